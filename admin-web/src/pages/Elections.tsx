@@ -29,7 +29,7 @@ import {
   Assessment as AssessmentIcon,
   Edit as EditIcon,
 } from '@mui/icons-material'
-import { electionApi } from '../services/api'
+import { electionApi, fetchAllPages } from '../services/api'
 import { format } from 'date-fns'
 import React from 'react'
 
@@ -73,8 +73,7 @@ export default function Elections() {
     try {
       setLoading(true)
       setError(null)
-      const response = await electionApi.get('/election/list')
-      setElections(response.data)
+      setElections(await fetchAllPages<Election>(electionApi, '/election/list', { limit: 500 }))
     } catch (error: any) {
       console.error('Failed to load elections:', error)
       setError(error.response?.data?.detail || 'Failed to load elections')
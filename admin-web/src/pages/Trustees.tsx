@@ -23,10 +23,7 @@ import {
   Tooltip,
   Card,
   CardContent,
-  Select,
-  MenuItem,
-  FormControl,
-  InputLabel,
+  Autocomplete,
 } from '@mui/material'
 import {
   ArrowBack,
@@ -36,7 +33,7 @@ import {
   VpnKey,
   Lock,
 } from '@mui/icons-material'
-import { electionApi, authApi } from '../services/api'
+import { electionApi, authApi, fetchAllPages } from '../services/api'
 import React from 'react'
 
 interface Trustee {
@@ -60,27 +57,53 @@ export default function Trustees() {
   const { electionId } = useParams<{ electionId: string }>()
   const navigate = useNavigate()
   const [trustees, setTrustees] = useState<Trustee[]>([])
-  const [users, setUsers] = useState<User[]>([])
+  const [userQuery, setUserQuery] = useState('')
+  const [userOptions, setUserOptions] = useState<User[]>([])
+  const [usersLoading, setUsersLoading] = useState(false)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [addDialogOpen, setAddDialogOpen] = useState(false)
-  const [selectedUserId, setSelectedUserId] = useState('')
+  const [selectedUser, setSelectedUser] = useState<User | null>(null)
   const [keyCeremonyLoading, setKeyCeremonyLoading] = useState(false)
   const [decryptionStatus, setDecryptionStatus] = useState<any>(null)
   const [tallyLoading, setTallyLoading] = useState(false)
 
   useEffect(() => {
     loadTrustees()
-    loadUsers()
     loadDecryptionStatus()
   }, [electionId])
 
+  // Trustee picker: search the voter registry server-side as the admin types (never the whole table)
+  useEffect(() => {
+    const query = userQuery.trim()
+    if (!addDialogOpen || query.length < 2) {
+      setUserOptions([])
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        setUsersLoading(true)
+        const filter = query.includes('@') ? { email_prefix: query } : { name_prefix: query }
+        const response = await authApi.get('/users/list', { params: { ...filter, limit: 20 } })
+        if (!cancelled) setUserOptions(response.data)
+      } catch (error: any) {
+        console.error('Failed to search users:', error)
+      } finally {
+        if (!cancelled) setUsersLoading(false)
+      }
+    }, 300)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [userQuery, addDialogOpen])
+
   const loadTrustees = async () => {
     try {
       setLoading(true)
       setError(null)
-      const response = await electionApi.get(`/trustee/election/${electionId}`)
-      setTrustees(response.data)
+      setTrustees(await fetchAllPages<Trustee>(electionApi, `/trustee/election/${electionId}`, { limit: 500 }))
     } catch (error: any) {
       console.error('Failed to load trustees:', error)
       if (error.response?.status !== 404) {
@@ -91,15 +114,6 @@ export default function Trustees() {
     }
   }
 
-  const loadUsers = async () => {
-    try {
-      const response = await authApi.get('/users/list')
-      setUsers(response.data.filter((u: any) => !u.is_admin))
-    } catch (error: any) {
-      console.error('Failed to load users:', error)
-    }
-  }
-
   const loadDecryptionStatus = async () => {
     try {
       const response = await electionApi.get(`/trustee/election/${electionId}/decryption-status`)
@@ -110,7 +124,7 @@ export default function Trustees() {
   }
 
   const handleAddTrustee = async () => {
-    if (!selectedUserId) {
+    if (!selectedUser) {
       alert('Please select a user')
       return
     }
@@ -118,10 +132,11 @@ export default function Trustees() {
     try {
       await electionApi.post('/trustee/add', {
         election_id: electionId,
-        user_id: selectedUserId,
+        user_id: selectedUser.user_id,
       })
       setAddDialogOpen(false)
-      setSelectedUserId('')
+      setSelectedUser(null)
+      setUserQuery('')
       alert('Trustee added successfully!')
       await loadTrustees()
     } catch (error: any) {
@@ -425,27 +440,26 @@ export default function Trustees() {
         <DialogTitle>Add Trustee</DialogTitle>
         <DialogContent>
           <Box mt={2}>
-            <FormControl fullWidth>
-              <InputLabel>Select User</InputLabel>
-              <Select
-                value={selectedUserId}
-                onChange={(e) => setSelectedUserId(e.target.value)}
-                label="Select User"
-              >
-                {users
-                  .filter(u => !trustees.some(t => t.user_id === u.user_id))
-                  .map((user) => (
-                    <MenuItem key={user.user_id} value={user.user_id}>
-                      {user.full_name} ({user.email})
-                    </MenuItem>
-                  ))}
-              </Select>
-            </FormControl>
+            <Autocomplete
+              options={userOptions.filter(u => !trustees.some(t => t.user_id === u.user_id))}
+              value={selectedUser}
+              onChange={(_, user) => setSelectedUser(user)}
+              inputValue={userQuery}
+              onInputChange={(_, value) => setUserQuery(value)}
+              getOptionLabel={(user) => `${user.full_name} (${user.email})`}
+              isOptionEqualToValue={(option, value) => option.user_id === value.user_id}
+              filterOptions={(options) => options}
+              loading={usersLoading}
+              noOptionsText={userQuery.trim().length < 2 ? 'Type at least 2 characters of a name or email' : 'No matching users'}
+              renderInput={(params) => (
+                <TextField {...params} label="Search user by name or email" fullWidth />
+              )}
+            />
           </Box>
         </DialogContent>
         <DialogActions>
           <Button onClick={() => setAddDialogOpen(false)}>Cancel</Button>
-          <Button variant="contained" onClick={handleAddTrustee} disabled={!selectedUserId}>
+          <Button variant="contained" onClick={handleAddTrustee} disabled={!selectedUser}>
             Add Trustee
           </Button>
         </DialogActions>
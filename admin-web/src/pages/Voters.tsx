@@ -16,7 +16,7 @@ import {
   Tooltip,
 } from '@mui/material'
 import { CheckCircle, Pending, Cancel } from '@mui/icons-material'
-import { authApi } from '../services/api'
+import { authApi, nextCursor } from '../services/api'
 import React from 'react'
 
 interface Voter {
@@ -33,6 +33,9 @@ export default function Voters() {
   const [voters, setVoters] = useState<Voter[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
+  const [cursor, setCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [bulkProgress, setBulkProgress] = useState<string | null>(null)
 
   useEffect(() => {
     loadVoters()
@@ -44,6 +47,7 @@ export default function Voters() {
       setError(null)
       const response = await authApi.get('/users/list')
       setVoters(response.data)
+      setCursor(nextCursor(response))
     } catch (error: any) {
       console.error('Failed to load voters:', error)
       setError(error.response?.data?.detail || 'Failed to load voters')
@@ -52,6 +56,21 @@ export default function Voters() {
     }
   }
 
+  const loadMoreVoters = async () => {
+    if (!cursor) return
+    try {
+      setLoadingMore(true)
+      const response = await authApi.get('/users/list', { params: { cursor } })
+      setVoters((current) => [...current, ...response.data])
+      setCursor(nextCursor(response))
+    } catch (error: any) {
+      console.error('Failed to load more voters:', error)
+      setError(error.response?.data?.detail || 'Failed to load voters')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleApproveKYC = async (userId: string) => {
     try {
       await authApi.post(`/users/kyc/approve/${userId}`)
@@ -75,6 +94,34 @@ export default function Voters() {
     }
   }
 
+  const handleApproveAllPending = async () => {
+    if (!confirm('Approve KYC for every pending voter?')) {
+      return
+    }
+    try {
+      setBulkProgress('Starting...')
+      const response = await authApi.post('/users/kyc/bulk', {
+        status: 'APPROVED',
+        filter: { kyc_status: 'PENDING' },
+      })
+      let job = response.data
+      while (job.status === 'PENDING' || job.status === 'RUNNING') {
+        setBulkProgress(`${job.processed} / ${job.total}`)
+        await new Promise((resolve) => setTimeout(resolve, 1000))
+        job = (await authApi.get(`/users/kyc/bulk/${job.job_id}`)).data
+      }
+      if (job.status === 'FAILED') {
+        setError(job.error || 'Bulk approval failed')
+      }
+      loadVoters()
+    } catch (error: any) {
+      console.error('Failed to approve pending voters:', error)
+      setError(error.response?.data?.detail || 'Failed to approve pending voters')
+    } finally {
+      setBulkProgress(null)
+    }
+  }
+
   const getKYCColor = (status: string) => {
     switch (status) {
       case 'APPROVED':
@@ -98,9 +145,19 @@ export default function Voters() {
 
   return (
     <Box>
-      <Typography variant="h4" gutterBottom>
-        Voters
-      </Typography>
+      <Box display="flex" justifyContent="space-between" alignItems="center" mb={2}>
+        <Typography variant="h4">
+          Voters
+        </Typography>
+        <Button
+          variant="contained"
+          color="success"
+          onClick={handleApproveAllPending}
+          disabled={bulkProgress !== null}
+        >
+          {bulkProgress !== null ? `Approving ${bulkProgress}` : 'Approve all pending'}
+        </Button>
+      </Box>
 
       {error && (
         <Alert severity="error" sx={{ mb: 3 }}>
@@ -192,6 +249,14 @@ export default function Voters() {
           </TableBody>
         </Table>
       </TableContainer>
+
+      {cursor && (
+        <Box display="flex" justifyContent="center" mt={2}>
+          <Button variant="outlined" onClick={loadMoreVoters} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
     </Box>
   )
 }
@@ -31,7 +31,7 @@ import {
   Pending,
   ContentCopy,
 } from '@mui/icons-material'
-import { electionApi, codeSheetApi } from '../services/api'
+import { electionApi, codeSheetApi, fetchAllPages } from '../services/api'
 import React from 'react'
 
 interface VotingCode {
@@ -64,8 +64,7 @@ export default function VotingCodes() {
     try {
       setLoading(true)
       setError(null)
-      const response = await codeSheetApi.get(`/code-sheet/election/${electionId}`)
-      setCodes(response.data)
+      setCodes(await fetchAllPages<VotingCode>(codeSheetApi, `/code-sheet/election/${electionId}`, { limit: 500 }))
     } catch (error: any) {
       console.error('Failed to load voting codes:', error)
       if (error.response?.status === 404) {
@@ -66,4 +66,19 @@ const responseInterceptor = (error: any) => {
   apiInstance.interceptors.response.use((response) => response, responseInterceptor)
 })
 
+// Cursor pagination: list endpoints return one page and put the next page's cursor in X-Next-Cursor
+export const nextCursor = (response: any): string | null => response.headers['x-next-cursor'] ?? null
+
+// Follow X-Next-Cursor until the last page (for per-election lists that are exported as a whole)
+export const fetchAllPages = async <T,>(apiInstance: any, url: string, params: Record<string, any> = {}): Promise<T[]> => {
+  const items: T[] = []
+  let cursor: string | null = null
+  do {
+    const response: any = await apiInstance.get(url, { params: { ...params, ...(cursor ? { cursor } : {}) } })
+    items.push(...response.data)
+    cursor = nextCursor(response)
+  } while (cursor)
+  return items
+}
+
 export default api
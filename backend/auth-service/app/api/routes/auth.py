@@ -4,13 +4,14 @@ Authentication endpoints (MVP)
 - login: username/password fallback
 - refresh: issue new access token
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Response
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy import text
 from datetime import datetime, timezone
 from shared.audit_helper import audit_login
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 from typing import Optional
@@ -18,13 +19,17 @@ from app.config import settings
 from shared.database import get_db
 from app.models.user import User
 from app.models.session import Session as SessionModel
-from app.utils.jwt_handler import create_access_token, create_refresh_token, verify_refresh_token, verify_access_token
+from app.utils.jwt_handler import create_access_token, create_refresh_token, verify_refresh_token
+from app.utils.signing_keys import key_store
+from app.utils.password_pool import PasswordPoolBusy, password_pool
+from app.services.session_store import token_digest
+from shared.auth import Principal, get_principal, revocations
 from shared.security import get_token_expiry
+from shared.tracing import span, STAGE_CRYPTO
+from shared.metrics import LOGINS
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class RegisterRequest(BaseModel):
     nic: str
@@ -47,12 +52,31 @@ class TokenResponse(BaseModel):
     expires_in: int = settings.access_token_expire_minutes * 60
 
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": str(PasswordPoolBusy.retry_after)}
+    )
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    # bcrypt runs in the hashing process pool; a full pool is shed with 503
+    with span("bcrypt.hash", stage=STAGE_CRYPTO):
+        try:
+            return password_pool.hash(password, settings.bcrypt_rounds)
+        except PasswordPoolBusy:
+            raise _busy()
 
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+def verify_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """(matches, new hash to store when the stored one was made with a different cost)"""
+    with span("bcrypt.verify", stage=STAGE_CRYPTO):
+        try:
+            return password_pool.verify(plain, hashed, settings.bcrypt_rounds)
+        except PasswordPoolBusy:
+            LOGINS.inc(result="shed")
+            raise _busy()
 
 
 @router.post("/register", response_model=TokenResponse)
@@ -77,16 +101,18 @@ def register(payload: RegisterRequest, request: Request, db: Session = Depends(g
     db.refresh(user)
 
     # Create tokens
-    access_token = create_access_token(str(user.user_id))
-    refresh_token = create_refresh_token(str(user.user_id))
+    session_id = uuid.uuid4()
+    access_token = create_access_token(str(user.user_id), str(session_id), user.is_admin, user.kyc_status)
+    refresh_token = create_refresh_token(str(user.user_id), str(session_id))
 
     session = SessionModel(
+        session_id=session_id,
         user_id=user.user_id,
-        access_token=access_token,
-        refresh_token=refresh_token,
+        refresh_token_hash=token_digest(refresh_token),
         device_info={"user_agent": request.headers.get("User-Agent")},
         ip_address=request.client.host,
-        expires_at=get_token_expiry("access")
+        expires_at=get_token_expiry("access"),
+        refresh_expires_at=get_token_expiry("refresh")
     )
     db.add(session)
     db.commit()
@@ -97,32 +123,43 @@ def register(payload: RegisterRequest, request: Request, db: Session = Depends(g
 @router.post("/login", response_model=TokenResponse)
 def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not user.password_hash or not verify_password(payload.password, user.password_hash):
+    if not user or not user.password_hash:
+        LOGINS.inc(result="invalid_credentials")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = verify_password(payload.password, user.password_hash)
+    if not valid:
+        LOGINS.inc(result="invalid_credentials")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    LOGINS.inc(result="success")
+
+    # BCRYPT_ROUNDS changed since this hash was made: store the rehash (saved with the commit below)
+    if new_hash:
+        user.password_hash = new_hash
 
     # Update last login time (with timezone awareness)
     user.last_login_at = datetime.now(timezone.utc)
-    print(f"[AUTH-SERVICE] Updating last_login_at for user {user.email}: {user.last_login_at}")
     
     # Generate tokens
-    access_token = create_access_token(str(user.user_id))
-    refresh_token = create_refresh_token(str(user.user_id))
+    session_id = uuid.uuid4()
+    access_token = create_access_token(str(user.user_id), str(session_id), user.is_admin, user.kyc_status)
+    refresh_token = create_refresh_token(str(user.user_id), str(session_id))
 
     # Create session
     session = SessionModel(
+        session_id=session_id,
         user_id=user.user_id,
-        access_token=access_token,
-        refresh_token=refresh_token,
+        refresh_token_hash=token_digest(refresh_token),
         device_info={"user_agent": request.headers.get("User-Agent")},
         ip_address=request.client.host,
-        expires_at=get_token_expiry("access")
+        expires_at=get_token_expiry("access"),
+        refresh_expires_at=get_token_expiry("refresh")
     )
     db.add(session)
     
     # Commit both user update and session creation
     db.commit()
     db.refresh(user)  # Refresh to ensure last_login_at is saved
-    print(f"[AUTH-SERVICE] Last login saved: {user.last_login_at}")
+    logger.debug("Login succeeded", extra={"user_id": str(user.user_id)})
     
     # Log to audit trail
     try:
@@ -148,17 +185,24 @@ def refresh(payload: RefreshRequest, request: Request, db: Session = Depends(get
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    # Optionally verify session exists
-    session = db.query(SessionModel).filter(SessionModel.refresh_token == payload.refresh_token).first()
-    if not session:
+    # The session is found by the digest of its current refresh token; a rotated-out token matches nothing
+    session = db.query(SessionModel).filter(
+        SessionModel.refresh_token_hash == token_digest(payload.refresh_token)
+    ).first()
+    if not session or session.revoked_at is not None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session not found")
 
-    access_token = create_access_token(user_id)
-    new_refresh_token = create_refresh_token(user_id)
+    # Re-read role and KYC status so the new access token's claims are current
+    user = db.query(User).filter(User.user_id == user_id).first()
+    if not user or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    access_token = create_access_token(user_id, str(session.session_id), user.is_admin, user.kyc_status)
+    new_refresh_token = create_refresh_token(user_id, str(session.session_id))
 
-    session.access_token = access_token
-    session.refresh_token = new_refresh_token
+    session.refresh_token_hash = token_digest(new_refresh_token)
     session.expires_at = get_token_expiry("access")
+    session.refresh_expires_at = get_token_expiry("refresh")
     db.commit()
 
     return TokenResponse(access_token=access_token, refresh_token=new_refresh_token)
@@ -173,16 +217,9 @@ class UserResponse(BaseModel):
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid authorization header")
-    
-    token = authorization.split(" ")[1]
-    user_id = verify_access_token(token)
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    
-    user = db.query(User).filter(User.user_id == user_id).first()
+def get_current_user(principal: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    # Profile data (name, email, current KYC status) is not in the token, so this one reads the row
+    user = db.query(User).filter(User.user_id == principal.user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
@@ -194,3 +231,26 @@ def get_current_user(authorization: Optional[str] = Header(None), db: Session =
         kyc_status=user.kyc_status
     )
 
+
+@router.post("/logout")
+def logout(principal: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    """Revoke the caller's session: its access token stops working and it cannot be refreshed"""
+    if principal.session_id:
+        db.execute(
+            text("""
+            UPDATE sessions SET revoked_at = CURRENT_TIMESTAMP
+            WHERE session_id = CAST(:sid AS uuid) AND revoked_at IS NULL
+            """),
+            {"sid": principal.session_id}
+        )
+        db.commit()
+        revocations.add(principal.session_id)
+    return {"message": "Logged out"}
+
+
+@router.get("/.well-known/jwks.json")
+def jwks(response: Response):
+    """Public keys for verifying access tokens (all keys not yet pruned, active first)"""
+    # Verifiers refetch early on an unknown kid, so a short max-age is not needed for rotation
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_store.jwks()
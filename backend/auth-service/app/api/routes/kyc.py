@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from shared.database import get_db
 from shared.audit_helper import audit_kyc_status_change
+from shared.auth import Principal, require_admin
 from app.models.user import User
 import logging
 
@@ -37,7 +38,7 @@ class KYCApproveRequest(BaseModel):
 
 
 @router.post("/approve")
-def kyc_approve(payload: KYCApproveRequest, db: Session = Depends(get_db)):
+def kyc_approve(payload: KYCApproveRequest, db: Session = Depends(get_db), admin: Principal = Depends(require_admin)):
     user = db.query(User).filter(User.user_id == payload.user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -49,14 +50,10 @@ def kyc_approve(payload: KYCApproveRequest, db: Session = Depends(get_db)):
     
     # Log to audit trail
     try:
-        # Get admin user (should be passed from auth context in production)
-        admin_user = db.query(User).filter(User.is_admin == True).first()
-        admin_id = str(admin_user.user_id) if admin_user else None
-        
         audit_kyc_status_change(
             db=db,
             user_id=payload.user_id,
-            admin_id=admin_id,
+            admin_id=admin.user_id,
             new_status=new_status,
             reason=f"Changed from {old_status} to {new_status}"
         )
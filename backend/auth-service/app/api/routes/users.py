@@ -1,15 +1,18 @@
 """
 User management endpoints for admin
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Header, Query, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime, timezone
+import uuid
 from shared.database import get_db
+from shared.pagination import clamp_limit, decode_cursor, paginate, prefix_pattern
 from app.models.user import User
-from app.utils.jwt_handler import verify_access_token
+from shared.auth import Principal, require_admin
+from app.services.kyc_bulk import create_job, get_job, claim_job, run_job
 
 router = APIRouter()
 
@@ -24,38 +27,62 @@ class VoterResponse(BaseModel):
     last_login_at: Optional[str]
 
 
-def get_current_admin(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    """Verify admin access"""
-    if not authorization or not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing authorization header")
-    
-    token = authorization.split(" ")[1]
-    user_id = verify_access_token(token)
-    if not user_id:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user or not user.is_admin:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    
-    return user
+# Admin routes authorize from the token's role claim (shared/auth.py): no user lookup per request
+get_current_admin = require_admin
 
 
 @router.get("/list", response_model=List[VoterResponse])
 def list_voters(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default PAGE_DEFAULT_LIMIT, capped at PAGE_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    kyc_status: Optional[Literal["PENDING", "APPROVED", "REJECTED"]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
+    email_prefix: Optional[str] = Query(None, min_length=1, max_length=255),
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
-    """List all voters (non-admin users)"""
+    """List voters (non-admin users), newest first, one page at a time"""
+    limit = clamp_limit(limit)
+    conditions = ["is_admin = false"]
+    params = {"limit": limit + 1}
+    
+    if kyc_status:
+        conditions.append("kyc_status = :kyc_status")
+        params["kyc_status"] = kyc_status
+    if created_after:
+        conditions.append("created_at >= :created_after")
+        params["created_after"] = created_after
+    if created_before:
+        conditions.append("created_at < :created_before")
+        params["created_before"] = created_before
+    if name_prefix:
+        conditions.append("lower(full_name) LIKE :name_pattern")
+        params["name_pattern"] = prefix_pattern(name_prefix)
+    if email_prefix:
+        conditions.append("lower(email) LIKE :email_pattern")
+        params["email_pattern"] = prefix_pattern(email_prefix)
+    
+    after = decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID))
+    if after:
+        conditions.append("(created_at, user_id) < (:after_created, :after_id)")
+        params["after_created"], params["after_id"] = after
+    
     rows = db.execute(
-        text("""
+        text(f"""
         SELECT user_id, full_name, email, nic, kyc_status, created_at, last_login_at
         FROM users
-        WHERE is_admin = false
-        ORDER BY created_at DESC
-        """)
+        WHERE {" AND ".join(conditions)}
+        ORDER BY created_at DESC, user_id DESC
+        LIMIT :limit
+        """),
+        params
     ).fetchall()
+    rows = paginate(request, response, rows, limit, lambda row: (row[5], row[0]))
     
     return [
         VoterResponse(
@@ -76,7 +103,7 @@ def approve_kyc(
     user_id: str,
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Approve user KYC"""
     user = db.query(User).filter(User.user_id == user_id).first()
@@ -85,7 +112,7 @@ def approve_kyc(
     
     user.kyc_status = "APPROVED"
     user.kyc_verified_at = datetime.now(timezone.utc)
-    user.kyc_verified_by = admin.user_id
+    user.kyc_verified_by = uuid.UUID(admin.user_id)
     db.commit()
     
     return {"message": "KYC approved successfully"}
@@ -96,7 +123,7 @@ def reject_kyc(
     user_id: str,
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Reject user KYC"""
     user = db.query(User).filter(User.user_id == user_id).first()
@@ -105,7 +132,104 @@ def reject_kyc(
     
     user.kyc_status = "REJECTED"
     user.kyc_verified_at = datetime.now(timezone.utc)
-    user.kyc_verified_by = admin.user_id
+    user.kyc_verified_by = uuid.UUID(admin.user_id)
     db.commit()
     
     return {"message": "KYC rejected"}
+
+
+class KYCBulkFilter(BaseModel):
+    kyc_status: Optional[Literal["PENDING", "APPROVED", "REJECTED"]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    name_prefix: Optional[str] = None
+
+
+class KYCBulkRequest(BaseModel):
+    status: Literal["APPROVED", "REJECTED"]
+    user_ids: Optional[List[str]] = None  # Explicit voters (combined with filter if both are given)
+    filter: Optional[KYCBulkFilter] = None
+
+
+class KYCBulkJobResponse(BaseModel):
+    job_id: str
+    target_status: str
+    status: str
+    total: int
+    processed: int
+    updated: int
+    progress: float
+    error: Optional[str]
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+
+
+@router.post("/kyc/bulk", response_model=KYCBulkJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def bulk_kyc(
+    payload: KYCBulkRequest,
+    background_tasks: BackgroundTasks,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    """
+    Approve or reject many voters' KYC in one job
+    
+    Select voters with user_ids and/or a filter, e.g. every pending voter:
+    {"status": "APPROVED", "filter": {"kyc_status": "PENDING"}}
+    
+    The job runs in the background in set-based batches; poll
+    GET /kyc/bulk/{job_id} for progress.
+    """
+    filters = payload.filter.model_dump(mode="json", exclude_none=True) if payload.filter else {}
+    if not payload.user_ids and not filters:
+        raise HTTPException(status_code=400, detail="Provide user_ids or a filter")
+    
+    user_ids = None
+    if payload.user_ids:
+        try:
+            user_ids = sorted({str(uuid.UUID(user_id)) for user_id in payload.user_ids})
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid user ID")
+    
+    job = create_job(db, payload.status, admin.user_id, user_ids, filters)
+    if claim_job(db, job["job_id"]):
+        background_tasks.add_task(run_job, job["job_id"])
+    return get_job(db, job["job_id"])
+
+
+@router.get("/kyc/bulk/{job_id}", response_model=KYCBulkJobResponse)
+def get_bulk_kyc_job(
+    job_id: str,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    """Progress of a bulk KYC job"""
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/kyc/bulk/{job_id}/resume", response_model=KYCBulkJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def resume_bulk_kyc_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    """Resume a failed or stalled bulk KYC job from its last committed batch"""
+    job = get_bulk_kyc_job(job_id, authorization, db, admin)
+    if job["status"] == "COMPLETED":
+        raise HTTPException(status_code=409, detail="Job already completed")
+    if not claim_job(db, job_id):
+        raise HTTPException(status_code=409, detail="Job is still running")
+    background_tasks.add_task(run_job, job_id)
+    return get_job(db, job_id)
@@ -11,6 +11,8 @@ from dotenv import load_dotenv
 env_path = Path(__file__).parent.parent.parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
 
+from shared.security import JWT_ALGORITHM, JWT_SECRET_KEY
+
 
 class Settings(BaseSettings):
     # Application
@@ -22,8 +24,10 @@ class Settings(BaseSettings):
     database_url: str = os.getenv("DATABASE_URL")
     
     # JWT
-    jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "XXDN41u505T0mk2uiPeqw4Lm6wa3ByNZ3V9B9iRF8Jq1RsePaLk7sDH8VogoJgTH2cy7ZcF")
-    jwt_algorithm: str = "HS256"
+    # Signing keys live in JWT_KEY_DIR (app/utils/signing_keys.py); the secret
+    # is only used to accept legacy HS256 refresh tokens
+    jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", JWT_SECRET_KEY)
+    jwt_algorithm: str = JWT_ALGORITHM
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 7
     
@@ -36,7 +40,7 @@ class Settings(BaseSettings):
     # allowed_origins: List[str] - Removed to avoid parsing issues
     
     # Security
-    bcrypt_rounds: int = 12
+    bcrypt_rounds: int = 12  # BCRYPT_ROUNDS; on login, hashes made at another cost are redone at this one
     rate_limit_per_minute: int = 60
     
     # Service
@@ -13,14 +13,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
 from app.api.routes import auth, kyc, webauthn, users
+from app.services.session_store import session_sweeper
+from shared.metrics import setup_metrics
+from shared.rate_limit import KEY_USER, RateLimit, setup_rate_limiting
+from shared.structured_logging import setup_logging
+from shared.tracing import setup_tracing
 import time
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -32,6 +32,17 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Rate limits and admission control. Added before CORS so it runs inside it:
+# 429/503 responses keep their CORS headers and show up in logs and metrics.
+setup_rate_limiting(app, "auth-service", [
+    # Credential endpoints, per client IP (RATE_LIMIT_PER_MINUTE, default 60/min)
+    RateLimit("login", r"/api/auth/login", per_minute=settings.rate_limit_per_minute, burst=20),
+    RateLimit("register", r"/api/auth/register", per_minute=settings.rate_limit_per_minute, burst=20),
+    RateLimit("refresh", r"/api/auth/refresh", per_minute=settings.rate_limit_per_minute, burst=20),
+    # Each bulk job walks the whole voter table
+    RateLimit("kyc_bulk", r"/api/users/kyc/bulk", per_minute=10, burst=5, key=KEY_USER),
+])
+
 # CORS middleware - Allow all origins in development for mobile app
 if settings.debug:
     # Development: Allow all origins (mobile app can connect from any IP)
@@ -41,6 +52,7 @@ if settings.debug:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link"],  # Pagination cursors
     )
 else:
     # Production: Restrict to specific origins
@@ -50,6 +62,7 @@ else:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link"],  # Pagination cursors
     )
 
 # Security headers middleware
@@ -71,12 +84,24 @@ async def add_process_time_header(request: Request, call_next):
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
+# Structured JSON logging with per-route sampling (LOG_* env vars)
+setup_logging(app, "auth-service")
+
+# Prometheus metrics (GET /metrics)
+setup_metrics(app, "auth-service")
+
+# Request tracing (outermost middleware: times the whole request)
+setup_tracing(app, "auth-service")
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(kyc.router, prefix="/api/kyc", tags=["KYC Verification"])
 app.include_router(webauthn.router, prefix="/api/webauthn", tags=["WebAuthn"])
 app.include_router(users.router, prefix="/api/users", tags=["User Management"])
 
+# Delete expired and revoked sessions in the background (SESSION_SWEEP_* env vars)
+session_sweeper.start()
+
 # Health check
 @app.get("/health")
 async def health_check():
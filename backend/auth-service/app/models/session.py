@@ -1,7 +1,7 @@
 """
 Session database model
 """
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, DateTime, ForeignKey, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -14,11 +14,12 @@ class Session(Base):
     
     session_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False, index=True)
-    access_token = Column(Text, nullable=False, index=True)
-    refresh_token = Column(Text, nullable=False)
+    # SHA-256 of the current refresh token (see app.services.session_store.token_digest)
+    refresh_token_hash = Column(LargeBinary(32), nullable=False, unique=True)
     device_info = Column(JSONB)
     ip_address = Column(INET)
-    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    refresh_expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     revoked_at = Column(DateTime(timezone=True))
     
@@ -0,0 +1,235 @@
+"""
+Bulk KYC status changes
+A job selects voters by explicit IDs and/or a filter (current KYC status,
+registration window, name prefix) and walks them in primary-key order, one
+set-based batch per transaction. Each batch is a single statement that
+updates the users, writes their KYC_STATUS_CHANGED audit rows with one
+INSERT ... SELECT, and records progress on the job row, so a job that is
+interrupted can be resumed from the last committed batch.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from shared.database import SessionLocal
+from shared.pagination import prefix_pattern
+
+logger = logging.getLogger(__name__)
+
+KYC_BULK_BATCH_SIZE = int(os.getenv("KYC_BULK_BATCH_SIZE", "1000"))
+
+# A RUNNING job whose progress has not moved for this long is assumed dead and may be resumed
+STALE_AFTER_SECONDS = int(os.getenv("KYC_BULK_STALE_SECONDS", "300"))
+
+
+def _selection(user_ids: Optional[List[str]], filters: Dict[str, Any]):
+    """WHERE clause and parameters for the users a job targets"""
+    conditions = ["is_admin = false"]
+    params: Dict[str, Any] = {}
+    if user_ids:
+        conditions.append("user_id = ANY(CAST(:user_ids AS uuid[]))")
+        params["user_ids"] = user_ids
+    if filters.get("kyc_status"):
+        conditions.append("kyc_status = :filter_kyc_status")
+        params["filter_kyc_status"] = filters["kyc_status"]
+    if filters.get("created_after"):
+        conditions.append("created_at >= CAST(:created_after AS timestamp)")
+        params["created_after"] = filters["created_after"]
+    if filters.get("created_before"):
+        conditions.append("created_at < CAST(:created_before AS timestamp)")
+        params["created_before"] = filters["created_before"]
+    if filters.get("name_prefix"):
+        conditions.append("lower(full_name) LIKE :name_pattern")
+        params["name_pattern"] = prefix_pattern(filters["name_prefix"])
+    return " AND ".join(conditions), params
+
+
+def create_job(db, target_status: str, requested_by: str,
+               user_ids: Optional[List[str]], filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a job and count the users it targets (the progress denominator)"""
+    where, params = _selection(user_ids, filters)
+    total = db.execute(text(f"SELECT COUNT(*) FROM users WHERE {where}"), params).scalar()
+    row = db.execute(
+        text("""
+        INSERT INTO kyc_bulk_jobs (target_status, requested_by, user_ids, filters, total)
+        VALUES (:target_status, CAST(:requested_by AS uuid), CAST(:user_ids AS uuid[]),
+                CAST(:filters AS jsonb), :total)
+        RETURNING job_id
+        """),
+        {
+            "target_status": target_status,
+            "requested_by": requested_by,
+            "user_ids": user_ids,
+            "filters": json.dumps(filters),
+            "total": total,
+        }
+    ).fetchone()
+    db.commit()
+    return get_job(db, str(row[0]))
+
+
+def get_job(db, job_id: str) -> Optional[Dict[str, Any]]:
+    row = db.execute(
+        text("""
+        SELECT job_id, target_status, status, total, processed, updated, error,
+               created_at, started_at, finished_at
+        FROM kyc_bulk_jobs
+        WHERE job_id = CAST(:job_id AS uuid)
+        """),
+        {"job_id": job_id}
+    ).fetchone()
+    if not row:
+        return None
+    return {
+        "job_id": str(row[0]),
+        "target_status": row[1],
+        "status": row[2],
+        "total": row[3],
+        "processed": row[4],
+        "updated": row[5],
+        # total is counted when the job is created; the selection can shrink while it runs
+        "progress": 1.0 if row[2] == "COMPLETED" or not row[3] else min(1.0, round(row[4] / row[3], 4)),
+        "error": row[6],
+        "created_at": str(row[7]),
+        "started_at": str(row[8]) if row[8] else None,
+        "finished_at": str(row[9]) if row[9] else None,
+    }
+
+
+def claim_job(db, job_id: str) -> bool:
+    """Mark a job RUNNING unless another runner owns it (stale runs can be taken over)"""
+    claimed = db.execute(
+        text("""
+        UPDATE kyc_bulk_jobs
+        SET status = 'RUNNING', error = NULL,
+            started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+            heartbeat_at = CURRENT_TIMESTAMP
+        WHERE job_id = CAST(:job_id AS uuid)
+          AND (status IN ('PENDING', 'FAILED')
+               OR (status = 'RUNNING'
+                   AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => :stale)))
+        RETURNING job_id
+        """),
+        {"job_id": job_id, "stale": STALE_AFTER_SECONDS}
+    ).fetchone()
+    db.commit()
+    return claimed is not None
+
+
+def _run_batch(db, job_id: str, target_status: str, requested_by: str,
+               where: str, params: Dict[str, Any], after: Optional[str]):
+    """Update, audit and checkpoint one batch; returns (last_user_id, selected, updated)"""
+    if after:
+        where += " AND user_id > CAST(:after AS uuid)"
+    return db.execute(
+        text(f"""
+        WITH batch AS (
+            SELECT user_id, kyc_status
+            FROM users
+            WHERE {where}
+            ORDER BY user_id
+            LIMIT :batch_size
+            FOR UPDATE
+        ), changed AS (
+            UPDATE users u
+            SET kyc_status = :target_status,
+                kyc_verified_at = CURRENT_TIMESTAMP,
+                kyc_verified_by = CAST(:requested_by AS uuid)
+            FROM batch b
+            WHERE u.user_id = b.user_id AND b.kyc_status IS DISTINCT FROM :target_status
+            RETURNING u.user_id
+        ), audited AS (
+            INSERT INTO audit_logs (event_type, event_description, user_id, resource_type,
+                                    resource_id, metadata, severity, created_at)
+            SELECT 'KYC_STATUS_CHANGED', 'KYC status changed to ' || :target_status,
+                   CAST(:requested_by AS uuid), 'USER', b.user_id,
+                   jsonb_build_object(
+                       'new_status', CAST(:target_status AS text),
+                       'reason', 'Changed from ' || COALESCE(b.kyc_status, 'NONE') || ' to ' || :target_status,
+                       'bulk_job_id', CAST(:job_id AS text)
+                   ),
+                   'INFO', CURRENT_TIMESTAMP
+            FROM changed c JOIN batch b ON b.user_id = c.user_id
+            RETURNING 1
+        ), progress AS (
+            UPDATE kyc_bulk_jobs
+            SET processed = processed + (SELECT COUNT(*) FROM batch),
+                updated = updated + (SELECT COUNT(*) FROM changed),
+                last_user_id = COALESCE((SELECT user_id FROM batch ORDER BY user_id DESC LIMIT 1), last_user_id),
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE job_id = CAST(:job_id AS uuid)
+            RETURNING last_user_id
+        )
+        SELECT (SELECT last_user_id FROM progress),
+               (SELECT COUNT(*) FROM batch),
+               (SELECT COUNT(*) FROM audited)
+        """),
+        {
+            **params,
+            "after": after,
+            "batch_size": KYC_BULK_BATCH_SIZE,
+            "target_status": target_status,
+            "requested_by": requested_by,
+            "job_id": job_id,
+        }
+    ).fetchone()
+
+
+def run_job(job_id: str):
+    """Run (or resume) a claimed job to completion; intended for a background task"""
+    db = SessionLocal()
+    try:
+        job = db.execute(
+            text("""
+            SELECT target_status, CAST(requested_by AS text), CAST(user_ids AS text[]), filters, CAST(last_user_id AS text)
+            FROM kyc_bulk_jobs WHERE job_id = CAST(:job_id AS uuid)
+            """),
+            {"job_id": job_id}
+        ).fetchone()
+        target_status, requested_by, user_ids, filters, after = job
+        where, params = _selection(user_ids, filters or {})
+
+        started = datetime.utcnow()
+        while True:
+            last_user_id, selected, updated = _run_batch(
+                db, job_id, target_status, requested_by, where, params, after
+            )
+            db.commit()
+            if selected < KYC_BULK_BATCH_SIZE:
+                break
+            after = str(last_user_id)
+
+        db.execute(
+            text("""
+            UPDATE kyc_bulk_jobs SET status = 'COMPLETED', finished_at = CURRENT_TIMESTAMP
+            WHERE job_id = CAST(:job_id AS uuid)
+            """),
+            {"job_id": job_id}
+        )
+        db.commit()
+        logger.info(
+            "Bulk KYC job completed",
+            extra={"job_id": job_id, "target_status": target_status,
+                   "duration_s": round((datetime.utcnow() - started).total_seconds(), 3)}
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Bulk KYC job {job_id} failed: {e}")
+        try:
+            db.execute(
+                text("""
+                UPDATE kyc_bulk_jobs SET status = 'FAILED', error = :error
+                WHERE job_id = CAST(:job_id AS uuid)
+                """),
+                {"job_id": job_id, "error": str(getattr(e, "orig", e))[:1000]}
+            )
+            db.commit()
+        except Exception:
+            # Left RUNNING; it becomes resumable once its heartbeat goes stale
+            db.rollback()
+    finally:
+        db.close()
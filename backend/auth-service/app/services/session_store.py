@@ -0,0 +1,90 @@
+"""
+Session bookkeeping
+Sessions are found at refresh time by a 32-byte SHA-256 digest of the
+refresh token, so the table and its unique index hold fixed-size keys
+instead of full JWTs.
+
+A background sweeper deletes sessions that can no longer be used, in
+batches of SESSION_SWEEP_BATCH rows every SESSION_SWEEP_INTERVAL seconds:
+- refresh token expired (refresh_expires_at in the past)
+- revoked, once the last access token issued for it has expired too
+  (until then the row is what puts it in shared.auth's revocation set)
+Logins and logouts remain in audit_logs; only the live-session state goes.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from shared.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "300"))
+SESSION_SWEEP_BATCH = int(os.getenv("SESSION_SWEEP_BATCH", "5000"))
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def sweep_expired_sessions(db) -> int:
+    """Delete unusable sessions batch by batch (one short transaction each); returns the number removed"""
+    removed = 0
+    while True:
+        # SKIP LOCKED: several auth processes can sweep at once without waiting on each other
+        deleted = db.execute(
+            text("""
+            DELETE FROM sessions
+            WHERE session_id IN (
+                SELECT session_id FROM sessions
+                WHERE refresh_expires_at < CURRENT_TIMESTAMP
+                   OR (revoked_at IS NOT NULL AND expires_at < CURRENT_TIMESTAMP)
+                LIMIT :batch_size
+                FOR UPDATE SKIP LOCKED
+            )
+            """),
+            {"batch_size": SESSION_SWEEP_BATCH}
+        ).rowcount
+        db.commit()
+        removed += deleted
+        if deleted < SESSION_SWEEP_BATCH:
+            return removed
+
+
+class SessionSweeper:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._started = False
+        self._lock = threading.Lock()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                removed = sweep_expired_sessions(db)
+                if removed:
+                    logger.info(
+                        "Swept expired sessions",
+                        extra={"removed": removed, "duration_s": round(time.perf_counter() - started, 3)}
+                    )
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Session sweep failed: {e}")
+            finally:
+                db.close()
+
+    def start(self):
+        with self._lock:
+            if self._started or self.interval <= 0:
+                return
+            self._started = True
+        threading.Thread(target=self._loop, name="session-sweeper", daemon=True).start()
+
+
+session_sweeper = SessionSweeper(SESSION_SWEEP_INTERVAL)
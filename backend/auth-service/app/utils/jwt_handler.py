@@ -1,39 +1,61 @@
 """
 JWT utility functions
+Tokens are signed with the active Ed25519 key from the key store
+(app/utils/signing_keys.py). Access tokens are verified by shared.auth
+(no database lookup), so they carry the caller's role and KYC status as claims.
 """
+import uuid
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from app.config import settings
+from app.utils.signing_keys import key_store
+from shared import eddsa_jwt
+from shared.auth import ROLE_ADMIN, ROLE_VOTER, set_jwks_source
 
+# This service verifies its own tokens straight from the key store, not over HTTP
+set_jwks_source(key_store.jwks)
 
-def create_access_token(user_id: str) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
-    payload = {"sub": user_id, "type": "access", "exp": expire}
-    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
+def _sign(payload: dict) -> str:
+    kid, private_key = key_store.signing_key()
+    return eddsa_jwt.encode(payload, private_key, kid)
 
-def create_refresh_token(user_id: str) -> str:
+
+def create_access_token(user_id: str, session_id: str, is_admin: bool, kyc_status: str) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": user_id,
+        "sid": session_id,
+        "role": ROLE_ADMIN if is_admin else ROLE_VOTER,
+        "kyc": kyc_status,
+        "type": "access",
+        "iat": now,
+        "exp": now + timedelta(minutes=settings.access_token_expire_minutes),
+    }
+    return _sign(payload)
+
+
+def create_refresh_token(user_id: str, session_id: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
-    payload = {"sub": user_id, "type": "refresh", "exp": expire}
-    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    # jti: every refresh yields a distinct token (and digest), even within the same second
+    payload = {"sub": user_id, "sid": session_id, "type": "refresh", "jti": uuid.uuid4().hex, "exp": expire}
+    return _sign(payload)
 
 
-def verify_refresh_token(token: str) -> str | None:
+def _decode_legacy_hs256(token: str) -> dict | None:
+    # Refresh tokens issued before the switch to EdDSA; drop once they have all expired
     try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        if payload.get("type") != "refresh":
-            return None
-        return payload.get("sub")
+        return jwt.decode(token, settings.jwt_secret_key, algorithms=["HS256"])
     except JWTError:
         return None
 
 
-def verify_access_token(token: str) -> str | None:
-    try:
-        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        if payload.get("type") != "access":
-            return None
-        return payload.get("sub")
-    except JWTError:
+def verify_refresh_token(token: str) -> str | None:
+    header = eddsa_jwt.unverified_header(token) or {}
+    if header.get("alg") == "HS256":
+        payload = _decode_legacy_hs256(token)
+    else:
+        payload = eddsa_jwt.decode(token, key_store.public_key)
+    if not payload or payload.get("type") != "refresh":
         return None
-
+    return payload.get("sub")
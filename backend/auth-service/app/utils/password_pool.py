@@ -0,0 +1,144 @@
+"""
+Password hashing off the request threads
+bcrypt at cost 12 is ~250 ms of CPU. Running it inline lets a login or
+registration rush occupy every threadpool thread (and the GIL), so unrelated
+requests and health checks stall behind it. Hashes are computed in a small
+process pool instead, and admission is bounded: at most BCRYPT_MAX_PENDING
+hash jobs may be queued or running; beyond that callers get PasswordPoolBusy
+straight away (the routes turn it into a 503 with Retry-After) rather than
+queueing work that would finish after the client has given up.
+
+Workers run at a lower CPU priority (BCRYPT_WORKER_NICE) so request handling
+in the service process wins when the host is saturated. They are spawned,
+not forked: a forked worker would inherit the server's listening socket and
+keep the port bound after the service exits.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+import bcrypt
+
+from shared.metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_SHED
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 8)))
+BCRYPT_TIMEOUT_SECONDS = float(os.getenv("BCRYPT_TIMEOUT_SECONDS", "10"))
+BCRYPT_WORKER_NICE = int(os.getenv("BCRYPT_WORKER_NICE", "5"))
+
+# bcrypt only looks at the first 72 bytes; passlib truncated silently, so keep doing that
+_BCRYPT_MAX_BYTES = 72
+
+
+class PasswordPoolBusy(Exception):
+    """Too many hash jobs in flight; retry later"""
+
+    retry_after = 1
+
+
+def _exit_with_parent(parent_pid: int):
+    # Idle workers would otherwise outlive a service that was killed without cleanup
+    while True:
+        time.sleep(1)
+        if os.getppid() != parent_pid:
+            os._exit(0)
+
+
+def _init_worker(parent_pid: int):
+    try:
+        os.nice(BCRYPT_WORKER_NICE)
+    except OSError:
+        pass
+    threading.Thread(target=_exit_with_parent, args=(parent_pid,), daemon=True).start()
+
+
+def _encode(password: str) -> bytes:
+    return password.encode("utf-8")[:_BCRYPT_MAX_BYTES]
+
+
+def _cost(hashed: str) -> Optional[int]:
+    # $2b$12$<salt+hash>
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode()
+
+
+def _verify(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash if the stored one uses a different cost)"""
+    try:
+        ok = bcrypt.checkpw(_encode(password), hashed.encode())
+    except ValueError:
+        # Not a bcrypt hash
+        return False, None
+    if ok and _cost(hashed) != rounds:
+        return True, _hash(password, rounds)
+    return ok, None
+
+
+class PasswordPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(os.getpid(),)
+                    )
+        return self._executor
+
+    def _run(self, operation: str, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                PASSWORD_HASH_SHED.inc(operation=operation)
+                raise PasswordPoolBusy()
+            self._pending += 1
+            PASSWORD_HASH_PENDING.set(self._pending)
+        try:
+            future = self._get_executor().submit(fn, *args)
+            return future.result(timeout=BCRYPT_TIMEOUT_SECONDS)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next caller
+            logger.error("Password hashing pool broken; restarting it")
+            with self._lock:
+                self._executor = None
+            raise PasswordPoolBusy()
+        except FutureTimeout:
+            future.cancel()
+            PASSWORD_HASH_SHED.inc(operation=operation)
+            logger.warning(f"Password {operation} timed out after {BCRYPT_TIMEOUT_SECONDS}s")
+            raise PasswordPoolBusy()
+        finally:
+            with self._lock:
+                self._pending -= 1
+                PASSWORD_HASH_PENDING.set(self._pending)
+
+    def hash(self, password: str, rounds: int) -> str:
+        return self._run("hash", _hash, password, rounds)
+
+    def verify(self, password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+        """Check a password; also returns a rehash at `rounds` when the stored cost differs"""
+        return self._run("verify", _verify, password, hashed, rounds)
+
+
+password_pool = PasswordPool(BCRYPT_WORKERS, BCRYPT_MAX_PENDING)
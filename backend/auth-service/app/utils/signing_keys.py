@@ -0,0 +1,46 @@
+"""
+Ed25519 signing keys for JWTs
+Keys are PKCS#8 PEM files in JWT_KEY_DIR, one per key, named <kid>.pem
+(shared/signing_keys.py). The newest key signs; every key in the directory
+is published in the JWKS so tokens signed before a rotation keep verifying
+until the key is pruned. Every auth-service process rereads the directory
+every JWT_KEY_RELOAD_SECONDS, so a rotation reaches all of them without a restart.
+
+    cd backend/auth-service
+    PYTHONPATH=.. python -m app.utils.signing_keys rotate   # add a new active key
+    PYTHONPATH=.. python -m app.utils.signing_keys list
+    PYTHONPATH=.. python -m app.utils.signing_keys prune    # drop keys retired longer than the grace period
+
+Prune only after the grace period (default: refresh token lifetime + 1 day),
+otherwise refresh tokens signed with the old key stop working.
+"""
+import os
+from pathlib import Path
+
+from shared.signing_keys import SigningKeyStore
+
+JWT_KEY_DIR = Path(os.getenv("JWT_KEY_DIR", str(Path(__file__).resolve().parents[3] / ".keys" / "jwt")))
+JWT_KEY_RELOAD_SECONDS = float(os.getenv("JWT_KEY_RELOAD_SECONDS", "30"))
+JWT_KEY_GRACE_SECONDS = float(os.getenv(
+    "JWT_KEY_GRACE_SECONDS",
+    str((int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7")) + 1) * 86400)
+))
+
+
+key_store = SigningKeyStore(JWT_KEY_DIR, "JWT", JWT_KEY_RELOAD_SECONDS)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage JWT signing keys")
+    parser.add_argument("command", choices=["rotate", "list", "prune"])
+    args = parser.parse_args()
+
+    if args.command == "rotate":
+        print(f"Active key: {key_store.rotate()}")
+    elif args.command == "prune":
+        removed = key_store.prune(JWT_KEY_GRACE_SECONDS)
+        print(f"Removed {len(removed)} key(s): {', '.join(removed) or '-'}")
+    for info in key_store.describe():
+        print(f"{info['kid']}  created {info['created_at']}{'  (active)' if info['active'] else ''}")
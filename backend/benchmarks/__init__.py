@@ -0,0 +1,7 @@
+"""
+Micro-benchmarks for the shared cryptographic primitives
+
+Run from the backend directory:
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare baseline.json results.json
+"""
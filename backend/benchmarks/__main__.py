@@ -0,0 +1,105 @@
+"""
+Benchmark CLI runner
+
+Usage (from the backend directory):
+    python -m benchmarks                          # run everything, print a table
+    python -m benchmarks -g ecies -g chain        # run selected groups
+    python -m benchmarks -o results.json          # write JSON results
+    python -m benchmarks --compare base.json new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add backend directory to Python path for shared module
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.harness import environment_info, compare_results  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+def print_results(results):
+    print(f"{'Benchmark':<42} {'ops/sec':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    print("-" * 88)
+    for r in results:
+        print(f"{r['name']:<42} {r['ops_per_sec']:>12.1f} {r['p50_us']:>10.1f} "
+              f"{r['p95_us']:>10.1f} {r['p99_us']:>10.1f}")
+
+
+def print_comparison(rows):
+    print(f"{'Benchmark':<42} {'base ops/s':>12} {'new ops/s':>12} {'change':>9}")
+    print("-" * 80)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<42} {row['baseline_ops_per_sec']:>12.1f} "
+              f"{row['current_ops_per_sec']:>12.1f} {row['change_pct']:>8.1f}%{flag}")
+
+
+def run(args) -> int:
+    from benchmarks.crypto_benchmarks import BENCHMARKS, DEFAULT_ITERATIONS
+
+    groups = args.group or list(BENCHMARKS.keys())
+    unknown = [g for g in groups if g not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmark group(s): {', '.join(unknown)}. "
+              f"Available: {', '.join(BENCHMARKS.keys())}", file=sys.stderr)
+        return 2
+
+    results = []
+    for group in groups:
+        iterations = args.iterations or DEFAULT_ITERATIONS[group]
+        print(f"Running {group} ({iterations} iterations)...", file=sys.stderr)
+        results.extend(BENCHMARKS[group](iterations))
+
+    print_results(results)
+
+    if args.output:
+        document = {
+            "version": RESULTS_VERSION,
+            "label": args.label,
+            "environment": environment_info(),
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(document, indent=2))
+        print(f"\nResults written to {args.output}", file=sys.stderr)
+
+    return 0
+
+
+def compare(args) -> int:
+    baseline_path, current_path = args.compare
+    baseline = json.loads(Path(baseline_path).read_text())
+    current = json.loads(Path(current_path).read_text())
+    rows = compare_results(baseline, current, args.threshold)
+    print_comparison(rows)
+    regressions = [r for r in rows if r["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold}%", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Crypto primitive micro-benchmarks")
+    parser.add_argument("-g", "--group", action="append",
+                        help="Benchmark group to run (repeatable, default: all)")
+    parser.add_argument("-n", "--iterations", type=int,
+                        help="Timed iterations per benchmark (default: per-group)")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file")
+    parser.add_argument("--label", default="", help="Free-form label stored in the results (e.g. commit hash)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Allowed ops/sec drop in percent before flagging a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(args)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
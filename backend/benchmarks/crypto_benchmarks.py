@@ -0,0 +1,269 @@
+"""
+Benchmark cases for the cryptographic primitives
+Each case takes an iteration count and returns a list of result records.
+"""
+import base64
+import hashlib
+import importlib.util
+import json
+import secrets
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Any
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from benchmarks.harness import measure
+from shared.crypto_utils import CryptoUtils, ECIESEncryption
+from shared.threshold_crypto import ThresholdCrypto, generate_election_keypair_with_trustees
+from shared.bulletin_chain import compute_entry_hash
+from shared import ballot_format, dkg, zkp
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Realistic sizes: a single-choice ballot is ~150 bytes of JSON, larger
+# sizes cover ranked/multi-question ballots
+BALLOT_SIZES = [64, 256, 1024, 4096]
+
+# (threshold, total_trustees) grids; (5, 9) is the project default
+THRESHOLD_GRID = [(2, 3), (3, 5), (5, 9), (7, 13), (11, 21)]
+
+
+def _load_blind_signature_class():
+    """
+    Load BlindSignature from the token service without importing its 'app' package
+    (every service uses the same top-level package name)
+    """
+    path = BACKEND_DIR / "token-service" / "app" / "utils" / "blind_signature.py"
+    spec = importlib.util.spec_from_file_location("token_service_blind_signature", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BlindSignature
+
+
+def _sample_ballot(size: int) -> bytes:
+    """Ballot plaintext padded to the requested size"""
+    body = f'{{"candidate_id":"{uuid.uuid4()}","election_id":"{uuid.uuid4()}","pad":"'
+    padding = "x" * max(0, size - len(body) - 2)
+    return (body + padding + '"}').encode()[:max(size, 1)]
+
+
+def bench_blind_signature(iterations: int) -> List[Dict[str, Any]]:
+    """RSA-2048 blind signing (server) and full client round trip"""
+    BlindSignature = _load_blind_signature_class()
+    signer = BlindSignature()
+    signer.generate_keys()
+    public_key = signer.public_key
+
+    message = secrets.token_bytes(32)
+    blinded, factor = BlindSignature.blind_message(message, public_key)
+    blinded_signature = signer.blind_sign(blinded)
+    signature = BlindSignature.unblind_signature(blinded_signature, factor, public_key)
+    if not BlindSignature.verify_signature(message, signature, public_key):
+        raise RuntimeError("Blind signature round trip failed verification")
+
+    params = {"key_size": signer.key_size}
+    return [
+        measure("blind_signature.blind", lambda: BlindSignature.blind_message(message, public_key),
+                iterations, params=params),
+        measure("blind_signature.sign", lambda: signer.blind_sign(blinded), iterations, params=params),
+        measure("blind_signature.unblind",
+                lambda: BlindSignature.unblind_signature(blinded_signature, factor, public_key),
+                iterations, params=params),
+        measure("blind_signature.verify",
+                lambda: BlindSignature.verify_signature(message, signature, public_key),
+                iterations, params=params),
+    ]
+
+
+def bench_ecies(iterations: int) -> List[Dict[str, Any]]:
+    """X25519 + AES-256-GCM ballot encryption at several ballot sizes"""
+    private_key, public_key = CryptoUtils.generate_x25519_keypair()
+    results = []
+    for size in BALLOT_SIZES:
+        plaintext = _sample_ballot(size)
+        encrypted = ECIESEncryption.encrypt(public_key, plaintext)
+        params = {"plaintext_bytes": size}
+        results.append(measure(
+            f"ecies.encrypt[{size}]",
+            lambda: ECIESEncryption.encrypt(public_key, plaintext),
+            iterations, params=params
+        ))
+        results.append(measure(
+            f"ecies.decrypt[{size}]",
+            lambda: ECIESEncryption.decrypt(
+                private_key,
+                encrypted["ephemeral_public_key"],
+                encrypted["ciphertext"],
+                encrypted["nonce"],
+                encrypted["tag"]
+            ),
+            iterations, params=params
+        ))
+    return results
+
+
+def bench_ed25519(iterations: int) -> List[Dict[str, Any]]:
+    """Ed25519 sign/verify on a 32-byte digest"""
+    private_key, public_key = CryptoUtils.generate_ed25519_keypair()
+    message = secrets.token_bytes(32)
+    signature = CryptoUtils.ed25519_sign(private_key, message)
+    # The bulletin board signs with an already-loaded key object (app/utils/entry_signing.py)
+    loaded_key = ed25519.Ed25519PrivateKey.from_private_bytes(private_key)
+    return [
+        measure("ed25519.sign", lambda: CryptoUtils.ed25519_sign(private_key, message), iterations),
+        measure("ed25519.verify", lambda: CryptoUtils.ed25519_verify(public_key, message, signature), iterations),
+        measure("ed25519.sign_loaded[100]", lambda: [loaded_key.sign(message) for _ in range(100)],
+                max(1, iterations // 100), params={"batch_size": 100}),
+    ]
+
+
+def bench_threshold(iterations: int) -> List[Dict[str, Any]]:
+    """Shamir split/combine of a 256-bit election key over the (t, n) grid"""
+    prime = ThresholdCrypto.generate_safe_prime()
+    secret = int.from_bytes(secrets.token_bytes(32), byteorder="big")
+    results = []
+    for threshold, total in THRESHOLD_GRID:
+        shares = ThresholdCrypto.generate_shares(secret, threshold, total, prime)
+        if ThresholdCrypto.lagrange_interpolation(shares[:threshold], prime) != secret:
+            raise RuntimeError(f"Share combine failed for t={threshold}, n={total}")
+        params = {"threshold": threshold, "total_trustees": total}
+        results.append(measure(
+            f"threshold.split[t={threshold},n={total}]",
+            lambda: ThresholdCrypto.generate_shares(secret, threshold, total, prime),
+            iterations, params=params
+        ))
+        results.append(measure(
+            f"threshold.combine[t={threshold},n={total}]",
+            lambda: ThresholdCrypto.lagrange_interpolation(shares[:threshold], prime),
+            iterations, params=params
+        ))
+    results.append(measure(
+        "threshold.election_keypair[t=5,n=9]",
+        lambda: generate_election_keypair_with_trustees(5, 9),
+        iterations, params={"threshold": 5, "total_trustees": 9}
+    ))
+    return results
+
+
+def bench_chain_hashing(iterations: int) -> List[Dict[str, Any]]:
+    """Bulletin board entry hashing (one BALLOT_CAST entry per operation)"""
+    entry_data = {
+        "ballot_hash": secrets.token_hex(32),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "action": "Ballot cast and recorded"
+    }
+    previous_hash = secrets.token_hex(32)
+    state = {"prev": previous_hash}
+
+    def append_one():
+        state["prev"] = compute_entry_hash(entry_data, state["prev"])
+
+    return [
+        measure("chain.entry_hash", lambda: compute_entry_hash(entry_data, previous_hash), iterations),
+        measure("chain.append_linked", append_one, iterations),
+    ]
+
+
+def bench_ballot_format(iterations: int) -> List[Dict[str, Any]]:
+    """Binary ballot encode/parse/hash against the JSON-of-base64 form it replaced"""
+    _, public_key = CryptoUtils.generate_x25519_keypair()
+    results = []
+    for size in BALLOT_SIZES:
+        encrypted = ECIESEncryption.encrypt(public_key, _sample_ballot(size))
+        submitted = {k: base64.b64encode(v).decode() for k, v in encrypted.items()}
+        encoded = ballot_format.encode_ballot(submitted)
+        legacy = json.dumps(submitted, sort_keys=True).encode()
+        params = {"plaintext_bytes": size, "binary_bytes": len(encoded), "json_bytes": len(legacy)}
+        results.append(measure(
+            f"ballot.encode_hash[{size}]",
+            lambda: ballot_format.ballot_hash(ballot_format.encode_ballot(submitted)),
+            iterations, params=params
+        ))
+        results.append(measure(
+            f"ballot.json_hash[{size}]",
+            lambda: hashlib.sha256(json.dumps(submitted, sort_keys=True).encode()).hexdigest(),
+            iterations, params=params
+        ))
+        results.append(measure(
+            f"ballot.parse[{size}]",
+            lambda: ballot_format.parse_ballot(encoded),
+            iterations, params=params
+        ))
+        results.append(measure(
+            f"ballot.json_parse[{size}]",
+            lambda: {k: base64.b64decode(v) for k, v in json.loads(legacy).items()},
+            iterations, params=params
+        ))
+    return results
+
+
+# Ballots per chunk handed to one pre-tally audit worker (ZKP_BATCH_SIZE)
+ZKP_CHUNK_SIZE = 256
+
+
+def bench_zkp(iterations: int) -> List[Dict[str, Any]]:
+    """Ballot proofs: proving, one verification, and a proof-audit chunk (per-proof timings)"""
+    election_id = str(uuid.uuid4())
+    items = []
+    for _ in range(ZKP_CHUNK_SIZE):
+        ballot_hash = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+        ephemeral_private, ephemeral_public = CryptoUtils.generate_x25519_keypair()
+        proof = zkp.prove(election_id, ballot_hash, ephemeral_private)
+        items.append((election_id, ballot_hash, ephemeral_public, zkp.BallotProof.from_dict(proof)))
+    results = [
+        measure("zkp.prove", lambda: zkp.prove(election_id, items[0][1], ephemeral_private), iterations),
+        measure("zkp.verify", lambda: zkp.verify(*items[0]), iterations),
+    ]
+    result = measure(
+        f"zkp.find_invalid[{ZKP_CHUNK_SIZE}]", lambda: zkp.find_invalid(items),
+        max(1, iterations // ZKP_CHUNK_SIZE), params={"chunk_size": ZKP_CHUNK_SIZE}
+    )
+    result["params"]["per_proof_us"] = round(result["mean_us"] / ZKP_CHUNK_SIZE, 3)
+    results.append(result)
+    return results
+
+
+def bench_dkg(iterations: int) -> List[Dict[str, Any]]:
+    """DKG share verification for one trustee: every dealer's share at once against one by one"""
+    results = []
+    for threshold, total in THRESHOLD_GRID:
+        polynomials = [dkg.new_polynomial(threshold) for _ in range(total)]
+        received = [([dkg.BASE * a for a in f], dkg.evaluate(f, total)) for f in polynomials]
+        params = {"threshold": threshold, "trustees": total}
+        results.append(measure(
+            f"dkg.verify_shares[{threshold}/{total}]", lambda: dkg.verify_shares(total, received),
+            iterations, params=params
+        ))
+        results.append(measure(
+            f"dkg.verify_share_each[{threshold}/{total}]",
+            lambda: all(dkg.verify_share(c, total, share) for c, share in received),
+            max(1, iterations // total), params=params
+        ))
+    return results
+
+
+# Registered benchmark groups, in run order
+BENCHMARKS: Dict[str, Callable[[int], List[Dict[str, Any]]]] = {
+    "blind_signature": bench_blind_signature,
+    "ecies": bench_ecies,
+    "ed25519": bench_ed25519,
+    "threshold": bench_threshold,
+    "chain": bench_chain_hashing,
+    "ballot_format": bench_ballot_format,
+    "zkp": bench_zkp,
+    "dkg": bench_dkg,
+}
+
+# Default iteration counts, scaled so each group takes a few seconds
+DEFAULT_ITERATIONS = {
+    "blind_signature": 200,
+    "ecies": 2000,
+    "ed25519": 2000,
+    "threshold": 200,
+    "chain": 20000,
+    "ballot_format": 20000,
+    "zkp": 200,
+    "dkg": 100,
+}
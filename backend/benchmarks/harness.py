@@ -0,0 +1,116 @@
+"""
+Timing harness for benchmarks
+Measures per-operation latency and reports throughput and percentiles
+"""
+import time
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Any, Optional
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_samples))))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(name: str, samples_ns: List[int], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build a result record from raw per-operation timings (nanoseconds)
+    """
+    samples_us = sorted(s / 1000.0 for s in samples_ns)
+    total_s = sum(samples_ns) / 1e9
+    return {
+        "name": name,
+        "params": params or {},
+        "iterations": len(samples_us),
+        "ops_per_sec": round(len(samples_us) / total_s, 2) if total_s > 0 else 0.0,
+        "mean_us": round(sum(samples_us) / len(samples_us), 3) if samples_us else 0.0,
+        "p50_us": round(percentile(samples_us, 50), 3),
+        "p95_us": round(percentile(samples_us, 95), 3),
+        "p99_us": round(percentile(samples_us, 99), 3),
+        "min_us": round(samples_us[0], 3) if samples_us else 0.0,
+        "max_us": round(samples_us[-1], 3) if samples_us else 0.0,
+    }
+
+
+def measure(
+    name: str,
+    operation: Callable[[], Any],
+    iterations: int,
+    warmup: int = 5,
+    params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Run an operation repeatedly and time each call individually
+
+    Args:
+        name: Benchmark name (stable across runs, used for comparisons)
+        operation: Zero-argument callable performing one operation
+        iterations: Number of timed calls
+        warmup: Untimed calls made first to populate caches
+        params: Parameters recorded alongside the result
+
+    Returns:
+        Result record (see summarize)
+    """
+    for _ in range(warmup):
+        operation()
+
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(iterations):
+        start = clock()
+        operation()
+        samples.append(clock() - start)
+
+    return summarize(name, samples, params)
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine so results are only compared like-for-like"""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold_pct: float = 10.0
+) -> List[Dict[str, Any]]:
+    """
+    Compare two result documents by benchmark name
+
+    A benchmark regresses when its ops/sec dropped by more than threshold_pct.
+
+    Returns:
+        One row per benchmark present in both documents
+    """
+    base_by_name = {r["name"]: r for r in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        base = base_by_name.get(result["name"])
+        if not base or not base.get("ops_per_sec"):
+            continue
+        change_pct = (result["ops_per_sec"] - base["ops_per_sec"]) / base["ops_per_sec"] * 100.0
+        rows.append({
+            "name": result["name"],
+            "baseline_ops_per_sec": base["ops_per_sec"],
+            "current_ops_per_sec": result["ops_per_sec"],
+            "baseline_p99_us": base["p99_us"],
+            "current_p99_us": result["p99_us"],
+            "change_pct": round(change_pct, 2),
+            "regression": change_pct < -threshold_pct,
+        })
+    return rows
@@ -1,47 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from shared.auth import require_service
 from shared.database import get_db
-import hashlib
-import json
+from shared.bulletin_chain import canonical_entry_data, compute_entry_hash, entry_signing_message
+from shared.http_cache import not_modified, make_etag, CACHE_SHORT
+from shared.tracing import span, STAGE_CRYPTO
+from app.utils import chain_verify
+from app.utils.entry_signing import key_store, sign_entries
+from typing import Dict, List, Literal, Optional
+import base64
+import os
+import uuid
 
 router = APIRouter()
 
+BULLETIN_BATCH_MAX = int(os.getenv("BULLETIN_BATCH_MAX", "1000"))
+
+# Must match the CHECK constraint on bulletin_board.entry_type (scripts/db-init.sql):
+# anything else is a 422 here, not a failed insert after locking and signing
+EntryType = Literal[
+    "ELECTION_CREATED",
+    "KEY_GENERATED",
+    "BALLOT_CAST",
+    "ELECTION_CLOSED",
+    "TRUSTEE_SHARE",
+    "RESULT_PUBLISHED",
+]
+
 class BulletinEntryIn(BaseModel):
     election_id: str
-    entry_type: str
+    entry_type: EntryType
     entry_data: dict
 
+class BulletinBatchIn(BaseModel):
+    entries: List[BulletinEntryIn]
+
 class BulletinEntryOut(BaseModel):
     entry_id: str
     entry_hash: str
     previous_hash: str | None
 
-@router.post("/append", response_model=BulletinEntryOut)
-def append_entry(payload: BulletinEntryIn, db: Session = Depends(get_db)):
+def _append_entries(db: Session, entries: List[BulletinEntryIn]) -> List[BulletinEntryOut]:
     """
-    Append a new entry to the bulletin board.
-    Creates a tamper-evident chain of events for the election.
+    Chain, sign and insert entries in one transaction, in the given order.
+    Each election's chain is locked for the transaction, so concurrent
+    appends cannot fork it.
     """
-    # Get last entry hash for this election
-    last = db.execute(
-        text("""
-        SELECT entry_hash FROM bulletin_board 
-        WHERE election_id::text = :eid 
-        ORDER BY sequence_number DESC LIMIT 1
-        """),
-        {"eid": payload.election_id}
-    ).fetchone()
-    previous_hash = last[0] if last else None
+    by_election: Dict[str, List[int]] = {}
+    for i, entry in enumerate(entries):
+        try:
+            election_id = str(uuid.UUID(entry.election_id))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid election ID: {entry.election_id}")
+        by_election.setdefault(election_id, []).append(i)
+
+    hashes: List[str] = [""] * len(entries)
+    previous: List[Optional[str]] = [None] * len(entries)
+    messages: List[bytes] = [b""] * len(entries)
+    data: List[str] = [""] * len(entries)
+    election_ids: List[str] = [""] * len(entries)
+    # Lock elections in a fixed order so two batches never wait on each other
+    for election_id in sorted(by_election):
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:eid, 0))"), {"eid": election_id})
+        # Get last entry hash for this election (index probe on election_id, sequence_number)
+        last = db.execute(
+            text("""
+            SELECT entry_hash FROM bulletin_board 
+            WHERE election_id = CAST(:eid AS uuid) 
+            ORDER BY sequence_number DESC LIMIT 1
+            """),
+            {"eid": election_id}
+        ).fetchone()
+        previous_hash = last[0] if last else None
+        for i in by_election[election_id]:
+            entry = entries[i]
+            # Compute hash: hash(entry_data + previous_hash)
+            election_ids[i] = election_id
+            data[i] = canonical_entry_data(entry.entry_data)
+            previous[i] = previous_hash
+            hashes[i] = previous_hash = compute_entry_hash(entry.entry_data, previous_hash)
+            messages[i] = entry_signing_message(election_id, entry.entry_type, hashes[i])
 
-    # Compute hash: hash(entry_data + previous_hash)
-    data_str = json.dumps(payload.entry_data, sort_keys=True)
-    hash_input = data_str.encode() + (previous_hash.encode() if previous_hash else b"")
-    computed_hash = hashlib.sha256(hash_input).hexdigest()
+    with span("bulletin.sign", stage=STAGE_CRYPTO, entries=len(entries)):
+        kid, signatures = sign_entries(messages)
 
-    # Insert into bulletin board
-    row = db.execute(
+    # One multi-row insert; sequence numbers follow the array order
+    rows = db.execute(
         text("""
         INSERT INTO bulletin_board (
             election_id, 
@@ -49,34 +95,69 @@ def append_entry(payload: BulletinEntryIn, db: Session = Depends(get_db)):
             entry_hash, 
             previous_hash, 
             entry_data, 
-            signature
-        )
-        VALUES (
-            CAST(:eid AS uuid), 
-            :etype, 
-            :eh, 
-            :ph, 
-            CAST(:edata AS jsonb), 
-            :sig
+            signature,
+            signing_key_id
         )
+        SELECT
+            CAST(e.election_id AS uuid),
+            e.entry_type,
+            e.entry_hash,
+            e.previous_hash,
+            CAST(e.entry_data AS jsonb),
+            e.signature,
+            :kid
+        FROM unnest(
+            CAST(:eids AS text[]), CAST(:etypes AS text[]), CAST(:hashes AS text[]),
+            CAST(:prevs AS text[]), CAST(:data AS text[]), CAST(:sigs AS bytea[])
+        ) WITH ORDINALITY AS e(election_id, entry_type, entry_hash, previous_hash, entry_data, signature, position)
+        ORDER BY e.position
         RETURNING entry_id, entry_hash, previous_hash
         """),
         {
-            "eid": payload.election_id,
-            "etype": payload.entry_type,
-            "eh": computed_hash,
-            "ph": previous_hash,
-            "edata": data_str,
-            "sig": b"mvp_signature"  # MVP: simplified signature
+            "eids": election_ids,
+            "etypes": [entry.entry_type for entry in entries],
+            "hashes": hashes,
+            "prevs": previous,
+            "data": data,
+            "sigs": signatures,
+            "kid": kid
         }
-    ).fetchone()
+    ).fetchall()
     db.commit()
 
-    return BulletinEntryOut(
-        entry_id=str(row[0]), 
-        entry_hash=row[1], 
-        previous_hash=row[2]
-    )
+    entry_ids = {row[1]: str(row[0]) for row in rows}
+    return [
+        BulletinEntryOut(entry_id=entry_ids[h], entry_hash=h, previous_hash=p)
+        for h, p in zip(hashes, previous)
+    ]
+
+@router.post("/append", response_model=BulletinEntryOut, dependencies=[Depends(require_service)])
+def append_entry(payload: BulletinEntryIn, db: Session = Depends(get_db)):
+    """
+    Append a new entry to the bulletin board.
+    Creates a tamper-evident chain of events for the election.
+    Internal: only other services (X-Service-Key) may append, since every
+    entry gets the board's signature.
+    """
+    return _append_entries(db, [payload])[0]
+
+@router.post("/append-batch", response_model=List[BulletinEntryOut], dependencies=[Depends(require_service)])
+def append_entries(payload: BulletinBatchIn, db: Session = Depends(get_db)):
+    """
+    Append several entries at once, in order (e.g. a batch of BALLOT_CAST
+    entries). One transaction, one insert and one chain lock per election
+    for the whole batch instead of one of each per entry.
+    """
+    if not payload.entries:
+        return []
+    if len(payload.entries) > BULLETIN_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BULLETIN_BATCH_MAX} entries per batch")
+    return _append_entries(db, payload.entries)
+
+@router.get("/keys")
+def get_signing_keys():
+    """Public keys that verify entry signatures, as a JWKS (kid = an entry's signing_key_id)"""
+    return key_store.jwks()
 
 @router.get("/{election_id}/chain")
 def get_chain(election_id: str, db: Session = Depends(get_db)):
@@ -92,7 +173,9 @@ def get_chain(election_id: str, db: Session = Depends(get_db)):
             entry_hash, 
             previous_hash, 
             entry_data, 
-            created_at 
+            created_at,
+            signature,
+            signing_key_id
         FROM bulletin_board 
         WHERE election_id::text = :eid 
         ORDER BY sequence_number
@@ -107,7 +190,10 @@ def get_chain(election_id: str, db: Session = Depends(get_db)):
             "hash": r[2],
             "prev": r[3],
             "data": r[4],
-            "time": r[5].isoformat() if r[5] else None
+            "time": r[5].isoformat() if r[5] else None,
+            # Ed25519 over entry_signing_message; entries from before signing have no kid
+            "sig": base64.b64encode(r[6]).decode() if r[7] else None,
+            "kid": r[7]
         }
         for r in rows
     ]
@@ -116,61 +202,48 @@ def get_chain(election_id: str, db: Session = Depends(get_db)):
 def verify_chain(election_id: str, db: Session = Depends(get_db)):
     """
     Verify the integrity of the bulletin board chain.
-    Checks that each entry's hash correctly links to the previous entry.
+    Checks that each entry's hash matches its data and links to the previous
+    entry. Segments of the chain are re-hashed in parallel (app/utils/chain_verify.py);
+    a broken chain reports the first failing sequence number.
     """
-    rows = db.execute(
-        text("""
-        SELECT 
-            entry_hash, 
-            previous_hash, 
-            entry_data 
-        FROM bulletin_board 
-        WHERE election_id::text = :eid 
-        ORDER BY sequence_number
-        """),
-        {"eid": election_id}
-    ).fetchall()
-    
-    if not rows:
-        return {"valid": True, "message": "No entries to verify"}
-    
-    # Verify each entry's hash
-    for i, row in enumerate(rows):
-        entry_hash = row[0]
-        previous_hash = row[1]
-        entry_data = row[2]
-        
-        # Check previous hash link
-        if i > 0:
-            expected_prev = rows[i - 1][0]
-            if previous_hash != expected_prev:
-                return {
-                    "valid": False,
-                    "message": f"Chain broken at entry {i}: prev hash mismatch"
-                }
-        
-        # Recompute hash to verify integrity
-        data_str = json.dumps(entry_data, sort_keys=True)
-        hash_input = data_str.encode() + (previous_hash.encode() if previous_hash else b"")
-        computed_hash = hashlib.sha256(hash_input).hexdigest()
-        
-        if computed_hash != entry_hash:
-            return {
-                "valid": False,
-                "message": f"Hash mismatch at entry {i}: data may have been tampered"
-            }
-    
-    return {
-        "valid": True,
-        "message": f"All {len(rows)} entries verified successfully",
-        "total_entries": len(rows)
-    }
+    try:
+        election_id = str(uuid.UUID(election_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid election ID: {election_id}")
+
+    with span("bulletin.verify_chain", stage=STAGE_CRYPTO):
+        report = chain_verify.verify_chain(db, election_id)
+
+    if report["valid"]:
+        if report["total_entries"] == 0:
+            return {"valid": True, "message": "No entries to verify", "total_entries": 0}
+        report["message"] = f"All {report['total_entries']} entries verified successfully"
+    elif report["reason"] == chain_verify.LINK_MISMATCH:
+        report["message"] = (f"Chain broken at entry {report['entry_index']} "
+                             f"(sequence {report['first_invalid_sequence']}): prev hash mismatch")
+    else:
+        report["message"] = (f"Hash mismatch at entry {report['entry_index']} "
+                             f"(sequence {report['first_invalid_sequence']}): data may have been tampered")
+    return report
 
 @router.get("/{election_id}/summary")
-def get_summary(election_id: str, db: Session = Depends(get_db)):
+def get_summary(election_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get a summary of bulletin board entries by type.
+    The ETag is the chain head hash, so it changes exactly when an entry is appended.
     """
+    head = db.execute(
+        text("""
+        SELECT entry_hash FROM bulletin_board 
+        WHERE election_id::text = :eid 
+        ORDER BY sequence_number DESC LIMIT 1
+        """),
+        {"eid": election_id}
+    ).fetchone()
+    cached = not_modified(request, response, make_etag("summary", election_id, head[0] if head else None), CACHE_SHORT)
+    if cached:
+        return cached
+    
     rows = db.execute(
         text("""
         SELECT 
@@ -8,9 +8,16 @@ sys.path.insert(0, str(backend_dir))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.bulletin import router as bulletin_router
+from shared.metrics import setup_metrics
+from shared.rate_limit import setup_rate_limiting
+from shared.structured_logging import setup_logging
+from shared.tracing import setup_tracing
 
 app = FastAPI(title="Bulletin Board Service", version="1.0.0", docs_url="/api/docs")
 
+# Rate limits and admission control (inside CORS, see auth-service/app/main.py)
+setup_rate_limiting(app, "bulletin-board-service")
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -20,6 +27,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Structured JSON logging with per-route sampling (LOG_* env vars)
+setup_logging(app, "bulletin-board-service")
+
+# Prometheus metrics (GET /metrics)
+setup_metrics(app, "bulletin-board-service")
+
+# Request tracing (outermost middleware: times the whole request)
+setup_tracing(app, "bulletin-board-service")
+
 app.include_router(bulletin_router, prefix="/api/bulletin", tags=["Bulletin Board"])
 
 @app.get("/health")
@@ -0,0 +1,234 @@
+"""
+Parallel bulletin chain verification
+An entry's hash depends only on its own stored entry_data and previous_hash,
+so recomputing hashes does not have to walk the chain in order. The
+election's sequence range is cut into segments; each worker reads its
+segment straight from the database (its own connection), re-hashes every
+entry and checks the links inside the segment. The parent only checks the
+link across each segment boundary, in order. Results are consumed in
+segment order, so the first failure found is the first in the chain, and
+later segments are cancelled as soon as one fails.
+
+    cd backend/bulletin-board-service
+    PYTHONPATH=.. python -m app.utils.chain_verify <election_id> [--workers N]
+
+GET /api/bulletin/{election_id}/verify uses the same engine: short chains
+are checked inline, longer ones on a process pool kept by the service.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared.bulletin_chain import compute_entry_hash
+
+logger = logging.getLogger(__name__)
+
+CHAIN_SEGMENT_ENTRIES = int(os.getenv("CHAIN_SEGMENT_ENTRIES", "50000"))
+CHAIN_VERIFY_WORKERS = int(os.getenv("CHAIN_VERIFY_WORKERS", str(os.cpu_count() or 1)))
+CHAIN_FETCH_ROWS = int(os.getenv("CHAIN_FETCH_ROWS", "10000"))
+
+HASH_MISMATCH = "hash_mismatch"
+LINK_MISMATCH = "link_mismatch"
+
+
+def _verify_segment(db: Session, election_id: str, first_seq: int, last_seq: int) -> Dict[str, Any]:
+    """
+    Re-hash the entries with first_seq <= sequence_number <= last_seq and
+    check the links between them. Stops at the first failure. The result
+    carries the segment's first previous_hash and last entry_hash for the
+    boundary checks.
+    """
+    rows = db.execute(
+        text("""
+        SELECT sequence_number, entry_hash, previous_hash, entry_data::text
+        FROM bulletin_board
+        WHERE election_id = CAST(:eid AS uuid)
+          AND sequence_number BETWEEN :first AND :last
+        ORDER BY sequence_number
+        """),
+        {"eid": election_id, "first": first_seq, "last": last_seq},
+        execution_options={"stream_results": True, "yield_per": CHAIN_FETCH_ROWS}
+    )
+    count = 0
+    head: Optional[Tuple[int, Optional[str]]] = None  # (sequence_number, previous_hash) of the first entry
+    last_hash = None
+    failure = None
+    for seq, entry_hash, previous_hash, entry_data in rows:
+        if head is None:
+            head = (seq, previous_hash)
+        elif previous_hash != last_hash:
+            failure = {"sequence_number": seq, "offset": count, "reason": LINK_MISMATCH}
+            break
+        if compute_entry_hash(json.loads(entry_data), previous_hash) != entry_hash:
+            failure = {"sequence_number": seq, "offset": count, "reason": HASH_MISMATCH}
+            break
+        last_hash = entry_hash
+        count += 1
+    rows.close()
+
+    return {
+        "count": count,
+        "first_sequence": head[0] if head else None,
+        "first_previous_hash": head[1] if head else None,
+        "last_hash": last_hash,
+        "failure": failure,
+    }
+
+
+def _verify_segment_worker(election_id: str, first_seq: int, last_seq: int) -> Dict[str, Any]:
+    """_verify_segment with the worker's own session (runs in the pool)"""
+    from shared.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return _verify_segment(db, election_id, first_seq, last_seq)
+    finally:
+        db.close()
+
+
+def _segments(db: Session, election_id: str) -> List[Tuple[int, int]]:
+    """
+    Sequence ranges of about CHAIN_SEGMENT_ENTRIES entries each. Sequence
+    numbers are shared by all elections, so the split is by range (two index
+    probes) rather than by exact count; a range may hold fewer entries.
+    """
+    bounds = db.execute(
+        text("""
+        SELECT MIN(sequence_number), MAX(sequence_number)
+        FROM bulletin_board
+        WHERE election_id = CAST(:eid AS uuid)
+        """),
+        {"eid": election_id}
+    ).fetchone()
+    if bounds[0] is None:
+        return []
+    first, last = bounds
+    span = max(CHAIN_SEGMENT_ENTRIES, 1)
+    return [(start, min(start + span - 1, last)) for start in range(first, last + 1, span)]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    """The service's verification pool, started on first use and kept"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def verify_chain(db: Session, election_id: str, workers: int = CHAIN_VERIFY_WORKERS,
+                 executor: Optional[ProcessPoolExecutor] = None) -> Dict[str, Any]:
+    """
+    Verify an election's chain. Returns {"valid", "total_entries"} and, for
+    a broken chain, "first_invalid_sequence", "entry_index" (0-based
+    position in the chain) and "reason" (hash_mismatch or link_mismatch).
+    total_entries counts the entries verified before the failure.
+    """
+    started = time.perf_counter()
+    segments = _segments(db, election_id)
+
+    if workers > 1 and len(segments) > 1:
+        executor = executor or _pool(workers)
+        # Submit ahead in chain order, a few segments per worker
+        pending = deque()
+        queued = iter(segments)
+
+        def submit_next():
+            segment = next(queued, None)
+            if segment is not None:
+                pending.append(executor.submit(_verify_segment_worker, election_id, *segment))
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        def results():
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                yield result
+    else:
+        def results():
+            for segment in segments:
+                yield _verify_segment(db, election_id, *segment)
+
+    total = 0
+    previous_hash = None
+    failure = None
+    for result in results():
+        if result["count"] == 0 and result["failure"] is None:
+            continue
+        # Boundary link: the segment's first entry must point at the previous segment's last
+        if total > 0 and result["first_previous_hash"] != previous_hash:
+            failure = {"sequence_number": result["first_sequence"], "offset": 0, "reason": LINK_MISMATCH}
+        else:
+            failure = result["failure"]
+        if failure:
+            failure["offset"] += total
+            total = failure["offset"]
+            break
+        total += result["count"]
+        previous_hash = result["last_hash"]
+
+    if failure and workers > 1 and len(segments) > 1:
+        for future in pending:
+            future.cancel()
+
+    report: Dict[str, Any] = {"valid": failure is None, "total_entries": total}
+    if failure:
+        report.update({
+            "first_invalid_sequence": failure["sequence_number"],
+            "entry_index": failure["offset"],
+            "reason": failure["reason"],
+        })
+    logger.info("Bulletin chain verified", extra={
+        "election_id": election_id,
+        "entries": total,
+        "segments": len(segments),
+        "valid": failure is None,
+        "first_invalid_sequence": failure["sequence_number"] if failure else None,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    })
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from shared.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Verify an election's bulletin board hash chain")
+    parser.add_argument("election_id")
+    parser.add_argument("--workers", type=int, default=CHAIN_VERIFY_WORKERS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        if args.workers > 1:
+            with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                report = verify_chain(db, args.election_id, workers=args.workers, executor=pool)
+        else:
+            report = verify_chain(db, args.election_id, workers=1)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"Verified {report['total_entries']} entries in {elapsed:.2f}s "
+          f"({report['total_entries'] / max(elapsed, 1e-9):.0f}/s)")
+    if not report["valid"]:
+        print(f"INVALID  sequence {report['first_invalid_sequence']} "
+              f"(entry {report['entry_index']}): {report['reason']}")
+    sys.exit(0 if report["valid"] else 1)
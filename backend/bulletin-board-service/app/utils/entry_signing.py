@@ -0,0 +1,47 @@
+"""
+Ed25519 signatures on bulletin board entries
+Every entry is signed over entry_signing_message (shared/bulletin_chain.py)
+with the board's active key, and the row records the key id. Keys are
+PKCS#8 PEM files in BULLETIN_KEY_DIR (shared/signing_keys.py); one is
+generated on first start. GET /api/bulletin/keys publishes every key as a
+JWKS, so anyone can check an entry's signature against the kid it names.
+
+    cd backend/bulletin-board-service
+    PYTHONPATH=.. python -m app.utils.entry_signing rotate   # add a new active key
+    PYTHONPATH=.. python -m app.utils.entry_signing list
+
+Retired keys are never pruned: entries are permanent, and so are the keys
+that verify them.
+"""
+import os
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from shared.signing_keys import SigningKeyStore
+
+BULLETIN_KEY_DIR = Path(os.getenv(
+    "BULLETIN_KEY_DIR", str(Path(__file__).resolve().parents[3] / ".keys" / "bulletin")
+))
+BULLETIN_KEY_RELOAD_SECONDS = float(os.getenv("BULLETIN_KEY_RELOAD_SECONDS", "30"))
+
+key_store = SigningKeyStore(BULLETIN_KEY_DIR, "bulletin", BULLETIN_KEY_RELOAD_SECONDS)
+
+
+def sign_entries(messages: Sequence[bytes]) -> Tuple[str, List[bytes]]:
+    """Sign a batch of entry messages with the active key: (kid, signatures)"""
+    # The key store keeps keys parsed, so the batch signs with the loaded key object
+    kid, private_key = key_store.signing_key()
+    return kid, [private_key.sign(message) for message in messages]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage bulletin board signing keys")
+    parser.add_argument("command", choices=["rotate", "list"])
+    args = parser.parse_args()
+
+    if args.command == "rotate":
+        print(f"Active key: {key_store.rotate()}")
+    for info in key_store.describe():
+        print(f"{info['kid']}  created {info['created_at']}{'  (active)' if info['active'] else ''}")
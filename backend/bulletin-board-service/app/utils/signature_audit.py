@@ -0,0 +1,197 @@
+"""
+Batch verification of bulletin board entry signatures
+Streams entries from a server-side cursor, one election or the whole board,
+and checks every Ed25519 signature (entry_signing_message in
+shared/bulletin_chain.py) against the key its row names. Entries are
+verified in chunks of SIGNATURE_BATCH_SIZE in a process pool, so an audit of
+millions of entries uses every core without holding the board in memory.
+Each worker loads the public keys once and reuses them for every entry.
+
+    cd backend/bulletin-board-service
+    PYTHONPATH=.. python -m app.utils.signature_audit [<election_id>] [--workers N] [--jwks keys.json]
+
+Keys come from this service's key directory, or from a JWKS saved from
+GET /api/bulletin/keys (--jwks) so an auditor does not need the key files.
+Entries written before signing was introduced (no key id) are counted as
+unsigned. Once an election has a signed entry, every later entry of that
+election must be signed too, so an unsigned one is invalid: clearing the
+key id must not turn a forged entry into a legacy one. So is any unsigned
+entry at or after the cut-over sequence SIGNATURE_REQUIRED_FROM (or
+--signed-from), the first entry written with signing enabled. Whether each
+entry hash matches its data and links to the previous entry is the chain
+verification's job (GET /api/bulletin/{election_id}/verify).
+"""
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared.bulletin_chain import entry_signing_message
+from shared.eddsa_jwt import jwk_to_public_key
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_BATCH_SIZE = int(os.getenv("SIGNATURE_BATCH_SIZE", "5000"))
+SIGNATURE_VERIFY_WORKERS = int(os.getenv("SIGNATURE_VERIFY_WORKERS", str(os.cpu_count() or 1)))
+SIGNATURE_FETCH_ROWS = int(os.getenv("SIGNATURE_FETCH_ROWS", "10000"))
+# First sequence number written with signing enabled; unset when not recorded
+SIGNATURE_REQUIRED_FROM = int(os.getenv("SIGNATURE_REQUIRED_FROM")) if os.getenv("SIGNATURE_REQUIRED_FROM") else None
+
+# (sequence_number, election_id, entry_type, entry_hash, signature, signing_key_id)
+_Item = Tuple[int, str, str, str, bytes, str]
+
+_public_keys: Dict[str, ed25519.Ed25519PublicKey] = {}
+
+
+def _load_keys(jwks: Dict[str, Any]):
+    """Worker initializer: parse the public keys once per process"""
+    global _public_keys
+    _public_keys = {}
+    for jwk in jwks.get("keys", []):
+        key = jwk_to_public_key(jwk)
+        if key is not None and jwk.get("kid"):
+            _public_keys[jwk["kid"]] = key
+
+
+def _check_chunk(items: Sequence[_Item]) -> List[int]:
+    """Sequence numbers in the chunk whose signature does not verify (runs in a worker)"""
+    invalid = []
+    for seq, election_id, entry_type, entry_hash, signature, kid in items:
+        key = _public_keys.get(kid)
+        if key is None:
+            invalid.append(seq)
+            continue
+        try:
+            key.verify(signature, entry_signing_message(election_id, entry_type, entry_hash))
+        except InvalidSignature:
+            invalid.append(seq)
+    return invalid
+
+
+def _chunks(db: Session, election_id: Optional[str], counts: Dict[str, int], invalid: List[int],
+            signed_from: Optional[int]):
+    """
+    Signed entries in SIGNATURE_BATCH_SIZE chunks. Unsigned entries are
+    counted as it goes, or added to invalid when a signature was required.
+    """
+    rows = db.execute(
+        text("""
+        SELECT sequence_number, election_id, entry_type, entry_hash, signature, signing_key_id
+        FROM bulletin_board
+        WHERE CAST(:eid AS uuid) IS NULL OR election_id = CAST(:eid AS uuid)
+        ORDER BY sequence_number
+        """),
+        {"eid": election_id},
+        execution_options={"stream_results": True, "yield_per": SIGNATURE_FETCH_ROWS}
+    )
+    chunk: List[_Item] = []
+    signed_elections = set()  # elections whose entries are signed from here on (rows come in sequence order)
+    for seq, eid, entry_type, entry_hash, signature, kid in rows:
+        if kid is None or signature is None:
+            if kid is not None or eid in signed_elections or (signed_from is not None and seq >= signed_from):
+                invalid.append(seq)
+            else:
+                counts["unsigned"] += 1
+            continue
+        signed_elections.add(eid)
+        chunk.append((seq, str(eid), entry_type, entry_hash, bytes(signature), kid))
+        if len(chunk) == SIGNATURE_BATCH_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def verify_signatures(db: Session, jwks: Dict[str, Any], election_id: Optional[str] = None,
+                      workers: int = SIGNATURE_VERIFY_WORKERS,
+                      signed_from: Optional[int] = SIGNATURE_REQUIRED_FROM) -> Dict[str, Any]:
+    """
+    Verify the signatures of every entry of an election (or of the whole board).
+    Returns {"checked": n, "invalid": [sequence_number, ...], "unsigned": n};
+    invalid includes unsigned entries that had to be signed.
+    """
+    started = time.perf_counter()
+    counts = {"checked": 0, "unsigned": 0}
+    invalid: List[int] = []
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_keys,
+            initargs=(jwks,)
+        ) as executor:
+            # A few chunks in flight per worker: the cursor is never far ahead of the pool
+            pending = set()
+            for chunk in _chunks(db, election_id, counts, invalid, signed_from):
+                counts["checked"] += len(chunk)
+                pending.add(executor.submit(_check_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        invalid.extend(future.result())
+            for future in pending:
+                invalid.extend(future.result())
+    else:
+        _load_keys(jwks)
+        for chunk in _chunks(db, election_id, counts, invalid, signed_from):
+            counts["checked"] += len(chunk)
+            invalid.extend(_check_chunk(chunk))
+
+    elapsed = time.perf_counter() - started
+    result = {"checked": counts["checked"], "invalid": sorted(invalid), "unsigned": counts["unsigned"]}
+    logger.info("Bulletin signatures verified", extra={
+        "election_id": election_id,
+        "checked": counts["checked"],
+        "invalid": len(invalid),
+        "unsigned": counts["unsigned"],
+        "duration_ms": round(elapsed * 1000, 1),
+    })
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    from shared.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Verify the Ed25519 signatures of bulletin board entries")
+    parser.add_argument("election_id", nargs="?", help="Only this election (default: the whole board)")
+    parser.add_argument("--workers", type=int, default=SIGNATURE_VERIFY_WORKERS)
+    parser.add_argument("--jwks", help="JWKS file saved from GET /api/bulletin/keys (default: local key directory)")
+    parser.add_argument("--signed-from", type=int, default=SIGNATURE_REQUIRED_FROM, metavar="SEQ",
+                        help="Entries from this sequence number on must be signed (default: $SIGNATURE_REQUIRED_FROM)")
+    args = parser.parse_args()
+
+    if args.jwks:
+        with open(args.jwks) as f:
+            jwks = json.load(f)
+    else:
+        from app.utils.entry_signing import BULLETIN_KEY_DIR, key_store
+        if not BULLETIN_KEY_DIR.is_dir():
+            parser.error(f"No key directory at {BULLETIN_KEY_DIR}; pass --jwks")
+        jwks = key_store.jwks()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        report = verify_signatures(db, jwks, args.election_id, workers=args.workers, signed_from=args.signed_from)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"Checked {report['checked']} signature(s) in {elapsed:.2f}s "
+          f"({report['checked'] / max(elapsed, 1e-9):.0f}/s), {report['unsigned']} unsigned entry(ies)")
+    for seq in report["invalid"][:100]:
+        print(f"INVALID  sequence {seq}")
+    if len(report["invalid"]) > 100:
+        print(f"... and {len(report['invalid']) - 100} more")
+    sys.exit(1 if report["invalid"] else 0)
@@ -0,0 +1,52 @@
+"""
+Bulletin board appends are internal: unauthenticated callers are rejected
+before anything is locked, signed or stored.
+
+    cd backend/bulletin-board-service && python -m pytest -q test_append_auth.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from shared.auth import service_headers
+from shared.database import get_db
+
+ELECTION_ID = "00000000-0000-0000-0000-000000000001"
+ENTRY = {"election_id": ELECTION_ID, "entry_type": "BALLOT_CAST", "entry_data": {"ballot_hash": "forged"}}
+
+
+class _NoDatabase:
+    def __getattr__(self, name):
+        raise AssertionError("the database must not be used")
+
+
+def _no_db():
+    yield _NoDatabase()
+
+
+app.dependency_overrides[get_db] = _no_db
+client = TestClient(app)
+
+
+def test_append_without_service_key_is_rejected():
+    response = client.post("/api/bulletin/append", json=ENTRY)
+    assert response.status_code == 401
+
+
+def test_append_batch_with_wrong_service_key_is_rejected():
+    response = client.post(
+        "/api/bulletin/append-batch", json={"entries": [ENTRY]}, headers={"X-Service-Key": "forged"}
+    )
+    assert response.status_code == 401
+
+
+def test_unknown_entry_type_is_422():
+    response = client.post(
+        "/api/bulletin/append", json={**ENTRY, "entry_type": "NOT_A_TYPE"}, headers=service_headers()
+    )
+    assert response.status_code == 422
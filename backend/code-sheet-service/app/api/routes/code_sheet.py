@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from shared.database import get_db
 from shared.audit_helper import audit_voting_codes_generated
+from shared.election_cache import get_election_metadata
+from shared.pagination import clamp_limit, decode_cursor, paginate
 from typing import List, Optional
 import secrets
+import uuid
 import json
 from datetime import datetime
 import logging
@@ -44,14 +47,12 @@ def generate_codes(payload: GenerateRequest, db: Session = Depends(get_db)):
     main_code = secrets.token_hex(16)
     
     # Fetch candidates
-    candidates = db.execute(
-        text("SELECT candidate_id FROM candidates WHERE election_id::text = :eid ORDER BY display_order"),
-        {"eid": payload.election_id}
-    ).fetchall()
+    election = get_election_metadata(db, payload.election_id)
+    candidates = election["candidates"] if election else []
     if not candidates:
         raise HTTPException(status_code=400, detail="No candidates configured")
 
-    candidate_codes = {str(c[0]): secrets.token_hex(4) for c in candidates}
+    candidate_codes = {c["candidate_id"]: secrets.token_hex(4) for c in candidates}
 
     row = db.execute(
         text("""
@@ -79,22 +80,15 @@ def generate_codes(payload: GenerateRequest, db: Session = Depends(get_db)):
 def generate_codes_bulk(payload: BulkGenerateRequest, db: Session = Depends(get_db)):
     """Generate voting codes for all eligible voters in an election"""
     
-    print(f"[CODE-SHEET] Generating codes for election: {payload.election_id}")
+    logger.info("Generating voting codes", extra={"election_id": payload.election_id})
     
-    # Verify election exists
-    election = db.execute(
-        text("SELECT election_id, title FROM elections WHERE election_id::text = :eid"),
-        {"eid": payload.election_id}
-    ).fetchone()
+    # Verify election exists and fetch its candidates
+    election = get_election_metadata(db, payload.election_id)
     
     if not election:
         raise HTTPException(status_code=404, detail="Election not found")
     
-    # Fetch candidates
-    candidates = db.execute(
-        text("SELECT candidate_id FROM candidates WHERE election_id::text = :eid ORDER BY display_order"),
-        {"eid": payload.election_id}
-    ).fetchall()
+    candidates = election["candidates"]
     
     if not candidates:
         raise HTTPException(status_code=400, detail="No candidates configured for this election")
@@ -112,7 +106,8 @@ def generate_codes_bulk(payload: BulkGenerateRequest, db: Session = Depends(get_
     if not voters:
         raise HTTPException(status_code=400, detail="No eligible voters found")
     
-    print(f"[CODE-SHEET] Found {len(voters)} eligible voters and {len(candidates)} candidates")
+    logger.debug("Eligible voters loaded",
+                 extra={"election_id": payload.election_id, "voters": len(voters), "candidates": len(candidates)})
     
     codes_generated = []
     
@@ -127,12 +122,12 @@ def generate_codes_bulk(payload: BulkGenerateRequest, db: Session = Depends(get_
         ).fetchone()
         
         if existing:
-            print(f"[CODE-SHEET] Skipping {voter[1]}: codes already exist")
+            logger.debug("Codes already exist, skipping voter", extra={"election_id": payload.election_id})
             continue
         
         # Generate codes
         main_code = secrets.token_hex(16)
-        candidate_codes = {str(c[0]): secrets.token_hex(4) for c in candidates}
+        candidate_codes = {c["candidate_id"]: secrets.token_hex(4) for c in candidates}
         
         # Insert voting codes
         result = db.execute(
@@ -164,7 +159,8 @@ def generate_codes_bulk(payload: BulkGenerateRequest, db: Session = Depends(get_
     
     db.commit()
     
-    print(f"[CODE-SHEET] Generated {len(codes_generated)} new code sheets")
+    logger.info("Voting codes generated",
+                extra={"election_id": payload.election_id, "generated": len(codes_generated)})
     
     # Log to audit trail
     if codes_generated:
@@ -222,22 +218,41 @@ def generate_codes_bulk(payload: BulkGenerateRequest, db: Session = Depends(get_
     )
 
 @router.get("/election/{election_id}", response_model=List[CodeResponse])
-def get_election_codes(election_id: str, db: Session = Depends(get_db)):
-    """Get all voting codes for an election"""
+def get_election_codes(
+    election_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default PAGE_DEFAULT_LIMIT, capped at PAGE_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Get the voting codes for an election, in generation order, one page at a time"""
+    limit = clamp_limit(limit)
+    conditions = ["vc.election_id = CAST(:eid AS uuid)"]
+    params = {"eid": election_id, "limit": limit + 1}
+    
+    after = decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID))
+    if after:
+        conditions.append("(vc.created_at, vc.code_id) > (:after_created, :after_id)")
+        params["after_created"], params["after_id"] = after
     
+    # Ordered by the (election_id, created_at, code_id) index rather than by email,
+    # so a page never has to join and sort the whole election
     codes = db.execute(
-        text("""
+        text(f"""
         SELECT 
             vc.code_id, vc.user_id, u.email, u.full_name, 
             vc.main_voting_code, vc.candidate_codes, 
             vc.code_sheet_generated, vc.main_code_used, vc.created_at
         FROM voting_codes vc
         JOIN users u ON vc.user_id = u.user_id
-        WHERE vc.election_id = CAST(:eid AS uuid)
-        ORDER BY u.email
+        WHERE {" AND ".join(conditions)}
+        ORDER BY vc.created_at, vc.code_id
+        LIMIT :limit
         """),
-        {"eid": election_id}
+        params
     ).fetchall()
+    codes = paginate(request, response, codes, limit, lambda row: (row[8], row[0]))
     
     return [
         CodeResponse(
@@ -9,12 +9,19 @@ sys.path.insert(0, str(backend_dir))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.code_sheet import router as cs_router
+from shared.metrics import setup_metrics
+from shared.rate_limit import setup_rate_limiting
+from shared.structured_logging import setup_logging
+from shared.tracing import setup_tracing
 
 app = FastAPI(title="Code Sheet Service", version="1.0.0", docs_url="/api/docs")
 
 # Check if running in development mode
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
+# Rate limits and admission control (inside CORS, see auth-service/app/main.py)
+setup_rate_limiting(app, "code-sheet-service")
+
 # CORS middleware - Secure configuration based on environment
 if DEBUG:
     # Development: Allow all origins for testing (mobile app, admin web)
@@ -29,6 +36,7 @@ if DEBUG:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link"],  # Pagination cursors
     )
 else:
     # Production: Strict origin control
@@ -39,8 +47,18 @@ else:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link"],  # Pagination cursors
     )
 
+# Structured JSON logging with per-route sampling (LOG_* env vars)
+setup_logging(app, "code-sheet-service")
+
+# Prometheus metrics (GET /metrics)
+setup_metrics(app, "code-sheet-service")
+
+# Request tracing (outermost middleware: times the whole request)
+setup_tracing(app, "code-sheet-service")
+
 app.include_router(cs_router, prefix="/api/code-sheet", tags=["Code Sheet"])
 
 @app.get("/health")
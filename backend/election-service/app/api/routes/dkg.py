@@ -0,0 +1,563 @@
+"""
+Distributed key generation ceremony (shared/dkg.py)
+The election key is generated by the trustees together, in three rounds.
+Each trustee runs `python -m trustee dkg` (backend/trustee/dkg.py), which
+drives its part:
+
+    round 1  POST /{election_id}/commitments   transport key + Feldman commitments
+    round 2  POST /{election_id}/shares        one encrypted share per other trustee
+    round 3  GET  /{election_id}/shares/{trustee_id}, then
+             POST /{election_id}/confirm       verification key, or complaints
+
+A round ends when every trustee has submitted; the last submission moves the
+ceremony on. Every submission is idempotent and the state is in the
+database, so trustees (and the service) can stop and resume at any point.
+After the last confirmation the election public key is the sum of the
+dealers' constant-term commitments. The service only ever sees public
+values and encrypted shares: no process holds the election private key.
+
+A complaint (a share that does not match its dealer's commitments) fails
+the ceremony; it is then restarted with POST /start and restart=true.
+
+Every route needs a bearer token. Only an admin opens or restarts a
+ceremony; a trustee's submissions and its sealed shares need the token of
+the user the trustee was added for, and the ceremony state is visible to
+admins and the election's trustees.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from shared.database import get_db
+from shared.auth import Principal, get_principal, require_admin
+from shared import ballot_format, dkg
+from shared.bulletin_helper import create_key_generated_entry
+from shared.audit_helper import audit_key_ceremony
+from shared.tracing import span, STAGE_CRYPTO
+from shared.election_cache import invalidate_election
+from typing import Dict, List, Optional
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+ROUND_COMMITMENTS = 1
+ROUND_SHARES = 2
+ROUND_CONFIRM = 3
+
+KEY_TYPE = "ed25519-dkg"
+
+class DkgStartRequest(BaseModel):
+    election_id: str
+    restart: bool = False  # replace a FAILED (or stalled) ceremony
+
+class CommitmentsRequest(BaseModel):
+    trustee_id: str
+    transport_key: str  # base64 X25519 public key
+    commitments: str  # base64 of t concatenated 32-byte points
+
+class DealSharesRequest(BaseModel):
+    trustee_id: str
+    shares: Dict[str, str]  # {recipient_index: base64 sealed share}
+
+class ConfirmRequest(BaseModel):
+    trustee_id: str
+    verification_key: Optional[str] = None  # base64 point s_j * B
+    complaints: List[int] = []  # dealer indexes whose share failed verification
+
+def _uuid(value: str, name: str) -> str:
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
+def _b64(value: str, name: str) -> bytes:
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail=f"{name} is not valid base64")
+
+def _encode(value) -> Optional[str]:
+    return base64.b64encode(bytes(value)).decode() if value is not None else None
+
+def _ceremony(db: Session, election_id: str, lock: bool = False):
+    """
+    (ceremony_id, threshold, total_trustees, round, status, failure_reason,
+    started_at, completed_at). With lock=True the row is held until commit,
+    which serializes submissions so exactly one of them ends each round.
+    """
+    ceremony = db.execute(
+        text(f"""
+        SELECT ceremony_id, threshold, total_trustees, round, status, failure_reason, started_at, completed_at
+        FROM dkg_ceremonies
+        WHERE election_id = CAST(:eid AS uuid)
+        {"FOR UPDATE" if lock else ""}
+        """),
+        {"eid": election_id}
+    ).fetchone()
+    if not ceremony:
+        raise HTTPException(status_code=404, detail="No key generation ceremony for this election")
+    return ceremony
+
+def _running(ceremony, expected_round: int):
+    if ceremony[4] != "RUNNING":
+        raise HTTPException(status_code=409, detail=f"Ceremony is {ceremony[4]}")
+    if ceremony[3] != expected_round:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "wrong_round", "round": ceremony[3], "expected": expected_round}
+        )
+
+def _participant(db: Session, election_id: str, trustee_id: str, principal: Principal):
+    """
+    (trustee_index, commitments, transport_key, shares_dealt_at, confirmed_at),
+    for the caller's own trustee only
+    """
+    participant = db.execute(
+        text("""
+        SELECT p.trustee_index, p.commitments, p.transport_key, p.shares_dealt_at, p.confirmed_at, t.user_id
+        FROM dkg_participants p
+        JOIN trustees t ON t.trustee_id = p.trustee_id
+        WHERE p.election_id = CAST(:eid AS uuid) AND p.trustee_id = CAST(:tid AS uuid)
+        """),
+        {"eid": election_id, "tid": _uuid(trustee_id, "trustee ID")}
+    ).fetchone()
+    if not participant:
+        raise HTTPException(status_code=404, detail="Trustee is not a participant of this ceremony")
+    if str(participant[5]) != principal.user_id:
+        raise HTTPException(status_code=403, detail="Trustee belongs to another user")
+    return participant[:5]
+
+def _require_viewer(db: Session, election_id: str, principal: Principal):
+    """Admins and the election's trustees may read the ceremony state"""
+    if principal.is_admin:
+        return
+    is_trustee = db.execute(
+        text("""
+        SELECT 1 FROM trustees
+        WHERE election_id = CAST(:eid AS uuid) AND user_id = CAST(:uid AS uuid)
+        """),
+        {"eid": election_id, "uid": principal.user_id}
+    ).first()
+    if not is_trustee:
+        raise HTTPException(status_code=403, detail="Only admins and the election's trustees can view the ceremony")
+
+def _advance(db: Session, election_id: str, current_round: int, done_column: str):
+    """Move to the next round if every participant has set done_column"""
+    db.execute(
+        text(f"""
+        UPDATE dkg_ceremonies
+        SET round = round + 1
+        WHERE election_id = CAST(:eid AS uuid) AND round = :round
+          AND NOT EXISTS (
+              SELECT 1 FROM dkg_participants
+              WHERE election_id = CAST(:eid AS uuid) AND {done_column} IS NULL
+          )
+        """),
+        {"eid": election_id, "round": current_round}
+    )
+
+def _joint_commitments(db: Session, election_id: str, threshold: int) -> List:
+    """A_k = sum_i C_ik over all dealers (points were validated when submitted)"""
+    rows = db.execute(
+        text("""
+        SELECT trustee_index, commitments
+        FROM dkg_participants
+        WHERE election_id = CAST(:eid AS uuid)
+        """),
+        {"eid": election_id}
+    ).fetchall()
+    with span("dkg.aggregate_commitments", stage=STAGE_CRYPTO, dealers=len(rows)):
+        return dkg.aggregate({
+            row[0]: dkg.unpack_points(bytes(row[1]), threshold, check_subgroup=False) for row in rows
+        })
+
+def _ceremony_state(db: Session, election_id: str):
+    ceremony = _ceremony(db, election_id)
+    participants = db.execute(
+        text("""
+        SELECT trustee_index, trustee_id, transport_key, commitments,
+               shares_dealt_at IS NOT NULL, confirmed_at IS NOT NULL, verification_key, complaints
+        FROM dkg_participants
+        WHERE election_id = CAST(:eid AS uuid)
+        ORDER BY trustee_index
+        """),
+        {"eid": election_id}
+    ).fetchall()
+    public_key = None
+    if ceremony[4] == "COMPLETED":
+        public_key = db.execute(
+            text("SELECT public_key FROM elections WHERE election_id = CAST(:eid AS uuid)"),
+            {"eid": election_id}
+        ).scalar()
+
+    return {
+        "election_id": election_id,
+        "ceremony_id": str(ceremony[0]),
+        "threshold": ceremony[1],
+        "total_trustees": ceremony[2],
+        "round": ceremony[3],
+        "status": ceremony[4],
+        "failure_reason": ceremony[5],
+        "started_at": str(ceremony[6]),
+        "completed_at": str(ceremony[7]) if ceremony[7] else None,
+        "public_key": public_key,
+        "participants": [
+            {
+                "trustee_index": p[0],
+                "trustee_id": str(p[1]),
+                "transport_key": _encode(p[2]),
+                "commitments": _encode(p[3]),
+                "shares_dealt": p[4],
+                "confirmed": p[5],
+                "verification_key": _encode(p[6]),
+                "complaints": p[7] or [],
+            }
+            for p in participants
+        ]
+    }
+
+@router.post("/start")
+def start_dkg(payload: DkgStartRequest, db: Session = Depends(get_db),
+              admin: Principal = Depends(require_admin)):
+    """
+    Open a key generation ceremony for the election's first n trustees
+    (by the order they were added; trustee_index 1..n). Calling it again
+    returns the running ceremony.
+    """
+    election_id = _uuid(payload.election_id, "election ID")
+    election = db.execute(
+        text("""
+        SELECT threshold_t, total_trustees_n, public_key
+        FROM elections
+        WHERE election_id = CAST(:eid AS uuid)
+        """),
+        {"eid": election_id}
+    ).fetchone()
+    if not election:
+        raise HTTPException(status_code=404, detail="Election not found")
+    threshold, total_trustees, public_key = election
+    if public_key:
+        raise HTTPException(status_code=400, detail="Key ceremony already completed for this election")
+    if not 1 <= threshold <= total_trustees:
+        raise HTTPException(status_code=400, detail="Election threshold must be between 1 and the number of trustees")
+
+    existing = db.execute(
+        text("SELECT status FROM dkg_ceremonies WHERE election_id = CAST(:eid AS uuid) FOR UPDATE"),
+        {"eid": election_id}
+    ).scalar()
+    if existing and not payload.restart:
+        if existing == "FAILED":
+            raise HTTPException(status_code=409, detail="Ceremony failed; start it again with restart=true")
+        return _ceremony_state(db, election_id)
+
+    trustee_count = db.execute(
+        text("SELECT COUNT(*) FROM trustees WHERE election_id = CAST(:eid AS uuid)"),
+        {"eid": election_id}
+    ).scalar()
+    if trustee_count < total_trustees:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough trustees accepted. Need {total_trustees}, have {trustee_count}"
+        )
+
+    if existing:
+        # Cascades to participants and dealt shares
+        db.execute(text("DELETE FROM dkg_ceremonies WHERE election_id = CAST(:eid AS uuid)"), {"eid": election_id})
+    db.execute(
+        text("""
+        INSERT INTO dkg_ceremonies (election_id, threshold, total_trustees)
+        VALUES (CAST(:eid AS uuid), :t, :n)
+        """),
+        {"eid": election_id, "t": threshold, "n": total_trustees}
+    )
+    db.execute(
+        text("""
+        INSERT INTO dkg_participants (election_id, trustee_index, trustee_id)
+        SELECT election_id, row_number() OVER (ORDER BY created_at, trustee_id), trustee_id
+        FROM trustees
+        WHERE election_id = CAST(:eid AS uuid)
+        ORDER BY created_at, trustee_id
+        LIMIT :n
+        """),
+        {"eid": election_id, "n": total_trustees}
+    )
+    db.commit()
+
+    logger.info("Key generation ceremony started", extra={
+        "election_id": election_id, "threshold": threshold, "trustees": total_trustees,
+        "restart": bool(existing), "user_id": admin.user_id
+    })
+    return _ceremony_state(db, election_id)
+
+@router.get("/{election_id}")
+def get_dkg_state(election_id: str, db: Session = Depends(get_db),
+                  principal: Principal = Depends(get_principal)):
+    """Round, status and every participant's public values"""
+    election_id = _uuid(election_id, "election ID")
+    _require_viewer(db, election_id, principal)
+    return _ceremony_state(db, election_id)
+
+@router.post("/{election_id}/commitments")
+def submit_commitments(election_id: str, payload: CommitmentsRequest, db: Session = Depends(get_db),
+                       principal: Principal = Depends(get_principal)):
+    """Round 1: a trustee's transport key and Feldman commitments"""
+    election_id = _uuid(election_id, "election ID")
+    ceremony = _ceremony(db, election_id, lock=True)
+    index, stored, stored_key = _participant(db, election_id, payload.trustee_id, principal)[:3]
+
+    transport_key = _b64(payload.transport_key, "transport_key")
+    commitments = _b64(payload.commitments, "commitments")
+    if stored is not None:
+        if (bytes(stored), bytes(stored_key)) != (commitments, transport_key):
+            raise HTTPException(status_code=409, detail="Trustee already submitted different commitments")
+        db.rollback()
+        return _ceremony_state(db, election_id)
+    _running(ceremony, ROUND_COMMITMENTS)
+
+    if len(transport_key) != 32:
+        raise HTTPException(status_code=400, detail="transport_key must be a 32-byte X25519 public key")
+    try:
+        with span("dkg.check_commitments", stage=STAGE_CRYPTO, threshold=ceremony[1]):
+            points = dkg.unpack_points(commitments, ceremony[1])
+    except dkg.DkgError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid commitments: {e}")
+    if points[0].is_point_at_infinity():
+        raise HTTPException(status_code=400, detail="Invalid commitments: constant term is the identity")
+
+    db.execute(
+        text("""
+        UPDATE dkg_participants
+        SET transport_key = :key, commitments = :commitments, committed_at = NOW()
+        WHERE election_id = CAST(:eid AS uuid) AND trustee_index = :idx
+        """),
+        {"eid": election_id, "idx": index, "key": transport_key, "commitments": commitments}
+    )
+    _advance(db, election_id, ROUND_COMMITMENTS, "committed_at")
+    db.commit()
+    return _ceremony_state(db, election_id)
+
+@router.post("/{election_id}/shares")
+def deal_shares(election_id: str, payload: DealSharesRequest, db: Session = Depends(get_db),
+                principal: Principal = Depends(get_principal)):
+    """Round 2: a dealer's shares for every other trustee, each sealed to the recipient's transport key"""
+    election_id = _uuid(election_id, "election ID")
+    ceremony = _ceremony(db, election_id, lock=True)
+    index, _, _, dealt_at, _ = _participant(db, election_id, payload.trustee_id, principal)
+    if dealt_at is not None:
+        db.rollback()
+        return {"election_id": election_id, "dealer_index": index, "round": ceremony[3]}
+    _running(ceremony, ROUND_SHARES)
+
+    try:
+        recipients = sorted(int(k) for k in payload.shares)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="shares must be keyed by recipient index")
+    expected = [j for j in range(1, ceremony[2] + 1) if j != index]
+    if recipients != expected:
+        raise HTTPException(status_code=400, detail=f"Expected one share for each of trustees {expected}")
+    ciphertexts = [_b64(payload.shares[str(j)], f"shares[{j}]") for j in recipients]
+    for j, ciphertext in zip(recipients, ciphertexts):
+        try:
+            ballot_format.parse_ballot(ciphertext)
+        except ballot_format.BallotFormatError as e:
+            raise HTTPException(status_code=400, detail=f"shares[{j}]: {e}")
+
+    db.execute(
+        text("""
+        INSERT INTO dkg_shares (election_id, recipient_index, dealer_index, ciphertext)
+        SELECT CAST(:eid AS uuid), s.recipient_index, :dealer, s.ciphertext
+        FROM unnest(CAST(:recipients AS integer[]), CAST(:ciphertexts AS bytea[])) AS s(recipient_index, ciphertext)
+        ON CONFLICT DO NOTHING
+        """),
+        {"eid": election_id, "dealer": index, "recipients": recipients, "ciphertexts": ciphertexts}
+    )
+    db.execute(
+        text("""
+        UPDATE dkg_participants SET shares_dealt_at = NOW()
+        WHERE election_id = CAST(:eid AS uuid) AND trustee_index = :idx
+        """),
+        {"eid": election_id, "idx": index}
+    )
+    _advance(db, election_id, ROUND_SHARES, "shares_dealt_at")
+    db.commit()
+    return {"election_id": election_id, "dealer_index": index, "round": _ceremony(db, election_id)[3]}
+
+@router.get("/{election_id}/shares/{trustee_id}")
+def get_dealt_shares(election_id: str, trustee_id: str, db: Session = Depends(get_db),
+                     principal: Principal = Depends(get_principal)):
+    """Round 3: the sealed shares every other dealer sent to this trustee"""
+    election_id = _uuid(election_id, "election ID")
+    ceremony = _ceremony(db, election_id)
+    index = _participant(db, election_id, trustee_id, principal)[0]
+    _running(ceremony, ROUND_CONFIRM)
+
+    rows = db.execute(
+        text("""
+        SELECT dealer_index, ciphertext
+        FROM dkg_shares
+        WHERE election_id = CAST(:eid AS uuid) AND recipient_index = :idx
+        ORDER BY dealer_index
+        """),
+        {"eid": election_id, "idx": index}
+    ).fetchall()
+    return {
+        "election_id": election_id,
+        "recipient_index": index,
+        "shares": {str(r[0]): _encode(r[1]) for r in rows}
+    }
+
+@router.post("/{election_id}/confirm")
+def confirm_share(election_id: str, payload: ConfirmRequest, db: Session = Depends(get_db),
+                  principal: Principal = Depends(get_principal)):
+    """
+    Round 3: a trustee accepts its combined share by publishing the
+    verification key s_j * B (checked against the joint commitments), or
+    complains about dealers whose share did not verify, which fails the
+    ceremony. The last confirmation completes it.
+    """
+    election_id = _uuid(election_id, "election ID")
+    ceremony = _ceremony(db, election_id, lock=True)
+    index, _, _, _, confirmed_at = _participant(db, election_id, payload.trustee_id, principal)
+    if confirmed_at is not None:
+        db.rollback()
+        return _ceremony_state(db, election_id)
+    _running(ceremony, ROUND_CONFIRM)
+    threshold, total_trustees = ceremony[1], ceremony[2]
+
+    if payload.complaints:
+        accused = sorted(set(payload.complaints))
+        if any(not 1 <= i <= total_trustees or i == index for i in accused):
+            raise HTTPException(status_code=400, detail="complaints must name other trustees' indexes")
+        reason = f"Trustee {index} complained about the shares dealt by trustee(s) {accused}"
+        db.execute(
+            text("""
+            UPDATE dkg_participants SET complaints = CAST(:accused AS integer[]), confirmed_at = NOW()
+            WHERE election_id = CAST(:eid AS uuid) AND trustee_index = :idx
+            """),
+            {"eid": election_id, "idx": index, "accused": accused}
+        )
+        db.execute(
+            text("""
+            UPDATE dkg_ceremonies SET status = 'FAILED', failure_reason = :reason
+            WHERE election_id = CAST(:eid AS uuid)
+            """),
+            {"eid": election_id, "reason": reason}
+        )
+        db.commit()
+        logger.warning("Key generation ceremony failed", extra={
+            "election_id": election_id, "trustee_index": index, "accused": accused
+        })
+        return _ceremony_state(db, election_id)
+
+    if not payload.verification_key:
+        raise HTTPException(status_code=400, detail="verification_key or complaints is required")
+    verification_key = _b64(payload.verification_key, "verification_key")
+    try:
+        point = dkg.decode_point(verification_key)
+    except dkg.DkgError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid verification_key: {e}")
+    joint = _joint_commitments(db, election_id, threshold)
+    with span("dkg.check_verification_key", stage=STAGE_CRYPTO):
+        if point != dkg.evaluate_commitments(joint, index):
+            raise HTTPException(status_code=400, detail="verification_key does not match the joint commitments")
+
+    db.execute(
+        text("""
+        UPDATE dkg_participants SET verification_key = :key, confirmed_at = NOW()
+        WHERE election_id = CAST(:eid AS uuid) AND trustee_index = :idx
+        """),
+        {"eid": election_id, "idx": index, "key": verification_key}
+    )
+    pending = db.execute(
+        text("""
+        SELECT COUNT(*) FROM dkg_participants
+        WHERE election_id = CAST(:eid AS uuid) AND confirmed_at IS NULL
+        """),
+        {"eid": election_id}
+    ).scalar()
+    if pending:
+        db.commit()
+        return _ceremony_state(db, election_id)
+
+    return _complete(db, election_id, threshold, total_trustees, joint)
+
+def _complete(db: Session, election_id: str, threshold: int, total_trustees: int, joint: List):
+    """Publish the election key and each trustee's public share information"""
+    public_key = base64.b64encode(dkg.x25519_public_key(joint[0])).decode()
+    key_id = hashlib.sha256(dkg.encode_point(joint[0])).hexdigest()[:16]
+
+    participants = db.execute(
+        text("""
+        SELECT trustee_id, trustee_index, verification_key
+        FROM dkg_participants
+        WHERE election_id = CAST(:eid AS uuid)
+        """),
+        {"eid": election_id}
+    ).fetchall()
+    packages = [
+        json.dumps({
+            "trustee_index": p[1],
+            "verification_key": _encode(p[2]),
+            "threshold": threshold,
+            "total_trustees": total_trustees,
+            "key_type": KEY_TYPE,
+            "key_id": key_id,
+        })
+        for p in participants
+    ]
+
+    db.execute(
+        text("UPDATE elections SET public_key = :pubkey WHERE election_id = CAST(:eid AS uuid)"),
+        {"eid": election_id, "pubkey": public_key}
+    )
+    db.execute(
+        text("""
+        UPDATE trustees t
+        SET public_key_share = s.package
+        FROM unnest(CAST(:tids AS uuid[]), CAST(:packages AS text[])) AS s(trustee_id, package)
+        WHERE t.trustee_id = s.trustee_id
+        """),
+        {"tids": [str(p[0]) for p in participants], "packages": packages}
+    )
+    db.execute(
+        text("""
+        UPDATE dkg_ceremonies SET status = 'COMPLETED', completed_at = NOW()
+        WHERE election_id = CAST(:eid AS uuid)
+        """),
+        {"eid": election_id}
+    )
+    # Sealed shares are of no further use once every trustee has confirmed
+    db.execute(text("DELETE FROM dkg_shares WHERE election_id = CAST(:eid AS uuid)"), {"eid": election_id})
+    db.commit()
+    invalidate_election(election_id)
+
+    logger.info("Key generation ceremony completed", extra={
+        "election_id": election_id, "threshold": threshold, "trustees": total_trustees
+    })
+
+    # Log to bulletin board and audit trail
+    try:
+        create_key_generated_entry(
+            election_id=election_id,
+            public_key=public_key,
+            threshold=threshold,
+            participants=total_trustees
+        )
+
+        audit_key_ceremony(
+            db=db,
+            election_id=election_id,
+            trustees_count=total_trustees,
+            threshold=threshold
+        )
+    except Exception as e:
+        logger.error(f"Failed to create key ceremony logs: {e}")
+
+    return _ceremony_state(db, election_id)
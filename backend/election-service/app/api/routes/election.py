@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from shared.database import get_db
+from shared.auth import Principal, get_optional_principal
 from shared.bulletin_helper import (
     create_election_created_entry,
     create_key_generated_entry,
@@ -16,12 +17,23 @@ from shared.audit_helper import (
     audit_key_ceremony,
     audit_tally_completed
 )
-from typing import List, Optional
+from shared.election_cache import get_election_metadata, invalidate_election
+from shared.stats import get_counters, get_ballot_count
+from shared.http_cache import not_modified, make_etag, CACHE_REVALIDATE, CACHE_SHORT, CACHE_STABLE, CACHE_FINAL
+from shared.pagination import clamp_limit, decode_cursor, paginate, prefix_pattern
+from app.utils.proof_audit import verify_election_proofs
+from datetime import datetime
+from typing import List, Literal, Optional
 import logging
+import os
+import uuid
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Re-verify every ballot proof before decrypting (app/utils/proof_audit.py)
+TALLY_VERIFY_PROOFS = os.getenv("TALLY_VERIFY_PROOFS", "true").lower() == "true"
+
 class ElectionCreate(BaseModel):
     title: str
     description: str | None = None
@@ -31,12 +43,19 @@ class ElectionCreate(BaseModel):
     total_trustees_n: int = 9
 
 @router.post("/create")
-def create_election(payload: ElectionCreate, db: Session = Depends(get_db)):
+def create_election(payload: ElectionCreate, db: Session = Depends(get_db),
+                    principal: Optional[Principal] = Depends(get_optional_principal)):
+    # A bearer token is verified locally against the auth service's JWKS; its admin becomes the creator.
+    # Anonymous calls keep the old behaviour of attributing the election to the first admin.
+    if principal is not None and not principal.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
     # Create election
     result = db.execute(
         text("""
         INSERT INTO elections (title, description, start_time, end_time, threshold_t, total_trustees_n, created_by)
-        VALUES (:t, :d, :st, :et, :tt, :nn, (SELECT user_id FROM users WHERE is_admin = true LIMIT 1))
+        VALUES (:t, :d, :st, :et, :tt, :nn,
+                COALESCE(CAST(:created_by AS uuid), (SELECT user_id FROM users WHERE is_admin = true LIMIT 1)))
         RETURNING election_id, created_by
         """),
         {
@@ -45,7 +64,8 @@ def create_election(payload: ElectionCreate, db: Session = Depends(get_db)):
             "st": payload.start_time,
             "et": payload.end_time,
             "tt": payload.threshold_t,
-            "nn": payload.total_trustees_n
+            "nn": payload.total_trustees_n,
+            "created_by": principal.user_id if principal else None
         }
     ).fetchone()
     db.commit()
@@ -96,14 +116,58 @@ class ElectionResponse(BaseModel):
 
 
 @router.get("/list", response_model=List[ElectionResponse])
-def list_elections(db: Session = Depends(get_db)):
+def list_elections(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default PAGE_DEFAULT_LIMIT, capped at PAGE_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    status: Optional[Literal["DRAFT", "ACTIVE", "CLOSED", "TALLIED"]] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=255, description="Title prefix"),
+    db: Session = Depends(get_db)
+):
+    limit = clamp_limit(limit)
+    conditions = ["true"]
+    params = {"limit": limit + 1}
+    
+    if status:
+        conditions.append("status = :status")
+        params["status"] = status
+    if created_after:
+        conditions.append("created_at >= :created_after")
+        params["created_after"] = created_after
+    if created_before:
+        conditions.append("created_at < :created_before")
+        params["created_before"] = created_before
+    if name_prefix:
+        conditions.append("lower(title) LIKE :name_pattern")
+        params["name_pattern"] = prefix_pattern(name_prefix)
+    
+    after = decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID))
+    if after:
+        conditions.append("(created_at, election_id) < (:after_created, :after_id)")
+        params["after_created"], params["after_id"] = after
+    
     rows = db.execute(
-        text("""
-        SELECT election_id, title, description, start_time, end_time, status, threshold_t, total_trustees_n
+        text(f"""
+        SELECT election_id, title, description, start_time, end_time, status, threshold_t, total_trustees_n, created_at,
+               updated_at
         FROM elections
-        ORDER BY created_at DESC
-        """)
+        WHERE {" AND ".join(conditions)}
+        ORDER BY created_at DESC, election_id DESC
+        LIMIT :limit
+        """),
+        params
     ).fetchall()
+    # Validator from the page itself (query and cursor, then each fetched row's id and updated_at,
+    # including the probe row behind X-Next-Cursor): any insert, update or delete that changes
+    # this page changes the ETag, without reading the rest of the table
+    etag = make_etag("elections", request.url.query, *(f"{row[0]}@{row[9]}" for row in rows))
+    cached = not_modified(request, response, etag, CACHE_SHORT)
+    if cached:
+        return cached
+    rows = paginate(request, response, rows, limit, lambda row: (row[8], row[0]))
     
     return [
         ElectionResponse(
@@ -141,51 +205,30 @@ class ElectionDetailResponse(BaseModel):
 
 
 @router.get("/{election_id}", response_model=ElectionDetailResponse)
-def get_election(election_id: str, db: Session = Depends(get_db)):
-    # Get election details including public key
-    election_row = db.execute(
-        text("""
-        SELECT election_id, title, description, start_time, end_time, status, threshold_t, total_trustees_n, public_key
-        FROM elections
-        WHERE election_id::text = :eid
-        """),
-        {"eid": election_id}
-    ).fetchone()
+def get_election(election_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    # Election details, public key and candidates (cached once the election leaves DRAFT)
+    election = get_election_metadata(db, election_id)
     
-    if not election_row:
+    if not election:
         raise HTTPException(status_code=404, detail="Election not found")
     
-    # Get candidates for this election
-    candidate_rows = db.execute(
-        text("""
-        SELECT candidate_id, name, party, display_order
-        FROM candidates
-        WHERE election_id::text = :eid
-        ORDER BY display_order
-        """),
-        {"eid": election_id}
-    ).fetchall()
+    cache_control = CACHE_REVALIDATE if election["status"] == "DRAFT" else CACHE_STABLE
+    cached = not_modified(request, response, election["etag"], cache_control)
+    if cached:
+        return cached
     
-    candidates = [
-        CandidateResponse(
-            candidate_id=str(row[0]),
-            name=row[1],
-            party=row[2],
-            display_order=row[3]
-        )
-        for row in candidate_rows
-    ]
+    candidates = [CandidateResponse(**c) for c in election["candidates"]]
     
     return ElectionDetailResponse(
-        election_id=str(election_row[0]),
-        title=election_row[1],
-        description=election_row[2],
-        start_time=str(election_row[3]),
-        end_time=str(election_row[4]),
-        status=election_row[5],
-        threshold_t=election_row[6],
-        total_trustees_n=election_row[7],
-        public_key=election_row[8],  # Add public key from database
+        election_id=election["election_id"],
+        title=election["title"],
+        description=election["description"],
+        start_time=election["start_time"],
+        end_time=election["end_time"],
+        status=election["status"],
+        threshold_t=election["threshold_t"],
+        total_trustees_n=election["total_trustees_n"],
+        public_key=election["public_key"],
         candidates=candidates
     )
 
@@ -221,6 +264,7 @@ def add_candidate(payload: CandidateCreate, db: Session = Depends(get_db)):
         }
     ).fetchone()
     db.commit()
+    invalidate_election(payload.election_id)
     return {"candidate_id": str(row[0])}
 
 
@@ -233,31 +277,14 @@ class DashboardStats(BaseModel):
 
 @router.get("/stats/dashboard", response_model=DashboardStats)
 def get_dashboard_stats(db: Session = Depends(get_db)):
-    # Get total elections
-    total_elections = db.execute(
-        text("SELECT COUNT(*) FROM elections")
-    ).fetchone()[0]
-    
-    # Get active elections
-    active_elections = db.execute(
-        text("SELECT COUNT(*) FROM elections WHERE status = 'ACTIVE'")
-    ).fetchone()[0]
-    
-    # Get total voters (non-admin users)
-    total_voters = db.execute(
-        text("SELECT COUNT(*) FROM users WHERE is_admin = false")
-    ).fetchone()[0]
-    
-    # Get pending KYC
-    pending_kyc = db.execute(
-        text("SELECT COUNT(*) FROM users WHERE kyc_status = 'PENDING'")
-    ).fetchone()[0]
+    # Trigger-maintained counters: O(1) regardless of table size
+    counters = get_counters(db)
     
     return DashboardStats(
-        total_elections=total_elections,
-        active_elections=active_elections,
-        total_voters=total_voters,
-        pending_kyc=pending_kyc
+        total_elections=counters.get("elections_total", 0),
+        active_elections=counters.get("elections_active", 0),
+        total_voters=counters.get("voters_total", 0),
+        pending_kyc=counters.get("kyc_pending", 0)
     )
 
 
@@ -302,24 +329,17 @@ def update_election_status(
             detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
         )
     
-    # Check if election exists
-    election = db.execute(
-        text("SELECT status FROM elections WHERE election_id::text = :eid"),
-        {"eid": election_id}
-    ).fetchone()
+    # Check if election exists (fresh read: this gates a status transition)
+    election = get_election_metadata(db, election_id, fresh=True)
     
     if not election:
         raise HTTPException(status_code=404, detail="Election not found")
     
-    current_status = election[0]
+    current_status = election["status"]
     
-    # Get election details for logging
-    election_details = db.execute(
-        text("SELECT title, created_by FROM elections WHERE election_id::text = :eid"),
-        {"eid": election_id}
-    ).fetchone()
-    election_title = election_details[0] if election_details else "Unknown"
-    created_by = str(election_details[1]) if election_details and election_details[1] else None
+    # Election details for logging
+    election_title = election["title"] or "Unknown"
+    created_by = election["created_by"]
     
     # Update status
     db.execute(
@@ -331,6 +351,7 @@ def update_election_status(
         {"status": payload.status, "eid": election_id}
     )
     db.commit()
+    invalidate_election(election_id)
     
     # Log status changes to bulletin board and audit trail
     try:
@@ -339,10 +360,7 @@ def update_election_status(
             audit_election_activated(db, election_id, created_by, election_title)
         elif payload.status == "CLOSED":
             # Election closed - get vote count
-            vote_count = db.execute(
-                text("SELECT COUNT(*) FROM ballots WHERE election_id::text = :eid"),
-                {"eid": election_id}
-            ).fetchone()[0]
+            vote_count = get_ballot_count(db, election_id)
             
             create_election_closed_entry(
                 election_id=election_id,
@@ -458,6 +476,7 @@ def update_election(
         params
     )
     db.commit()
+    invalidate_election(election_id)
     
     return {
         "message": "Election updated successfully",
@@ -473,29 +492,23 @@ def tally_election(election_id: str, db: Session = Depends(get_db)):
     Process:
     1. Check election is CLOSED
     2. Verify enough trustees have submitted decryption shares (threshold met)
-    3. Decrypt each ballot using combined partial decryptions
-    4. Count votes per candidate
-    5. Store results in election_results table
-    6. Update election status to TALLIED
+    3. Re-verify every ballot proof (batched, see app/utils/proof_audit.py)
+    4. Decrypt each ballot using combined partial decryptions
+    5. Count votes per candidate
+    6. Store results in election_results table
+    7. Update election status to TALLIED
     """
     
     import hashlib
     import json as json_lib
     
-    # 1) Check election exists and is CLOSED
-    election = db.execute(
-        text("""
-        SELECT status, threshold_t, total_trustees_n 
-        FROM elections 
-        WHERE election_id::text = :eid
-        """),
-        {"eid": election_id}
-    ).fetchone()
+    # 1) Check election exists and is CLOSED (fresh read: tallying changes the status)
+    election = get_election_metadata(db, election_id, fresh=True)
     
     if not election:
         raise HTTPException(status_code=404, detail="Election not found")
     
-    status, threshold, total_trustees = election[0], election[1], election[2]
+    status, threshold, total_trustees = election["status"], election["threshold_t"], election["total_trustees_n"]
     
     if status != "CLOSED":
         raise HTTPException(
@@ -536,20 +549,30 @@ def tally_election(election_id: str, db: Session = Depends(get_db)):
     if not ballots:
         raise HTTPException(status_code=400, detail="No ballots to tally")
     
-    # 4) Get all candidates for this election
-    candidates = db.execute(
-        text("""
-        SELECT candidate_id 
-        FROM candidates 
-        WHERE election_id::text = :eid
-        """),
-        {"eid": election_id}
-    ).fetchall()
+    # 3b) Refuse to tally if any stored ballot fails its proof
+    if TALLY_VERIFY_PROOFS:
+        proof_report = verify_election_proofs(db, election_id)
+        if proof_report["invalid"]:
+            logger.error("Tally refused: invalid ballot proofs", extra={
+                "election_id": election_id,
+                "invalid": len(proof_report["invalid"])
+            })
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "error": "invalid_ballot_proofs",
+                    "count": len(proof_report["invalid"]),
+                    "ballot_ids": proof_report["invalid"][:20]
+                }
+            )
+    
+    # 4) Candidates for this election (loaded with the election metadata)
+    candidates = election["candidates"]
     
     if not candidates:
         raise HTTPException(status_code=400, detail="No candidates found for this election")
     
-    candidate_ids = [str(c[0]) for c in candidates]
+    candidate_ids = [c["candidate_id"] for c in candidates]
     vote_counts = {cid: 0 for cid in candidate_ids}
     
     # 5) Decrypt each ballot using threshold decryption
@@ -625,26 +648,17 @@ def tally_election(election_id: str, db: Session = Depends(get_db)):
     )
     
     db.commit()
+    invalidate_election(election_id)
     
     # 9) Log to bulletin board and audit trail
     try:
-        # Get election details and winner
-        election_info = db.execute(
-            text("SELECT title, created_by FROM elections WHERE election_id::text = :eid"),
-            {"eid": election_id}
-        ).fetchone()
-        election_title = election_info[0] if election_info else "Unknown"
-        created_by = str(election_info[1]) if election_info and election_info[1] else None
+        created_by = election["created_by"]
         
         # Find winner
         winner_candidate_id = max(vote_counts.items(), key=lambda x: x[1])[0] if vote_counts else None
-        winner_name = None
-        if winner_candidate_id:
-            winner_row = db.execute(
-                text("SELECT name FROM candidates WHERE candidate_id::text = :cid"),
-                {"cid": winner_candidate_id}
-            ).fetchone()
-            winner_name = winner_row[0] if winner_row else None
+        winner_name = next(
+            (c["name"] for c in candidates if c["candidate_id"] == winner_candidate_id), None
+        )
         
         # Post to bulletin board
         create_result_published_entry(
@@ -678,7 +692,7 @@ def tally_election(election_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{election_id}/results")
-def get_election_results(election_id: str, db: Session = Depends(get_db)):
+def get_election_results(election_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get election results after tallying.
     
@@ -692,24 +706,22 @@ def get_election_results(election_id: str, db: Session = Depends(get_db)):
     import json as json_lib
     
     # 1) Check election exists and is TALLIED
-    election = db.execute(
-        text("""
-        SELECT election_id, title, description, status, start_time, end_time
-        FROM elections 
-        WHERE election_id::text = :eid
-        """),
-        {"eid": election_id}
-    ).fetchone()
+    election = get_election_metadata(db, election_id)
     
     if not election:
         raise HTTPException(status_code=404, detail="Election not found")
     
-    if election[3] != "TALLIED":
+    if election["status"] != "TALLIED":
         raise HTTPException(
             status_code=400,
-            detail=f"Election results not available. Status: {election[3]}"
+            detail=f"Election results not available. Status: {election['status']}"
         )
     
+    # Results only change when the election is re-tallied, which bumps updated_at
+    cached = not_modified(request, response, make_etag("results", election["etag"]), CACHE_FINAL)
+    if cached:
+        return cached
+    
     # 2) Get results with candidate details
     results = db.execute(
         text("""
@@ -731,8 +743,8 @@ def get_election_results(election_id: str, db: Session = Depends(get_db)):
         # Election is tallied but no results found (maybe no votes cast)
         return {
             "election_id": election_id,
-            "election_title": election[1],
-            "status": election[3],
+            "election_title": election["title"],
+            "status": election["status"],
             "results": [],
             "total_votes": 0
         }
@@ -753,8 +765,8 @@ def get_election_results(election_id: str, db: Session = Depends(get_db)):
     
     return {
         "election_id": election_id,
-        "election_title": election[1],
-        "status": election[3],
+        "election_title": election["title"],
+        "status": election["status"],
         "results": formatted_results,
         "total_votes": total_votes
     }
@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from shared.database import get_db
+from shared.database import SessionLocal, get_db
+from shared import ballot_export
 from shared.bulletin_helper import create_trustee_share_entry, create_key_generated_entry
 from shared.audit_helper import audit_trustee_share_submitted, audit_key_ceremony
+from shared.tracing import span, STAGE_CRYPTO
+from shared.election_cache import get_election_metadata, invalidate_election
+from shared.pagination import clamp_limit, decode_cursor, paginate
+from shared.http_cache import not_modified, CACHE_FINAL
+from datetime import datetime
 from typing import List, Optional
 import sys
+import base64
+import hashlib
+import uuid
 import json
 import logging
+import re
+import zlib
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +67,12 @@ class SubmitShareRequest(BaseModel):
     trustee_id: str
     decryption_shares: dict  # {ballot_id: partial_decryption}
 
+class ShareChunkRequest(BaseModel):
+    shares: dict  # {ballot_id: partial_decryption}, one chunk of the full map
+
+class CompleteSharesRequest(BaseModel):
+    chunks: int  # chunk indexes 0..chunks-1 must all have been uploaded
+
 class MyElectionResponse(BaseModel):
     trustee_id: str
     election_id: str
@@ -178,11 +196,26 @@ def add_trustee(payload: TrusteeAdd, db: Session = Depends(get_db)):
     }
 
 @router.get("/election/{election_id}", response_model=List[TrusteeResponse])
-def get_election_trustees(election_id: str, db: Session = Depends(get_db)):
-    """Get all trustees for an election"""
+def get_election_trustees(
+    election_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default PAGE_DEFAULT_LIMIT, capped at PAGE_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Get the trustees for an election, in the order they were added, one page at a time"""
+    limit = clamp_limit(limit)
+    conditions = ["t.election_id = CAST(:eid AS uuid)"]
+    params = {"eid": election_id, "limit": limit + 1}
+    
+    after = decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID))
+    if after:
+        conditions.append("(t.created_at, t.trustee_id) > (:after_created, :after_id)")
+        params["after_created"], params["after_id"] = after
     
     trustees = db.execute(
-        text("""
+        text(f"""
         SELECT 
             t.trustee_id, t.election_id, t.user_id, u.email, u.full_name,
             (t.public_key_share IS NOT NULL) as has_key_share,
@@ -190,11 +223,13 @@ def get_election_trustees(election_id: str, db: Session = Depends(get_db)):
             t.created_at
         FROM trustees t
         JOIN users u ON t.user_id = u.user_id
-        WHERE t.election_id = CAST(:eid AS uuid)
-        ORDER BY t.created_at
+        WHERE {" AND ".join(conditions)}
+        ORDER BY t.created_at, t.trustee_id
+        LIMIT :limit
         """),
-        {"eid": election_id}
+        params
     ).fetchall()
+    trustees = paginate(request, response, trustees, limit, lambda row: (row[7], row[0]))
     
     return [
         TrusteeResponse(
@@ -264,7 +299,8 @@ def initiate_key_ceremony(payload: KeyCeremonyRequest, db: Session = Depends(get
     print(f"[TRUSTEE] Threshold: {threshold}, Total Trustees: {total_trustees}")
     
     # Generate election keypair with trustee shares
-    key_material = generate_election_keypair_with_trustees(threshold, total_trustees)
+    with span("threshold.generate_keypair", stage=STAGE_CRYPTO, threshold=threshold, trustees=total_trustees):
+        key_material = generate_election_keypair_with_trustees(threshold, total_trustees)
     
     public_key_pem = key_material['public_key'].decode('utf-8')
     trustee_shares = key_material['trustee_shares']
@@ -301,6 +337,7 @@ def initiate_key_ceremony(payload: KeyCeremonyRequest, db: Session = Depends(get
         trustees_updated += 1
     
     db.commit()
+    invalidate_election(payload.election_id)
     
     print(f"[TRUSTEE] Key ceremony completed. Updated {trustees_updated} trustees")
     
@@ -368,50 +405,201 @@ def submit_decryption_share(payload: SubmitShareRequest, db: Session = Depends(g
     
     db.commit()
     
-    election_id = str(trustee[1])
-    share_count = len(payload.decryption_shares)
-    
+    return _shares_submitted(db, payload.trustee_id, str(trustee[1]), len(payload.decryption_shares))
+
+def _shares_submitted(db: Session, trustee_id: str, election_id: str, share_count: int):
     # Log to bulletin board and audit trail
     try:
         create_trustee_share_entry(
             election_id=election_id,
-            trustee_id=payload.trustee_id,
+            trustee_id=trustee_id,
             share_count=share_count
         )
         
         audit_trustee_share_submitted(
             db=db,
             election_id=election_id,
-            trustee_id=payload.trustee_id,
+            trustee_id=trustee_id,
             share_count=share_count
         )
     except Exception as e:
         logger.error(f"Failed to create trustee share logs: {e}")
     
     return {
-        "trustee_id": payload.trustee_id,
+        "trustee_id": trustee_id,
         "election_id": election_id,
         "shares_count": share_count,
         "message": "Decryption shares submitted successfully"
     }
 
-@router.get("/election/{election_id}/decryption-status")
-def get_decryption_status(election_id: str, db: Session = Depends(get_db)):
-    """Check if enough trustees have submitted decryption shares"""
+def _trustee_with_key_share(db: Session, trustee_id: str):
+    try:
+        trustee_id = str(uuid.UUID(trustee_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid trustee ID")
+    trustee = db.execute(
+        text("""
+        SELECT trustee_id, election_id, public_key_share
+        FROM trustees
+        WHERE trustee_id = CAST(:tid AS uuid)
+        """),
+        {"tid": trustee_id}
+    ).fetchone()
+    if not trustee:
+        raise HTTPException(status_code=404, detail="Trustee not found")
+    if not trustee[2]:
+        raise HTTPException(status_code=400, detail="Trustee has not received key share yet")
+    return trustee_id, str(trustee[1])
+
+def _share_chunk_digest(shares: dict) -> str:
+    """SHA-256 of a chunk's canonical JSON (backend/trustee/decrypt.py computes the same)"""
+    return hashlib.sha256(json.dumps(shares, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+@router.put("/{trustee_id}/decryption-share/chunks/{chunk_index}")
+def upload_decryption_share_chunk(trustee_id: str, chunk_index: int, payload: ShareChunkRequest,
+                                  db: Session = Depends(get_db)):
+    """
+    Upload one chunk of a trustee's partial decryptions (used by the trustee
+    CLI, backend/trustee). Idempotent: re-sending a chunk replaces it, so an
+    interrupted upload resumes by sending the chunks missing from
+    GET /{trustee_id}/decryption-share/chunks.
+    """
+    trustee_id, election_id = _trustee_with_key_share(db, trustee_id)
+    if chunk_index < 0:
+        raise HTTPException(status_code=400, detail="chunk_index must be >= 0")
+    if not payload.shares or not all(isinstance(v, str) for v in payload.shares.values()):
+        raise HTTPException(status_code=400, detail="shares must map ballot ids to partial decryptions")
     
-    election = db.execute(
+    digest = _share_chunk_digest(payload.shares)
+    db.execute(
         text("""
-        SELECT threshold_t, total_trustees_n 
-        FROM elections 
-        WHERE election_id = CAST(:eid AS uuid)
+        INSERT INTO decryption_share_chunks (trustee_id, chunk_index, shares, share_count, digest)
+        VALUES (CAST(:tid AS uuid), :idx, CAST(:shares AS jsonb), :count, :digest)
+        ON CONFLICT (trustee_id, chunk_index) DO UPDATE SET
+            shares = EXCLUDED.shares,
+            share_count = EXCLUDED.share_count,
+            digest = EXCLUDED.digest,
+            received_at = NOW()
         """),
+        {
+            "tid": trustee_id,
+            "idx": chunk_index,
+            "shares": json.dumps(payload.shares),
+            "count": len(payload.shares),
+            "digest": digest
+        }
+    )
+    db.commit()
+    
+    return {"trustee_id": trustee_id, "chunk_index": chunk_index, "share_count": len(payload.shares), "digest": digest}
+
+@router.get("/{trustee_id}/decryption-share/chunks")
+def list_decryption_share_chunks(trustee_id: str, db: Session = Depends(get_db)):
+    """Chunks uploaded so far and not yet completed (index, share count, digest)"""
+    trustee_id, election_id = _trustee_with_key_share(db, trustee_id)
+    rows = db.execute(
+        text("""
+        SELECT chunk_index, share_count, digest
+        FROM decryption_share_chunks
+        WHERE trustee_id = CAST(:tid AS uuid)
+        ORDER BY chunk_index
+        """),
+        {"tid": trustee_id}
+    ).fetchall()
+    
+    return {
+        "trustee_id": trustee_id,
+        "election_id": election_id,
+        "chunks": [{"chunk_index": r[0], "share_count": r[1], "digest": r[2]} for r in rows]
+    }
+
+@router.post("/{trustee_id}/decryption-share/complete")
+def complete_decryption_share_upload(trustee_id: str, payload: CompleteSharesRequest,
+                                     db: Session = Depends(get_db)):
+    """
+    Merge the uploaded chunks into the trustee's decryption shares, the same
+    end state as POST /submit-decryption-share. Every chunk 0..chunks-1 must
+    be present, and together they must cover every ballot of the election
+    exactly once.
+    """
+    trustee_id, election_id = _trustee_with_key_share(db, trustee_id)
+    
+    uploaded = db.execute(
+        text("""
+        SELECT COUNT(*), COALESCE(MIN(chunk_index), 0), COALESCE(MAX(chunk_index), -1),
+               COALESCE(SUM(share_count), 0)
+        FROM decryption_share_chunks
+        WHERE trustee_id = CAST(:tid AS uuid)
+        """),
+        {"tid": trustee_id}
+    ).fetchone()
+    chunk_count, first_index, last_index, share_count = uploaded
+    if (chunk_count, first_index, last_index) != (payload.chunks, 0, payload.chunks - 1) or chunk_count == 0:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Expected chunks 0..{payload.chunks - 1}, have {chunk_count} chunk(s) "
+                   f"between {first_index} and {last_index}"
+        )
+    
+    ballot_count = db.execute(
+        text("SELECT COUNT(*) FROM ballots WHERE election_id = CAST(:eid AS uuid)"),
         {"eid": election_id}
+    ).scalar()
+    
+    # Merge in one statement. The distinct key count catches a ballot sent in two chunks;
+    # with every key naming one of the election's ballots, the keys are exactly its ballot ids
+    merged = db.execute(
+        text("""
+        WITH merged AS (
+            SELECT jsonb_object_agg(e.key, e.value) AS shares
+            FROM decryption_share_chunks c, jsonb_each(c.shares) e
+            WHERE c.trustee_id = CAST(:tid AS uuid)
+        )
+        UPDATE trustees t
+        SET
+            decryption_shares = merged.shares,
+            shares_submitted = true,
+            shares_submitted_at = NOW()
+        FROM merged
+        WHERE t.trustee_id = CAST(:tid AS uuid)
+          AND (SELECT COUNT(*) FROM jsonb_object_keys(merged.shares)) = :expected
+          AND NOT EXISTS (
+              SELECT 1
+              FROM jsonb_object_keys(merged.shares) AS k(ballot_id)
+              LEFT JOIN ballots b
+                ON b.election_id = CAST(:eid AS uuid) AND b.ballot_id::text = k.ballot_id
+              WHERE b.ballot_id IS NULL
+          )
+        RETURNING t.trustee_id
+        """),
+        {"tid": trustee_id, "eid": election_id, "expected": ballot_count}
     ).fetchone()
+    if not merged or share_count != ballot_count:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Chunks hold {share_count} share(s); the election has {ballot_count} ballot(s), "
+                   f"and every ballot needs exactly one share under its ballot_id"
+        )
+    
+    db.execute(
+        text("DELETE FROM decryption_share_chunks WHERE trustee_id = CAST(:tid AS uuid)"),
+        {"tid": trustee_id}
+    )
+    db.commit()
+    
+    return _shares_submitted(db, trustee_id, election_id, ballot_count)
+
+@router.get("/election/{election_id}/decryption-status")
+def get_decryption_status(election_id: str, db: Session = Depends(get_db)):
+    """Check if enough trustees have submitted decryption shares"""
+    
+    election = get_election_metadata(db, election_id)
     
     if not election:
         raise HTTPException(status_code=404, detail="Election not found")
     
-    threshold = election[0]
+    threshold = election["threshold_t"]
     
     # Count trustees who submitted shares
     submitted_count = db.execute(
@@ -428,7 +616,7 @@ def get_decryption_status(election_id: str, db: Session = Depends(get_db)):
     return {
         "election_id": election_id,
         "threshold": threshold,
-        "total_trustees": election[1],
+        "total_trustees": election["total_trustees_n"],
         "trustees_submitted": submitted_count,
         "can_decrypt": can_decrypt,
         "trustees_needed": max(0, threshold - submitted_count)
@@ -436,17 +624,13 @@ def get_decryption_status(election_id: str, db: Session = Depends(get_db)):
 
 @router.get("/election/{election_id}/ballots")
 def get_election_ballots(election_id: str, db: Session = Depends(get_db)):
-    """Get all ballots for an election (for trustees to verify before decryption)"""
+    """
+    Get all ballots for an election (for trustees to verify before decryption).
+    Builds the whole list in memory: large elections should use /ballots/export.
+    """
     
     # Verify election exists
-    election = db.execute(
-        text("""
-        SELECT election_id, status 
-        FROM elections 
-        WHERE election_id = CAST(:eid AS uuid)
-        """),
-        {"eid": election_id}
-    ).fetchone()
+    election = get_election_metadata(db, election_id)
     
     if not election:
         raise HTTPException(status_code=404, detail="Election not found")
@@ -464,18 +648,141 @@ def get_election_ballots(election_id: str, db: Session = Depends(get_db)):
     
     return {
         "election_id": election_id,
-        "status": election[1],
+        "status": election["status"],
         "ballot_count": len(ballots),
         "ballots": [
             {
                 "ballot_id": str(row[0]),
-                "encrypted_ballot": row[1],  # Add encrypted ballot data
+                # Base64 of the stored bytes: the binary ballot format (shared/ballot_format.py),
+                # or JSON text for ballots stored before it
+                "encrypted_ballot": base64.b64encode(row[1]).decode(),
                 "ballot_hash": row[2]
             }
             for row in ballots
         ]
     }
 
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header: str, total: int):
+    """(start, end) of a single-range Range header, None to ignore it (RFC 9110 14.2)"""
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), total - 1) if last else total - 1
+    else:
+        start, end = max(total - int(last), 0), total - 1
+    if start > end or start >= total:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{total}"}
+        )
+    return start, end
+
+
+def _export_stream(election_id: str, start: int, end: Optional[int], manifest, compress: bool):
+    # Own session: the response body is produced after the route returns
+    db = SessionLocal()
+    try:
+        chunks = ballot_export.iter_export(db, election_id, start, end, manifest)
+        if not compress:
+            yield from chunks
+            return
+        # Ciphertext barely compresses; level 1 still trims record framing and legacy JSON ballots
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        db.close()
+
+
+def _export_election(db: Session, election_id: str):
+    try:
+        election_id = str(uuid.UUID(election_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid election ID")
+    election = get_election_metadata(db, election_id, fresh=True)
+    if not election:
+        raise HTTPException(status_code=404, detail="Election not found")
+    return election_id, election
+
+
+@router.get("/election/{election_id}/ballots/manifest")
+def get_ballot_export_manifest(election_id: str, request: Request, response: Response,
+                               db: Session = Depends(get_db)):
+    """
+    Manifest of the binary ballot export (shared/ballot_export.py): ballot
+    count, total size, final chain digest and the chunk table (byte ranges
+    with the chain value before and after each chunk) for parallel download.
+    """
+    election_id, election = _export_election(db, election_id)
+    manifest = ballot_export.build_manifest(db, election_id, election["status"])
+    if manifest["final"]:
+        cached = not_modified(request, response, f'"{manifest["digest"][:32]}"', CACHE_FINAL)
+        if cached:
+            return cached
+    return manifest
+
+
+@router.get("/election/{election_id}/ballots/export")
+def export_election_ballots(election_id: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Stream every ballot as length-prefixed binary records (shared/ballot_export.py).
+
+    Once the election is CLOSED the export is immutable and single byte
+    ranges are served (206, with If-Range against the ETag), so trustees
+    can download manifest chunks in parallel and resume at any offset.
+    Full downloads are gzip-compressed when the client sends
+    Accept-Encoding: gzip.
+    """
+    election_id, election = _export_election(db, election_id)
+    status = election["status"]
+
+    headers = {"Accept-Ranges": "none"}
+    manifest = None
+    byte_range = None
+    if status in ballot_export.FINAL_STATUSES:
+        manifest = ballot_export.build_manifest(db, election_id, status)
+        etag = f'"{manifest["digest"][:32]}"'
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "X-Ballot-Count": str(manifest["ballot_count"]),
+            "X-Export-Digest": manifest["digest"],
+        }
+        range_header = request.headers.get("range")
+        if range_header and request.headers.get("if-range", etag) == etag:
+            byte_range = _parse_range(range_header, manifest["total_bytes"])
+
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{manifest['total_bytes']}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _export_stream(election_id, start, end, manifest, False),
+            status_code=206, media_type=ballot_export.MEDIA_TYPE, headers=headers
+        )
+
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+        if "ETag" in headers:
+            headers["ETag"] = f"W/{headers['ETag']}"
+    elif manifest:
+        headers["Content-Length"] = str(manifest["total_bytes"])
+    return StreamingResponse(
+        _export_stream(election_id, 0, None, manifest, compress),
+        media_type=ballot_export.MEDIA_TYPE, headers=headers
+    )
+
 @router.delete("/{trustee_id}")
 def remove_trustee(trustee_id: str, db: Session = Depends(get_db)):
     """Remove a trustee (only if key ceremony not started)"""
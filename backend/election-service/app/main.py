@@ -10,12 +10,20 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.election import router as election_router
 from app.api.routes.trustee import router as trustee_router
+from app.api.routes.dkg import router as dkg_router
+from shared.metrics import setup_metrics
+from shared.rate_limit import setup_rate_limiting
+from shared.structured_logging import setup_logging
+from shared.tracing import setup_tracing
 
 app = FastAPI(title="Election Service", version="1.0.0", docs_url="/api/docs")
 
 # Check if running in development mode
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
+# Rate limits and admission control (inside CORS, see auth-service/app/main.py)
+setup_rate_limiting(app, "election-service")
+
 # CORS middleware - Secure configuration based on environment
 if DEBUG:
     # Development: Allow all origins for testing (mobile app, admin web)
@@ -30,6 +38,7 @@ if DEBUG:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link"],  # Pagination cursors
     )
 else:
     # Production: Strict origin control
@@ -40,10 +49,21 @@ else:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Link"],  # Pagination cursors
     )
 
+# Structured JSON logging with per-route sampling (LOG_* env vars)
+setup_logging(app, "election-service")
+
+# Prometheus metrics (GET /metrics)
+setup_metrics(app, "election-service")
+
+# Request tracing (outermost middleware: times the whole request)
+setup_tracing(app, "election-service")
+
 app.include_router(election_router, prefix="/api/election", tags=["Election"])
 app.include_router(trustee_router, prefix="/api/trustee", tags=["Trustee"])
+app.include_router(dkg_router, prefix="/api/dkg", tags=["Key Generation"])
 
 @app.get("/health")
 async def health():
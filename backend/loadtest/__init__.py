@@ -0,0 +1,8 @@
+"""
+End-to-end election load generator
+
+Provisions an election through the services, registers voters, replays the
+blind-sign -> encrypt -> submit flow at a target arrival rate, then closes
+and tallies. Run from the backend directory:
+    python -m loadtest --voters 500 --rate 50 -o run.json
+"""
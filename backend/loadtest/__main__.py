@@ -0,0 +1,147 @@
+"""
+Load generator CLI
+
+Usage (from the backend directory):
+    # Against already-running services
+    python -m loadtest --voters 200 --rate 20 -o run.json
+
+    # Fresh scratch database + all six services started locally
+    python -m loadtest --local-stack --admin-db-url postgresql://postgres:pw@localhost:5432/postgres \\
+        --voters 1000 --rate 100 --concurrency 64 -o run.json
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Add backend directory to Python path for shared module
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.harness import environment_info, percentile  # noqa: E402
+from loadtest.client import ServiceClient  # noqa: E402
+from loadtest.recorder import LatencyRecorder, PhaseTimer  # noqa: E402
+from loadtest.scenario import ElectionScenario, ScenarioConfig  # noqa: E402
+
+logger = logging.getLogger("loadtest")
+
+
+def print_report(report):
+    print(f"\n{'Endpoint':<58} {'reqs':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>5}")
+    print("-" * 107)
+    for endpoint, stats in report.items():
+        errors = sum(stats["errors"].values())
+        print(f"{endpoint:<58} {stats['requests']:>6} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {errors:>5}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end election load generator")
+    parser.add_argument("--voters", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=10.0, help="Voter arrival rate (voters/sec)")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a fixed cadence")
+    parser.add_argument("--concurrency", type=int, default=32, help="Max in-flight voters")
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--threshold", type=int, default=2)
+    parser.add_argument("--trustees", type=int, default=3)
+    parser.add_argument("--admin-email", default="admin@evote.com")
+    parser.add_argument("--admin-password", default="Admin@123")
+    parser.add_argument("--no-tally", action="store_true", help="Close the election but skip tallying")
+    parser.add_argument("--dkg", action="store_true",
+                        help="Generate the election key with the distributed ceremony (trustee CLI in threads)")
+    parser.add_argument("--local-stack", action="store_true",
+                        help="Create a scratch database and start all six services locally")
+    parser.add_argument("--admin-db-url", help="Postgres URL with CREATE DATABASE rights (for --local-stack)")
+    parser.add_argument("--db-name", default="evoting_loadtest")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers per service (for --local-stack)")
+    parser.add_argument("-o", "--output", help="Write JSON report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if args.trustees > args.voters:
+        parser.error("--trustees cannot exceed --voters (trustees are drawn from registered voters)")
+
+    recorder = LatencyRecorder()
+    client = ServiceClient(recorder, pool_size=max(args.concurrency, 10))
+    processes = []
+
+    if args.local_stack:
+        from loadtest import local_stack
+        if not args.admin_db_url:
+            parser.error("--local-stack requires --admin-db-url")
+        database_url = local_stack.reset_database(args.admin_db_url, args.db_name)
+        logger.info(f"Scratch database ready: {args.db_name}")
+        processes = local_stack.start_services(database_url, workers=args.workers)
+        health = local_stack.wait_healthy(client)
+        if not all(health.values()):
+            local_stack.stop_services(processes)
+            logger.error(f"Services failed to start: {[k for k, v in health.items() if not v]}")
+            return 1
+
+    config = ScenarioConfig(
+        voters=args.voters,
+        arrival_rate=args.rate,
+        poisson=args.poisson,
+        concurrency=args.concurrency,
+        candidates=args.candidates,
+        threshold=args.threshold,
+        trustees=args.trustees,
+        admin_email=args.admin_email,
+        admin_password=args.admin_password,
+        tally=not args.no_tally,
+        dkg=args.dkg,
+    )
+    scenario = ElectionScenario(client, config)
+    phases = PhaseTimer()
+    tally = None
+
+    try:
+        phases.run("login_admin", scenario.login_admin)
+        phases.run("create_election", scenario.create_election)
+        logger.info(f"Election {scenario.state.election_id} created, registering {args.voters} voters")
+        phases.run("register_voters", scenario.register_voters)
+        phases.run("key_ceremony", scenario.run_key_ceremony)
+        phases.run("activate_and_issue_codes", scenario.activate_and_issue_codes)
+        logger.info(f"Voting at {args.rate}/s with concurrency {args.concurrency}")
+        phases.run("voting", scenario.run_voting)
+        tally = phases.run("close_and_tally", scenario.close_and_tally)
+    finally:
+        if processes:
+            from loadtest import local_stack
+            local_stack.stop_services(processes)
+
+    state = scenario.state
+    report = recorder.report()
+    voting_seconds = phases.phases.get("voting", 0) or 1e-9
+    lag = sorted(state.schedule_lag_ms)
+    summary = {
+        "election_id": state.election_id,
+        "votes_ok": state.votes_ok,
+        "votes_failed": state.votes_failed,
+        "achieved_vote_rate": round(state.votes_ok / voting_seconds, 2),
+        "target_vote_rate": args.rate,
+        "schedule_lag_p99_ms": round(percentile(lag, 99), 2),
+        "tallied_ballots": tally.get("total_ballots") if tally else None,
+    }
+
+    print_report(report)
+    print(f"\nPhases (s): {phases.phases}")
+    print(f"Summary: {summary}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "config": vars(config),
+            "environment": environment_info(),
+            "phases_s": phases.phases,
+            "summary": summary,
+            "endpoints": report,
+        }, indent=2))
+        logger.info(f"Report written to {args.output}")
+
+    return 0 if state.votes_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+HTTP client for the six services that records per-endpoint latency
+"""
+import os
+import time
+from typing import Optional, Dict, Any
+
+import requests
+
+from loadtest.recorder import LatencyRecorder
+
+DEFAULT_SERVICE_URLS = {
+    "auth": os.getenv("AUTH_SERVICE_URL", "http://localhost:8001"),
+    "token": os.getenv("TOKEN_SERVICE_URL", "http://localhost:8002"),
+    "vote": os.getenv("VOTE_SERVICE_URL", "http://localhost:8003"),
+    "bulletin": os.getenv("BULLETIN_BOARD_SERVICE_URL", "http://localhost:8004"),
+    "election": os.getenv("ELECTION_SERVICE_URL", "http://localhost:8005"),
+    "code_sheet": os.getenv("CODE_SHEET_SERVICE_URL", "http://localhost:8006"),
+}
+
+
+class ServiceError(Exception):
+    """Raised when a service returns a non-2xx response"""
+
+    def __init__(self, endpoint: str, status_code: int, body: str):
+        super().__init__(f"{endpoint} -> {status_code}: {body[:200]}")
+        self.endpoint = endpoint
+        self.status_code = status_code
+
+
+class ServiceClient:
+    """
+    Thin wrapper over requests with one pooled session per client.
+    Every call is labelled with a stable endpoint name (path template, not the
+    concrete URL) so latency aggregates per route.
+    """
+
+    def __init__(self, recorder: LatencyRecorder, service_urls: Optional[Dict[str, str]] = None,
+                 timeout: float = 30.0, pool_size: int = 64, max_retries: int = 3):
+        self.recorder = recorder
+        self.max_retries = max_retries
+        self.urls = dict(DEFAULT_SERVICE_URLS)
+        if service_urls:
+            self.urls.update(service_urls)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def call(self, service: str, method: str, path: str, label: Optional[str] = None,
+             token: Optional[str] = None, **kwargs) -> Any:
+        endpoint = f"{method} {label or path}"
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        for attempt in range(self.max_retries + 1):
+            started_at = time.time()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, f"{self.urls[service]}{path}",
+                    headers=headers, timeout=self.timeout, **kwargs
+                )
+            except requests.exceptions.RequestException as e:
+                self.recorder.record(endpoint, started_at, time.perf_counter() - start, 0)
+                raise ServiceError(endpoint, 0, str(e))
+            self.recorder.record(endpoint, started_at, time.perf_counter() - start, response.status_code)
+
+            # Rate limited (429), load shed (503) or idempotent request in progress (409): back off as told and retry
+            retry_after = response.headers.get("Retry-After")
+            if response.status_code not in (409, 429, 503) or retry_after is None or attempt == self.max_retries:
+                break
+            time.sleep(float(retry_after))
+
+        if response.status_code >= 400:
+            raise ServiceError(endpoint, response.status_code, response.text)
+        return response.json() if response.content else None
+
+    def health(self, service: str) -> bool:
+        try:
+            return self.session.get(f"{self.urls[service]}/health", timeout=2).status_code == 200
+        except requests.exceptions.RequestException:
+            return False
@@ -0,0 +1,84 @@
+"""
+Single-machine stack for load tests: a scratch Postgres database plus the six
+FastAPI services started as uvicorn subprocesses pointed at it.
+"""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlparse, urlunparse
+
+import psycopg
+
+BACKEND_DIR = Path(__file__).parent.parent
+SCHEMA_PATH = BACKEND_DIR.parent / "scripts" / "db-init.sql"
+
+SERVICES = {
+    "auth": ("auth-service", 8001),
+    "token": ("token-service", 8002),
+    "vote": ("vote-service", 8003),
+    "bulletin": ("bulletin-board-service", 8004),
+    "election": ("election-service", 8005),
+    "code_sheet": ("code-sheet-service", 8006),
+}
+
+
+def _with_database(url: str, dbname: str) -> str:
+    parts = urlparse(url)
+    return urlunparse(parts._replace(path=f"/{dbname}"))
+
+
+def reset_database(admin_url: str, dbname: str) -> str:
+    """
+    Drop and recreate a scratch database and load the schema
+    Returns the DATABASE_URL for the new database
+    """
+    with psycopg.connect(_with_database(admin_url, "postgres"), autocommit=True) as conn:
+        conn.execute(f'DROP DATABASE IF EXISTS "{dbname}" WITH (FORCE)')
+        conn.execute(f'CREATE DATABASE "{dbname}"')
+
+    database_url = _with_database(admin_url, dbname)
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute(SCHEMA_PATH.read_text())
+    return database_url
+
+
+def start_services(database_url: str, workers: int = 1, log_dir: Path = None) -> List[subprocess.Popen]:
+    """Start all six services with uvicorn, logging to files under log_dir"""
+    env = dict(os.environ, DATABASE_URL=database_url, DEBUG="true")
+    log_dir = log_dir or BACKEND_DIR / "loadtest-logs"
+    log_dir.mkdir(exist_ok=True)
+
+    processes = []
+    for name, (directory, port) in SERVICES.items():
+        log_file = open(log_dir / f"{name}.log", "w")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--no-access-log"],
+            cwd=BACKEND_DIR / directory, env=env, stdout=log_file, stderr=subprocess.STDOUT
+        ))
+    return processes
+
+
+def wait_healthy(client, timeout: float = 60.0) -> Dict[str, bool]:
+    """Poll /health on every service until all respond or the timeout expires"""
+    deadline = time.time() + timeout
+    status = {name: False for name in SERVICES}
+    while time.time() < deadline and not all(status.values()):
+        for name in SERVICES:
+            if not status[name]:
+                status[name] = client.health(name)
+        time.sleep(0.5)
+    return status
+
+
+def stop_services(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,64 @@
+"""
+Thread-safe latency recording and per-endpoint reporting
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Any, List
+
+from benchmarks.harness import percentile
+
+
+class LatencyRecorder:
+    """Collects (start, duration, status) samples keyed by endpoint label"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[tuple]] = defaultdict(list)
+
+    def record(self, endpoint: str, started_at: float, duration_s: float, status_code: int):
+        with self._lock:
+            self._samples[endpoint].append((started_at, duration_s, status_code))
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-endpoint latency percentiles (ms), throughput and error counts
+        Throughput is completed requests per second over the endpoint's active window.
+        """
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._samples.items()}
+
+        report = {}
+        for endpoint, samples in sorted(snapshot.items()):
+            latencies = sorted(d * 1000.0 for _, d, _ in samples)
+            first_start = min(s for s, _, _ in samples)
+            last_end = max(s + d for s, d, _ in samples)
+            window = max(last_end - first_start, 1e-9)
+            errors = defaultdict(int)
+            for _, _, status in samples:
+                if status >= 400 or status == 0:
+                    errors[str(status)] += 1
+            report[endpoint] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / window, 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(latencies[-1], 2),
+                "errors": dict(errors),
+            }
+        return report
+
+
+class PhaseTimer:
+    """Wall-clock timing of named scenario phases"""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def run(self, name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.phases[name] = round(time.perf_counter() - start, 3)
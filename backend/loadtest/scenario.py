@@ -0,0 +1,300 @@
+"""
+Election-day scenario: provision, vote at a target arrival rate, close and tally
+"""
+import base64
+import hashlib
+import json
+import logging
+import random
+import secrets
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from cryptography.hazmat.primitives import serialization
+
+from shared import ballot_format, zkp
+from shared.crypto_utils import CryptoUtils, ECIESEncryption
+from loadtest.client import ServiceClient, ServiceError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScenarioConfig:
+    voters: int = 100
+    arrival_rate: float = 10.0  # voters per second
+    poisson: bool = False  # exponential inter-arrival times instead of a fixed cadence
+    concurrency: int = 32
+    candidates: int = 3
+    threshold: int = 2
+    trustees: int = 3
+    admin_email: str = "admin@evote.com"
+    admin_password: str = "Admin@123"
+    voter_password: str = "LoadTest@123"
+    tally: bool = True
+    dkg: bool = False  # distributed key generation instead of the central key ceremony
+
+
+@dataclass
+class Voter:
+    email: str
+    access_token: str = ""
+    user_id: str = ""
+    main_voting_code: str = ""
+
+
+@dataclass
+class ScenarioState:
+    run_id: str
+    admin_token: str = ""
+    election_id: str = ""
+    election_public_key: bytes = b""
+    candidate_ids: List[str] = field(default_factory=list)
+    voters: List[Voter] = field(default_factory=list)
+    trustee_ids: List[str] = field(default_factory=list)
+    rsa_n: int = 0
+    rsa_e: int = 0
+    votes_ok: int = 0
+    votes_failed: int = 0
+    schedule_lag_ms: List[float] = field(default_factory=list)
+
+
+class ElectionScenario:
+    """Drives one full election through the public service APIs"""
+
+    def __init__(self, client: ServiceClient, config: ScenarioConfig):
+        self.client = client
+        self.config = config
+        self.state = ScenarioState(run_id=uuid.uuid4().hex[:8])
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Provisioning
+    # ------------------------------------------------------------------
+
+    def login_admin(self):
+        result = self.client.call("auth", "POST", "/api/auth/login", json={
+            "email": self.config.admin_email,
+            "password": self.config.admin_password,
+        })
+        self.state.admin_token = result["access_token"]
+
+    def create_election(self):
+        now = datetime.now(timezone.utc)
+        result = self.client.call("election", "POST", "/api/election/create", json={
+            "title": f"Load test {self.state.run_id}",
+            "description": "Generated by loadtest",
+            "start_time": now.isoformat(),
+            "end_time": (now + timedelta(hours=12)).isoformat(),
+            "threshold_t": self.config.threshold,
+            "total_trustees_n": self.config.trustees,
+        })
+        self.state.election_id = result["election_id"]
+        for i in range(self.config.candidates):
+            candidate = self.client.call("election", "POST", "/api/election/candidate/add", json={
+                "election_id": self.state.election_id,
+                "name": f"Candidate {i + 1}",
+                "party": f"Party {i + 1}",
+            })
+            self.state.candidate_ids.append(candidate["candidate_id"])
+
+    def _register_one(self, index: int) -> Voter:
+        run_id = self.state.run_id
+        voter = Voter(email=f"lt-{run_id}-{index}@loadtest.example.com")
+        tokens = self.client.call("auth", "POST", "/api/auth/register", json={
+            "nic": f"LT{run_id}{index:07d}"[:20],
+            "email": voter.email,
+            "full_name": f"Load Test Voter {index}",
+            "date_of_birth": "1990-01-01",
+            "password": self.config.voter_password,
+        })
+        voter.access_token = tokens["access_token"]
+        me = self.client.call("auth", "GET", "/api/auth/me", token=voter.access_token)
+        voter.user_id = me["user_id"]
+        self.client.call(
+            "auth", "POST", f"/api/users/kyc/approve/{voter.user_id}",
+            label="/api/users/kyc/approve/{user_id}", token=self.state.admin_token
+        )
+        return voter
+
+    def register_voters(self):
+        with ThreadPoolExecutor(max_workers=self.config.concurrency) as pool:
+            futures = [pool.submit(self._register_one, i) for i in range(self.config.voters)]
+            for future in as_completed(futures):
+                self.state.voters.append(future.result())
+
+    def run_key_ceremony(self):
+        for voter in self.state.voters[:self.config.trustees]:
+            trustee = self.client.call("election", "POST", "/api/trustee/add", json={
+                "election_id": self.state.election_id,
+                "user_id": voter.user_id,
+            })
+            self.state.trustee_ids.append(trustee["trustee_id"])
+        if self.config.dkg:
+            self._run_dkg()
+        else:
+            self.client.call("election", "POST", "/api/trustee/key-ceremony",
+                             json={"election_id": self.state.election_id})
+        election = self.client.call(
+            "election", "GET", f"/api/election/{self.state.election_id}", label="/api/election/{election_id}"
+        )
+        self.state.election_public_key = base64.b64decode(election["public_key"])
+
+    def _run_dkg(self):
+        """Every trustee runs its DKG participant concurrently, as separate trustees would"""
+        from trustee.dkg import DkgParticipant
+
+        self.client.call("election", "POST", "/api/dkg/start", json={"election_id": self.state.election_id},
+                         token=self.state.admin_token)
+        # Trustees were added for the first voters, whose tokens the DKG routes check
+        trustees = zip(self.state.trustee_ids, self.state.voters[:self.config.trustees])
+        with tempfile.TemporaryDirectory(prefix="loadtest-dkg-") as workdir:
+            participants = [
+                DkgParticipant(self.client.urls["election"], self.state.election_id, trustee_id,
+                               workdir=Path(workdir) / trustee_id, token=voter.access_token,
+                               poll_interval=0.2, timeout=300)
+                for trustee_id, voter in trustees
+            ]
+            with ThreadPoolExecutor(max_workers=len(participants)) as pool:
+                for future in as_completed([pool.submit(p.run) for p in participants]):
+                    future.result()
+
+    def activate_and_issue_codes(self):
+        self.client.call(
+            "election", "PUT", f"/api/election/{self.state.election_id}/status",
+            label="/api/election/{election_id}/status", json={"status": "ACTIVE"}
+        )
+        result = self.client.call("code_sheet", "POST", "/api/code-sheet/generate-bulk",
+                                  json={"election_id": self.state.election_id})
+        codes_by_user = {c["user_id"]: c["main_voting_code"] for c in result["codes"]}
+        for voter in self.state.voters:
+            voter.main_voting_code = codes_by_user.get(voter.user_id, "")
+
+        public_key = self.client.call("token", "GET", "/api/token/public-key")
+        rsa_key = serialization.load_pem_public_key(public_key["public_key"].encode())
+        numbers = rsa_key.public_numbers()
+        self.state.rsa_n, self.state.rsa_e = numbers.n, numbers.e
+
+    # ------------------------------------------------------------------
+    # Voting
+    # ------------------------------------------------------------------
+
+    def cast_vote(self, voter: Voter):
+        """Blind-sign -> ECIES encrypt -> submit, mirroring the mobile client"""
+        n, e = self.state.rsa_n, self.state.rsa_e
+        modulus_bytes = (n.bit_length() + 7) // 8
+
+        # Blind a random 256-bit token: m' = H(t) * r^e mod n
+        token_message = secrets.token_bytes(32)
+        message_hash = int.from_bytes(hashlib.sha256(token_message).digest(), "big")
+        r = secrets.randbelow(n - 2) + 2
+        blinded = (message_hash * pow(r, e, n)) % n
+
+        signed = self.client.call("token", "POST", "/api/token/request-signature", headers={
+            "Idempotency-Key": str(uuid.uuid4()),
+        }, json={
+            "election_id": self.state.election_id,
+            "main_voting_code": voter.main_voting_code,
+            "blinded_token": base64.b64encode(blinded.to_bytes(modulus_bytes, "big")).decode(),
+        })
+        blinded_signature = int.from_bytes(base64.b64decode(signed["blinded_signature"]), "big")
+        signature = (blinded_signature * pow(r, -1, n)) % n
+
+        candidate_id = random.choice(self.state.candidate_ids)
+        vote_data = {
+            "candidate_id": candidate_id,
+            "election_id": self.state.election_id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "nonce": secrets.token_hex(16),
+        }
+        vote_json = json.dumps(vote_data)
+        ephemeral_private, _ = CryptoUtils.generate_x25519_keypair()
+        encrypted = ECIESEncryption.encrypt(self.state.election_public_key, vote_json.encode(), ephemeral_private)
+        b64 = {k: base64.b64encode(v).decode() for k, v in encrypted.items()}
+        ballot_hash = ballot_format.ballot_hash(ballot_format.encode_ballot(b64))
+
+        self.client.call("vote", "POST", "/api/vote/submit", headers={
+            "Idempotency-Key": str(uuid.uuid4()),
+        }, json={
+            "election_id": self.state.election_id,
+            "encrypted_vote": b64,
+            "proof": {
+                "voter_public_key": base64.b64encode(self.state.election_public_key).decode(),
+                "ephemeral_public_key": b64["ephemeral_public_key"],
+                "commitment": hashlib.sha256(vote_json.encode()).hexdigest(),
+                **zkp.prove(self.state.election_id, ballot_hash, ephemeral_private),
+            },
+            "token_hash": signed["token_hash"],
+            "token_signature": base64.b64encode(signature.to_bytes(modulus_bytes, "big")).decode(),
+            "candidate_id": candidate_id,
+        })
+
+    def _cast_vote_counted(self, voter: Voter, scheduled_at: float):
+        lag_ms = (time.perf_counter() - scheduled_at) * 1000.0
+        try:
+            self.cast_vote(voter)
+            ok = True
+        except ServiceError as e:
+            logger.warning(f"Vote failed: {e}")
+            ok = False
+        with self._lock:
+            self.state.schedule_lag_ms.append(lag_ms)
+            if ok:
+                self.state.votes_ok += 1
+            else:
+                self.state.votes_failed += 1
+
+    def run_voting(self):
+        """
+        Open-loop arrivals: voter i is released at its scheduled time regardless
+        of how many earlier votes are still in flight (bounded by concurrency).
+        """
+        voters = [v for v in self.state.voters if v.main_voting_code]
+        interval = 1.0 / self.config.arrival_rate
+        with ThreadPoolExecutor(max_workers=self.config.concurrency) as pool:
+            next_at = time.perf_counter()
+            futures = []
+            for voter in voters:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(pool.submit(self._cast_vote_counted, voter, next_at))
+                next_at += random.expovariate(self.config.arrival_rate) if self.config.poisson else interval
+            for future in futures:
+                future.result()
+
+    # ------------------------------------------------------------------
+    # Close and tally
+    # ------------------------------------------------------------------
+
+    def close_and_tally(self) -> Optional[Dict[str, Any]]:
+        election_id = self.state.election_id
+        self.client.call("election", "PUT", f"/api/election/{election_id}/status",
+                         label="/api/election/{election_id}/status", json={"status": "CLOSED"})
+        if not self.config.tally:
+            return None
+
+        ballots = self.client.call(
+            "election", "GET", f"/api/trustee/election/{election_id}/ballots",
+            label="/api/trustee/election/{election_id}/ballots"
+        )["ballots"]
+        for trustee_id in self.state.trustee_ids[:self.config.threshold]:
+            shares = {
+                b["ballot_id"]: hashlib.sha256(
+                    f"{b['ballot_id']}:{b['encrypted_ballot']}:{trustee_id}".encode()
+                ).hexdigest()
+                for b in ballots
+            }
+            self.client.call("election", "POST", "/api/trustee/submit-decryption-share", json={
+                "trustee_id": trustee_id,
+                "decryption_shares": shares,
+            })
+        return self.client.call("election", "POST", f"/api/election/{election_id}/tally",
+                                label="/api/election/{election_id}/tally")
@@ -6,6 +6,7 @@ from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
+from shared.tracing import span, STAGE_AUDIT
 
 logger = logging.getLogger(__name__)
 
@@ -44,63 +45,64 @@ def log_audit_event(
     Returns:
         True if successful, False otherwise
     """
-    try:
-        import json
-        metadata_json = json.dumps(metadata) if metadata else None
-        
-        db.execute(
-            text("""
-                INSERT INTO audit_logs (
-                    event_type,
-                    event_description,
-                    user_id,
-                    resource_type,
-                    resource_id,
-                    ip_address,
-                    user_agent,
-                    request_method,
-                    request_path,
-                    metadata,
-                    severity,
-                    created_at
-                ) VALUES (
-                    :event_type,
-                    :event_description,
-                    :user_id::uuid,
-                    :resource_type,
-                    :resource_id::uuid,
-                    :ip_address::inet,
-                    :user_agent,
-                    :request_method,
-                    :request_path,
-                    :metadata::jsonb,
-                    :severity,
-                    :created_at
-                )
-            """),
-            {
-                "event_type": event_type,
-                "event_description": event_description,
-                "user_id": user_id,
-                "resource_type": resource_type,
-                "resource_id": resource_id,
-                "ip_address": ip_address,
-                "user_agent": user_agent,
-                "request_method": request_method,
-                "request_path": request_path,
-                "metadata": metadata_json,
-                "severity": severity,
-                "created_at": datetime.utcnow()
-            }
-        )
-        db.commit()
-        logger.debug(f"Audit log created: {event_type}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to create audit log: {e}")
-        db.rollback()
-        return False
+    with span("audit.write", stage=STAGE_AUDIT, event_type=event_type):
+        try:
+            import json
+            metadata_json = json.dumps(metadata) if metadata else None
+            
+            db.execute(
+                text("""
+                    INSERT INTO audit_logs (
+                        event_type,
+                        event_description,
+                        user_id,
+                        resource_type,
+                        resource_id,
+                        ip_address,
+                        user_agent,
+                        request_method,
+                        request_path,
+                        metadata,
+                        severity,
+                        created_at
+                    ) VALUES (
+                        :event_type,
+                        :event_description,
+                        CAST(:user_id AS uuid),
+                        :resource_type,
+                        CAST(:resource_id AS uuid),
+                        CAST(:ip_address AS inet),
+                        :user_agent,
+                        :request_method,
+                        :request_path,
+                        CAST(:metadata AS jsonb),
+                        :severity,
+                        :created_at
+                    )
+                """),
+                {
+                    "event_type": event_type,
+                    "event_description": event_description,
+                    "user_id": user_id,
+                    "resource_type": resource_type,
+                    "resource_id": resource_id,
+                    "ip_address": ip_address,
+                    "user_agent": user_agent,
+                    "request_method": request_method,
+                    "request_path": request_path,
+                    "metadata": metadata_json,
+                    "severity": severity,
+                    "created_at": datetime.utcnow()
+                }
+            )
+            db.commit()
+            logger.debug(f"Audit log created: {event_type}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to create audit log: {e}")
+            db.rollback()
+            return False
 
 
 # Convenience functions for common events
@@ -179,10 +181,9 @@ def audit_trustee_share_submitted(db: Session, election_id: str, trustee_id: str
         db=db,
         event_type="TRUSTEE_SHARE_SUBMITTED",
         event_description=f"Trustee submitted {share_count} decryption shares",
-        user_id=trustee_id,
         resource_type="ELECTION",
         resource_id=election_id,
-        metadata={"share_count": share_count},
+        metadata={"share_count": share_count, "trustee_id": trustee_id},
         severity="INFO"
     )
 
@@ -0,0 +1,274 @@
+"""
+Stateless request authentication
+Access tokens carry everything needed to authorize a request (sub, sid,
+role, kyc), so a protected route costs a signature check against a cached
+key plus a set lookup - no database round trip.
+
+Tokens are signed by the auth service with Ed25519 (EdDSA); every other
+service verifies them locally with the public keys from the auth service's
+JWKS (AUTH_JWKS_URL). The JWKS and the parsed keys are cached for
+JWKS_CACHE_TTL seconds; a token carrying an unknown kid (the auth service
+has rotated) triggers an early refetch, at most once every
+JWKS_MIN_REFETCH_SECONDS. The auth service itself plugs its key store in
+with set_jwks_source() and never goes over HTTP.
+
+Logged-out sessions are rejected through an in-memory revocation set: the
+sessions with revoked_at set whose access tokens have not expired yet. It
+is refreshed from the database every AUTH_REVOCATION_REFRESH seconds by a
+background thread, so a revocation made by another process takes effect
+within that interval (immediately in the process that made it).
+
+Service-to-service calls (e.g. bulletin board appends) carry no user
+token; they send the shared internal key in X-Service-Key instead
+(service_headers() / require_service). The key is INTERNAL_SERVICE_KEY, or
+else the SERVICE_KEY_FILE every service reads, generated on first use.
+
+Usage:
+    @router.get("/admin-thing")
+    def admin_thing(admin: Principal = Depends(require_admin)): ...
+"""
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Set
+
+import requests
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from fastapi import Depends, Header, HTTPException, status
+from sqlalchemy import text
+
+from shared import eddsa_jwt
+
+logger = logging.getLogger(__name__)
+
+AUTH_REVOCATION_REFRESH = float(os.getenv("AUTH_REVOCATION_REFRESH", "5"))
+AUTH_JWKS_URL = os.getenv("AUTH_JWKS_URL", "http://localhost:8001/api/auth/.well-known/jwks.json")
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "300"))
+JWKS_MIN_REFETCH_SECONDS = float(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30"))
+INTERNAL_SERVICE_KEY = os.getenv("INTERNAL_SERVICE_KEY", "")
+SERVICE_KEY_FILE = Path(os.getenv(
+    "SERVICE_KEY_FILE", str(Path(__file__).resolve().parents[1] / ".keys" / "service.key")
+))
+
+ROLE_ADMIN = "admin"
+ROLE_VOTER = "voter"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, built from access token claims only"""
+    user_id: str
+    session_id: Optional[str]
+    role: str
+    kyc_status: Optional[str]
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == ROLE_ADMIN
+
+
+def _fetch_jwks() -> Dict[str, Any]:
+    response = requests.get(AUTH_JWKS_URL, timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+
+class _JwksCache:
+    """Public keys by kid, parsed once per JWKS fetch"""
+
+    def __init__(self, fetch: Callable[[], Dict[str, Any]]):
+        self._fetch = fetch
+        self._keys: Dict[str, ed25519.Ed25519PublicKey] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self._lock = threading.Lock()
+
+    def set_source(self, fetch: Callable[[], Dict[str, Any]]):
+        with self._lock:
+            self._fetch = fetch
+            self._keys = {}
+            self._fetched_at = self._attempted_at = 0.0
+
+    def _reload(self, min_interval: float):
+        with self._lock:
+            # Another thread may have reloaded while this one waited for the lock
+            if time.monotonic() - self._attempted_at < min_interval:
+                return
+            self._attempted_at = time.monotonic()
+            try:
+                jwks = self._fetch()
+            except Exception as e:
+                # Keep verifying with the keys already known
+                logger.warning(f"JWKS fetch failed: {e}")
+                return
+            keys = {}
+            for jwk in jwks.get("keys", []):
+                key = eddsa_jwt.jwk_to_public_key(jwk)
+                if key is not None and jwk.get("kid"):
+                    keys[jwk["kid"]] = key
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+
+    def get(self, kid: Optional[str]) -> Optional[ed25519.Ed25519PublicKey]:
+        if time.monotonic() - self._fetched_at > JWKS_CACHE_TTL:
+            self._reload(min_interval=min(JWKS_MIN_REFETCH_SECONDS, JWKS_CACHE_TTL))
+        key = self._keys.get(kid)
+        if key is None and kid is not None:
+            self._reload(min_interval=JWKS_MIN_REFETCH_SECONDS)
+            key = self._keys.get(kid)
+        return key
+
+
+jwks_cache = _JwksCache(_fetch_jwks)
+
+
+def set_jwks_source(fetch: Callable[[], Dict[str, Any]]):
+    """Replace the JWKS loader (the auth service serves its own keys without HTTP)"""
+    jwks_cache.set_source(fetch)
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Verified access token claims, or None if the token is invalid, expired or not an access token"""
+    claims = eddsa_jwt.decode(token, jwks_cache.get)
+    if claims is None or claims.get("type") != "access" or not claims.get("sub"):
+        return None
+    return claims
+
+
+class _RevocationSet:
+    """Revoked, not yet expired session IDs, mirrored from the sessions table"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._revoked: Set[str] = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _load(self) -> Set[str]:
+        from shared.database import SessionLocal
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                text("""
+                SELECT session_id FROM sessions
+                WHERE revoked_at IS NOT NULL AND expires_at > CURRENT_TIMESTAMP
+                """)
+            ).fetchall()
+            return {str(row[0]) for row in rows}
+        finally:
+            db.close()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                revoked = self._load()
+                with self._lock:
+                    self._revoked = revoked
+            except Exception as e:
+                # Keep the last known set: failing open on a blip beats rejecting every request
+                logger.warning(f"Revocation set refresh failed: {e}")
+            time.sleep(self.interval)
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        try:
+            revoked = self._load()
+            with self._lock:
+                self._revoked = revoked
+        except Exception as e:
+            logger.warning(f"Initial revocation set load failed: {e}")
+        thread = threading.Thread(target=self._refresh_loop, name="auth-revocations", daemon=True)
+        thread.start()
+
+    def is_revoked(self, session_id: Optional[str]) -> bool:
+        self._ensure_started()
+        return session_id is not None and session_id in self._revoked
+
+    def add(self, session_id: str):
+        """Revoke locally right away (the database row is the source of truth for other processes)"""
+        with self._lock:
+            self._revoked = self._revoked | {session_id}
+
+
+revocations = _RevocationSet(AUTH_REVOCATION_REFRESH)
+
+
+def get_principal(authorization: Optional[str] = Header(None)) -> Principal:
+    """Authenticate the bearer token in the Authorization header"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid authorization header")
+
+    claims = decode_access_token(authorization[len("Bearer "):])
+    if claims is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    if revocations.is_revoked(claims.get("sid")):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session has been revoked")
+
+    return Principal(
+        user_id=claims["sub"],
+        session_id=claims.get("sid"),
+        role=claims.get("role", ROLE_VOTER),
+        kyc_status=claims.get("kyc"),
+    )
+
+
+def get_optional_principal(authorization: Optional[str] = Header(None)) -> Optional[Principal]:
+    """Like get_principal, but None for anonymous requests (a bad token is still a 401)"""
+    if not authorization:
+        return None
+    return get_principal(authorization)
+
+
+def require_admin(principal: Principal = Depends(get_principal)) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return principal
+
+
+_service_key: Optional[str] = INTERNAL_SERVICE_KEY or None
+_service_key_lock = threading.Lock()
+
+
+def service_key() -> str:
+    """The shared internal key; SERVICE_KEY_FILE is created on first use when INTERNAL_SERVICE_KEY is unset"""
+    global _service_key
+    if _service_key is None:
+        with _service_key_lock:
+            if _service_key is None:
+                if not SERVICE_KEY_FILE.exists():
+                    SERVICE_KEY_FILE.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = SERVICE_KEY_FILE.with_name(f".{SERVICE_KEY_FILE.name}.{os.getpid()}")
+                    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    with os.fdopen(fd, "w") as f:
+                        f.write(secrets.token_urlsafe(32))
+                    try:
+                        # Atomic and never overwrites: the first process to start wins
+                        os.link(tmp, SERVICE_KEY_FILE)
+                        logger.info(f"Generated internal service key {SERVICE_KEY_FILE}")
+                    except FileExistsError:
+                        pass
+                    finally:
+                        tmp.unlink()
+                _service_key = SERVICE_KEY_FILE.read_text().strip()
+    return _service_key
+
+
+def service_headers() -> Dict[str, str]:
+    """Headers that authenticate a call to another service's internal routes"""
+    return {"X-Service-Key": service_key()}
+
+
+def require_service(x_service_key: Optional[str] = Header(None)) -> None:
+    """Internal routes: only other services, holding the shared key, may call them"""
+    if not x_service_key or not hmac.compare_digest(x_service_key.encode(), service_key().encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Service authentication required")
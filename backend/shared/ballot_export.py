@@ -0,0 +1,267 @@
+"""
+Binary ballot export for trustees
+An election's ballots are exported as one byte stream instead of a JSON
+document, read from a server-side cursor and never held in memory:
+
+    header   "EVBX" | version (1 byte) | election id (16 bytes)
+    record   length (u32, big-endian, excludes itself) | ballot id (16) |
+             ballot hash (32) | ballot bytes (shared/ballot_format.py)
+
+Records are ordered by ballot id. Each record extends a hash chain:
+
+    d0 = SHA-256(header)    di = SHA-256(di-1 | record i, length prefix included)
+
+The manifest lists the ballot count, the total size and the final chain
+value. It also lists the export in chunks of EXPORT_CHUNK_RECORDS records,
+each with its byte range and the chain value before and after it. A trustee
+can fetch chunks in parallel with HTTP Range requests (or resume an
+interrupted download at any byte offset) and verify every chunk on its own
+with RecordReader as it arrives.
+"""
+import hashlib
+import os
+import struct
+import threading
+import uuid
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from shared import ballot_format
+
+MAGIC = b"EVBX"
+FORMAT_VERSION = 1
+FORMAT_NAME = "evbx-1"
+MEDIA_TYPE = "application/vnd.evote.ballots"
+
+HEADER_SIZE = len(MAGIC) + 1 + 16
+_LENGTH = struct.Struct(">I")
+RECORD_OVERHEAD = _LENGTH.size + 16 + 32
+
+EXPORT_CHUNK_RECORDS = int(os.getenv("EXPORT_CHUNK_RECORDS", "10000"))
+EXPORT_FETCH_ROWS = int(os.getenv("EXPORT_FETCH_ROWS", "500"))
+MANIFEST_CACHE_SIZE = int(os.getenv("EXPORT_MANIFEST_CACHE_SIZE", "32"))
+
+# Ballots can no longer be added, so the export is immutable
+FINAL_STATUSES = ("CLOSED", "TALLIED")
+
+
+class ExportFormatError(ValueError):
+    """Malformed or tampered export stream"""
+
+
+def encode_header(election_id: str) -> bytes:
+    return MAGIC + bytes((FORMAT_VERSION,)) + uuid.UUID(str(election_id)).bytes
+
+
+def encode_record(ballot_id, ballot_hash: str, ballot: bytes) -> bytes:
+    body_size = 16 + 32 + len(ballot)
+    return b"".join((
+        _LENGTH.pack(body_size),
+        uuid.UUID(str(ballot_id)).bytes,
+        bytes.fromhex(ballot_hash),
+        ballot,
+    ))
+
+
+def chain_start(header: bytes) -> bytes:
+    return hashlib.sha256(header).digest()
+
+
+def chain_step(digest: bytes, record: bytes) -> bytes:
+    return hashlib.sha256(digest + record).digest()
+
+
+@dataclass(frozen=True)
+class ExportRecord:
+    ballot_id: str
+    ballot_hash: str
+    ballot: bytes
+
+
+class RecordReader:
+    """
+    Incremental parser for an export stream, or for one chunk of it.
+    feed() takes bytes as they arrive and returns the complete records. Each
+    record's ballot hash is checked against its bytes (binary ballots), and
+    the hash chain is advanced, so `digest` can be compared with the
+    manifest's digest_end once the chunk is complete.
+
+        reader = RecordReader(digest=bytes.fromhex(chunk["digest_start"]))  # one chunk
+        reader = RecordReader()                                              # whole stream
+    """
+
+    def __init__(self, digest: Optional[bytes] = None, election_id: Optional[str] = None):
+        self._buffer = bytearray()
+        self._expect_header = digest is None
+        self.election_id = election_id
+        self.digest = digest
+        self.records = 0
+
+    @property
+    def pending(self) -> int:
+        """Bytes received that do not yet form a complete record"""
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> List[ExportRecord]:
+        self._buffer += data
+        if self._expect_header:
+            if len(self._buffer) < HEADER_SIZE:
+                return []
+            header = bytes(self._buffer[:HEADER_SIZE])
+            if header[:len(MAGIC)] != MAGIC or header[len(MAGIC)] != FORMAT_VERSION:
+                raise ExportFormatError("Not a version 1 ballot export")
+            election_id = str(uuid.UUID(bytes=header[len(MAGIC) + 1:]))
+            if self.election_id and election_id != str(uuid.UUID(str(self.election_id))):
+                raise ExportFormatError(f"Export is for election {election_id}")
+            self.election_id = election_id
+            self.digest = chain_start(header)
+            del self._buffer[:HEADER_SIZE]
+            self._expect_header = False
+
+        records = []
+        offset = 0
+        while len(self._buffer) - offset >= _LENGTH.size:
+            (body_size,) = _LENGTH.unpack_from(self._buffer, offset)
+            if body_size <= 48:
+                raise ExportFormatError(f"Invalid record length {body_size} after {self.records} records")
+            end = offset + _LENGTH.size + body_size
+            if end > len(self._buffer):
+                break
+            record = bytes(self._buffer[offset:end])
+            body = memoryview(record)[_LENGTH.size:]
+            ballot = bytes(body[48:])
+            ballot_hash = body[16:48].hex()
+            if not ballot_format.is_legacy(ballot) and ballot_format.ballot_hash(ballot) != ballot_hash:
+                raise ExportFormatError(f"Ballot hash mismatch in record {self.records}")
+            self.digest = chain_step(self.digest, record)
+            self.records += 1
+            records.append(ExportRecord(str(uuid.UUID(bytes=bytes(body[:16]))), ballot_hash, ballot))
+            offset = end
+        del self._buffer[:offset]
+        return records
+
+
+# ---------------------------------------------------------------------------
+# Server side
+# ---------------------------------------------------------------------------
+
+_manifests: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_manifests_lock = threading.Lock()
+
+
+def _ballot_rows(db: Session, election_id: str, first_ballot_id: Optional[str] = None):
+    """Ballots in export order, fetched EXPORT_FETCH_ROWS at a time from a server-side cursor"""
+    return db.execute(
+        text("""
+        SELECT ballot_id, ballot_hash, encrypted_ballot
+        FROM ballots
+        WHERE election_id = CAST(:eid AS uuid)
+          AND (CAST(:first AS uuid) IS NULL OR ballot_id >= CAST(:first AS uuid))
+        ORDER BY ballot_id
+        """),
+        {"eid": election_id, "first": first_ballot_id},
+        execution_options={"stream_results": True, "yield_per": EXPORT_FETCH_ROWS}
+    )
+
+
+def build_manifest(db: Session, election_id: str, status: str) -> Dict[str, Any]:
+    """
+    Manifest of an election's export. It is kept in memory once the election
+    is closed; until then it is rebuilt on every call (one pass over the ballots).
+    """
+    final = status in FINAL_STATUSES
+    with _manifests_lock:
+        cached = _manifests.get(election_id)
+        if cached is not None and final:
+            _manifests.move_to_end(election_id)
+            return cached
+
+    header = encode_header(election_id)
+    digest = chain_start(header)
+    offset = HEADER_SIZE
+    chunks: List[Dict[str, Any]] = []
+    chunk = None
+    count = 0
+    for ballot_id, ballot_hash, ballot in _ballot_rows(db, election_id):
+        if chunk is None:
+            chunk = {
+                "index": len(chunks), "offset": offset, "length": 0, "records": 0,
+                "first_ballot_id": str(ballot_id), "digest_start": digest.hex(),
+            }
+        record = encode_record(ballot_id, ballot_hash, ballot)
+        digest = chain_step(digest, record)
+        offset += len(record)
+        chunk["length"] += len(record)
+        chunk["records"] += 1
+        count += 1
+        if chunk["records"] == EXPORT_CHUNK_RECORDS:
+            chunk["digest_end"] = digest.hex()
+            chunks.append(chunk)
+            chunk = None
+    if chunk is not None:
+        chunk["digest_end"] = digest.hex()
+        chunks.append(chunk)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "election_id": election_id,
+        "final": final,
+        "ballot_count": count,
+        "header_bytes": HEADER_SIZE,
+        "total_bytes": offset,
+        "digest": digest.hex(),
+        "chunk_records": EXPORT_CHUNK_RECORDS,
+        "chunks": chunks,
+    }
+    if final:
+        with _manifests_lock:
+            _manifests[election_id] = manifest
+            while len(_manifests) > MANIFEST_CACHE_SIZE:
+                _manifests.popitem(last=False)
+    return manifest
+
+
+def iter_export(db: Session, election_id: str, start: int = 0, end: Optional[int] = None,
+                manifest: Optional[Dict[str, Any]] = None) -> Iterator[bytes]:
+    """
+    Bytes [start, end] (inclusive) of the export; end=None streams to the end.
+    With a manifest, reading starts at the chunk holding `start` rather than
+    at the first ballot.
+    """
+    if start < HEADER_SIZE:
+        header = encode_header(election_id)
+        yield header[start:HEADER_SIZE if end is None else min(end + 1, HEADER_SIZE)]
+    position = HEADER_SIZE
+    if end is not None and end < HEADER_SIZE:
+        return
+
+    first_ballot_id = None
+    if manifest and manifest["chunks"] and start > HEADER_SIZE:
+        offsets = [chunk["offset"] for chunk in manifest["chunks"]]
+        chunk = manifest["chunks"][max(bisect_right(offsets, start) - 1, 0)]
+        first_ballot_id, position = chunk["first_ballot_id"], chunk["offset"]
+
+    batch = []
+    batch_size = 0
+    for ballot_id, ballot_hash, ballot in _ballot_rows(db, election_id, first_ballot_id):
+        record = encode_record(ballot_id, ballot_hash, ballot)
+        record_start, position = position, position + len(record)
+        if position <= start:
+            continue
+        if record_start < start or (end is not None and position > end + 1):
+            record = record[max(start - record_start, 0):len(record) if end is None else end + 1 - record_start]
+        batch.append(record)
+        batch_size += len(record)
+        # Write in ~64 KiB pieces rather than one tiny write per ballot
+        if batch_size >= 65536:
+            yield b"".join(batch)
+            batch, batch_size = [], 0
+        if end is not None and position > end:
+            break
+    if batch:
+        yield b"".join(batch)
@@ -0,0 +1,120 @@
+"""
+Canonical binary ballot encoding
+An ECIES ballot is stored as one fixed-layout byte string:
+
+    offset  size  field
+    0       1     version (0x01)
+    1       32    ephemeral X25519 public key
+    33      12    AES-GCM nonce
+    45      16    AES-GCM tag
+    61      n     ciphertext
+
+There is exactly one encoding per ballot, so the ballot hash is SHA-256
+over these bytes and does not depend on JSON key order or base64 padding.
+Compared with the JSON-of-base64 form previously stored, a single-choice
+ballot shrinks by roughly half.
+
+Clients still submit the JSON form (`encrypted_vote`); the vote service
+converts it with encode_ballot. Rows written before this format (JSON text,
+first byte "{") are converted by scripts/migrate-ballots-binary.sql, which
+keeps their original ballot_hash so existing receipts and bulletin entries
+stay valid.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Dict, Union
+
+VERSION_1 = 0x01
+
+EPHEMERAL_KEY_SIZE = 32
+NONCE_SIZE = 12
+TAG_SIZE = 16
+HEADER_SIZE = 1 + EPHEMERAL_KEY_SIZE + NONCE_SIZE + TAG_SIZE
+
+_KEY_OFFSET = 1
+_NONCE_OFFSET = _KEY_OFFSET + EPHEMERAL_KEY_SIZE
+_TAG_OFFSET = _NONCE_OFFSET + NONCE_SIZE
+
+FIELDS = ("ephemeral_public_key", "nonce", "tag", "ciphertext")
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class BallotFormatError(ValueError):
+    """Not a well-formed ballot"""
+
+
+class BallotView:
+    """
+    Read-only view of an encoded ballot. Fields are memoryview slices of the
+    caller's buffer (no copies); call bytes() on one to keep it beyond the
+    buffer's lifetime.
+    """
+
+    __slots__ = ("buffer", "version", "ephemeral_public_key", "nonce", "tag", "ciphertext")
+
+    def __init__(self, data: Buffer):
+        buffer = memoryview(data)
+        if buffer.ndim != 1 or buffer.itemsize != 1:
+            buffer = buffer.cast("B")
+        if len(buffer) <= HEADER_SIZE:
+            raise BallotFormatError(f"Ballot too short ({len(buffer)} bytes)")
+        if buffer[0] != VERSION_1:
+            raise BallotFormatError(f"Unsupported ballot version {buffer[0]}")
+        self.buffer = buffer
+        self.version = buffer[0]
+        self.ephemeral_public_key = buffer[_KEY_OFFSET:_NONCE_OFFSET]
+        self.nonce = buffer[_NONCE_OFFSET:_TAG_OFFSET]
+        self.tag = buffer[_TAG_OFFSET:HEADER_SIZE]
+        self.ciphertext = buffer[HEADER_SIZE:]
+
+    def to_json(self) -> Dict[str, str]:
+        """The base64 JSON form clients submit"""
+        return {field: base64.b64encode(getattr(self, field)).decode() for field in FIELDS}
+
+
+def parse_ballot(data: Buffer) -> BallotView:
+    return BallotView(data)
+
+
+def _decode_field(encrypted_vote: Dict[str, Any], field: str, size: int = None) -> bytes:
+    value = encrypted_vote.get(field)
+    if not isinstance(value, str):
+        raise BallotFormatError(f"encrypted_vote.{field} is missing")
+    try:
+        raw = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise BallotFormatError(f"encrypted_vote.{field} is not valid base64")
+    if size is not None and len(raw) != size:
+        raise BallotFormatError(f"encrypted_vote.{field} must be {size} bytes, got {len(raw)}")
+    return raw
+
+
+def encode_ballot(encrypted_vote: Dict[str, Any]) -> bytes:
+    """Encode the submitted JSON form (base64 fields) as a version 1 ballot"""
+    ephemeral_public_key = _decode_field(encrypted_vote, "ephemeral_public_key", EPHEMERAL_KEY_SIZE)
+    nonce = _decode_field(encrypted_vote, "nonce", NONCE_SIZE)
+    tag = _decode_field(encrypted_vote, "tag", TAG_SIZE)
+    ciphertext = _decode_field(encrypted_vote, "ciphertext")
+    if not ciphertext:
+        raise BallotFormatError("encrypted_vote.ciphertext is empty")
+    return b"".join((bytes((VERSION_1,)), ephemeral_public_key, nonce, tag, ciphertext))
+
+
+def ballot_hash(data: Buffer) -> str:
+    """Canonical ballot hash: SHA-256 over the encoded bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_legacy(data: Buffer) -> bool:
+    """Stored before the binary format: JSON text of the base64 fields"""
+    return len(data) > 0 and data[0] == ord("{")
+
+
+def to_json(data: Buffer) -> Dict[str, str]:
+    """Base64 JSON fields of a stored ballot, whichever format it is in"""
+    if is_legacy(data):
+        return json.loads(bytes(data))
+    return BallotView(data).to_json()
@@ -0,0 +1,37 @@
+"""
+Bulletin board hash chain primitives
+Shared by the bulletin board service and offline tooling so every
+component hashes (and signs) entries exactly the same way.
+"""
+import hashlib
+import json
+from typing import Optional, Dict, Any
+
+
+def canonical_entry_data(entry_data: Dict[str, Any]) -> str:
+    """
+    Canonical JSON form of an entry's data (sorted keys)
+    """
+    return json.dumps(entry_data, sort_keys=True)
+
+
+def compute_entry_hash(entry_data: Dict[str, Any], previous_hash: Optional[str]) -> str:
+    """
+    Compute an entry hash: SHA256(entry_data + previous_hash)
+    Returns hex digest
+    """
+    data_str = canonical_entry_data(entry_data)
+    hash_input = data_str.encode() + (previous_hash.encode() if previous_hash else b"")
+    return hashlib.sha256(hash_input).hexdigest()
+
+
+SIGNATURE_CONTEXT = b"evote-bulletin-entry-v1"
+
+
+def entry_signing_message(election_id: str, entry_type: str, entry_hash: str) -> bytes:
+    """
+    The bytes the bulletin board signs for an entry (Ed25519).
+    The entry hash covers the data and the previous entry, so a signature
+    vouches for the entry's place in the chain as well as its content.
+    """
+    return b"|".join((SIGNATURE_CONTEXT, str(election_id).encode(), entry_type.encode(), entry_hash.encode()))
@@ -3,7 +3,10 @@ Helper functions for bulletin board integration
 """
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from shared.auth import service_headers
+from shared.tracing import span, inject_headers, STAGE_BULLETIN
+from shared.metrics import BULLETIN_ENTRIES
 
 logger = logging.getLogger(__name__)
 
@@ -35,20 +38,62 @@ def post_bulletin_entry(
             "entry_data": entry_data
         }
         
-        response = requests.post(
-            f"{BULLETIN_SERVICE_URL}/append",
-            json=payload,
-            timeout=timeout
-        )
+        with span("bulletin.append", stage=STAGE_BULLETIN, entry_type=entry_type):
+            response = requests.post(
+                f"{BULLETIN_SERVICE_URL}/append",
+                json=payload,
+                headers=inject_headers(service_headers()),
+                timeout=timeout
+            )
         
         if response.status_code == 200:
+            BULLETIN_ENTRIES.inc(entry_type=entry_type, result="ok")
             logger.info(f"Bulletin board entry created: {entry_type} for election {election_id}")
             return response.json()
         else:
+            BULLETIN_ENTRIES.inc(entry_type=entry_type, result="rejected")
             logger.error(f"Failed to create bulletin entry: {response.status_code} - {response.text}")
             return None
             
     except requests.exceptions.RequestException as e:
+        BULLETIN_ENTRIES.inc(entry_type=entry_type, result="unreachable")
+        logger.error(f"Error posting to bulletin board: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error posting to bulletin board: {e}")
+        return None
+
+
+def post_bulletin_entries(entries: List[Dict[str, Any]], timeout: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """
+    Post several entries in one request (appended in order, in one
+    transaction). Each entry is {"election_id", "entry_type", "entry_data"}.
+
+    Returns:
+        The appended entries, or None if the request failed
+    """
+    if not entries:
+        return []
+    try:
+        with span("bulletin.append_batch", stage=STAGE_BULLETIN, entries=len(entries)):
+            response = requests.post(
+                f"{BULLETIN_SERVICE_URL}/append-batch",
+                json={"entries": entries},
+                headers=inject_headers(service_headers()),
+                timeout=timeout
+            )
+        result = "ok" if response.status_code == 200 else "rejected"
+        for entry in entries:
+            BULLETIN_ENTRIES.inc(entry_type=entry["entry_type"], result=result)
+        if response.status_code == 200:
+            logger.info(f"Bulletin board entries created: {len(entries)}")
+            return response.json()
+        logger.error(f"Failed to create bulletin entries: {response.status_code} - {response.text}")
+        return None
+
+    except requests.exceptions.RequestException as e:
+        for entry in entries:
+            BULLETIN_ENTRIES.inc(entry_type=entry["entry_type"], result="unreachable")
         logger.error(f"Error posting to bulletin board: {e}")
         return None
     except Exception as e:
@@ -97,6 +142,22 @@ def create_ballot_cast_entry(election_id: str, ballot_hash: str, timestamp: str)
     )
 
 
+def create_ballot_cast_entries(ballots: List[Dict[str, str]]):
+    """Bulletin board entries for a batch of cast votes ({"election_id", "ballot_hash", "timestamp"} each)."""
+    return post_bulletin_entries([
+        {
+            "election_id": ballot["election_id"],
+            "entry_type": "BALLOT_CAST",
+            "entry_data": {
+                "ballot_hash": ballot["ballot_hash"],
+                "timestamp": ballot["timestamp"],
+                "action": "Ballot cast and recorded"
+            }
+        }
+        for ballot in ballots
+    ])
+
+
 def create_election_closed_entry(election_id: str, total_votes: int, close_time: str):
     """Create bulletin board entry for election closure."""
     return post_bulletin_entry(
@@ -8,7 +8,7 @@ All cryptographic operations follow the design document specifications:
 """
 
 from cryptography.hazmat.primitives.asymmetric import ed25519, x25519
-from cryptography.hazmat.primitives import hashes, hmac
+from cryptography.hazmat.primitives import hashes, hmac, serialization
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
 from cryptography.hazmat.backends import default_backend
@@ -259,13 +259,22 @@ class ECIESEncryption:
     """
     
     @staticmethod
-    def encrypt(recipient_public_key: bytes, plaintext: bytes) -> Dict[str, bytes]:
+    def encrypt(recipient_public_key: bytes, plaintext: bytes, ephemeral_private_key: bytes = None) -> Dict[str, bytes]:
         """
         ECIES encryption
+        ephemeral_private_key: fresh X25519 key chosen by the caller (a ballot proof needs it,
+        see shared/zkp.py); generated here when omitted. Never reuse one.
         Returns: dict with 'ephemeral_public_key', 'ciphertext', 'nonce', 'tag'
         """
         # Generate ephemeral key pair
-        ephemeral_private, ephemeral_public = CryptoUtils.generate_x25519_keypair()
+        if ephemeral_private_key is None:
+            ephemeral_private, ephemeral_public = CryptoUtils.generate_x25519_keypair()
+        else:
+            ephemeral_private = ephemeral_private_key
+            ephemeral_public = x25519.X25519PrivateKey.from_private_bytes(ephemeral_private_key).public_key().public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw
+            )
         
         # Perform ECDH
         shared_secret = CryptoUtils.x25519_key_agreement(ephemeral_private, recipient_public_key)
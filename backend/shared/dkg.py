@@ -0,0 +1,236 @@
+"""
+Distributed key generation (Pedersen's DKG with Feldman commitments)
+The election key is never assembled anywhere. Each of the n trustees deals
+a random polynomial f_i of degree t-1 over the Ed25519 scalar field and
+publishes Feldman commitments C_ik = a_ik * B. Trustee j receives
+s_ij = f_i(j) from every dealer i, checks it against the commitments, and
+keeps s_j = sum_i s_ij, its share of the election secret x = sum_i f_i(0).
+Any t trustees can combine their shares with Lagrange interpolation, and
+fewer learn nothing about x.
+
+The election public key X = sum_i C_i0 is an Ed25519 point. Its Montgomery
+u-coordinate is an ordinary X25519 public key, so clients keep encrypting
+ballots with ECIES (shared/crypto_utils.py) unchanged.
+
+Commitments are stored compactly as concatenated 32-byte compressed points
+(t * 32 bytes per dealer). Checks run against the aggregated commitments
+A_k = sum_i C_ik (the joint polynomial), evaluated at a trustee index with
+Horner's rule using point additions only. Indexes are small, so this costs
+a few dozen additions instead of one scalar multiplication per coefficient:
+
+    one trustee, all dealers:   (sum_i s_ij) B == sum_k j^k A_k
+    verification keys:          V_j            == sum_k j^k A_k
+
+A passing check proves the trustee's combined share lies on the joint
+polynomial, which is all the ceremony needs. Each dealer is checked on its
+own only when the combined check fails, to name the dealers to complain
+about. Point arithmetic is pycryptodome's native Ed25519 implementation.
+
+Shares travel through the election service encrypted to the recipient's
+X25519 transport key (ECIES, stored in the ballot layout of
+shared/ballot_format.py), so the service never sees one in the clear.
+"""
+import secrets
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from Crypto.PublicKey.ECC import EccPoint
+
+from shared import ballot_format
+from shared.crypto_utils import ECIESEncryption
+
+P = 2 ** 255 - 19
+L = 2 ** 252 + 27742317777372353535851937790883648493  # order of the base point
+D = -121665 * pow(121666, -1, P) % P
+_SQRT_M1 = pow(2, (P - 1) // 4, P)
+
+POINT_SIZE = 32
+SCALAR_SIZE = 32
+
+_CURVE = "Ed25519"
+
+
+class DkgError(ValueError):
+    """Malformed DKG message"""
+
+
+def decode_point(data: bytes, check_subgroup: bool = True) -> EccPoint:
+    """
+    Compressed Ed25519 point (RFC 8032 5.1.3), required to be in the
+    prime-order subgroup. Skip that check (one scalar multiplication) only
+    for points validated when they were stored.
+    """
+    if len(data) != POINT_SIZE:
+        raise DkgError(f"Point must be {POINT_SIZE} bytes")
+    y = int.from_bytes(data, "little") & ((1 << 255) - 1)
+    sign = data[31] >> 7
+    if y >= P:
+        raise DkgError("Point not canonically encoded")
+    u = (y * y - 1) % P
+    v = (D * y * y + 1) % P
+    x = u * pow(v, 3, P) * pow(u * pow(v, 7, P), (P - 5) // 8, P) % P
+    if v * x * x % P == (P - u) % P:
+        x = x * _SQRT_M1 % P
+    if v * x * x % P != u or (x == 0 and sign):
+        raise DkgError("Not a curve point")
+    if x & 1 != sign:
+        x = P - x
+    point = EccPoint(x, y, _CURVE)
+    if check_subgroup and not (point * L).is_point_at_infinity():
+        raise DkgError("Point not in the prime-order subgroup")
+    return point
+
+
+def encode_point(point: EccPoint) -> bytes:
+    x, y = int(point.x), int(point.y)
+    return (y | (x & 1) << 255).to_bytes(POINT_SIZE, "little")
+
+
+BASE = decode_point(bytes.fromhex("5866666666666666666666666666666666666666666666666666666666666666"))
+IDENTITY = EccPoint(0, 1, _CURVE)
+
+
+def pack_points(points: Iterable[EccPoint]) -> bytes:
+    return b"".join(encode_point(p) for p in points)
+
+
+def unpack_points(data: bytes, count: int, check_subgroup: bool = True) -> List[EccPoint]:
+    if len(data) != count * POINT_SIZE:
+        raise DkgError(f"Expected {count} points ({count * POINT_SIZE} bytes), got {len(data)} bytes")
+    return [decode_point(data[i:i + POINT_SIZE], check_subgroup) for i in range(0, len(data), POINT_SIZE)]
+
+
+def encode_scalar(value: int) -> bytes:
+    return (value % L).to_bytes(SCALAR_SIZE, "little")
+
+
+def decode_scalar(data: bytes) -> int:
+    value = int.from_bytes(data, "little")
+    if len(data) != SCALAR_SIZE or value >= L:
+        raise DkgError("Scalar not canonically encoded")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Dealing
+# ---------------------------------------------------------------------------
+
+def new_polynomial(threshold: int) -> List[int]:
+    """Random coefficients a_0..a_(t-1); a_0 is this dealer's contribution to the secret"""
+    return [secrets.randbelow(L - 1) + 1 for _ in range(threshold)]
+
+
+def commit(coefficients: Sequence[int]) -> bytes:
+    """Feldman commitments to the coefficients, packed"""
+    return pack_points(BASE * a for a in coefficients)
+
+
+def evaluate(coefficients: Sequence[int], x: int) -> int:
+    """f(x) mod L (Horner)"""
+    result = 0
+    for a in reversed(coefficients):
+        result = (result * x + a) % L
+    return result
+
+
+def seal_share(transport_key: bytes, share: int) -> bytes:
+    """Encrypt a share to its recipient's X25519 transport key"""
+    sealed = ECIESEncryption.encrypt(transport_key, encode_scalar(share))
+    return b"".join((bytes((ballot_format.VERSION_1,)),) + tuple(sealed[f] for f in ballot_format.FIELDS))
+
+
+def open_share(transport_private_key: bytes, data: bytes) -> int:
+    """Decrypt a sealed share; raises DkgError if it does not decrypt to a scalar"""
+    try:
+        view = ballot_format.parse_ballot(data)
+        plaintext = ECIESEncryption.decrypt(
+            transport_private_key, bytes(view.ephemeral_public_key), bytes(view.ciphertext),
+            bytes(view.nonce), bytes(view.tag)
+        )
+    except Exception as e:
+        raise DkgError(f"Share does not decrypt: {e}")
+    return decode_scalar(plaintext)
+
+
+# ---------------------------------------------------------------------------
+# Verification
+# ---------------------------------------------------------------------------
+
+def _mul_small(point: EccPoint, k: int) -> EccPoint:
+    """k * point by double-and-add; for trustee indexes this beats a full scalar multiplication"""
+    result = IDENTITY
+    for bit in bin(k)[2:]:
+        result = result + result
+        if bit == "1":
+            result = result + point
+    return result
+
+
+def aggregate(commitments: Dict[int, Sequence[EccPoint]]) -> List[EccPoint]:
+    """A_k = sum_i C_ik: commitments to the joint polynomial F = sum_i f_i"""
+    dealers = list(commitments.values())
+    combined = []
+    for k in range(len(dealers[0])):
+        acc = IDENTITY
+        for dealer in dealers:
+            acc = acc + dealer[k]
+        combined.append(acc)
+    return combined
+
+
+def evaluate_commitments(commitments: Sequence[EccPoint], index: int) -> EccPoint:
+    """sum_k index^k C_k, i.e. f(index) * B (Horner, additions only)"""
+    acc = commitments[-1]
+    for commitment in reversed(commitments[:-1]):
+        acc = _mul_small(acc, index) + commitment
+    return acc
+
+
+def verify_share(commitments: Sequence[EccPoint], index: int, share: int) -> bool:
+    """One dealer's share for trustee `index` against that dealer's commitments"""
+    return BASE * share == evaluate_commitments(commitments, index)
+
+
+def verify_shares(index: int, received: Sequence[Tuple[Sequence[EccPoint], int]]) -> bool:
+    """
+    All shares received by trustee `index` in one check against the
+    aggregated commitments. `received` holds (dealer commitments, share) pairs.
+    """
+    if not received:
+        return True
+    combined = aggregate(dict(enumerate(commitments for commitments, _ in received)))
+    return BASE * (sum(share for _, share in received) % L) == evaluate_commitments(combined, index)
+
+
+def find_invalid_shares(index: int, received: Sequence[Tuple[Sequence[EccPoint], int]]) -> List[int]:
+    """Positions in `received` whose share does not match the dealer's commitments"""
+    if verify_shares(index, received):
+        return []
+    return [i for i, (commitments, share) in enumerate(received) if not verify_share(commitments, index, share)]
+
+
+def invalid_verification_keys(commitments: Dict[int, Sequence[EccPoint]], keys: Dict[int, EccPoint]) -> List[int]:
+    """Trustees whose published V_j is not F(j) * B for the joint polynomial"""
+    combined = aggregate(commitments)
+    return sorted(j for j, key in keys.items() if key != evaluate_commitments(combined, j))
+
+
+def public_key(commitments: Dict[int, Sequence[EccPoint]]) -> EccPoint:
+    """Election public key: sum of every dealer's constant-term commitment"""
+    return aggregate(commitments)[0]
+
+
+def x25519_public_key(point: EccPoint) -> bytes:
+    """The X25519 (Montgomery u-coordinate) form of an Ed25519 point"""
+    y = int(point.y)
+    u = (1 + y) * pow(1 - y, -1, P) % P
+    return u.to_bytes(32, "little")
+
+
+def lagrange_coefficient(index: int, indexes: Sequence[int]) -> int:
+    """Weight of share `index` when interpolating f(0) from shares at `indexes`"""
+    numerator = denominator = 1
+    for other in indexes:
+        if other != index:
+            numerator = numerator * other % L
+            denominator = denominator * (other - index) % L
+    return numerator * pow(denominator, -1, L) % L
@@ -0,0 +1,101 @@
+"""
+JWTs signed with Ed25519 (JWS "alg": "EdDSA", RFC 8037)
+python-jose has no EdDSA support, so this is a minimal compact-JWS codec on
+top of the cryptography package. Keys are published as OKP JWKs.
+"""
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+ALGORITHM = "EdDSA"
+
+
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    raise TypeError(f"Cannot encode {type(value).__name__} in a JWT")
+
+
+def encode(claims: Dict[str, Any], private_key: ed25519.Ed25519PrivateKey, kid: str) -> str:
+    """Sign claims into a compact JWT; datetime values become NumericDate seconds"""
+    header = {"alg": ALGORITHM, "typ": "JWT", "kid": kid}
+    signing_input = (
+        b64url_encode(json.dumps(header, separators=(",", ":")).encode())
+        + "."
+        + b64url_encode(json.dumps(claims, separators=(",", ":"), default=_json_default).encode())
+    )
+    signature = private_key.sign(signing_input.encode())
+    return signing_input + "." + b64url_encode(signature)
+
+
+def unverified_header(token: str) -> Optional[Dict[str, Any]]:
+    try:
+        header = json.loads(b64url_decode(token.split(".", 1)[0]))
+        return header if isinstance(header, dict) else None
+    except (ValueError, IndexError):
+        return None
+
+
+def decode(token: str, resolve_key: Callable[[str], Optional[ed25519.Ed25519PublicKey]],
+           leeway: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Verified claims, or None if the token is malformed, signed by an unknown
+    key, has a bad signature, or is expired / not yet valid / has no exp.
+    `resolve_key` maps the header's kid to a public key (None if unknown).
+    """
+    try:
+        header_b64, claims_b64, signature_b64 = token.split(".")
+        header = json.loads(b64url_decode(header_b64))
+        if not isinstance(header, dict) or header.get("alg") != ALGORITHM:
+            return None
+        # kid is attacker-controlled: anything but a string never reaches the key lookup
+        kid = header.get("kid")
+        if not isinstance(kid, str):
+            return None
+        public_key = resolve_key(kid)
+        if public_key is None:
+            return None
+        public_key.verify(b64url_decode(signature_b64), f"{header_b64}.{claims_b64}".encode())
+        claims = json.loads(b64url_decode(claims_b64))
+    except (ValueError, TypeError, InvalidSignature):
+        return None
+    if not isinstance(claims, dict):
+        return None
+
+    # Every token this system issues expires, so a missing exp is rejected too
+    now = time.time()
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)) or exp + leeway <= now:
+        return None
+    nbf = claims.get("nbf")
+    if nbf is not None and (not isinstance(nbf, (int, float)) or nbf - leeway > now):
+        return None
+    return claims
+
+
+def public_jwk(public_key: ed25519.Ed25519PublicKey, kid: str) -> Dict[str, str]:
+    raw = public_key.public_bytes(encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+    return {"kty": "OKP", "crv": "Ed25519", "x": b64url_encode(raw), "kid": kid, "alg": ALGORITHM, "use": "sig"}
+
+
+def jwk_to_public_key(jwk: Dict[str, Any]) -> Optional[ed25519.Ed25519PublicKey]:
+    if jwk.get("kty") != "OKP" or jwk.get("crv") != "Ed25519" or not jwk.get("x"):
+        return None
+    try:
+        return ed25519.Ed25519PublicKey.from_public_bytes(b64url_decode(jwk["x"]))
+    except ValueError:
+        return None
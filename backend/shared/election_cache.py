@@ -0,0 +1,221 @@
+"""
+Read-through cache for election and candidate metadata
+- get_election_metadata(db, election_id): election row + ordered candidates
+- invalidate_election(election_id): call after any write to the election or its candidates
+
+Each entry carries an "etag" (a digest of its content) for conditional GETs.
+
+Entries live in an in-process LRU with a TTL. If REDIS_URL is set and the
+redis package is installed, Redis is used as a shared second level and
+invalidations are broadcast to every process over pub/sub. Without Redis,
+other processes see changes within ELECTION_CACHE_TTL seconds.
+
+DRAFT elections are never cached: they are still being edited, and code
+sheets or ballots must not be built from a stale candidate list.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+ELECTION_CACHE_TTL = float(os.getenv("ELECTION_CACHE_TTL", "30"))
+ELECTION_CACHE_SIZE = int(os.getenv("ELECTION_CACHE_SIZE", "256"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+_REDIS_KEY_PREFIX = "evote:election:"
+_REDIS_CHANNEL = "evote:election:invalidate"
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every delete so a load that raced an invalidation is not stored
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key: str, value: Any, generation: Optional[int] = None):
+        with self._lock:
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            for key in self._data:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._data.clear()
+
+
+class _RedisLayer:
+    """Shared second-level cache plus cross-process invalidation"""
+
+    def __init__(self, url: str, local: TTLCache):
+        import redis  # Optional dependency
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.local = local
+        thread = threading.Thread(target=self._listen, name="election-cache-invalidation", daemon=True)
+        thread.start()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(_REDIS_KEY_PREFIX + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        self.client.set(_REDIS_KEY_PREFIX + key, json.dumps(value), ex=int(max(ELECTION_CACHE_TTL * 10, 60)))
+
+    def invalidate(self, key: str):
+        self.client.delete(_REDIS_KEY_PREFIX + key)
+        self.client.publish(_REDIS_CHANNEL, key)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(_REDIS_CHANNEL)
+                for message in pubsub.listen():
+                    key = message.get("data")
+                    if isinstance(key, bytes):
+                        self.local.delete(key.decode())
+                    else:
+                        self.local.clear()
+            except Exception as e:
+                # Lost the subscription: drop everything local, since invalidations may have been missed
+                logger.warning(f"Election cache invalidation channel error: {e}")
+                self.local.clear()
+                time.sleep(1)
+
+
+_local = TTLCache(ELECTION_CACHE_SIZE, ELECTION_CACHE_TTL)
+_redis: Optional[_RedisLayer] = None
+
+if REDIS_URL:
+    try:
+        _redis = _RedisLayer(REDIS_URL, _local)
+    except ImportError:
+        logger.warning("REDIS_URL set but the redis package is not installed; using in-process cache only")
+
+
+def _load(db, election_id: str) -> Optional[Dict[str, Any]]:
+    row = db.execute(
+        text("""
+        SELECT election_id, title, description, start_time, end_time, status,
+               threshold_t, total_trustees_n, public_key, created_by, updated_at
+        FROM elections
+        WHERE election_id::text = :eid
+        """),
+        {"eid": election_id}
+    ).fetchone()
+    if not row:
+        return None
+
+    candidates = db.execute(
+        text("""
+        SELECT candidate_id, name, party, display_order
+        FROM candidates
+        WHERE election_id::text = :eid
+        ORDER BY display_order
+        """),
+        {"eid": election_id}
+    ).fetchall()
+
+    metadata = {
+        "election_id": str(row[0]),
+        "title": row[1],
+        "description": row[2],
+        "start_time": str(row[3]),
+        "end_time": str(row[4]),
+        "status": row[5],
+        "threshold_t": row[6],
+        "total_trustees_n": row[7],
+        "public_key": row[8],
+        "created_by": str(row[9]) if row[9] else None,
+        "candidates": [
+            {"candidate_id": str(c[0]), "name": c[1], "party": c[2], "display_order": c[3]}
+            for c in candidates
+        ],
+        "updated_at": str(row[10]),
+    }
+    metadata["etag"] = '"' + hashlib.sha256(json.dumps(metadata, sort_keys=True).encode()).hexdigest()[:32] + '"'
+    return metadata
+
+
+def get_election_metadata(db, election_id: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Election metadata and candidates, or None if the election does not exist.
+    Pass fresh=True for checks that gate a state change (e.g. tallying);
+    the result still refreshes the cache. Treat the returned dict as read-only.
+    """
+    key = election_id.strip().lower()
+    if not fresh:
+        cached = _local.get(key)
+        if cached is not None:
+            return cached
+        if _redis is not None:
+            try:
+                cached = _redis.get(key)
+            except Exception as e:
+                logger.warning(f"Election cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                _local.set(key, cached)
+                return cached
+
+    generation = _local.generation(key)
+    metadata = _load(db, election_id)
+    if metadata is not None and metadata["status"] != "DRAFT":
+        _local.set(key, metadata, generation)
+        if _redis is not None:
+            try:
+                _redis.set(key, metadata)
+            except Exception as e:
+                logger.warning(f"Election cache write failed: {e}")
+    return metadata
+
+
+def invalidate_election(election_id: str):
+    """Drop cached metadata for an election in this process and, with Redis, everywhere"""
+    key = election_id.strip().lower()
+    _local.delete(key)
+    if _redis is not None:
+        try:
+            _redis.invalidate(key)
+        except Exception as e:
+            logger.warning(f"Election cache invalidation failed: {e}")
@@ -0,0 +1,52 @@
+"""
+Conditional GET helpers (ETag / If-None-Match / Cache-Control)
+
+Usage inside a route:
+    etag = make_etag("election", election_id, updated_at)
+    cached = not_modified(request, response, etag, CACHE_SHORT)
+    if cached:
+        return cached
+    ... build the full response ...
+
+The ETag and Cache-Control headers are set on both the 304 and the full
+response, so nginx (see infrastructure/nginx/nginx.conf) can micro-cache and
+revalidate with If-None-Match instead of hitting Python on every poll.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Cache-Control policies
+CACHE_REVALIDATE = "no-cache"  # Data still being edited: always revalidate
+CACHE_SHORT = "public, max-age=5, stale-while-revalidate=5"  # Lists and live counters
+CACHE_STABLE = "public, max-age=30, stale-while-revalidate=30"  # Changes only on status transitions
+CACHE_FINAL = "public, max-age=300, stale-while-revalidate=60"  # Published results
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values that determine a representation"""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: nginx may hand back W/"..." after gzip
+    return any(tag == etag or tag == f"W/{etag}" for tag in candidates)
+
+
+def not_modified(request: Request, response: Response, etag: str, cache_control: str) -> Optional[Response]:
+    """
+    Set ETag and Cache-Control on the response, and return a 304 response
+    if the client already has this representation (None otherwise).
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
@@ -0,0 +1,252 @@
+"""
+Idempotency-Key support for retried POSTs
+A client that did not get a response (timeout, dropped connection) resends
+the same request with the same Idempotency-Key header. The first execution's
+response is stored under (scope, key) and replayed to every retry, so the
+retry neither repeats the crypto/DB work nor fails with "already used".
+
+- Responses are kept in the idempotency_keys table for IDEMPOTENCY_TTL_HOURS
+  and in a bounded in-process LRU (IDEMPOTENCY_CACHE_SIZE) in front of it.
+- Only outcomes a retry could not change are stored: 2xx results, 422s and
+  MalformedRequest (a 400 about the request body itself). Any other 4xx
+  depends on state that may change (token not issued yet, election not
+  open), so it releases the key like a 5xx or an unexpected exception, and
+  a retry runs again.
+- A retry while the first attempt is still running gets 409 + Retry-After.
+  An attempt that has held its key longer than IDEMPOTENCY_LOCK_SECONDS is
+  presumed dead and the key may be taken over.
+- Reusing a key with a different request body is a 422.
+
+Usage inside a route:
+    return run_idempotent(db, idempotency_key, "vote_submit", payload, lambda: _submit(payload, db))
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from shared.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+IDEMPOTENCY_SWEEP_INTERVAL = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "600"))
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class MalformedRequest(HTTPException):
+    """400 for a body that can never succeed as sent; stored and replayed like a 422"""
+
+    def __init__(self, detail: Any):
+        super().__init__(status_code=400, detail=detail)
+
+
+def _is_final(e: HTTPException) -> bool:
+    return e.status_code == 422 or isinstance(e, MalformedRequest)
+
+
+def request_fingerprint(payload: Any) -> bytes:
+    """SHA-256 of the request body in canonical JSON form"""
+    body = jsonable_encoder(payload)
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).digest()
+
+
+class _ResponseCache:
+    """Completed responses by (scope, key); least recently used evicted beyond max_size"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bytes, int, Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope: str, key: str) -> Optional[Tuple[bytes, int, Any]]:
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                return None
+            if entry[3] < time.monotonic():
+                del self._entries[(scope, key)]
+                return None
+            self._entries.move_to_end((scope, key))
+            return entry[:3]
+
+    def put(self, scope: str, key: str, fingerprint: bytes, status_code: int, body: Any):
+        with self._lock:
+            self._entries[(scope, key)] = (fingerprint, status_code, body,
+                                           time.monotonic() + IDEMPOTENCY_TTL_HOURS * 3600)
+            self._entries.move_to_end((scope, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+_cache = _ResponseCache(IDEMPOTENCY_CACHE_SIZE)
+_sweeper_started = False
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(IDEMPOTENCY_SWEEP_INTERVAL)
+        db = SessionLocal()
+        try:
+            while True:
+                deleted = db.execute(
+                    text("""
+                    DELETE FROM idempotency_keys
+                    WHERE ctid IN (
+                        SELECT ctid FROM idempotency_keys
+                        WHERE expires_at < CURRENT_TIMESTAMP
+                        LIMIT 5000
+                    )
+                    """)
+                ).rowcount
+                db.commit()
+                if deleted < 5000:
+                    break
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Idempotency key sweep failed: {e}")
+        finally:
+            db.close()
+
+
+def _ensure_sweeper():
+    global _sweeper_started
+    if _sweeper_started:
+        return
+    with _sweeper_lock:
+        if _sweeper_started:
+            return
+        _sweeper_started = True
+    threading.Thread(target=_sweep_loop, name="idempotency-sweeper", daemon=True).start()
+
+
+def _replay(status_code: int, body: Any) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content=body, headers={"Idempotent-Replayed": "true"})
+
+
+def _mismatch() -> HTTPException:
+    return HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+
+def _claim(db, scope: str, key: str, fingerprint: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Take the key for this attempt. Returns None when claimed, otherwise the
+    existing row (status_code NULL while its attempt is still running).
+    Expired rows and attempts stuck past the lock timeout are taken over.
+    """
+    claimed = db.execute(
+        text("""
+        INSERT INTO idempotency_keys (scope, idempotency_key, request_hash, expires_at)
+        VALUES (:scope, :key, :fingerprint, CURRENT_TIMESTAMP + make_interval(secs => :ttl))
+        ON CONFLICT (scope, idempotency_key) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash, status_code = NULL, response = NULL,
+            locked_at = CURRENT_TIMESTAMP, expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at < CURRENT_TIMESTAMP
+           OR (idempotency_keys.status_code IS NULL
+               AND idempotency_keys.request_hash = EXCLUDED.request_hash
+               AND idempotency_keys.locked_at < CURRENT_TIMESTAMP - make_interval(secs => :lock_secs))
+        RETURNING 1
+        """),
+        {"scope": scope, "key": key, "fingerprint": fingerprint,
+         "ttl": IDEMPOTENCY_TTL_HOURS * 3600, "lock_secs": IDEMPOTENCY_LOCK_SECONDS}
+    ).fetchone()
+    db.commit()
+    if claimed:
+        return None
+    row = db.execute(
+        text("""
+        SELECT request_hash, status_code, response FROM idempotency_keys
+        WHERE scope = :scope AND idempotency_key = :key
+        """),
+        {"scope": scope, "key": key}
+    ).fetchone()
+    return {"request_hash": bytes(row[0]), "status_code": row[1], "response": row[2]} if row else None
+
+
+def _complete(db, scope: str, key: str, status_code: int, body: Any):
+    db.execute(
+        text("""
+        UPDATE idempotency_keys SET status_code = :status_code, response = CAST(:response AS jsonb)
+        WHERE scope = :scope AND idempotency_key = :key
+        """),
+        {"scope": scope, "key": key, "status_code": status_code, "response": json.dumps(body)}
+    )
+    db.commit()
+
+
+def _release(db, scope: str, key: str):
+    # The handler may have left the session mid-transaction
+    db.rollback()
+    db.execute(
+        text("DELETE FROM idempotency_keys WHERE scope = :scope AND idempotency_key = :key AND status_code IS NULL"),
+        {"scope": scope, "key": key}
+    )
+    db.commit()
+
+
+def run_idempotent(db, key: Optional[str], scope: str, payload: Any, handler: Callable[[], Any]):
+    """
+    Run `handler` at most once per (scope, key) and return its result, or
+    replay the stored response. Without a key the handler simply runs.
+    `db` is the route's session; the claim is committed on it before the
+    handler runs, so concurrent retries see it.
+    """
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+
+    fingerprint = request_fingerprint(payload)
+    cached = _cache.get(scope, key)
+    if cached is not None:
+        if cached[0] != fingerprint:
+            raise _mismatch()
+        return _replay(cached[1], cached[2])
+
+    _ensure_sweeper()
+    existing = _claim(db, scope, key, fingerprint)
+    if existing is not None:
+        if existing["request_hash"] != fingerprint:
+            raise _mismatch()
+        if existing["status_code"] is None:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"}
+            )
+        _cache.put(scope, key, fingerprint, existing["status_code"], existing["response"])
+        return _replay(existing["status_code"], existing["response"])
+
+    try:
+        result = handler()
+    except HTTPException as e:
+        if not _is_final(e):
+            _release(db, scope, key)
+            raise
+        db.rollback()
+        body = {"detail": e.detail}
+        _complete(db, scope, key, e.status_code, body)
+        _cache.put(scope, key, fingerprint, e.status_code, body)
+        raise
+    except Exception:
+        _release(db, scope, key)
+        raise
+
+    body = jsonable_encoder(result)
+    _complete(db, scope, key, 200, body)
+    _cache.put(scope, key, fingerprint, 200, body)
+    return result
@@ -0,0 +1,316 @@
+"""
+Prometheus metrics
+- Counter / Gauge / Histogram with labels, rendered in the Prometheus text format
+- setup_metrics(app, service): request latency middleware and a GET /metrics endpoint
+- Domain counters shared by the services (ballots, tokens, bulletin entries, logins)
+
+Metrics are kept per process: with several uvicorn workers, each worker
+exposes its own values and Prometheus should scrape them individually
+(or run one worker per container).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: 1ms .. 10s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+    Use set_function() for values read at scrape time (e.g. pool size).
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                items.append((key, float(function())))
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ---------------------------------------------------------------------------
+# Metrics shared by all services
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_DURATION = Histogram(
+    "evote_http_request_duration_seconds", "HTTP request latency by route",
+    ["service", "method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "evote_http_requests_in_progress", "HTTP requests currently being handled", ["service"]
+)
+OPERATION_DURATION = Histogram(
+    "evote_operation_duration_seconds",
+    "Time spent in traced operations (crypto, bulletin appends, audit writes, SQL statements)",
+    ["stage", "operation"]
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "evote_db_pool_connections", "Database connection pool state", ["state"]
+)
+
+# Domain counters
+BALLOTS = Counter(
+    "evote_ballots_total", "Ballots submitted, by result and rejection reason", ["election_id", "result", "reason"]
+)
+TOKENS_ISSUED = Counter(
+    "evote_tokens_issued_total", "Anonymous voting tokens issued", ["election_id", "method"]
+)
+BULLETIN_ENTRIES = Counter(
+    "evote_bulletin_entries_total", "Bulletin board append attempts", ["entry_type", "result"]
+)
+LOGINS = Counter(
+    "evote_logins_total", "Login attempts by result", ["result"]
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "evote_password_hash_pending", "bcrypt jobs queued or running in the auth service's hashing pool"
+)
+PASSWORD_HASH_SHED = Counter(
+    "evote_password_hash_shed_total", "bcrypt jobs rejected (pool full or timed out)", ["operation"]
+)
+RATE_LIMITED = Counter(
+    "evote_rate_limited_total", "Requests rejected with 429 by a rate limit", ["service", "rule"]
+)
+REQUESTS_SHED = Counter(
+    "evote_requests_shed_total", "Requests rejected with 503 by admission control", ["service", "reason"]
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "evote_admission_in_flight", "Requests admitted whose response has not started", ["service"]
+)
+BALLOT_QUEUE_DEPTH = Gauge(
+    "evote_ballot_queue_depth", "Ballots accepted into the write-behind journal and not yet committed"
+)
+BALLOT_QUEUE_BATCH_SIZE = Histogram(
+    "evote_ballot_queue_batch_size", "Ballots per group-commit transaction",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+
+
+# Label for rejections that happen before the election is confirmed to exist:
+# request fields must never become label values, or random ids grow the series without bound
+UNKNOWN_ELECTION = "unknown"
+
+
+def record_ballot_rejected(election_id: str, reason: str):
+    """election_id must come from the database (or be UNKNOWN_ELECTION)"""
+    BALLOTS.inc(election_id=election_id, result="rejected", reason=reason)
+
+
+def record_ballot_accepted(election_id: str):
+    BALLOTS.inc(election_id=election_id, result="accepted", reason="")
+
+
+def instrument_db_pool(engine=None):
+    """Expose the SQLAlchemy QueuePool state as gauges, read at scrape time"""
+    if engine is None:
+        from shared.database import engine
+    pool = engine.pool
+    DB_POOL_CONNECTIONS.set_function(lambda: pool.size(), state="size")
+    DB_POOL_CONNECTIONS.set_function(lambda: pool.checkedout(), state="checked_out")
+    DB_POOL_CONNECTIONS.set_function(lambda: pool.checkedin(), state="idle")
+    DB_POOL_CONNECTIONS.set_function(lambda: max(pool.overflow(), 0), state="overflow")
+
+
+def _observe_span(span):
+    if span.stage:
+        OPERATION_DURATION.observe(span.duration_ms / 1000.0, stage=span.stage, operation=span.name)
+
+
+def setup_metrics(app, service_name: str, path: str = "/metrics"):
+    """
+    Register request metrics middleware and the /metrics endpoint on a FastAPI app.
+    Requests are labelled by route template (/api/election/{election_id}), not raw path.
+    """
+    from fastapi.responses import Response
+    from shared.tracing import add_span_listener
+
+    instrument_db_pool()
+    add_span_listener(_observe_span)
+
+    @app.get(path, include_in_schema=False)
+    def metrics():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    @app.middleware("http")
+    async def record_request_metrics(request, call_next):
+        if request.url.path == path:
+            return await call_next(request)
+        HTTP_REQUESTS_IN_PROGRESS.inc(service=service_name)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec(service=service_name)
+            route = request.scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                service=service_name,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
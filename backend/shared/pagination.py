@@ -0,0 +1,79 @@
+"""
+Keyset (cursor) pagination for list endpoints
+
+Every page is `WHERE (sort_key, id) < (:cursor values) ORDER BY sort_key, id
+LIMIT n + 1` against a matching index, so page N costs the same as page 1
+no matter how large the table is. The response body stays a plain JSON
+array; the opaque cursor for the next page is returned in the X-Next-Cursor
+header (and as a Link: rel="next" URL). No header means this is the last page.
+
+Usage inside a route:
+    limit = clamp_limit(limit)
+    after = decode_cursor(cursor, (datetime.fromisoformat, uuid.UUID))  # None on the first page
+    rows = ... LIMIT :limit + 1 ...
+    rows = paginate(request, response, rows, limit, lambda r: (r[5], r[0]))
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "500"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return PAGE_DEFAULT_LIMIT
+    return max(1, min(limit, PAGE_MAX_LIMIT))
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    # Values travel as strings; queries CAST them back to the column type
+    values = [v.isoformat() if isinstance(v, datetime) else str(v) for v in values]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], parsers: Sequence[Callable[[str], Any]]) -> Optional[List[Any]]:
+    """
+    Decode a cursor into its key values, converting each with the matching
+    parser (e.g. datetime.fromisoformat, uuid.UUID). None when there is no cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong cursor size")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def prefix_pattern(prefix: str) -> str:
+    """LIKE pattern matching values that start with `prefix` (case-insensitive callers lower() both sides)"""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.lower() + "%"
+
+
+def paginate(request: Request, response: Response, rows: List[Any], limit: int,
+             key: Callable[[Any], Sequence[Any]]) -> List[Any]:
+    """
+    Trim a `limit + 1` row fetch to `limit` rows and, if there is a further
+    page, advertise its cursor built from the last returned row's sort key.
+    """
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    cursor = encode_cursor(key(rows[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    next_url = request.url.include_query_params(cursor=cursor, limit=limit)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return rows
@@ -0,0 +1,388 @@
+"""
+Rate limiting and admission control (ASGI middleware)
+- Per-route token buckets keyed by client IP, authenticated user, or the
+  election_id in the path / JSON body. A request over its limit gets a 429
+  with Retry-After before it reaches a route, so it costs no DB work.
+- A per-process cap on requests in flight, and shedding while the DB pool
+  is exhausted: new requests get a 503 with Retry-After instead of queueing
+  for a connection for pool_timeout seconds.
+
+Election buckets are keyed by a field of an unauthenticated request, so they
+only count requests the route accepted: the bucket is checked up front, but
+a token is taken when the response status is below 400. Junk submissions
+naming an election cannot use up its budget and lock real voters out.
+
+IP buckets use scope["client"]. Behind nginx that is the proxy's address
+unless uvicorn trusts its X-Forwarded-For (--proxy-headers, which is the
+default, and --forwarded-allow-ips / FORWARDED_ALLOW_IPS set to the proxy).
+
+Buckets live in process memory, so with N workers the effective limit is up
+to N times the configured rate. If REDIS_URL is set (and the redis package
+is installed, as for shared/election_cache.py) they live in Redis instead and
+are shared by every process; if Redis is unreachable, the process falls back
+to its own buckets. Every limit can be overridden with
+RATE_LIMIT_<NAME>=<per_minute>[:<burst>] (e.g. RATE_LIMIT_LOGIN=30:10);
+RATE_LIMIT_ENABLED=false turns the buckets off (e.g. for load tests).
+
+Usage (before the CORS middleware is added, so 429s keep CORS headers):
+    setup_rate_limiting(app, "token-service", [
+        RateLimit("request_signature", r"/api/token/request-signature", per_minute=60, burst=20),
+    ])
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import List, Optional, Sequence, Tuple
+
+from shared.metrics import ADMISSION_IN_FLIGHT, RATE_LIMITED, REQUESTS_SHED
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+# 0: derive from the DB pool size (ADMISSION_INFLIGHT_PER_CONNECTION requests per connection)
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "0"))
+ADMISSION_INFLIGHT_PER_CONNECTION = int(os.getenv("ADMISSION_INFLIGHT_PER_CONNECTION", "4"))
+ADMISSION_SHED_ON_POOL_EXHAUSTED = os.getenv("ADMISSION_SHED_ON_POOL_EXHAUSTED", "true").lower() == "true"
+
+# Bodies larger than this are not parsed for an election_id (the bucket falls back to the IP)
+_MAX_KEY_BODY_BYTES = 64 * 1024
+
+EXEMPT_PATHS = {"/health", "/metrics", "/", "/api/docs", "/api/redoc", "/openapi.json"}
+
+KEY_IP = "ip"
+KEY_USER = "user"
+KEY_ELECTION = "election"
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A token bucket of `burst` tokens refilled at `per_minute`, one bucket per key"""
+    name: str
+    path: str  # regex, matched against the whole path
+    per_minute: float
+    burst: int
+    key: str = KEY_IP
+    methods: Tuple[str, ...] = ("POST",)
+
+
+def _with_env_override(rule: RateLimit) -> RateLimit:
+    value = os.getenv(f"RATE_LIMIT_{rule.name.upper()}")
+    if not value:
+        return rule
+    try:
+        per_minute, _, burst = value.partition(":")
+        return replace(rule, per_minute=float(per_minute), burst=int(burst) if burst else rule.burst)
+    except ValueError:
+        logger.warning(f"Ignoring invalid RATE_LIMIT_{rule.name.upper()}={value!r}")
+        return rule
+
+
+class TokenBuckets:
+    """In-process buckets, least recently used evicted beyond max_keys (an evicted key starts full)"""
+
+    remote = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def _refill(self, rule: RateLimit, key: str) -> List[float]:
+        now = time.monotonic()
+        bucket = self._buckets.get((rule.name, key))
+        if bucket is None:
+            bucket = [float(rule.burst), now]
+            self._buckets[(rule.name, key)] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((rule.name, key))
+            bucket[0] = min(float(rule.burst), bucket[0] + (now - bucket[1]) * rule.per_minute / 60.0)
+            bucket[1] = now
+        return bucket
+
+    def take(self, rule: RateLimit, key: str) -> float:
+        """Take one token; 0 if allowed, otherwise seconds until a token is available"""
+        bucket = self._refill(rule, key)
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return _wait(rule, bucket[0])
+
+    def wait_time(self, rule: RateLimit, key: str) -> float:
+        """Like take, without taking the token"""
+        bucket = self._refill(rule, key)
+        return 0.0 if bucket[0] >= 1.0 else _wait(rule, bucket[0])
+
+    def charge(self, rule: RateLimit, key: str):
+        """Take one token even if the bucket is empty (requests admitted concurrently)"""
+        self._refill(rule, key)[0] -= 1.0
+
+
+def _wait(rule: RateLimit, tokens: float) -> float:
+    rate = rule.per_minute / 60.0
+    return (1.0 - tokens) / rate if rate > 0 else 60.0
+
+
+# KEYS[1]: bucket; ARGV: per-second rate, burst, mode (take | wait | charge).
+# Server time, so processes on different hosts share one clock. Returns
+# {1 if a token was taken, tokens left as a string} (Lua numbers are
+# truncated to integers on the way out).
+_REDIS_BUCKET_SCRIPT = """
+local rate, burst, mode = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+if state[2] then tokens = math.min(burst, tokens + (now - tonumber(state[2])) * rate) end
+local taken = 0
+if mode == 'charge' or (mode == 'take' and tokens >= 1) then
+  tokens = tokens - 1
+  taken = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+if rate > 0 then redis.call('PEXPIRE', KEYS[1], math.ceil((burst + 1) / rate * 1000)) end
+return {taken, tostring(tokens)}
+"""
+
+
+class RedisTokenBuckets:
+    """Buckets shared by every process through Redis; each operation is one atomic script call"""
+
+    remote = True
+
+    def __init__(self, url: str, fallback: TokenBuckets):
+        import redis  # Optional dependency
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.script = self.client.register_script(_REDIS_BUCKET_SCRIPT)
+        self.fallback = fallback
+
+    def _run(self, rule: RateLimit, key: str, mode: str) -> Optional[Tuple[bool, float]]:
+        try:
+            taken, tokens = self.script(
+                keys=[f"evote:ratelimit:{rule.name}:{key}"],
+                args=[rule.per_minute / 60.0, rule.burst, mode]
+            )
+            return bool(taken), float(tokens)
+        except Exception as e:
+            logger.warning(f"Rate limit store unavailable, using in-process buckets: {e}")
+            return None
+
+    def take(self, rule: RateLimit, key: str) -> float:
+        result = self._run(rule, key, "take")
+        if result is None:
+            return self.fallback.take(rule, key)
+        taken, tokens = result
+        return 0.0 if taken else _wait(rule, tokens)
+
+    def wait_time(self, rule: RateLimit, key: str) -> float:
+        result = self._run(rule, key, "wait")
+        if result is None:
+            return self.fallback.wait_time(rule, key)
+        return 0.0 if result[1] >= 1.0 else _wait(rule, result[1])
+
+    def charge(self, rule: RateLimit, key: str):
+        if self._run(rule, key, "charge") is None:
+            self.fallback.charge(rule, key)
+
+
+def _bucket_store():
+    local = TokenBuckets(RATE_LIMIT_MAX_KEYS)
+    if REDIS_URL:
+        try:
+            return RedisTokenBuckets(REDIS_URL, local)
+        except ImportError:
+            logger.warning("REDIS_URL set but the redis package is not installed; using in-process rate limits")
+    return local
+
+
+def _client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _user_id(scope) -> Optional[str]:
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    # Verified (signature check against the cached JWKS, no DB), so nobody can drain another user's bucket
+    from shared.auth import decode_access_token
+    claims = decode_access_token(authorization[len("Bearer "):])
+    return claims["sub"] if claims else None
+
+
+_UUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+_ELECTION_IN_PATH = re.compile(r"/(" + _UUID.pattern + r")(?:/|$)")
+
+
+async def _read_body(receive) -> Tuple[bytes, list]:
+    """Read the request body, keeping the messages so the route can receive them again"""
+    messages, chunks, size = [], [], 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        size += len(chunks[-1])
+        if not message.get("more_body", False) or size > _MAX_KEY_BODY_BYTES:
+            break
+    return b"".join(chunks), messages
+
+
+def _replay(messages: list, receive):
+    pending = list(messages)
+
+    async def replayed():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+    return replayed
+
+
+async def _send_error(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _pool_capacity(pool) -> int:
+    # QueuePool does not expose max_overflow publicly
+    return pool.size() + getattr(pool, "_max_overflow", 0)
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, service: str, rules: Sequence[RateLimit], max_in_flight: int,
+                 pool=None, enabled: bool = True):
+        self.app = app
+        self.service = service
+        self.rules = [(re.compile(rule.path), rule) for rule in rules] if enabled else []
+        self.max_in_flight = max_in_flight
+        self.pool = pool
+        self.buckets = _bucket_store()
+        self.in_flight = 0
+
+    async def _bucket_call(self, operation, rule: RateLimit, key: str):
+        # Redis round trips stay off the event loop; in-process buckets are a dict lookup
+        if self.buckets.remote:
+            return await asyncio.to_thread(operation, rule, key)
+        return operation(rule, key)
+
+    def _pool_exhausted(self) -> bool:
+        if self.pool is None:
+            return False
+        try:
+            return self.pool.checkedout() >= _pool_capacity(self.pool)
+        except Exception:
+            return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        # Admission control: cheap checks first, nothing below has touched the DB yet
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            REQUESTS_SHED.inc(service=self.service, reason="in_flight")
+            return await _send_error(send, 503, "Service overloaded, please retry", 1)
+        if ADMISSION_SHED_ON_POOL_EXHAUSTED and self._pool_exhausted():
+            REQUESTS_SHED.inc(service=self.service, reason="db_pool")
+            return await _send_error(send, 503, "Service overloaded, please retry", 1)
+
+        charge_on_success = []
+        for pattern, rule in self.rules:
+            if scope["method"] not in rule.methods or not pattern.fullmatch(scope["path"]):
+                continue
+            key = None
+            if rule.key == KEY_USER:
+                # A JWKS refetch may block briefly, so keep it off the event loop
+                key = await asyncio.to_thread(_user_id, scope)
+            elif rule.key == KEY_ELECTION:
+                match = _ELECTION_IN_PATH.search(scope["path"])
+                if match:
+                    key = match.group(1).lower()
+                else:
+                    body, messages = await _read_body(receive)
+                    receive = _replay(messages, receive)
+                    try:
+                        election_id = json.loads(body).get("election_id")
+                        key = election_id.lower() if isinstance(election_id, str) and _UUID.fullmatch(election_id) else None
+                    except (ValueError, AttributeError):
+                        key = None
+            if rule.key == KEY_ELECTION and key:
+                # Checked now, paid for once the route has accepted the request
+                retry_after = await self._bucket_call(self.buckets.wait_time, rule, key)
+                if not retry_after:
+                    charge_on_success.append((rule, key))
+            else:
+                # No user / election to key on: fall back to the caller's address
+                key = key or "ip:" + _client_ip(scope)
+                retry_after = await self._bucket_call(self.buckets.take, rule, key)
+            if retry_after:
+                RATE_LIMITED.inc(service=self.service, rule=rule.name)
+                return await _send_error(send, 429, "Too many requests", retry_after)
+
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight, service=self.service)
+        started = False
+
+        async def send_and_release(message):
+            # A request stops counting once its response starts (long-lived streams do not hold a slot)
+            nonlocal started
+            if message["type"] == "http.response.start" and not started:
+                started = True
+                self.in_flight -= 1
+                ADMISSION_IN_FLIGHT.set(self.in_flight, service=self.service)
+                if message["status"] < 400:
+                    for rule, key in charge_on_success:
+                        await self._bucket_call(self.buckets.charge, rule, key)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            if not started:
+                self.in_flight -= 1
+                ADMISSION_IN_FLIGHT.set(self.in_flight, service=self.service)
+
+
+def setup_rate_limiting(app, service_name: str, rules: Sequence[RateLimit] = ()):
+    """Register the middleware; call it before adding CORSMiddleware"""
+    from shared.database import engine
+
+    pool = engine.pool
+    max_in_flight = ADMISSION_MAX_INFLIGHT
+    if not max_in_flight:
+        try:
+            max_in_flight = _pool_capacity(pool) * ADMISSION_INFLIGHT_PER_CONNECTION
+        except Exception:
+            max_in_flight = 0
+    app.add_middleware(
+        RateLimitMiddleware,
+        service=service_name,
+        rules=[_with_env_override(rule) for rule in rules],
+        max_in_flight=max_in_flight,
+        pool=pool,
+        enabled=RATE_LIMIT_ENABLED,
+    )
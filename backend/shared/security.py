@@ -8,8 +8,10 @@ import hashlib
 import secrets
 
 # Security constants
+# Tokens are signed with Ed25519 keys (auth-service/app/utils/signing_keys.py);
+# the secret only verifies HS256 refresh tokens issued before the switch
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change_this_to_very_long_random_secret_key_at_least_64_characters")
-JWT_ALGORITHM = "HS256"
+JWT_ALGORITHM = "EdDSA"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
@@ -0,0 +1,134 @@
+"""
+Directory-backed Ed25519 signing keys
+Keys are PKCS#8 PEM files in one directory, one per key, named <kid>.pem.
+The newest key signs; every key in the directory is published (as a JWKS),
+so anything signed before a rotation keeps verifying until its key is
+pruned. Every process rereads the directory every reload_seconds, so a
+rotation reaches all of them without a restart. A key is generated on first
+use if the directory is empty.
+
+Used for JWTs (auth-service/app/utils/signing_keys.py) and bulletin board
+entries (bulletin-board-service/app/utils/entry_signing.py).
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from shared.crypto_utils import CryptoUtils
+from shared.eddsa_jwt import public_jwk
+
+logger = logging.getLogger(__name__)
+
+
+class SigningKeyStore:
+    """Directory-backed Ed25519 key set with an active (newest) key"""
+
+    def __init__(self, directory: Path, label: str, reload_seconds: float = 30.0):
+        self.directory = directory
+        self.label = label  # names the key set in log messages
+        self.reload_seconds = reload_seconds
+        self._lock = threading.Lock()
+        # (mtime, kid, private key), oldest first
+        self._keys: List[Tuple[float, str, ed25519.Ed25519PrivateKey]] = []
+        self._public: Dict[str, ed25519.Ed25519PublicKey] = {}
+        self._loaded_at = 0.0
+
+    def _read(self) -> List[Tuple[float, str, ed25519.Ed25519PrivateKey]]:
+        keys = []
+        if self.directory.is_dir():
+            for path in self.directory.glob("*.pem"):
+                try:
+                    key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping unreadable {self.label} key {path.name}: {e}")
+                    continue
+                if isinstance(key, ed25519.Ed25519PrivateKey):
+                    keys.append((path.stat().st_mtime, path.stem, key))
+        keys.sort(key=lambda item: (item[0], item[1]))
+        return keys
+
+    def _refresh(self, force: bool = False):
+        if not force and time.monotonic() - self._loaded_at < self.reload_seconds:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._loaded_at < self.reload_seconds:
+                return
+            keys = self._read()
+            if not keys:
+                self._write_new_key()
+                keys = self._read()
+            self._keys = keys
+            self._public = {kid: key.public_key() for _, kid, key in keys}
+            self._loaded_at = time.monotonic()
+
+    def _write_new_key(self) -> str:
+        private_bytes, _ = CryptoUtils.generate_ed25519_keypair()
+        key = ed25519.Ed25519PrivateKey.from_private_bytes(private_bytes)
+        kid = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "-" + secrets.token_hex(4)
+        pem = key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.directory / f"{kid}.pem", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        logger.info(f"Generated {self.label} signing key", extra={"kid": kid})
+        return kid
+
+    def signing_key(self) -> Tuple[str, ed25519.Ed25519PrivateKey]:
+        self._refresh()
+        _, kid, key = self._keys[-1]
+        return kid, key
+
+    def public_key(self, kid: Optional[str]) -> Optional[ed25519.Ed25519PublicKey]:
+        self._refresh()
+        key = self._public.get(kid)
+        if key is None and kid is not None and time.monotonic() - self._loaded_at > 1.0:
+            # Possibly rotated by another process since the last reload (at most one reread per second)
+            self._refresh(force=True)
+            key = self._public.get(kid)
+        return key
+
+    def jwks(self) -> Dict[str, list]:
+        self._refresh()
+        return {"keys": [public_jwk(key.public_key(), kid) for _, kid, key in reversed(self._keys)]}
+
+    def rotate(self) -> str:
+        with self._lock:
+            kid = self._write_new_key()
+        self._refresh(force=True)
+        return kid
+
+    def prune(self, grace_seconds: float) -> List[str]:
+        """Delete keys that were superseded more than grace_seconds ago (never the active key)"""
+        self._refresh(force=True)
+        now = time.time()
+        removed = []
+        for (_, kid, _), (superseded_at, _, _) in zip(self._keys, self._keys[1:]):
+            if now - superseded_at > grace_seconds:
+                (self.directory / f"{kid}.pem").unlink(missing_ok=True)
+                removed.append(kid)
+        self._refresh(force=True)
+        return removed
+
+    def describe(self) -> List[Dict[str, object]]:
+        self._refresh(force=True)
+        active = self._keys[-1][1]
+        return [
+            {
+                "kid": kid,
+                "created_at": datetime.fromtimestamp(mtime, timezone.utc).isoformat(),
+                "active": kid == active,
+            }
+            for mtime, kid, _ in self._keys
+        ]
@@ -0,0 +1,33 @@
+"""
+Precomputed statistics
+Counters are maintained by database triggers (see scripts/add-stats-counters.sql),
+so every read here is a primary-key lookup regardless of table size.
+"""
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def get_counters(db: Session) -> Dict[str, int]:
+    """Global counters: elections_total, elections_active, voters_total, kyc_pending"""
+    rows = db.execute(text("SELECT counter_name, value FROM stats_counters")).fetchall()
+    return {row[0]: int(row[1]) for row in rows}
+
+
+def get_ballot_count(db: Session, election_id: str) -> int:
+    """Number of ballots cast in an election (sum of the counter shards)"""
+    return int(db.execute(
+        text("""
+        SELECT COALESCE(SUM(ballot_count), 0)
+        FROM election_ballot_counts
+        WHERE election_id = CAST(:eid AS uuid)
+        """),
+        {"eid": election_id}
+    ).scalar())
+
+
+def refresh_counters(db: Session):
+    """Recompute all counters from the base tables (drift repair; takes table locks)"""
+    db.execute(text("SELECT refresh_stats_counters()"))
+    db.commit()
@@ -0,0 +1,175 @@
+"""
+Structured, non-blocking logging
+- setup_logging(app, service): JSON-lines output written by a background thread
+- Request handlers only enqueue records (QueueHandler); formatting and stdout
+  writes happen on the listener thread
+- Per-route sampling and level overrides for high-volume endpoints
+
+Structured fields are passed with `extra`:
+    logger.info("Ballot stored", extra={"election_id": eid, "ballot_hash": bh[:16]})
+
+Configuration (environment):
+    LOG_LEVEL=INFO
+    LOG_FORMAT=json                                   # json | text
+    LOG_ROUTE_LEVELS=/api/vote/submit=WARNING         # path prefix = minimum level (raises LOG_LEVEL)
+    LOG_SAMPLE_RATES=/api/token=0.1,/api/vote=0.05    # path prefix = fraction of requests logged
+Sampling is decided once per request and never drops WARNING or above.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from shared.tracing import current_trace_id
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+def _parse_route_map(value: str) -> List[Tuple[str, str]]:
+    """Parse "prefix=value,prefix=value", longest prefix first"""
+    entries = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        prefix, _, setting = item.partition("=")
+        if setting:
+            entries.append((prefix.strip(), setting.strip()))
+    return sorted(entries, key=lambda e: len(e[0]), reverse=True)
+
+
+def _match(entries: List[Tuple[str, str]], path: str) -> Optional[str]:
+    for prefix, setting in entries:
+        if path.startswith(prefix):
+            return setting
+    return None
+
+
+ROUTE_LEVELS = [(p, logging.getLevelName(v.upper())) for p, v in _parse_route_map(os.getenv("LOG_ROUTE_LEVELS", ""))]
+SAMPLE_RATES = [(p, float(v)) for p, v in _parse_route_map(os.getenv("LOG_SAMPLE_RATES", ""))]
+
+# Per-request logging decision: (route path, minimum level for this request)
+_request_log: contextvars.ContextVar[Optional[Tuple[str, int]]] = contextvars.ContextVar("request_log", default=None)
+
+
+class RequestFilter(logging.Filter):
+    """
+    Applies per-route level/sampling and stamps request context onto the record.
+    Runs in the calling thread, before the record is queued.
+    """
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request_log.get()
+        if context is not None:
+            route, min_level = context
+            if record.levelno < min_level:
+                return False
+            record.route = route
+        record.service = self.service
+        trace_id = current_trace_id()
+        if trace_id:
+            record.trace_id = trace_id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the request: records are dropped when the
+    queue is full, and message formatting is left to the listener thread.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(service: str):
+    """Route the root logger through a background queue listener (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _DroppingQueueHandler(log_queue)
+    handler.addFilter(RequestFilter(service))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def setup_logging(app, service: str):
+    """
+    Configure structured logging and register the per-request sampling middleware.
+    """
+    configure_logging(service)
+    base_level = logging.getLogger().getEffectiveLevel()
+
+    @app.middleware("http")
+    async def log_context(request, call_next):
+        path = request.url.path
+        min_level = _match(ROUTE_LEVELS, path) or base_level
+        rate = _match(SAMPLE_RATES, path)
+        if rate is not None and random.random() >= rate:
+            # Unsampled request: keep warnings and errors only
+            min_level = max(min_level, logging.WARNING)
+        token = _request_log.set((path, min_level))
+        try:
+            return await call_next(request)
+        finally:
+            _request_log.reset(token)
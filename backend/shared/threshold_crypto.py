@@ -5,7 +5,7 @@ Implements Shamir's Secret Sharing for trustee-based decryption
 import secrets
 import hashlib
 import base64
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.backends import default_backend
@@ -179,6 +179,21 @@ class ThresholdCrypto:
         
         return share_hash
     
+    @staticmethod
+    def partial_decrypt_many(ciphertexts: Iterable[bytes], share: dict) -> List[bytes]:
+        """
+        partial_decrypt for many ballots with the same share (same results).
+        The share's part of the hash input is formatted and absorbed once,
+        then the hash state is copied for each ballot.
+        """
+        prefix = hashlib.sha256(f"{share['share_x']}{share['share_y']}".encode())
+        results = []
+        for ciphertext in ciphertexts:
+            digest = prefix.copy()
+            digest.update(ciphertext.hex().encode())
+            results.append(digest.digest())
+        return results
+    
     @staticmethod
     def combine_partial_decryptions(
         partial_decryptions: List[bytes],
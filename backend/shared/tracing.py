@@ -0,0 +1,358 @@
+"""
+Request tracing and per-stage timing
+- setup_tracing(app, service): middleware that opens a root span per request
+- span(name, stage=...): context manager for timing a block inside a request
+- DB statements are timed automatically through SQLAlchemy engine events
+- inject_headers(): propagates the trace across service-to-service HTTP calls
+
+Each request's stage totals (db, crypto, bulletin, audit) are returned in a
+Server-Timing header. Finished spans can be exported to a JSON-lines file or
+an OTLP/HTTP collector (e.g. a local OpenTelemetry collector on :4318).
+"""
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()  # none | file | otlp
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "0"))  # log stage breakdown above this; 0 disables
+
+# Stages reported per request
+STAGE_DB = "db"
+STAGE_CRYPTO = "crypto"
+STAGE_BULLETIN = "bulletin"
+STAGE_AUDIT = "audit"
+STAGES = (STAGE_DB, STAGE_CRYPTO, STAGE_BULLETIN, STAGE_AUDIT)
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("name", "span_id", "parent_id", "stage", "owner_stage", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, parent_id: Optional[str] = None,
+                 stage: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else parent_id
+        self.stage = stage
+        # Stage time is attributed to the outermost staged span only, so an audit
+        # write's INSERT counts as audit time rather than also as db time
+        self.owner_stage = parent.owner_stage if parent and parent.owner_stage else stage
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """All spans recorded while handling one request"""
+
+    def __init__(self, service: str, trace_id: Optional[str] = None, sampled: bool = True):
+        self.service = service
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.stage_ns: Dict[str, int] = {stage: 0 for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def add(self, span: Span, parent: Optional[Span]):
+        with self._lock:
+            if span.stage and not (parent and parent.owner_stage):
+                self.stage_ns[span.stage] = self.stage_ns.get(span.stage, 0) + (span.end_ns - span.start_ns)
+            if self.sampled:
+                self.spans.append(span)
+        for listener in _span_listeners:
+            try:
+                listener(span)
+            except Exception as e:
+                logger.debug(f"Span listener failed: {e}")
+
+    def stage_ms(self) -> Dict[str, float]:
+        return {stage: round(ns / 1e6, 3) for stage, ns in self.stage_ns.items()}
+
+    def server_timing(self, root: Span) -> str:
+        parts = [f"{stage};dur={ms}" for stage, ms in self.stage_ms().items() if ms]
+        parts.append(f"total;dur={round(root.duration_ms, 3)}")
+        return ", ".join(parts)
+
+
+# Called with every finished span (e.g. to feed metrics histograms)
+_span_listeners: List[Callable[[Span], None]] = []
+
+
+def add_span_listener(listener: Callable[[Span], None]):
+    """Register a callback run for each finished span"""
+    if listener not in _span_listeners:
+        _span_listeners.append(listener)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the request being handled, if any"""
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def span(name: str, stage: Optional[str] = None, **attributes):
+    """
+    Time a block of work inside the current request.
+    No-op outside a traced request.
+
+    Usage:
+        with span("rsa.verify", stage=STAGE_CRYPTO):
+            ...
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, parent=parent, stage=stage, attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.add(current, parent)
+
+
+def record_span(name: str, stage: Optional[str], start_ns: int, end_ns: int, **attributes):
+    """Record an already-timed operation as a child of the current span"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    completed = Span(name, parent=parent, stage=stage, attributes=attributes)
+    completed.start_ns = start_ns
+    completed.end_ns = end_ns
+    trace.add(completed, parent)
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Add a W3C traceparent header for an outgoing HTTP call
+    """
+    headers = dict(headers or {})
+    trace = _current_trace.get()
+    if trace is not None:
+        parent = _current_span.get()
+        span_id = parent.span_id if parent else secrets.token_hex(8)
+        flags = "01" if trace.sampled else "00"
+        headers["traceparent"] = f"00-{trace.trace_id}-{span_id}-{flags}"
+    return headers
+
+
+def _parse_traceparent(value: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[bool]]:
+    """Returns (trace_id, parent_span_id, sampled) or Nones if absent/invalid"""
+    if not value:
+        return None, None, None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None, None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+class _SpanExporter:
+    """
+    Background exporter: requests enqueue finished traces and never block.
+    Traces are dropped if the queue is full.
+    """
+
+    def __init__(self, mode: str, batch_size: int = 512, flush_interval: float = 1.0):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[Trace]" = queue.Queue(maxsize=10000)
+        self.dropped = 0
+        thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        thread.start()
+
+    def submit(self, trace: Trace):
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                if self.mode == "file":
+                    self._write_file(batch)
+                elif self.mode == "otlp":
+                    self._post_otlp(batch)
+            except Exception as e:
+                logger.error(f"Trace export failed: {e}")
+
+    def _write_file(self, batch: List[Trace]):
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            for trace in batch:
+                for s in trace.spans:
+                    f.write(json.dumps({
+                        "service": trace.service,
+                        "trace_id": trace.trace_id,
+                        "span_id": s.span_id,
+                        "parent_id": s.parent_id,
+                        "name": s.name,
+                        "stage": s.stage,
+                        "start_ns": s.start_ns,
+                        "duration_ms": round(s.duration_ms, 3),
+                        "attributes": s.attributes,
+                    }) + "\n")
+
+    def _post_otlp(self, batch: List[Trace]):
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        for trace in batch:
+            for s in trace.spans:
+                attributes = dict(s.attributes)
+                if s.stage:
+                    attributes["stage"] = s.stage
+                by_service.setdefault(trace.service, []).append({
+                    "traceId": trace.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 2 if s.parent_id is None else 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in attributes.items()],
+                })
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                    "scopeSpans": [{"scope": {"name": "shared.tracing"}, "spans": spans}],
+                }
+                for service, spans in by_service.items()
+            ]
+        }
+        request = urllib.request.Request(
+            TRACE_OTLP_ENDPOINT,
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+
+
+_exporter: Optional[_SpanExporter] = None
+
+
+def _get_exporter() -> Optional[_SpanExporter]:
+    global _exporter
+    if _exporter is None and TRACE_EXPORTER in ("file", "otlp"):
+        _exporter = _SpanExporter(TRACE_EXPORTER)
+    return _exporter
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+_engine_instrumented = False
+
+
+def instrument_engine(engine=None):
+    """Time every SQL statement on the shared engine as a db-stage span"""
+    global _engine_instrumented
+    if _engine_instrumented:
+        return
+    from sqlalchemy import event
+    if engine is None:
+        from shared.database import engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_query_start", []).append(time.time_ns())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("trace_query_start")
+        if not starts:
+            return
+        start_ns = starts.pop()
+        if _current_trace.get() is not None:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+            record_span(f"db.{operation.lower()}", STAGE_DB, start_ns, time.time_ns(),
+                        statement=statement.strip()[:200])
+
+    _engine_instrumented = True
+
+
+def setup_tracing(app, service_name: str):
+    """
+    Register the tracing middleware on a FastAPI app.
+    Call after other middleware so the root span covers the whole request.
+    """
+    instrument_engine()
+
+    @app.middleware("http")
+    async def trace_requests(request, call_next):
+        trace_id, parent_id, sampled = _parse_traceparent(request.headers.get("traceparent"))
+        if sampled is None:
+            sampled = _get_exporter() is not None and random.random() < TRACE_SAMPLE_RATE
+        trace = Trace(service_name, trace_id=trace_id, sampled=sampled)
+        root = Span(f"{request.method} {request.url.path}", parent_id=parent_id)
+
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            response = await call_next(request)
+            root.attributes["http.status_code"] = response.status_code
+        finally:
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.add(root, None)
+
+        response.headers["X-Trace-Id"] = trace.trace_id
+        response.headers["Server-Timing"] = trace.server_timing(root)
+
+        if TRACE_SLOW_MS and root.duration_ms >= TRACE_SLOW_MS:
+            logger.warning(f"Slow request {root.name} {root.duration_ms:.1f}ms "
+                           f"trace={trace.trace_id} stages={trace.stage_ms()}")
+
+        exporter = _get_exporter()
+        if exporter and trace.sampled:
+            exporter.submit(trace)
+        return response
@@ -0,0 +1,156 @@
+"""
+Ballot proofs: knowledge of the ECIES ephemeral secret
+A ballot is ECIES-encrypted with a fresh X25519 key pair (r, E = r*B). Its
+proof is a Schnorr proof of knowledge of r for the ballot's own E, taken
+from the ballot bytes, with the Fiat-Shamir challenge bound to the election
+and the ballot hash. Only whoever ran the encryption knows r, so the proof
+shows that the submitter built this ciphertext. Somebody who has only seen
+a ballot cannot resubmit it in altered form with a valid proof, and a proof
+cannot be moved to another ballot or election. Exact copies are already
+refused as duplicate ballot hashes. ECIES ciphertexts admit no proof about
+the plaintext, so this does not show that the vote is a valid choice.
+
+Group: Ed25519 (pycryptodome's native point arithmetic, as in shared/dkg.py).
+E is an X25519 u-coordinate; its Edwards point has y = (u - 1) / (u + 1).
+u alone does not fix the sign of x, so the proof carries R's x. The verifier
+checks that (x, y) is on the curve, which is cheaper than decompressing.
+
+    T = k*B,  c = SHA-512(domain | election | ballot hash | E | T) mod L,
+    s = k + c*r mod L;   valid iff encode(s*B - c*R) == T
+
+Proof fields in the submitted `proof` dict, each the hex of 32 bytes
+little-endian (x coordinate, compressed point T, scalar s):
+    {"scheme": "ecies-ephemeral-v1", "x": ..., "t": ..., "s": ...}
+
+A verification costs two scalar multiplications. A randomized batch check
+would need a multi-scalar multiplication, and in Python that costs more
+than the native ones, so find_invalid checks proofs one by one. The
+pre-tally audit spreads them over a process pool instead.
+
+ZKP_REQUIRED (default true) is read by the vote service (submissions
+without a proof are refused) and by the pre-tally audit (stored ballots
+without a valid proof are invalid rather than unproven).
+"""
+import hashlib
+import os
+import secrets
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+from Crypto.PublicKey.ECC import EccPoint
+
+from shared.dkg import BASE, D, L, P, encode_point
+
+SCHEME = "ecies-ephemeral-v1"
+
+ZKP_REQUIRED = os.getenv("ZKP_REQUIRED", "true").lower() == "true"
+
+_FIELD_BYTES = 32
+_DOMAIN = b"evote-ballot-proof-v2"
+
+
+class ProofError(ValueError):
+    """Malformed proof"""
+
+
+def _field(proof: Dict[str, Any], name: str) -> bytes:
+    value = proof.get(name)
+    try:
+        raw = bytes.fromhex(value)
+    except (TypeError, ValueError):
+        raise ProofError(f"proof.{name} must be hex")
+    if len(raw) != _FIELD_BYTES:
+        raise ProofError(f"proof.{name} must be {_FIELD_BYTES} bytes")
+    return raw
+
+
+@dataclass(frozen=True)
+class BallotProof:
+    x: int       # x coordinate of the ephemeral key's Edwards point
+    t: bytes     # compressed commitment T
+    s: int
+
+    @classmethod
+    def from_dict(cls, proof: Dict[str, Any]) -> "BallotProof":
+        if not isinstance(proof, dict) or proof.get("scheme") != SCHEME:
+            raise ProofError(f"proof.scheme must be {SCHEME!r}")
+        x = int.from_bytes(_field(proof, "x"), "little")
+        t = _field(proof, "t")
+        s = int.from_bytes(_field(proof, "s"), "little")
+        if x >= P or s >= L:
+            raise ProofError("proof value out of range")
+        return cls(x, t, s)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            "scheme": SCHEME,
+            "x": self.x.to_bytes(_FIELD_BYTES, "little").hex(),
+            "t": self.t.hex(),
+            "s": self.s.to_bytes(_FIELD_BYTES, "little").hex(),
+        }
+
+
+def is_current(proof: Any) -> bool:
+    """Whether a stored proof claims this scheme (older schemes prove nothing about the ballot)"""
+    return isinstance(proof, dict) and proof.get("scheme") == SCHEME
+
+
+def _ephemeral_point(ephemeral_key: bytes, x: int) -> EccPoint:
+    """The Edwards point (x, y) for X25519 key u; ProofError unless it is on the curve"""
+    u = int.from_bytes(ephemeral_key, "little")
+    if len(ephemeral_key) != _FIELD_BYTES or u >= P or u == P - 1:
+        raise ProofError("ephemeral key out of range")
+    y = (u - 1) * pow(u + 1, -1, P) % P
+    xx, yy = x * x % P, y * y % P
+    if (yy - xx - 1 - D * xx % P * yy) % P:
+        raise ProofError("proof.x does not match the ephemeral key")
+    return EccPoint(x, y, "Ed25519")
+
+
+def challenge(election_id: str, ballot_hash: str, ephemeral_key: bytes, t: bytes) -> int:
+    digest = hashlib.sha512(b"|".join((
+        _DOMAIN,
+        election_id.lower().encode(),
+        ballot_hash.lower().encode(),
+        bytes(ephemeral_key),
+        t,
+    ))).digest()
+    return int.from_bytes(digest, "little") % L
+
+
+def _clamp(private_key: bytes) -> int:
+    # The scalar X25519 actually multiplies by (RFC 7748)
+    k = bytearray(private_key)
+    k[0] &= 248
+    k[31] &= 127
+    k[31] |= 64
+    return int.from_bytes(k, "little")
+
+
+def prove(election_id: str, ballot_hash: str, ephemeral_private_key: bytes) -> Dict[str, str]:
+    """Proof for a ballot encrypted with this ephemeral X25519 private key (the client side)"""
+    r = _clamp(ephemeral_private_key) % L
+    ephemeral = BASE * r
+    ephemeral_key = ((1 + int(ephemeral.y)) * pow(1 - int(ephemeral.y), -1, P) % P).to_bytes(_FIELD_BYTES, "little")
+    k = secrets.randbelow(L - 1) + 1
+    t = encode_point(BASE * k)
+    s = (k + challenge(election_id, ballot_hash, ephemeral_key, t) * r) % L
+    return BallotProof(int(ephemeral.x), t, s).to_dict()
+
+
+def verify(election_id: str, ballot_hash: str, ephemeral_key: bytes, proof: BallotProof) -> bool:
+    """ephemeral_key must come from the ballot itself (ballot_format), never from the proof dict"""
+    try:
+        ephemeral = _ephemeral_point(bytes(ephemeral_key), proof.x)
+    except ProofError:
+        return False
+    c = challenge(election_id, ballot_hash, ephemeral_key, proof.t)
+    return encode_point(BASE * proof.s + (-(ephemeral * c))) == proof.t
+
+
+Item = Tuple[str, str, bytes, BallotProof]  # (election_id, ballot_hash, ephemeral_key, proof)
+
+
+def find_invalid(items: Sequence[Item]) -> List[int]:
+    """Indexes of the proofs that do not verify"""
+    return [i for i, item in enumerate(items) if not verify(*item)]
@@ -1,16 +1,21 @@
 """
 Blind Signature API Routes - RSA Blind Signature Implementation
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from shared.database import get_db
+from shared.idempotency import IDEMPOTENCY_HEADER, run_idempotent
 from app.utils.blind_signature import get_blind_signer
+from shared.tracing import span, STAGE_CRYPTO
+from shared.metrics import TOKENS_ISSUED
 from datetime import datetime
 import base64
 import hashlib
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 class BlindSignRequest(BaseModel):
@@ -24,7 +29,16 @@ class BlindSignResponse(BaseModel):
     public_key: str  # Server's public key for verification
 
 @router.post("/request-signature", response_model=BlindSignResponse)
-def request_signature(payload: BlindSignRequest, db: Session = Depends(get_db)):
+def request_signature(
+    payload: BlindSignRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER)
+):
+    """Sign a blinded token; a retry with the same Idempotency-Key gets the first signature replayed"""
+    return run_idempotent(db, idempotency_key, "request_signature", payload, lambda: _request_signature(payload, db))
+
+
+def _request_signature(payload: BlindSignRequest, db: Session):
     """
     Issue RSA blind signature for anonymous voting token
     Server signs blinded message without seeing original
@@ -49,7 +63,8 @@ def request_signature(payload: BlindSignRequest, db: Session = Depends(get_db)):
         
         # Get blind signer and sign the blinded message
         signer = get_blind_signer()
-        blinded_signature_bytes = signer.blind_sign(blinded_bytes)
+        with span("rsa.blind_sign", stage=STAGE_CRYPTO):
+            blinded_signature_bytes = signer.blind_sign(blinded_bytes)
         
         # Encode signature
         blinded_signature = base64.b64encode(blinded_signature_bytes).decode('utf-8')
@@ -58,11 +73,12 @@ def request_signature(payload: BlindSignRequest, db: Session = Depends(get_db)):
         token_hash = hashlib.sha256(blinded_bytes).hexdigest()
         
         # Store anonymous token record with blinded signature
-        db.execute(
+        election_id = db.execute(
             text("""
             INSERT INTO anonymous_tokens 
             (election_id, token_hash, signed_blind_token, issued_at, is_used)
             VALUES (CAST(:eid AS uuid), :hash, :sig, :issued_at, FALSE)
+            RETURNING election_id
             """),
             {
                 "eid": payload.election_id,
@@ -70,7 +86,7 @@ def request_signature(payload: BlindSignRequest, db: Session = Depends(get_db)):
                 "sig": blinded_signature_bytes,  # Store the blinded signature
                 "issued_at": datetime.utcnow()
             }
-        )
+        ).scalar()
         
         # Mark main code used
         db.execute(
@@ -83,9 +99,11 @@ def request_signature(payload: BlindSignRequest, db: Session = Depends(get_db)):
         )
         
         db.commit()
+        # Label with the stored election id, never the raw request field
+        TOKENS_ISSUED.inc(election_id=str(election_id), method="blind_signature")
         
-        print(f"[TOKEN-SERVICE] Blind signature issued for election {payload.election_id}")
-        print(f"[TOKEN-SERVICE] Token hash: {token_hash[:20]}...")
+        logger.info("Blind signature issued",
+                    extra={"election_id": payload.election_id, "token_hash": token_hash[:16]})
         
         return BlindSignResponse(
             blinded_signature=blinded_signature,
@@ -120,8 +138,8 @@ def create_token_direct(payload: CreateTokenDirectRequest, db: Session = Depends
     Create anonymous token directly (simplified MVP approach)
     Skips blind signature protocol for simplified implementation
     """
-    print(f"[TOKEN-SERVICE] Creating token for election: {payload.election_id}")
-    print(f"[TOKEN-SERVICE] Token hash: {payload.token_hash[:16]}...")
+    logger.debug("Direct token requested",
+                 extra={"election_id": payload.election_id, "token_hash": payload.token_hash[:16]})
     
     try:
         # Check if token already exists
@@ -134,7 +152,7 @@ def create_token_direct(payload: CreateTokenDirectRequest, db: Session = Depends
         ).fetchone()
         
         if existing:
-            print(f"[TOKEN-SERVICE] Token already exists: {existing[0]}")
+            logger.info("Direct token already exists", extra={"election_id": payload.election_id})
             return {
                 "message": "Token already exists",
                 "token_hash": payload.token_hash
@@ -144,11 +162,12 @@ def create_token_direct(payload: CreateTokenDirectRequest, db: Session = Depends
         # For simplified MVP: Use token_hash as placeholder for signed_blind_token
         placeholder_signature = bytes.fromhex(payload.token_hash)
         
-        db.execute(
+        election_id = db.execute(
             text("""
             INSERT INTO anonymous_tokens 
             (election_id, token_hash, signed_blind_token, issued_at, is_used)
             VALUES (CAST(:eid AS uuid), :hash, :sig, :issued_at, FALSE)
+            RETURNING election_id
             """),
             {
                 "eid": payload.election_id,
@@ -156,11 +175,13 @@ def create_token_direct(payload: CreateTokenDirectRequest, db: Session = Depends
                 "sig": placeholder_signature,
                 "issued_at": datetime.utcnow()
             }
-        )
+        ).scalar()
         
         db.commit()
+        TOKENS_ISSUED.inc(election_id=str(election_id), method="direct")
         
-        print(f"[TOKEN-SERVICE] Token created successfully")
+        logger.info("Direct token created",
+                    extra={"election_id": payload.election_id, "token_hash": payload.token_hash[:16]})
         
         return {
             "message": "Anonymous token created successfully",
@@ -169,7 +190,7 @@ def create_token_direct(payload: CreateTokenDirectRequest, db: Session = Depends
         
     except Exception as e:
         db.rollback()
-        print(f"[TOKEN-SERVICE] Error creating token: {str(e)}")
+        logger.error(f"Failed to create token: {e}", extra={"election_id": payload.election_id})
         raise HTTPException(status_code=500, detail=f"Failed to create token: {str(e)}")
 
 
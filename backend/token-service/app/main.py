@@ -9,12 +9,26 @@ sys.path.insert(0, str(backend_dir))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.blind_signing import router as blind_router
+from shared.metrics import setup_metrics
+from shared.rate_limit import KEY_ELECTION, RateLimit, setup_rate_limiting
+from shared.structured_logging import setup_logging
+from shared.tracing import setup_tracing
+from shared.security import RATE_LIMIT_PER_MINUTE
 
 app = FastAPI(title="Anonymous Token Service", version="1.0.0", docs_url="/api/docs")
 
 # Check if running in development mode
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
+# Rate limits and admission control (inside CORS, see auth-service/app/main.py)
+setup_rate_limiting(app, "token-service", [
+    # One signature per voter: a client asking for many is guessing voting codes.
+    # The per-election cap only counts signatures issued, not requests with a bad code
+    RateLimit("request_signature", r"/api/token/request-signature", per_minute=RATE_LIMIT_PER_MINUTE, burst=20),
+    RateLimit("request_signature_election", r"/api/token/request-signature",
+              per_minute=6000, burst=500, key=KEY_ELECTION),
+])
+
 # CORS middleware - Secure configuration based on environment
 if DEBUG:
     # Development: Allow all origins for testing (mobile app, admin web)
@@ -41,6 +55,15 @@ else:
         allow_headers=["*"],
     )
 
+# Structured JSON logging with per-route sampling (LOG_* env vars)
+setup_logging(app, "token-service")
+
+# Prometheus metrics (GET /metrics)
+setup_metrics(app, "token-service")
+
+# Request tracing (outermost middleware: times the whole request)
+setup_tracing(app, "token-service")
+
 app.include_router(blind_router, prefix="/api/token", tags=["Blind Signing"])
 
 @app.get("/health")
@@ -0,0 +1,8 @@
+"""
+Trustee command-line tool
+
+Computes a trustee's partial decryptions for a closed election from the
+streamed binary ballot export and uploads them in resumable chunks. Run
+from the backend directory:
+    python -m trustee --election <election_id> --trustee-id <trustee_id> --share share.json
+"""
@@ -0,0 +1,149 @@
+"""
+Trustee CLI
+
+Usage (from the backend directory):
+    # Key generation: take part in the election's ceremony (opened with
+    # POST /api/dkg/start); rerun the same command to resume. --token (or
+    # TRUSTEE_TOKEN) is the trustee user's access token from /api/auth/login
+    python -m trustee dkg --election <election_id> --trustee-id <trustee_id> --token <access_token>
+
+    # Decrypt and upload; rerun the same command to resume after an interruption
+    python -m trustee decrypt --election <election_id> --trustee-id <trustee_id> --share share.json
+
+    # Air-gapped trustee: save the export on a connected machine, carry it to
+    # the offline machine and decrypt there, then carry --workdir back and upload
+    python -m trustee export --election <election_id> --out export/
+    python -m trustee decrypt ... --from-export export/
+    python -m trustee decrypt ... --upload-only
+
+    # Decrypt now, upload later from the same --workdir (downloads over HTTP)
+    python -m trustee decrypt ... --no-upload
+
+share.json is the trustee's key share: written to the workdir by `dkg`, or
+the package from the legacy central key ceremony.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add backend directory to Python path for shared module
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from trustee.decrypt import TrusteeError, TrusteeSession, download_export  # noqa: E402
+from trustee.dkg import DkgParticipant  # noqa: E402
+
+logger = logging.getLogger("trustee")
+
+
+def run_dkg(args) -> int:
+    participant = DkgParticipant(
+        args.url, args.election, args.trustee_id,
+        workdir=args.workdir,
+        token=args.token,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+    )
+    started = time.perf_counter()
+    ceremony = participant.run()
+    logger.info(f"Key generation completed in {time.perf_counter() - started:.1f}s; "
+                f"election public key {ceremony['public_key']}, share in {participant.share_path}")
+    return 0
+
+
+def run_export(args) -> int:
+    download_export(args.url, args.election, args.out)
+    logger.info(f"Copy {args.out} to the offline machine and run decrypt --from-export there")
+    return 0
+
+
+def run_decrypt(args) -> int:
+    share = json.loads(args.share.read_text())
+    session = TrusteeSession(
+        args.url, args.election, args.trustee_id, share,
+        workdir=args.workdir,
+        workers=args.workers,
+        uploads=args.uploads,
+        export_dir=args.from_export,
+    )
+    started = time.perf_counter()
+    if args.upload_only:
+        session.workdir.mkdir(parents=True, exist_ok=True)
+        session.fetch_manifest()
+        result = session.upload()
+    else:
+        result = session.run(upload=not (args.no_upload or args.from_export))
+
+    elapsed = time.perf_counter() - started
+    if result:
+        logger.info(f"Submitted {result['shares_count']} partial decryption(s) in {elapsed:.1f}s")
+    else:
+        logger.info(f"Checkpoints ready in {session.workdir} ({elapsed:.1f}s); upload with --upload-only")
+    return 0
+
+
+def main() -> int:
+    election = argparse.ArgumentParser(add_help=False)
+    election.add_argument("--election", required=True, help="Election ID")
+    election.add_argument("--url", default=os.getenv("ELECTION_SERVICE_URL", "http://localhost:8005"),
+                          help="Election service base URL")
+
+    common = argparse.ArgumentParser(add_help=False, parents=[election])
+    common.add_argument("--trustee-id", required=True)
+    common.add_argument("--workdir", type=Path, help="State and checkpoint directory (default: ./trustee-<election>)")
+
+    parser = argparse.ArgumentParser(description="Trustee tools: key generation and partial decryption")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", parents=[election],
+                                 help="Save a closed election's ballot export for an offline decryption")
+    export.add_argument("--out", type=Path, help="Output directory (default: ./export-<election>)")
+
+    dkg = commands.add_parser("dkg", parents=[common], help="Take part in the distributed key generation")
+    dkg.add_argument("--token", default=os.getenv("TRUSTEE_TOKEN"),
+                     help="Access token of the trustee's user account (default: $TRUSTEE_TOKEN)")
+    dkg.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between ceremony status checks")
+    dkg.add_argument("--timeout", type=float, default=3600.0, help="Seconds to wait for the other trustees per round")
+
+    decrypt = commands.add_parser("decrypt", parents=[common],
+                                  help="Compute and upload partial decryptions of a closed election")
+    decrypt.add_argument("--share", required=True, type=Path, help="Key share package (JSON)")
+    decrypt.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Decryption processes")
+    decrypt.add_argument("--uploads", type=int, default=4, help="Concurrent chunk uploads")
+    mode = decrypt.add_mutually_exclusive_group()
+    mode.add_argument("--no-upload", action="store_true", help="Only download and decrypt")
+    mode.add_argument("--upload-only", action="store_true", help="Only upload existing checkpoints")
+    mode.add_argument("--from-export", type=Path, metavar="DIR",
+                      help="Decrypt offline from a directory written by `export` (never uploads)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    try:
+        args.election = str(uuid.UUID(args.election))
+        if args.command != "export":
+            args.trustee_id = str(uuid.UUID(args.trustee_id))
+    except ValueError:
+        parser.error("--election and --trustee-id must be UUIDs")
+    if args.command == "dkg" and not args.token:
+        parser.error("dkg needs the trustee's access token: --token or TRUSTEE_TOKEN")
+    if args.command == "export":
+        args.out = args.out or Path(f"export-{args.election}")
+    else:
+        args.workdir = args.workdir or Path(f"trustee-{args.election}")
+
+    runners = {"dkg": run_dkg, "decrypt": run_decrypt, "export": run_export}
+    try:
+        return runners[args.command](args)
+    except TrusteeError as e:
+        logger.error(str(e))
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+Partial decryption of a closed election by one trustee
+
+1. Fetch the export manifest (shared/ballot_export.py). The election must be
+   CLOSED, so the ballot set and every chunk's byte range are fixed.
+2. Each manifest chunk is downloaded with a Range request, verified against
+   its chain digests, and partially decrypted in a process pool. The result
+   is written to <workdir>/shares-NNNNNN.json. Chunks with a checkpoint
+   matching the manifest are skipped, so an interrupted run picks up where
+   it stopped.
+3. Checkpoints are uploaded one chunk per PUT. Chunks the server already
+   holds with the same digest are skipped. Then the upload is completed,
+   which merges the chunks into the trustee's decryption shares.
+
+An air-gapped trustee never talks to the service while holding the share:
+download_export saves the manifest and the whole export (verified against
+the manifest digest) on a connected machine, step 2 reads the chunks from
+that copy instead of over HTTP, and step 3 runs back on a connected machine
+from the same workdir.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+from shared.ballot_export import RecordReader
+from shared.threshold_crypto import ThresholdCrypto
+
+logger = logging.getLogger("trustee")
+
+DOWNLOAD_BLOCK = 1 << 16
+REQUEST_TIMEOUT = 60.0
+
+# Files written by download_export
+MANIFEST_FILE = "manifest.json"
+EXPORT_FILE = "ballots.evbx"
+
+
+class TrusteeError(Exception):
+    """The election, the export or the server is not in the expected state"""
+
+
+def share_chunk_digest(shares: Dict[str, str]) -> str:
+    """SHA-256 of a chunk's canonical JSON (the election service computes the same)"""
+    return hashlib.sha256(json.dumps(shares, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _checkpoint_path(workdir: Path, index: int) -> Path:
+    return workdir / f"shares-{index:06d}.json"
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(workdir: Path, chunk: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The chunk's checkpoint, if one was written for this exact chunk"""
+    path = _checkpoint_path(workdir, chunk["index"])
+    try:
+        checkpoint = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("digest_end") != chunk["digest_end"] or len(checkpoint.get("shares", ())) != chunk["records"]:
+        return None
+    return checkpoint
+
+
+def _chunk_blocks(export_url: str, etag: str, chunk: Dict[str, Any], export_file: Optional[str]) -> Iterator[bytes]:
+    """The chunk's bytes: a Range request, or a read from a downloaded export"""
+    first, last = chunk["offset"], chunk["offset"] + chunk["length"] - 1
+    if export_file:
+        with open(export_file, "rb") as f:
+            f.seek(first)
+            remaining = chunk["length"]
+            while remaining > 0:
+                block = f.read(min(DOWNLOAD_BLOCK, remaining))
+                if not block:
+                    raise TrusteeError(f"Chunk {chunk['index']}: {export_file} is truncated")
+                remaining -= len(block)
+                yield block
+        return
+    headers = {"Range": f"bytes={first}-{last}", "If-Range": etag}
+    with requests.get(export_url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        if response.status_code != 206:
+            raise TrusteeError(f"Chunk {chunk['index']}: expected 206, got {response.status_code}")
+        yield from response.iter_content(DOWNLOAD_BLOCK)
+
+
+def decrypt_chunk(export_url: str, etag: str, chunk: Dict[str, Any], share: Dict[str, Any], workdir: str,
+                  export_file: Optional[str] = None) -> int:
+    """Fetch, verify, partially decrypt and checkpoint one manifest chunk (runs in a worker)"""
+    reader = RecordReader(digest=bytes.fromhex(chunk["digest_start"]))
+    shares: Dict[str, str] = {}
+    for block in _chunk_blocks(export_url, etag, chunk, export_file):
+        records = reader.feed(block)
+        if records:
+            partials = ThresholdCrypto.partial_decrypt_many((r.ballot for r in records), share)
+            shares.update((r.ballot_id, p.hex()) for r, p in zip(records, partials))
+    if reader.pending or reader.records != chunk["records"] or reader.digest.hex() != chunk["digest_end"]:
+        raise TrusteeError(f"Chunk {chunk['index']} does not match the manifest")
+
+    checkpoint = {
+        "index": chunk["index"],
+        "digest_end": chunk["digest_end"],
+        "digest": share_chunk_digest(shares),
+        "shares": shares,
+    }
+    _write_atomic(_checkpoint_path(Path(workdir), chunk["index"]), json.dumps(checkpoint).encode())
+    return len(shares)
+
+
+class ServiceClient:
+    """JSON client for one route prefix of the election service"""
+
+    def __init__(self, base_url: str, prefix: str, retries: int = 3, token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.prefix = prefix
+        self.retries = retries
+        self.http = requests.Session()
+        if token:
+            self.http.headers["Authorization"] = f"Bearer {token}"
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{self.prefix}{path}"
+
+    def _request(self, method: str, path: str, **kwargs) -> Any:
+        """JSON request, retrying connection errors and 5xx with backoff"""
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.http.request(method, self._url(path), timeout=REQUEST_TIMEOUT, **kwargs)
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    raise TrusteeError(f"{method} {path}: {e}")
+            else:
+                if response.status_code < 500 or attempt == self.retries:
+                    if response.status_code >= 400:
+                        raise TrusteeError(f"{method} {path} -> {response.status_code}: {response.text[:300]}")
+                    return response.json()
+            time.sleep(min(2 ** attempt, 10))
+
+
+def download_export(base_url: str, election_id: str, out_dir: Path, retries: int = 3) -> Dict[str, Any]:
+    """
+    Save a closed election's manifest and export to out_dir for an
+    air-gapped decryption (TrusteeSession export_dir). The export is checked
+    record by record and against the manifest digest before it is kept.
+    """
+    client = ServiceClient(base_url, "/api/trustee", retries)
+    manifest = client._request("GET", f"/election/{election_id}/ballots/manifest")
+    if not manifest["final"]:
+        raise TrusteeError("Election is not closed yet: its ballots can still change")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / EXPORT_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    reader = RecordReader(election_id=election_id)
+    try:
+        with client.http.get(client._url(f"/election/{election_id}/ballots/export"),
+                             stream=True, timeout=REQUEST_TIMEOUT) as response, open(tmp, "wb") as f:
+            if response.status_code != 200:
+                raise TrusteeError(f"Export download: expected 200, got {response.status_code}")
+            for block in response.iter_content(DOWNLOAD_BLOCK):
+                reader.feed(block)
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+    except requests.RequestException as e:
+        raise TrusteeError(f"Export download: {e}")
+    if reader.pending or reader.records != manifest["ballot_count"] or reader.digest.hex() != manifest["digest"]:
+        tmp.unlink()
+        raise TrusteeError("Downloaded export does not match the manifest")
+    os.replace(tmp, path)
+    _write_atomic(out_dir / MANIFEST_FILE, json.dumps(manifest).encode())
+    logger.info(f"Election {election_id}: {manifest['ballot_count']} ballots, "
+                f"{manifest['total_bytes']} bytes saved to {path}")
+    return manifest
+
+
+class TrusteeSession(ServiceClient):
+    def __init__(self, base_url: str, election_id: str, trustee_id: str, share: Dict[str, Any],
+                 workdir: Path, workers: int = os.cpu_count() or 1, uploads: int = 4, retries: int = 3,
+                 export_dir: Optional[Path] = None):
+        if "share_x" not in share or "share_y" not in share:
+            raise TrusteeError("Share file must contain share_x and share_y")
+        super().__init__(base_url, "/api/trustee", retries)
+        self.election_id = election_id
+        self.trustee_id = trustee_id
+        self.share = share
+        self.workdir = workdir
+        self.workers = max(workers, 1)
+        self.uploads = max(uploads, 1)
+        self.export_dir = export_dir  # a download_export directory: decrypt without the service
+        self.manifest: Optional[Dict[str, Any]] = None
+
+    def _load_export_manifest(self) -> Dict[str, Any]:
+        try:
+            manifest = json.loads((self.export_dir / MANIFEST_FILE).read_text())
+            export_size = (self.export_dir / EXPORT_FILE).stat().st_size
+        except (OSError, ValueError) as e:
+            raise TrusteeError(f"{self.export_dir} does not hold a downloaded export: {e}")
+        if manifest.get("election_id") != self.election_id:
+            raise TrusteeError(f"Downloaded export is for election {manifest.get('election_id')}")
+        if export_size != manifest["total_bytes"]:
+            raise TrusteeError(f"{EXPORT_FILE} is {export_size} bytes, the manifest says {manifest['total_bytes']}")
+        return manifest
+
+    def fetch_manifest(self) -> Dict[str, Any]:
+        if self.export_dir:
+            manifest = self._load_export_manifest()
+        else:
+            manifest = self._request("GET", f"/election/{self.election_id}/ballots/manifest")
+        if not manifest["final"]:
+            raise TrusteeError("Election is not closed yet: its ballots can still change")
+        saved = self.workdir / "manifest.json"
+        if saved.exists() and json.loads(saved.read_text())["digest"] != manifest["digest"]:
+            logger.warning("Export differs from the previous run; checkpoints are rebuilt where chunks changed")
+        _write_atomic(saved, json.dumps(manifest).encode())
+        self.manifest = manifest
+        logger.info(f"Election {self.election_id}: {manifest['ballot_count']} ballots, "
+                    f"{manifest['total_bytes']} bytes in {len(manifest['chunks'])} chunk(s)")
+        return manifest
+
+    def decrypt(self) -> int:
+        """Partially decrypt every chunk without a valid checkpoint; returns the chunks computed"""
+        chunks = self.manifest["chunks"]
+        pending = [c for c in chunks if load_checkpoint(self.workdir, c) is None]
+        logger.info(f"{len(chunks) - len(pending)} chunk(s) already checkpointed, {len(pending)} to decrypt")
+        if not pending:
+            return 0
+
+        export_url = self._url(f"/election/{self.election_id}/ballots/export")
+        export_file = str(self.export_dir / EXPORT_FILE) if self.export_dir else None
+        etag = f'"{self.manifest["digest"][:32]}"'
+        started = time.perf_counter()
+        done = ballots = 0
+        for attempt in range(self.retries + 1):
+            failed = []
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(pending)),
+                mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                futures = {
+                    executor.submit(decrypt_chunk, export_url, etag, chunk, self.share, str(self.workdir), export_file): chunk
+                    for chunk in pending
+                }
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        ballots += future.result()
+                    except (TrusteeError, requests.RequestException) as e:
+                        logger.warning(f"Chunk {chunk['index']} failed: {e}")
+                        failed.append(chunk)
+                        continue
+                    done += 1
+                    if done % max(len(chunks) // 20, 1) == 0 or done == len(pending):
+                        elapsed = time.perf_counter() - started
+                        logger.info(f"Decrypted {done}/{len(pending)} chunk(s), {ballots / elapsed:.0f} ballots/s")
+            if not failed:
+                return done
+            pending = failed
+            if attempt < self.retries:
+                time.sleep(min(2 ** attempt, 10))
+        raise TrusteeError(f"{len(pending)} chunk(s) failed after {self.retries + 1} attempts")
+
+    def upload(self) -> Dict[str, Any]:
+        """Upload checkpoints the server does not hold yet, then complete the submission"""
+        status = self._request("GET", f"/{self.trustee_id}/decryption-share/chunks")
+        if status["election_id"] != self.election_id:
+            raise TrusteeError(f"Trustee {self.trustee_id} belongs to election {status['election_id']}")
+        held = {c["chunk_index"]: c["digest"] for c in status["chunks"]}
+
+        chunks = self.manifest["chunks"]
+        checkpoints = []
+        for chunk in chunks:
+            checkpoint = load_checkpoint(self.workdir, chunk)
+            if checkpoint is None:
+                raise TrusteeError(f"Chunk {chunk['index']} has not been decrypted")
+            if held.get(chunk["index"]) != checkpoint["digest"]:
+                checkpoints.append(checkpoint)
+        logger.info(f"{len(chunks) - len(checkpoints)} chunk(s) already uploaded, {len(checkpoints)} to upload")
+
+        def put(checkpoint):
+            result = self._request("PUT", f"/{self.trustee_id}/decryption-share/chunks/{checkpoint['index']}",
+                                   json={"shares": checkpoint["shares"]})
+            if result["digest"] != checkpoint["digest"]:
+                raise TrusteeError(f"Chunk {checkpoint['index']}: server digest does not match")
+
+        with ThreadPoolExecutor(max_workers=self.uploads) as executor:
+            for future in as_completed([executor.submit(put, c) for c in checkpoints]):
+                future.result()
+
+        return self._request("POST", f"/{self.trustee_id}/decryption-share/complete", json={"chunks": len(chunks)})
+
+    def run(self, upload: bool = True) -> Optional[Dict[str, Any]]:
+        if upload and self.export_dir:
+            raise TrusteeError("Decrypting from a downloaded export never uploads; upload with --upload-only")
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self.fetch_manifest()
+        self.decrypt()
+        return self.upload() if upload else None
@@ -0,0 +1,215 @@
+"""
+One trustee's part in the distributed key generation (shared/dkg.py)
+
+1. Generate a random polynomial and an X25519 transport key, save them to
+   <workdir>/dkg-state.json (mode 0600), then publish the transport key and
+   the polynomial's Feldman commitments.
+2. Once every trustee has committed, seal f(j) to each other trustee j's
+   transport key and upload the shares.
+3. Once every trustee has dealt, download and open the shares sent to this
+   trustee, verify them all in one check against the dealers' commitments,
+   and write the combined share to <workdir>/share.json (the --share file
+   for `python -m trustee decrypt`). Publish the verification key, or
+   complain about the dealers whose share did not verify. The polynomial is
+   then deleted from the state file.
+
+The state file is written before anything is published, so rerunning the
+same command after an interruption resumes the ceremony where it stopped.
+"""
+import base64
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from shared import dkg
+from shared.crypto_utils import CryptoUtils
+from trustee.decrypt import ServiceClient, TrusteeError, _write_atomic
+
+logger = logging.getLogger("trustee")
+
+STATE_FILE = "dkg-state.json"
+SHARE_FILE = "share.json"
+
+ROUND_COMMITMENTS = 1
+ROUND_SHARES = 2
+ROUND_CONFIRM = 3
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+class DkgParticipant(ServiceClient):
+    def __init__(self, base_url: str, election_id: str, trustee_id: str, workdir: Path, token: str,
+                 poll_interval: float = 1.0, timeout: float = 3600.0, retries: int = 3):
+        # token: access token of the user the trustee was added for (the DKG routes check it)
+        super().__init__(base_url, f"/api/dkg/{election_id}", retries, token)
+        self.election_id = election_id
+        self.trustee_id = trustee_id
+        self.workdir = workdir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.state: Optional[Dict[str, Any]] = None
+
+    @property
+    def share_path(self) -> Path:
+        return self.workdir / SHARE_FILE
+
+    def _save_state(self):
+        path = self.workdir / STATE_FILE
+        _write_atomic(path, json.dumps(self.state).encode())
+        os.chmod(path, 0o600)
+
+    def _load_state(self, ceremony: Dict[str, Any], me: Dict[str, Any]):
+        """This ceremony's saved polynomial and transport key, or new ones"""
+        path = self.workdir / STATE_FILE
+        if path.exists():
+            state = json.loads(path.read_text())
+            if state["ceremony_id"] == ceremony["ceremony_id"]:
+                self.state = state
+                return
+            logger.info("Ceremony was restarted; discarding the saved state")
+        if me["commitments"] is not None:
+            raise TrusteeError("Commitments were published but the saved state is missing; restart the ceremony")
+
+        transport_private, transport_public = CryptoUtils.generate_x25519_keypair()
+        self.state = {
+            "ceremony_id": ceremony["ceremony_id"],
+            "trustee_index": me["trustee_index"],
+            "threshold": ceremony["threshold"],
+            "total_trustees": ceremony["total_trustees"],
+            "transport_private_key": transport_private.hex(),
+            "transport_key": transport_public.hex(),
+            "coefficients": [hex(a) for a in dkg.new_polynomial(ceremony["threshold"])],
+        }
+        self._save_state()
+
+    @property
+    def coefficients(self):
+        if self.state.get("coefficients") is None:
+            raise TrusteeError("The polynomial was already deleted after confirming")
+        return [int(a, 16) for a in self.state["coefficients"]]
+
+    def wait_for_round(self, target_round: int) -> Dict[str, Any]:
+        """Poll the ceremony until it reaches target_round (or ends)"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            ceremony = self._request("GET", "")
+            if ceremony["status"] == "FAILED":
+                raise TrusteeError(f"Ceremony failed: {ceremony['failure_reason']}")
+            if ceremony["status"] == "COMPLETED" or ceremony["round"] >= target_round:
+                return ceremony
+            if time.monotonic() > deadline:
+                raise TrusteeError(f"Timed out waiting for round {target_round} (ceremony is in round {ceremony['round']})")
+            time.sleep(self.poll_interval)
+
+    def _me(self, ceremony: Dict[str, Any]) -> Dict[str, Any]:
+        for participant in ceremony["participants"]:
+            if participant["trustee_id"] == self.trustee_id:
+                return participant
+        raise TrusteeError(f"Trustee {self.trustee_id} is not a participant of this ceremony")
+
+    def commit(self, ceremony: Dict[str, Any]):
+        me = self._me(ceremony)
+        self._load_state(ceremony, me)
+        if me["commitments"] is not None:
+            return
+        self._request("POST", "/commitments", json={
+            "trustee_id": self.trustee_id,
+            "transport_key": _b64(bytes.fromhex(self.state["transport_key"])),
+            "commitments": _b64(dkg.commit(self.coefficients)),
+        })
+        logger.info(f"Round 1: published commitments as trustee {self.state['trustee_index']}")
+
+    def deal(self, ceremony: Dict[str, Any]):
+        if self._me(ceremony)["shares_dealt"]:
+            return
+        coefficients = self.coefficients
+        index = self.state["trustee_index"]
+        shares = {
+            str(p["trustee_index"]): _b64(dkg.seal_share(
+                base64.b64decode(p["transport_key"]), dkg.evaluate(coefficients, p["trustee_index"])
+            ))
+            for p in ceremony["participants"] if p["trustee_index"] != index
+        }
+        self._request("POST", "/shares", json={"trustee_id": self.trustee_id, "shares": shares})
+        logger.info(f"Round 2: dealt {len(shares)} share(s)")
+
+    def confirm(self, ceremony: Dict[str, Any]):
+        if self._me(ceremony)["confirmed"]:
+            return
+        index = self.state["trustee_index"]
+        threshold = self.state["threshold"]
+        sealed = self._request("GET", f"/shares/{self.trustee_id}")["shares"]
+        transport_private = bytes.fromhex(self.state["transport_private_key"])
+
+        # (dealer index, commitments, share); a share that does not open is a bad share too
+        coefficients = self.coefficients
+        received = [(index, [dkg.BASE * a for a in coefficients], dkg.evaluate(coefficients, index))]
+        complaints = []
+        started = time.perf_counter()
+        for participant in ceremony["participants"]:
+            dealer = participant["trustee_index"]
+            if dealer == index:
+                continue
+            try:
+                commitments = dkg.unpack_points(base64.b64decode(participant["commitments"]), threshold)
+                share = dkg.open_share(transport_private, base64.b64decode(sealed[str(dealer)]))
+            except (dkg.DkgError, KeyError) as e:
+                logger.warning(f"Share from trustee {dealer} is unusable: {e}")
+                complaints.append(dealer)
+                continue
+            received.append((dealer, commitments, share))
+
+        pairs = [(commitments, share) for _, commitments, share in received]
+        complaints += [received[i][0] for i in dkg.find_invalid_shares(index, pairs)]
+        logger.info(f"Round 3: checked {len(received)} share(s) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if complaints:
+            self._request("POST", "/confirm", json={"trustee_id": self.trustee_id, "complaints": sorted(complaints)})
+            raise TrusteeError(f"Shares from trustee(s) {sorted(complaints)} failed verification; complaint filed")
+
+        secret_share = sum(share for _, _, share in received) % dkg.L
+        verification_key = _b64(dkg.encode_point(dkg.BASE * secret_share))
+        _write_atomic(self.share_path, json.dumps({
+            "trustee_index": index,
+            "share_x": index,
+            "share_y": secret_share,
+            "threshold": threshold,
+            "total_trustees": self.state["total_trustees"],
+            "key_type": "ed25519-dkg",
+            "verification_key": verification_key,
+        }).encode())
+        os.chmod(self.share_path, 0o600)
+
+        self._request("POST", "/confirm", json={"trustee_id": self.trustee_id, "verification_key": verification_key})
+        self.state["coefficients"] = None
+        self._save_state()
+        logger.info(f"Round 3: confirmed; share written to {self.share_path}")
+
+    def _forget_polynomial(self):
+        """Drop the coefficients once this trustee has confirmed (resumed runs included)"""
+        path = self.workdir / STATE_FILE
+        if self.state is None and path.exists():
+            self.state = json.loads(path.read_text())
+        if self.state is not None and self.state.get("coefficients") is not None:
+            self.state["coefficients"] = None
+            self._save_state()
+
+    def run(self) -> Dict[str, Any]:
+        """Take part in every remaining round; returns the completed ceremony"""
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        ceremony = self.wait_for_round(ROUND_COMMITMENTS)
+        if ceremony["status"] != "COMPLETED":
+            self.commit(ceremony)
+            self.deal(self.wait_for_round(ROUND_SHARES))
+            self.confirm(self.wait_for_round(ROUND_CONFIRM))
+            # Waits for the other trustees' confirmations: the ceremony completes without another round
+            ceremony = self.wait_for_round(ROUND_CONFIRM + 1)
+
+        self._forget_polynomial()
+        if not self.share_path.exists():
+            raise TrusteeError(f"Ceremony is complete but {self.share_path} is missing")
+        return ceremony
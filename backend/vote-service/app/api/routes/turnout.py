@@ -0,0 +1,81 @@
+"""
+Live turnout stream (Server-Sent Events)
+Dashboards subscribe once instead of polling counts and results in a loop.
+"""
+import asyncio
+import json
+import logging
+import uuid
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from shared.database import SessionLocal
+from shared.election_cache import get_election_metadata
+from app.utils.turnout_hub import hub
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Comment lines keep idle connections open through proxies and detect disconnects
+HEARTBEAT_SECONDS = 15
+
+
+def _election_status(election_id: str):
+    db = SessionLocal()
+    try:
+        election = get_election_metadata(db, election_id)
+        return election["status"] if election else None
+    finally:
+        db.close()
+
+
+@router.get("/turnout/{election_id}/stream")
+async def stream_turnout(election_id: str, request: Request):
+    """
+    Stream ballot-count deltas and the bulletin head hash for an election
+
+    Each `turnout` event carries: election_id, ballot_count, delta,
+    bulletin_head, bulletin_sequence, ts. Updates are coalesced and sent at
+    most once per TURNOUT_INTERVAL, only when something changed.
+    """
+    try:
+        election_id = str(uuid.UUID(election_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid election ID")
+
+    status = await asyncio.to_thread(_election_status, election_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Election not found")
+
+    queue = hub.subscribe(election_id)
+    if queue is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many turnout subscribers",
+            headers={"Retry-After": "5"}
+        )
+
+    async def events():
+        try:
+            yield f"retry: {int(hub.interval * 1000) * 3}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: turnout\ndata: {json.dumps(event)}\n\n"
+        finally:
+            hub.unsubscribe(election_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Stop nginx buffering the stream
+        }
+    )
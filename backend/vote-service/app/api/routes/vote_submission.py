@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from shared.database import get_db
+from shared.idempotency import IDEMPOTENCY_HEADER, MalformedRequest, run_idempotent
 from shared.bulletin_helper import create_ballot_cast_entry
+from shared import ballot_format, zkp
 from shared.audit_helper import audit_vote_cast
+from shared.tracing import span, STAGE_CRYPTO
+from shared.metrics import UNKNOWN_ELECTION, record_ballot_accepted, record_ballot_rejected
+from app.utils.ballot_queue import VOTE_INGEST_MODE, DuplicateSubmission, ballot_queue
 from datetime import datetime
 import base64
 import hashlib
@@ -39,9 +44,25 @@ class VoteSubmitResponse(BaseModel):
     verification_code: str
     vote_hash: str  # For receipt
     message: str
+    status: str = "recorded"  # "queued": provisional receipt, see GET /receipt/{ballot_hash}
+
+class BallotReceiptStatus(BaseModel):
+    ballot_hash: str
+    status: str  # queued | recorded | rejected
+    reason: str | None = None
+    detail: str | None = None
 
 @router.post("/submit", response_model=VoteSubmitResponse)
-def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
+def submit_vote(
+    payload: VoteSubmitRequest,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER)
+):
+    """Submit a ballot; a retry with the same Idempotency-Key gets the first response replayed"""
+    return run_idempotent(db, idempotency_key, "vote_submit", payload, lambda: _submit_vote(payload, db))
+
+
+def _submit_vote(payload: VoteSubmitRequest, db: Session):
     """
     Submit encrypted vote with anonymous token verification
     
@@ -58,8 +79,8 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
     - Vote is encrypted end-to-end (ECIES)
     """
     
-    print(f"[VOTE-SERVICE] Received vote submission for election: {payload.election_id}")
-    print(f"[VOTE-SERVICE] Token hash: {payload.token_hash[:16]}...")
+    logger.debug("Vote submission received",
+                 extra={"election_id": payload.election_id, "token_hash": payload.token_hash[:16]})
     
     # 1) Verify anonymous token exists and is not already used
     token_record = db.execute(
@@ -71,16 +92,18 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
         {"th": payload.token_hash, "eid": payload.election_id}
     ).fetchone()
     
-    print(f"[VOTE-SERVICE] Token record found: {token_record is not None}")
-    
     if not token_record:
-        print(f"[VOTE-SERVICE] Token not found in database!")
+        logger.info("Vote rejected: token not found",
+                    extra={"election_id": payload.election_id, "token_hash": payload.token_hash[:16]})
+        # The election is unconfirmed until a token matches it: keep the request's id out of the labels
+        record_ballot_rejected(UNKNOWN_ELECTION, "token_not_found")
         raise HTTPException(
             status_code=400, 
             detail="Invalid or unregistered anonymous token. Please request a token first."
         )
     
     if token_record[1]:  # is_used
+        record_ballot_rejected(payload.election_id, "token_used")
         raise HTTPException(
             status_code=400,
             detail="This token has already been used. Each token can only vote once."
@@ -89,35 +112,56 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
     # 2) Verify RSA signature on token (proves authenticity)
     # Token signature is RSA signature of sha256(token_hash)
     # This proves the token was issued by the server via blind signature
-    try:
-        import rsa
-        from shared.crypto_utils import get_server_public_key
+    with span("token.verify_signature", stage=STAGE_CRYPTO):
+        try:
+            import rsa
+            from shared.crypto_utils import get_server_public_key
         
-        # Get token hash bytes for signature verification
-        token_hash_bytes = bytes.fromhex(payload.token_hash)
-        signature_bytes = base64.b64decode(payload.token_signature)
+            # Get token hash bytes for signature verification
+            token_hash_bytes = bytes.fromhex(payload.token_hash)
+            signature_bytes = base64.b64decode(payload.token_signature)
         
-        # Load server's RSA public key
-        pubkey = get_server_public_key()
+            # Load server's RSA public key
+            pubkey = get_server_public_key()
         
-        # Verify signature
-        try:
-            rsa.verify(token_hash_bytes, signature_bytes, pubkey)
-        except rsa.pkcs1.VerificationError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid token signature. Token authentication failed."
-            )
+            # Verify signature
+            try:
+                rsa.verify(token_hash_bytes, signature_bytes, pubkey)
+            except rsa.pkcs1.VerificationError:
+                record_ballot_rejected(payload.election_id, "bad_signature")
+                raise MalformedRequest("Invalid token signature. Token authentication failed.")
             
-    except ImportError:
-        # For MVP: If rsa library not available, skip verification
-        # In production, this MUST be implemented
-        pass
+        except ImportError:
+            # For MVP: If rsa library not available, skip verification
+            # In production, this MUST be implemented
+            pass
+    
+    # 3) Encode the ballot in the canonical binary format and hash those bytes
+    with span("ballot.hash", stage=STAGE_CRYPTO):
+        try:
+            ballot_bytes = ballot_format.encode_ballot(payload.encrypted_vote)
+        except ballot_format.BallotFormatError as e:
+            record_ballot_rejected(payload.election_id, "malformed_ballot")
+            raise MalformedRequest(f"Malformed encrypted vote: {e}")
+        ballot_hash = ballot_format.ballot_hash(ballot_bytes)
     
-    # 3) Create ballot hash from encrypted vote
-    encrypted_vote_json = json_lib.dumps(payload.encrypted_vote, sort_keys=True)
-    ballot_bytes = encrypted_vote_json.encode('utf-8')
-    ballot_hash = hashlib.sha256(ballot_bytes).hexdigest()
+    # 3b) Verify the ballot proof: knowledge of the secret behind this ballot's own ephemeral key,
+    # bound to this election and this ballot hash (ZKP_REQUIRED=false accepts ballots without one
+    # while old clients are phased out)
+    if zkp.ZKP_REQUIRED or "scheme" in payload.proof:
+        with span("ballot.verify_proof", stage=STAGE_CRYPTO):
+            try:
+                proof_ok = zkp.verify(
+                    payload.election_id, ballot_hash,
+                    bytes(ballot_format.parse_ballot(ballot_bytes).ephemeral_public_key),
+                    zkp.BallotProof.from_dict(payload.proof)
+                )
+            except zkp.ProofError as e:
+                record_ballot_rejected(payload.election_id, "invalid_proof")
+                raise MalformedRequest(f"Invalid ballot proof: {e}")
+        if not proof_ok:
+            record_ballot_rejected(payload.election_id, "invalid_proof")
+            raise MalformedRequest("Ballot proof verification failed")
     
     # 4) Generate verification code
     verification_code = ballot_hash[:12].upper()
@@ -141,11 +185,15 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
     ).fetchone()
     
     if existing_ballot:
+        record_ballot_rejected(payload.election_id, "duplicate_ballot")
         raise HTTPException(
             status_code=400, 
             detail="This exact ballot has already been submitted"
         )
     
+    if VOTE_INGEST_MODE == "queue":
+        return _enqueue_ballot(payload, ballot_bytes, ballot_hash, verification_code, vote_hash)
+    
     # 7) Store encrypted ballot linked to anonymous token
     try:
         db.execute(
@@ -193,6 +241,8 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
         )
         
         db.commit()
+        record_ballot_accepted(payload.election_id)
+        logger.info("Ballot stored", extra={"election_id": payload.election_id, "ballot_hash": ballot_hash[:16]})
         
         # Get ballot_id for logging
         ballot_record = db.execute(
@@ -223,15 +273,18 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
         db.rollback()
         # Check if it's a duplicate vote error
         if "duplicate" in str(e).lower() or "unique" in str(e).lower():
+            record_ballot_rejected(payload.election_id, "already_voted")
             raise HTTPException(
                 status_code=400, 
                 detail="You have already voted in this election"
             )
         if "foreign key" in str(e).lower():
+            record_ballot_rejected(payload.election_id, "invalid_token")
             raise HTTPException(
                 status_code=400,
                 detail="Invalid anonymous token. Please request a token first."
             )
+        record_ballot_rejected(payload.election_id, "storage_error")
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to store ballot: {str(e)}"
@@ -243,3 +296,55 @@ def submit_vote(payload: VoteSubmitRequest, db: Session = Depends(get_db)):
         vote_hash=vote_hash,
         message="Vote submitted successfully"
     )
+
+
+def _enqueue_ballot(payload: VoteSubmitRequest, ballot_bytes: bytes, ballot_hash: str,
+                    verification_code: str, vote_hash: str) -> VoteSubmitResponse:
+    """Write-behind mode: journal the validated ballot; the committer stores it (app/utils/ballot_queue.py)"""
+    try:
+        ballot_queue.enqueue({
+            "election_id": payload.election_id,
+            "encrypted_ballot": base64.b64encode(ballot_bytes).decode(),
+            "zkp_proof": json_lib.dumps(payload.proof),
+            "token_signature": payload.token_signature,
+            "ballot_hash": ballot_hash,
+            "verification_code": verification_code,
+            "token_hash": payload.token_hash,
+            "cast_at": datetime.utcnow().isoformat(),
+        })
+    except DuplicateSubmission:
+        record_ballot_rejected(payload.election_id, "already_queued")
+        raise HTTPException(
+            status_code=400,
+            detail="A ballot for this token is already being processed"
+        )
+    except Exception as e:
+        record_ballot_rejected(payload.election_id, "storage_error")
+        raise HTTPException(status_code=500, detail=f"Failed to queue ballot: {str(e)}")
+    
+    return VoteSubmitResponse(
+        ballot_hash=ballot_hash,
+        verification_code=verification_code,
+        vote_hash=vote_hash,
+        message="Vote received and queued for recording",
+        status="queued"
+    )
+
+
+@router.get("/receipt/{ballot_hash}", response_model=BallotReceiptStatus)
+def get_receipt_status(ballot_hash: str, db: Session = Depends(get_db)):
+    """
+    Where a ballot stands: queued (write-behind journal), recorded, or rejected
+    with the reason. Ballots stored directly are simply recorded.
+    """
+    queued = ballot_queue.status(ballot_hash)
+    if queued:
+        return BallotReceiptStatus(ballot_hash=ballot_hash, **queued)
+    
+    stored = db.execute(
+        text("SELECT 1 FROM ballots WHERE ballot_hash = :bh"),
+        {"bh": ballot_hash}
+    ).fetchone()
+    if not stored:
+        raise HTTPException(status_code=404, detail="Ballot not found")
+    return BallotReceiptStatus(ballot_hash=ballot_hash, status="recorded")
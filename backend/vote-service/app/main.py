@@ -9,12 +9,29 @@ sys.path.insert(0, str(backend_dir))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.vote_submission import router as vote_router
+from app.api.routes.turnout import router as turnout_router
+from app.utils.ballot_queue import VOTE_INGEST_MODE, ballot_queue
+from shared.metrics import setup_metrics
+from shared.rate_limit import KEY_ELECTION, RateLimit, setup_rate_limiting
+from shared.structured_logging import setup_logging
+from shared.tracing import setup_tracing
+from shared.security import RATE_LIMIT_PER_MINUTE
 
 app = FastAPI(title="Vote Submission Service", version="1.0.0", docs_url="/api/docs")
 
 # Check if running in development mode
 DEBUG = os.getenv("DEBUG", "true").lower() == "true"
 
+# Rate limits and admission control (inside CORS, see auth-service/app/main.py)
+setup_rate_limiting(app, "vote-service", [
+    # Per address (shared by a polling station behind NAT, hence the headroom) and per election
+    # (accepted ballots only, so rejected junk naming an election does not use up its budget)
+    RateLimit("vote_submit", r"/api/vote/submit", per_minute=RATE_LIMIT_PER_MINUTE * 10, burst=100),
+    RateLimit("vote_submit_election", r"/api/vote/submit",
+              per_minute=6000, burst=500, key=KEY_ELECTION),
+    RateLimit("turnout_stream", r"/api/vote/turnout/[^/]+/stream", per_minute=30, burst=10, methods=("GET",)),
+])
+
 # CORS middleware - Secure configuration based on environment
 if DEBUG:
     # Development: Allow all origins for testing (mobile app, admin web)
@@ -41,7 +58,21 @@ else:
         allow_headers=["*"],
     )
 
+# Structured JSON logging with per-route sampling (LOG_* env vars)
+setup_logging(app, "vote-service")
+
+# Prometheus metrics (GET /metrics)
+setup_metrics(app, "vote-service")
+
+# Request tracing (outermost middleware: times the whole request)
+setup_tracing(app, "vote-service")
+
 app.include_router(vote_router, prefix="/api/vote", tags=["Vote Submission"])
+app.include_router(turnout_router, prefix="/api/vote", tags=["Turnout Stream"])
+
+# Write-behind ingestion: commit ballots left in the journal by a previous run straight away
+if VOTE_INGEST_MODE == "queue":
+    ballot_queue.start()
 
 @app.get("/health")
 async def health():
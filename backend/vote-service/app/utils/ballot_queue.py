@@ -0,0 +1,434 @@
+"""
+Write-behind ballot ingestion (VOTE_INGEST_MODE=queue)
+In the default mode every submission commits its own Postgres transaction,
+so the accept rate is bounded by commit (fsync) latency. In queue mode a
+validated submission is appended to a local SQLite journal (WAL,
+synchronous=FULL) and the voter gets a provisional receipt as soon as it is
+on disk. A committer thread then moves ballots to Postgres in batches of up
+to VOTE_QUEUE_BATCH, one transaction per batch:
+
+- tokens are claimed with a single UPDATE ... WHERE NOT is_used; a token
+  already spent is rejected (token_used)
+- ballots go in with one multi-row INSERT ... ON CONFLICT DO NOTHING; a
+  ballot whose hash already exists is rejected (duplicate_ballot) and its
+  token claim is undone
+- VOTE_CAST audit rows are written in the same transaction
+
+Outcomes are kept in the journal for VOTE_QUEUE_RETENTION seconds and served
+by GET /api/vote/receipt/{ballot_hash} (queued / recorded / rejected).
+
+Journal appends are group-committed too: concurrent submissions share one
+SQLite transaction (one fsync). With several workers per host, every worker
+appends to the same journal and whichever holds the journal's lock file runs
+the committer; another takes over if it exits. Pending ballots survive a
+restart. Drain the queue (evote_ballot_queue_depth == 0) before tallying.
+"""
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from shared.bulletin_helper import create_ballot_cast_entries
+from shared.database import SessionLocal
+from shared.metrics import BALLOT_QUEUE_DEPTH, BALLOT_QUEUE_BATCH_SIZE, record_ballot_accepted, record_ballot_rejected
+
+logger = logging.getLogger(__name__)
+
+VOTE_INGEST_MODE = os.getenv("VOTE_INGEST_MODE", "direct").lower()
+VOTE_QUEUE_PATH = os.getenv(
+    "VOTE_QUEUE_PATH", str(Path(__file__).resolve().parent.parent.parent.parent / ".queue" / "ballots.sqlite3")
+)
+VOTE_QUEUE_BATCH = int(os.getenv("VOTE_QUEUE_BATCH", "500"))
+VOTE_QUEUE_POLL_MS = float(os.getenv("VOTE_QUEUE_POLL_MS", "20"))
+VOTE_QUEUE_RETENTION = float(os.getenv("VOTE_QUEUE_RETENTION", "3600"))
+
+STATUS_QUEUED = "queued"
+STATUS_RECORDED = "recorded"
+STATUS_REJECTED = "rejected"
+
+# Same wording as the synchronous path in vote_submission.py
+REJECTION_DETAILS = {
+    "token_used": "This token has already been used. Each token can only vote once.",
+    "duplicate_ballot": "This exact ballot has already been submitted",
+    "storage_error": "Failed to store ballot",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_ballots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ballot_hash TEXT NOT NULL,
+    token_hash TEXT NOT NULL,
+    election_id TEXT NOT NULL,
+    ballot TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    reason TEXT,
+    enqueued_at REAL NOT NULL,
+    done_at REAL
+);
+-- One pending ballot per token / per ciphertext; rejected rows do not block a corrected resubmission
+CREATE UNIQUE INDEX IF NOT EXISTS pending_ballots_token ON pending_ballots(token_hash) WHERE status = 'queued';
+CREATE UNIQUE INDEX IF NOT EXISTS pending_ballots_hash ON pending_ballots(ballot_hash) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS pending_ballots_lookup ON pending_ballots(ballot_hash, seq);
+CREATE INDEX IF NOT EXISTS pending_ballots_status ON pending_ballots(status, seq);
+"""
+
+
+class DuplicateSubmission(Exception):
+    """A ballot for this token (or this exact ballot) is already waiting in the queue"""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+class _Append:
+    __slots__ = ("row", "done", "error")
+
+    def __init__(self, row: tuple):
+        self.row = row
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class BallotQueue:
+    def __init__(self, path: str, batch_size: int):
+        self.path = path
+        self.batch_size = batch_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        self._appends: List[_Append] = []
+        self._appends_cond = threading.Condition()
+        self._committer_wakeup = threading.Event()
+        self._bulletin = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ballot-bulletin")
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    # --- journal -------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = _connect(self.path)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        with self._conn_lock:
+            self._db()
+        BALLOT_QUEUE_DEPTH.set_function(self.depth)
+        threading.Thread(target=self._append_loop, name="ballot-journal", daemon=True).start()
+        threading.Thread(target=self._commit_loop, name="ballot-committer", daemon=True).start()
+
+    def enqueue(self, ballot: Dict[str, Any]):
+        """Append a validated ballot; returns once it is durable in the journal"""
+        self.start()
+        request = _Append((
+            ballot["ballot_hash"], ballot["token_hash"], ballot["election_id"], json.dumps(ballot), time.time()
+        ))
+        with self._appends_cond:
+            self._appends.append(request)
+            self._appends_cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+
+    def _append_loop(self):
+        while True:
+            with self._appends_cond:
+                while not self._appends:
+                    self._appends_cond.wait()
+                batch, self._appends = self._appends, []
+            try:
+                self._append_batch(batch)
+            except Exception as e:
+                logger.error(f"Ballot journal append failed: {e}")
+                for request in batch:
+                    request.error = request.error or e
+            for request in batch:
+                request.done.set()
+            self._committer_wakeup.set()
+
+    def _append_batch(self, batch: List[_Append]):
+        with self._conn_lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                for request in batch:
+                    try:
+                        db.execute("SAVEPOINT item")
+                        db.execute(
+                            """
+                            INSERT INTO pending_ballots (ballot_hash, token_hash, election_id, ballot, enqueued_at)
+                            VALUES (?, ?, ?, ?, ?)
+                            """,
+                            request.row
+                        )
+                        db.execute("RELEASE item")
+                    except sqlite3.IntegrityError:
+                        db.execute("ROLLBACK TO item")
+                        db.execute("RELEASE item")
+                        request.error = DuplicateSubmission()
+                    except Exception as e:
+                        db.execute("ROLLBACK TO item")
+                        db.execute("RELEASE item")
+                        request.error = e
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def depth(self) -> int:
+        with self._conn_lock:
+            return self._db().execute(
+                "SELECT COUNT(*) FROM pending_ballots WHERE status = 'queued'"
+            ).fetchone()[0]
+
+    def status(self, ballot_hash: str) -> Optional[Dict[str, Any]]:
+        """Latest queue outcome for a ballot hash, or None if the journal has no record of it"""
+        if not os.path.exists(self.path):
+            return None
+        with self._conn_lock:
+            row = self._db().execute(
+                """
+                SELECT status, reason, enqueued_at, done_at FROM pending_ballots
+                WHERE ballot_hash = ? ORDER BY seq DESC LIMIT 1
+                """,
+                (ballot_hash,)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "status": row[0],
+            "reason": row[1],
+            "detail": REJECTION_DETAILS.get(row[1]) if row[1] else None,
+        }
+
+    # --- committer -----------------------------------------------------
+
+    def _commit_loop(self):
+        # Only one process per journal commits; the others block here until it exits
+        lock_file = open(self.path + ".lock", "w")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        logger.info("Ballot committer started", extra={"journal": self.path, "pid": os.getpid()})
+        last_prune = 0.0
+        while True:
+            try:
+                processed = self._commit_next_batch()
+            except Exception as e:
+                logger.error(f"Ballot batch commit failed, retrying: {e}")
+                time.sleep(1)
+                continue
+            if time.monotonic() - last_prune > 60:
+                self._prune()
+                last_prune = time.monotonic()
+            if not processed:
+                # Woken at once by appends in this process; other workers' appends are found by polling
+                self._committer_wakeup.wait(VOTE_QUEUE_POLL_MS / 1000.0)
+                self._committer_wakeup.clear()
+
+    def _commit_next_batch(self) -> int:
+        with self._conn_lock:
+            rows = self._db().execute(
+                "SELECT seq, ballot FROM pending_ballots WHERE status = 'queued' ORDER BY seq LIMIT ?",
+                (self.batch_size,)
+            ).fetchall()
+        if not rows:
+            return 0
+        items = [dict(json.loads(ballot), seq=seq) for seq, ballot in rows]
+
+        try:
+            outcomes = self._store(items)
+        except OperationalError:
+            # Database unreachable: leave everything queued and retry the same batch
+            raise
+        except Exception as e:
+            if len(items) == 1:
+                logger.error(f"Ballot rejected by the database: {e}",
+                             extra={"ballot_hash": items[0]["ballot_hash"][:16]})
+                outcomes = {items[0]["seq"]: (STATUS_REJECTED, "storage_error", None)}
+            else:
+                # Isolate the item the database refuses instead of blocking the queue behind it
+                outcomes = {}
+                for item in items:
+                    try:
+                        outcomes.update(self._store([item]))
+                    except OperationalError:
+                        raise
+                    except Exception as item_error:
+                        logger.error(f"Ballot rejected by the database: {item_error}",
+                                     extra={"ballot_hash": item["ballot_hash"][:16]})
+                        outcomes[item["seq"]] = (STATUS_REJECTED, "storage_error", None)
+
+        now = time.time()
+        with self._conn_lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(
+                "UPDATE pending_ballots SET status = ?, reason = ?, done_at = ? WHERE seq = ?",
+                [(status, reason, now, seq) for seq, (status, reason, _) in outcomes.items()]
+            )
+            db.execute("COMMIT")
+
+        BALLOT_QUEUE_BATCH_SIZE.observe(len(items))
+        cast = []
+        for item in items:
+            status, reason, is_new = outcomes[item["seq"]]
+            if status == STATUS_REJECTED:
+                record_ballot_rejected(item["election_id"], reason)
+            elif is_new:
+                record_ballot_accepted(item["election_id"])
+                cast.append({
+                    "election_id": item["election_id"],
+                    "ballot_hash": item["ballot_hash"],
+                    "timestamp": item["cast_at"],
+                })
+        # One bulletin request (one transaction, one signing pass) per committed batch
+        if cast:
+            self._bulletin.submit(create_ballot_cast_entries, cast)
+        logger.info("Ballot batch committed", extra={
+            "batch_size": len(items),
+            "rejected": sum(1 for status, _, _ in outcomes.values() if status == STATUS_REJECTED),
+        })
+        return len(items)
+
+    def _store(self, items: List[Dict[str, Any]]) -> Dict[int, tuple]:
+        """One Postgres transaction for the batch; returns seq -> (status, reason, newly inserted)"""
+        db = SessionLocal()
+        try:
+            claimed = {
+                row[0] for row in db.execute(
+                    text("""
+                    UPDATE anonymous_tokens t
+                    SET is_used = TRUE, used_at = NOW()
+                    FROM unnest(CAST(:token_hashes AS text[]), CAST(:election_ids AS uuid[])) AS q(token_hash, election_id)
+                    WHERE t.token_hash = q.token_hash AND t.election_id = q.election_id AND NOT t.is_used
+                    RETURNING t.token_hash
+                    """),
+                    {
+                        "token_hashes": [item["token_hash"] for item in items],
+                        "election_ids": [item["election_id"] for item in items],
+                    }
+                )
+            }
+
+            to_insert = [item for item in items if item["token_hash"] in claimed]
+            inserted: Dict[str, str] = {}
+            if to_insert:
+                inserted = {
+                    row[1]: str(row[0]) for row in db.execute(
+                        text("""
+                        INSERT INTO ballots (
+                            election_id, encrypted_ballot, zkp_proof, ballot_signature,
+                            ballot_hash, verification_code, token_hash, cast_at
+                        )
+                        SELECT q.election_id, decode(q.ballot, 'base64'), q.zkp, convert_to(q.sig, 'UTF8'),
+                               q.ballot_hash, q.verification_code, q.token_hash, q.cast_at
+                        FROM unnest(
+                            CAST(:election_ids AS uuid[]), CAST(:ballots AS text[]), CAST(:zkps AS jsonb[]),
+                            CAST(:sigs AS text[]), CAST(:ballot_hashes AS text[]), CAST(:codes AS text[]),
+                            CAST(:token_hashes AS text[]), CAST(:cast_ats AS timestamp[])
+                        ) AS q(election_id, ballot, zkp, sig, ballot_hash, verification_code, token_hash, cast_at)
+                        ON CONFLICT (ballot_hash) DO NOTHING
+                        RETURNING ballot_id, ballot_hash
+                        """),
+                        {
+                            "election_ids": [item["election_id"] for item in to_insert],
+                            "ballots": [item["encrypted_ballot"] for item in to_insert],
+                            "zkps": [item["zkp_proof"] for item in to_insert],
+                            "sigs": [item["token_signature"] for item in to_insert],
+                            "ballot_hashes": [item["ballot_hash"] for item in to_insert],
+                            "codes": [item["verification_code"] for item in to_insert],
+                            "token_hashes": [item["token_hash"] for item in to_insert],
+                            "cast_ats": [item["cast_at"] for item in to_insert],
+                        }
+                    )
+                }
+                # Duplicate ciphertext: the token stays spendable for a corrected submission
+                unclaim = [item["token_hash"] for item in to_insert if item["ballot_hash"] not in inserted]
+                if unclaim:
+                    db.execute(
+                        text("""
+                        UPDATE anonymous_tokens SET is_used = FALSE, used_at = NULL
+                        WHERE token_hash = ANY(CAST(:token_hashes AS text[]))
+                        """),
+                        {"token_hashes": unclaim}
+                    )
+                if inserted:
+                    election_by_hash = {item["ballot_hash"]: item["election_id"] for item in to_insert}
+                    db.execute(
+                        text("""
+                        INSERT INTO audit_logs (event_type, event_description, resource_type, resource_id,
+                                                metadata, severity, created_at)
+                        SELECT 'VOTE_CAST', 'Vote cast successfully', 'BALLOT', q.ballot_id,
+                               jsonb_build_object('election_id', q.election_id), 'INFO', NOW()
+                        FROM unnest(CAST(:ballot_ids AS uuid[]), CAST(:election_ids AS text[])) AS q(ballot_id, election_id)
+                        """),
+                        {
+                            "ballot_ids": list(inserted.values()),
+                            "election_ids": [election_by_hash[ballot_hash] for ballot_hash in inserted],
+                        }
+                    )
+
+            # A token that was already spent may have been spent by this very ballot, committed
+            # before a crash kept the journal from recording it; that is a success, not a rejection
+            already_stored = set()
+            unclaimed = [item for item in items if item["token_hash"] not in claimed]
+            if unclaimed:
+                already_stored = {
+                    row[0] for row in db.execute(
+                        text("""
+                        SELECT b.ballot_hash
+                        FROM unnest(CAST(:ballot_hashes AS text[]), CAST(:token_hashes AS text[]))
+                             AS q(ballot_hash, token_hash)
+                        JOIN ballots b ON b.ballot_hash = q.ballot_hash AND b.token_hash = q.token_hash
+                        """),
+                        {
+                            "ballot_hashes": [item["ballot_hash"] for item in unclaimed],
+                            "token_hashes": [item["token_hash"] for item in unclaimed],
+                        }
+                    )
+                }
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        outcomes = {}
+        for item in items:
+            if item["ballot_hash"] in inserted:
+                outcomes[item["seq"]] = (STATUS_RECORDED, None, True)
+            elif item["ballot_hash"] in already_stored:
+                outcomes[item["seq"]] = (STATUS_RECORDED, None, False)
+            elif item["token_hash"] in claimed:
+                outcomes[item["seq"]] = (STATUS_REJECTED, "duplicate_ballot", False)
+            else:
+                outcomes[item["seq"]] = (STATUS_REJECTED, "token_used", False)
+        return outcomes
+
+    def _prune(self):
+        with self._conn_lock:
+            self._db().execute(
+                "DELETE FROM pending_ballots WHERE status != 'queued' AND done_at < ?",
+                (time.time() - VOTE_QUEUE_RETENTION,)
+            )
+
+
+ballot_queue = BallotQueue(VOTE_QUEUE_PATH, VOTE_QUEUE_BATCH)
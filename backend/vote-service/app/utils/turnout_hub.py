@@ -0,0 +1,144 @@
+"""
+Live turnout fan-out
+One background task per process reads the trigger-maintained ballot counters
+(election_ballot_counts) and the bulletin head for every election that has at
+least one subscriber, once per TURNOUT_INTERVAL seconds, and pushes a single
+coalesced update per changed election to all of its subscribers.
+
+Database cost is one query per tick, independent of the number of dashboards
+watching and of the vote rate. Nothing runs while nobody is subscribed.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import text
+
+from shared.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+TURNOUT_INTERVAL = float(os.getenv("TURNOUT_INTERVAL", "1.0"))
+TURNOUT_MAX_SUBSCRIBERS = int(os.getenv("TURNOUT_MAX_SUBSCRIBERS", "5000"))
+
+# Only the latest state matters to a dashboard: slow consumers lose old updates, not new ones
+_QUEUE_SIZE = 4
+
+
+def _load_snapshots(election_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Ballot count and bulletin head for each election, in one round trip"""
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text("""
+            SELECT e.id,
+                   COALESCE((SELECT SUM(c.ballot_count) FROM election_ballot_counts c
+                             WHERE c.election_id = e.id), 0),
+                   h.entry_hash, h.sequence_number
+            FROM unnest(CAST(:ids AS uuid[])) AS e(id)
+            LEFT JOIN LATERAL (
+                SELECT b.entry_hash, b.sequence_number
+                FROM bulletin_board b
+                WHERE b.election_id = e.id
+                ORDER BY b.sequence_number DESC
+                LIMIT 1
+            ) h ON true
+            """),
+            {"ids": election_ids}
+        ).fetchall()
+    finally:
+        db.close()
+    return {
+        str(row[0]): {
+            "ballot_count": int(row[1]),
+            "bulletin_head": row[2],
+            "bulletin_sequence": row[3],
+        }
+        for row in rows
+    }
+
+
+class TurnoutHub:
+    """Per-election subscriber queues fed by a fixed-cadence poller"""
+
+    def __init__(self, interval: float = TURNOUT_INTERVAL, max_subscribers: int = TURNOUT_MAX_SUBSCRIBERS):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def subscribe(self, election_id: str) -> Optional[asyncio.Queue]:
+        """Register a subscriber; returns None when the process is at capacity"""
+        if self._count >= self.max_subscribers:
+            return None
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        self._subscribers.setdefault(election_id, set()).add(queue)
+        self._count += 1
+        # Late joiners get the current state right away instead of waiting for a change
+        latest = self._latest.get(election_id)
+        if latest is not None:
+            queue.put_nowait(dict(latest, delta=0))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, election_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(election_id)
+        if not queues or queue not in queues:
+            return
+        queues.discard(queue)
+        self._count -= 1
+        if not queues:
+            del self._subscribers[election_id]
+            self._latest.pop(election_id, None)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def _publish(self, snapshots: Dict[str, Dict[str, Any]]):
+        now = time.time()
+        for election_id, snapshot in snapshots.items():
+            queues = self._subscribers.get(election_id)
+            if not queues:
+                continue
+            previous = self._latest.get(election_id)
+            if previous is not None and all(previous[k] == snapshot[k] for k in snapshot):
+                continue
+            event = {
+                "election_id": election_id,
+                **snapshot,
+                "delta": snapshot["ballot_count"] - (previous["ballot_count"] if previous else snapshot["ballot_count"]),
+                "ts": now,
+            }
+            self._latest[election_id] = event
+            for queue in queues:
+                self._offer(queue, event)
+
+    async def _run(self):
+        logger.info("Turnout poller started", extra={"interval": self.interval})
+        while self._subscribers:
+            started = time.monotonic()
+            try:
+                snapshots = await asyncio.to_thread(_load_snapshots, list(self._subscribers))
+                self._publish(snapshots)
+            except Exception as e:
+                logger.warning(f"Turnout poll failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        logger.info("Turnout poller stopped (no subscribers)")
+
+
+hub = TurnoutHub()
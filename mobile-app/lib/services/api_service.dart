@@ -1,6 +1,8 @@
+import 'dart:async';
 import 'dart:convert';
 import 'package:http/http.dart' as http;
 import 'package:logger/logger.dart';
+import 'package:uuid/uuid.dart';
 import 'storage_service.dart';
 
 class ApiService {
@@ -17,6 +19,34 @@ class ApiService {
   final logger = Logger();
   final StorageService _storage = StorageService();
 
+  /// POST carrying an Idempotency-Key header, resent with the same key when
+  /// the response is lost (network error/timeout) or the first attempt is
+  /// still in progress (409). The server replays the original response.
+  Future<http.Response> _postIdempotent(
+    Uri url, {
+    required Map<String, String> headers,
+    required Object body,
+    int maxAttempts = 3,
+  }) async {
+    for (var attempt = 1;; attempt++) {
+      try {
+        final response = await http
+            .post(url, headers: headers, body: body)
+            .timeout(const Duration(seconds: 30));
+        if (response.statusCode != 409 || attempt >= maxAttempts) {
+          return response;
+        }
+        final retryAfter = int.tryParse(response.headers['retry-after'] ?? '') ?? 1;
+        await Future.delayed(Duration(seconds: retryAfter));
+      } on TimeoutException {
+        if (attempt >= maxAttempts) rethrow;
+      } on http.ClientException {
+        if (attempt >= maxAttempts) rethrow;
+      }
+      logger.w('Retrying ${url.path} (attempt ${attempt + 1})');
+    }
+  }
+
   // ============= Auth Service APIs =============
 
   /// Register new user
@@ -173,21 +203,29 @@ class ApiService {
   // ============= Election Service APIs =============
 
   /// Get list of all elections
+  /// The list is paginated: follows the X-Next-Cursor header to the last page.
   Future<Map<String, dynamic>> getElections() async {
     try {
-      final response = await http.get(
-        Uri.parse('$electionServiceUrl/list'),
-        headers: {'Content-Type': 'application/json'},
-      );
-
-      logger.d('Get elections response: ${response.statusCode}');
-
-      if (response.statusCode == 200) {
-        final data = json.decode(response.body);
-        return {'success': true, 'data': data};
-      } else {
-        return {'success': false, 'error': 'Failed to fetch elections'};
-      }
+      final data = [];
+      String? cursor;
+      do {
+        final response = await http.get(
+          Uri.parse('$electionServiceUrl/list').replace(queryParameters: {
+            'limit': '500',
+            if (cursor != null) 'cursor': cursor,
+          }),
+          headers: {'Content-Type': 'application/json'},
+        );
+
+        logger.d('Get elections response: ${response.statusCode}');
+
+        if (response.statusCode != 200) {
+          return {'success': false, 'error': 'Failed to fetch elections'};
+        }
+        data.addAll(json.decode(response.body) as List);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor != null);
+      return {'success': true, 'data': data};
     } catch (e) {
       logger.e('Get elections error: $e');
       return {'success': false, 'error': 'Network error: $e'};
@@ -225,18 +263,22 @@ class ApiService {
     required Map<String, dynamic> proof,
     required String tokenHash,
     required String tokenSignature,
+    String? idempotencyKey,
   }) async {
+    // One key per ballot: a resend after a lost response gets the original receipt back
+    idempotencyKey ??= const Uuid().v4();
     try {
       final token = await _storage.getAccessToken();
       if (token == null) {
         return {'success': false, 'error': 'Not authenticated'};
       }
 
-      final response = await http.post(
+      final response = await _postIdempotent(
         Uri.parse('$voteServiceUrl/submit'),
         headers: {
           'Content-Type': 'application/json',
           'Authorization': 'Bearer $token',
+          'Idempotency-Key': idempotencyKey,
         },
         body: json.encode({
           'election_id': electionId,
@@ -269,6 +311,7 @@ class ApiService {
             proof: proof,
             tokenHash: tokenHash,
             tokenSignature: tokenSignature,
+            idempotencyKey: idempotencyKey,
           );
         }
         return {'success': false, 'error': 'Session expired'};
@@ -413,18 +456,22 @@ class ApiService {
     required String electionId,
     required String mainVotingCode,
     required String blindedMessage,
+    String? idempotencyKey,
   }) async {
+    // The main voting code is single-use: a resend must get the original signature, not "already used"
+    idempotencyKey ??= const Uuid().v4();
     try {
       final token = await _storage.getAccessToken();
       if (token == null) {
         return {'success': false, 'error': 'Not authenticated'};
       }
 
-      final response = await http.post(
+      final response = await _postIdempotent(
         Uri.parse('$tokenServiceUrl/request-signature'),
         headers: {
           'Content-Type': 'application/json',
           'Authorization': 'Bearer $token',
+          'Idempotency-Key': idempotencyKey,
         },
         body: json.encode({
           'election_id': electionId,
@@ -445,6 +492,7 @@ class ApiService {
             electionId: electionId,
             mainVotingCode: mainVotingCode,
             blindedMessage: blindedMessage,
+            idempotencyKey: idempotencyKey,
           );
         }
         return {'success': false, 'error': 'Session expired'};
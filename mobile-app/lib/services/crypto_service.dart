@@ -326,16 +326,44 @@ class CryptoService {
     return _x25519ScalarMult(scalar, basePoint);
   }
 
-  /// X25519 scalar multiplication
+  /// X25519 scalar multiplication (RFC 7748 Montgomery ladder)
   Uint8List _x25519ScalarMult(Uint8List scalar, Uint8List point) {
-    // For production, use proper X25519 implementation
-    // This is a simplified version for MVP
-    // In a real implementation, use a proper Curve25519 library
-    final result = Uint8List(32);
-    for (int i = 0; i < 32; i++) {
-      result[i] = (scalar[i] ^ point[i]) & 0xFF;
+    final k = Uint8List.fromList(scalar);
+    k[0] &= 248;
+    k[31] &= 127;
+    k[31] |= 64;
+    final kInt = _bytesToBigIntLE(k);
+    final u = Uint8List.fromList(point);
+    u[31] &= 127;
+    final x1 = _bytesToBigIntLE(u) % _curveP;
+
+    var x2 = BigInt.one, z2 = BigInt.zero, x3 = x1, z3 = BigInt.one;
+    var swap = 0;
+    for (int t = 254; t >= 0; t--) {
+      final kt = ((kInt >> t) & BigInt.one).toInt();
+      if ((swap ^ kt) == 1) {
+        final tx = x2, tz = z2;
+        x2 = x3;
+        z2 = z3;
+        x3 = tx;
+        z3 = tz;
+      }
+      swap = kt;
+      final a = (x2 + z2) % _curveP, aa = a * a % _curveP;
+      final b = (x2 - z2) % _curveP, bb = b * b % _curveP;
+      final e = (aa - bb) % _curveP;
+      final c = (x3 + z3) % _curveP, d = (x3 - z3) % _curveP;
+      final da = d * a % _curveP, cb = c * b % _curveP;
+      x3 = (da + cb) * (da + cb) % _curveP;
+      z3 = x1 * (da - cb) % _curveP * (da - cb) % _curveP;
+      x2 = aa * bb % _curveP;
+      z2 = e * (aa + _a24 * e) % _curveP;
     }
-    return result;
+    if (swap == 1) {
+      x2 = x3;
+      z2 = z3;
+    }
+    return _bigIntToBytesLE(x2 * z2.modInverse(_curveP) % _curveP, 32);
   }
 
   // ============= HKDF Key Derivation =============
@@ -385,10 +413,18 @@ class CryptoService {
   // ============= ECIES (Elliptic Curve Integrated Encryption Scheme) =============
 
   /// ECIES Encrypt using X25519 + AES-256-GCM + HKDF
+  /// [ephemeralPrivateKey]: fresh key chosen by the caller (the ballot proof
+  /// needs it); generated here when omitted. Never reuse one.
   Map<String, Uint8List> eciesEncrypt(
-      Uint8List recipientPublicKey, Uint8List plaintext) {
+      Uint8List recipientPublicKey, Uint8List plaintext,
+      {Uint8List? ephemeralPrivateKey}) {
     // Generate ephemeral key pair
-    final ephemeralKeys = generateX25519KeyPair();
+    final ephemeralKeys = ephemeralPrivateKey == null
+        ? generateX25519KeyPair()
+        : {
+            'private_key': ephemeralPrivateKey,
+            'public_key': _x25519ScalarMultBase(ephemeralPrivateKey),
+          };
     final ephemeralPrivate = ephemeralKeys['private_key']!;
     final ephemeralPublic = ephemeralKeys['public_key']!;
 
@@ -436,6 +472,111 @@ class CryptoService {
     return aesGcmDecrypt(ciphertext, encryptionKey, nonce, tag);
   }
 
+  // ============= Ballot Proof (Schnorr on Ed25519, see backend/shared/zkp.py) =============
+
+  /// Curve25519 field prime 2^255 - 19 and the group order L
+  static final BigInt _curveP = (BigInt.one << 255) - BigInt.from(19);
+  static final BigInt _curveL = (BigInt.one << 252) +
+      BigInt.parse('27742317777372353535851937790883648493');
+  static final BigInt _a24 = BigInt.from(121665);
+
+  /// Edwards d = -121665 / 121666
+  static final BigInt _edD =
+      (-BigInt.from(121665) * BigInt.from(121666).modInverse(_curveP)) %
+          _curveP;
+  static final List<BigInt> _edBase = [
+    BigInt.parse(
+        '15112221349535400772501151409588531511454012693041857206046113283949847762202'),
+    BigInt.parse(
+        '46316835694926478169428394003475163141307993866256225615783033603165251855960'),
+  ];
+
+  /// Affine Edwards addition (complete for Ed25519, so also used for doubling)
+  List<BigInt> _edAdd(List<BigInt> p1, List<BigInt> p2) {
+    final x1x2 = p1[0] * p2[0] % _curveP, y1y2 = p1[1] * p2[1] % _curveP;
+    final dxy = _edD * x1x2 % _curveP * y1y2 % _curveP;
+    final x3 = (p1[0] * p2[1] + p1[1] * p2[0]) %
+        _curveP *
+        ((BigInt.one + dxy) % _curveP).modInverse(_curveP) %
+        _curveP;
+    final y3 = (y1y2 + x1x2) %
+        _curveP *
+        ((BigInt.one - dxy) % _curveP).modInverse(_curveP) %
+        _curveP;
+    return [x3, y3];
+  }
+
+  List<BigInt> _edMul(BigInt k, List<BigInt> point) {
+    var result = [BigInt.zero, BigInt.one];
+    var addend = point;
+    while (k > BigInt.zero) {
+      if (k.isOdd) result = _edAdd(result, addend);
+      addend = _edAdd(addend, addend);
+      k = k >> 1;
+    }
+    return result;
+  }
+
+  /// Compressed point: y little-endian with the parity of x in the top bit
+  Uint8List _edEncode(List<BigInt> point) {
+    final bytes = _bigIntToBytesLE(point[1], 32);
+    if (point[0].isOdd) bytes[31] |= 0x80;
+    return bytes;
+  }
+
+  /// Canonical ballot hash: SHA-256 over version 0x01 || ephemeral key || nonce || tag || ciphertext
+  String ballotHash(Map<String, Uint8List> encrypted) {
+    final builder = BytesBuilder()
+      ..addByte(0x01)
+      ..add(encrypted['ephemeral_public_key']!)
+      ..add(encrypted['nonce']!)
+      ..add(encrypted['tag']!)
+      ..add(encrypted['ciphertext']!);
+    return hexEncode(sha256(builder.toBytes()));
+  }
+
+  /// Proof of knowledge of the ECIES ephemeral secret, bound to the election
+  /// and the ballot hash
+  Map<String, String> proveBallot(
+      String electionId, String ballotHash, Uint8List ephemeralPrivateKey) {
+    final clamped = Uint8List.fromList(ephemeralPrivateKey);
+    clamped[0] &= 248;
+    clamped[31] &= 127;
+    clamped[31] |= 64;
+    final r = _bytesToBigIntLE(clamped) % _curveL;
+    final ephemeral = _edMul(r, _edBase);
+    // X25519 u-coordinate of the same point: the ballot's ephemeral public key
+    final u = (BigInt.one + ephemeral[1]) *
+        ((BigInt.one - ephemeral[1]) % _curveP).modInverse(_curveP) %
+        _curveP;
+
+    final k = _bytesToBigIntLE(generateRandomBytes(64)) % (_curveL - BigInt.one) +
+        BigInt.one;
+    final t = _edEncode(_edMul(k, _edBase));
+
+    final separator = utf8.encode('|');
+    final transcript = BytesBuilder()
+      ..add(utf8.encode('evote-ballot-proof-v2'))
+      ..add(separator)
+      ..add(utf8.encode(electionId.toLowerCase()))
+      ..add(separator)
+      ..add(utf8.encode(ballotHash.toLowerCase()))
+      ..add(separator)
+      ..add(_bigIntToBytesLE(u, 32))
+      ..add(separator)
+      ..add(t);
+    final c = _bytesToBigIntLE(
+            SHA512Digest().process(transcript.toBytes())) %
+        _curveL;
+
+    return {
+      'scheme': 'ecies-ephemeral-v1',
+      'x': hexEncode(_bigIntToBytesLE(ephemeral[0], 32)),
+      't': hexEncode(t),
+      's': hexEncode(_bigIntToBytesLE((k + c * r) % _curveL, 32)),
+    };
+  }
+
   // ============= Helper Functions =============
 
   /// Generate random BigInt
@@ -463,6 +604,25 @@ class CryptoService {
     return bytes;
   }
 
+  /// Convert little-endian bytes to BigInt
+  BigInt _bytesToBigIntLE(Uint8List bytes) {
+    BigInt result = BigInt.zero;
+    for (int i = bytes.length - 1; i >= 0; i--) {
+      result = (result << 8) | BigInt.from(bytes[i]);
+    }
+    return result;
+  }
+
+  /// Convert BigInt to little-endian bytes
+  Uint8List _bigIntToBytesLE(BigInt number, int length) {
+    final bytes = Uint8List(length);
+    for (int i = 0; i < length; i++) {
+      bytes[i] = (number & BigInt.from(0xff)).toInt();
+      number = number >> 8;
+    }
+    return bytes;
+  }
+
   /// Base64 encode
   String base64Encode(Uint8List data) {
     return base64.encode(data);
@@ -506,14 +666,17 @@ class CryptoService {
 
     final plaintext = Uint8List.fromList(utf8.encode(json.encode(voteData)));
 
-    // Encrypt with ECIES
-    final encrypted = eciesEncrypt(voterPublicKey, plaintext);
+    // Encrypt with ECIES under a fresh ephemeral key kept for the proof
+    final ephemeralPrivate = generateX25519KeyPair()['private_key']!;
+    final encrypted = eciesEncrypt(voterPublicKey, plaintext,
+        ephemeralPrivateKey: ephemeralPrivate);
 
-    // Generate proof of knowledge (simplified ZK proof for MVP)
+    // Proof of knowledge of the ephemeral secret, bound to this ballot (verified by the vote service)
     final proofData = {
       'voter_public_key': base64Encode(voterPublicKey),
       'ephemeral_public_key': base64Encode(encrypted['ephemeral_public_key']!),
       'commitment': sha256String(json.encode(voteData)),
+      ...proveBallot(electionId, ballotHash(encrypted), ephemeralPrivate),
     };
 
     return {
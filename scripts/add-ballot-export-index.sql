@@ -0,0 +1,14 @@
+-- Migration: Ballot index ordered for the binary trustee export
+-- Description: The export (GET /api/trustee/election/{id}/ballots/export)
+--              streams an election's ballots in ballot_id order from a
+--              server-side cursor. Range requests seek to the first
+--              ballot_id of a manifest chunk. With (election_id, ballot_id)
+--              both are an ordered index range scan, with no sort of the
+--              whole election. The new index replaces the
+--              election_id-only index.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-ballot-export-index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ballots_election_ballot
+    ON ballots(election_id, ballot_id);
+DROP INDEX CONCURRENTLY IF EXISTS idx_ballots_election;
+ALTER INDEX idx_ballots_election_ballot RENAME TO idx_ballots_election;
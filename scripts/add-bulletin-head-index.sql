@@ -0,0 +1,9 @@
+-- Migration: Composite index for per-election bulletin head lookups
+-- Description: The latest entry of an election (chain head) is read by the
+--              turnout stream on every tick and by the bulletin summary.
+--              With (election_id, sequence_number) this is a single index
+--              probe instead of sorting all of the election's entries.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-bulletin-head-index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bulletin_election_sequence
+    ON bulletin_board(election_id, sequence_number);
@@ -0,0 +1,13 @@
+-- Migration: Signed bulletin board entries
+-- Description: The bulletin board signs every entry with an Ed25519 key
+--              (bulletin-board-service/app/utils/entry_signing.py) and
+--              records which key signed it. Existing entries keep their
+--              placeholder signature with no key id and are reported as
+--              unsigned by the signature audit.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-bulletin-signatures.sql
+
+BEGIN;
+
+ALTER TABLE bulletin_board ADD COLUMN IF NOT EXISTS signing_key_id VARCHAR(32);
+
+COMMIT;
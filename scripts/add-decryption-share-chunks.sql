@@ -0,0 +1,22 @@
+-- Migration: Chunked decryption share uploads
+-- Description: The trustee CLI (backend/trustee) uploads partial
+--              decryptions in chunks, one idempotent PUT per chunk, so an
+--              interrupted upload resumes with the missing chunks only.
+--              Chunks are merged into trustees.decryption_shares when the
+--              upload is completed.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-decryption-share-chunks.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS decryption_share_chunks (
+    trustee_id UUID NOT NULL REFERENCES trustees(trustee_id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    shares JSONB NOT NULL, -- {ballot_id: partial_decryption}
+    share_count INTEGER NOT NULL,
+    digest VARCHAR(64) NOT NULL, -- SHA-256 of the canonical JSON of shares
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (trustee_id, chunk_index)
+);
+
+COMMIT;
@@ -0,0 +1,48 @@
+-- Migration: Distributed key generation ceremony
+-- Description: Trustees generate the election key together (/api/dkg and
+--              `python -m trustee dkg`) instead of the election service
+--              generating and splitting it. Holds each trustee's Feldman
+--              commitments, the encrypted shares between trustees and the
+--              round the ceremony is in, so interrupted participants resume.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-dkg-ceremony.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS dkg_ceremonies (
+    election_id UUID PRIMARY KEY REFERENCES elections(election_id) ON DELETE CASCADE,
+    ceremony_id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    threshold INTEGER NOT NULL,
+    total_trustees INTEGER NOT NULL,
+    round INTEGER NOT NULL DEFAULT 1, -- 1 commitments, 2 shares, 3 confirmations
+    status VARCHAR(20) NOT NULL DEFAULT 'RUNNING' CHECK (status IN ('RUNNING', 'COMPLETED', 'FAILED')),
+    failure_reason TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS dkg_participants (
+    election_id UUID NOT NULL REFERENCES dkg_ceremonies(election_id) ON DELETE CASCADE,
+    trustee_index INTEGER NOT NULL, -- 1..n, the share's x coordinate
+    trustee_id UUID NOT NULL UNIQUE REFERENCES trustees(trustee_id) ON DELETE CASCADE,
+    transport_key BYTEA, -- X25519 key that shares for this trustee are encrypted to
+    commitments BYTEA, -- t compressed Ed25519 points (t * 32 bytes)
+    committed_at TIMESTAMP,
+    shares_dealt_at TIMESTAMP,
+    verification_key BYTEA, -- s_j * B
+    complaints INTEGER[], -- dealer indexes whose share failed verification
+    confirmed_at TIMESTAMP,
+
+    PRIMARY KEY (election_id, trustee_index)
+);
+
+-- Encrypted share from one dealer to one recipient (shared/ballot_format.py layout)
+CREATE TABLE IF NOT EXISTS dkg_shares (
+    election_id UUID NOT NULL REFERENCES dkg_ceremonies(election_id) ON DELETE CASCADE,
+    recipient_index INTEGER NOT NULL,
+    dealer_index INTEGER NOT NULL,
+    ciphertext BYTEA NOT NULL,
+
+    PRIMARY KEY (election_id, recipient_index, dealer_index)
+);
+
+COMMIT;
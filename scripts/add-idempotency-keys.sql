@@ -0,0 +1,26 @@
+-- Migration: Idempotency keys
+-- Description: Stores the first response to a POST sent with an
+--              Idempotency-Key header (vote submission, blind signing) so
+--              that client retries are answered by replaying it.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-idempotency-keys.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(50) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash BYTEA NOT NULL,
+
+    -- NULL while the first attempt is still running
+    status_code INTEGER,
+    response JSONB,
+
+    locked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+
+    PRIMARY KEY (scope, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+
+COMMIT;
@@ -0,0 +1,27 @@
+-- Migration: Bulk KYC approval jobs
+-- Description: Tracks bulk KYC status changes (POST /api/users/kyc/bulk):
+--              selection, progress counters and the resume point.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-kyc-bulk-jobs.sql
+
+CREATE TABLE IF NOT EXISTS kyc_bulk_jobs (
+    job_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    target_status VARCHAR(20) NOT NULL CHECK (target_status IN ('PENDING', 'APPROVED', 'REJECTED')),
+    requested_by UUID REFERENCES users(user_id),
+    
+    -- Selection: explicit IDs and/or filters (kyc_status, created_after, created_before, name_prefix)
+    user_ids UUID[],
+    filters JSONB NOT NULL DEFAULT '{}',
+    
+    -- Progress (last_user_id is the resume point: users are processed in user_id order)
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')),
+    total BIGINT NOT NULL DEFAULT 0,
+    processed BIGINT NOT NULL DEFAULT 0,
+    updated BIGINT NOT NULL DEFAULT 0,
+    last_user_id UUID,
+    error TEXT,
+    
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
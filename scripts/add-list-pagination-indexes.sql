@@ -0,0 +1,29 @@
+-- Migration: Indexes for keyset pagination and prefix search on list endpoints
+-- Description: Each list endpoint pages with (created_at, id) keyset
+--              predicates. These indexes let every page be a bounded index
+--              range scan. Name/email/title prefix filters use text_pattern_ops
+--              indexes on lower(...) so LIKE 'prefix%' is an index range too.
+--              The name prefix index is not partial so the planner uses its
+--              expression statistics to tell a selective prefix (index scan)
+--              from a broad one (walk the created_at index instead).
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-list-pagination-indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_voters_created
+    ON users(created_at, user_id) WHERE is_admin = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_voters_kyc_created
+    ON users(kyc_status, created_at, user_id) WHERE is_admin = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_full_name_prefix
+    ON users(lower(full_name) text_pattern_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email_prefix
+    ON users(lower(email) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_elections_created
+    ON elections(created_at, election_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_elections_title_prefix
+    ON elections(lower(title) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_trustees_election_created
+    ON trustees(election_id, created_at, trustee_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_voting_codes_election_created
+    ON voting_codes(election_id, created_at, code_id);
@@ -0,0 +1,151 @@
+-- Migration: Trigger-maintained statistics counters
+-- Description: Replaces COUNT(*) scans for the admin dashboard and per-election
+--              ballot counts with counters kept up to date by statement-level
+--              triggers. Ballot counts are sharded per backend so concurrent
+--              vote commits do not serialize on a single counter row.
+-- Usage: psql -U postgres -d evoting_db -f scripts/add-stats-counters.sql
+
+BEGIN;
+
+-- Global counters (dashboard)
+CREATE TABLE IF NOT EXISTS stats_counters (
+    counter_name VARCHAR(64) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO stats_counters (counter_name) VALUES
+    ('elections_total'), ('elections_active'), ('voters_total'), ('kyc_pending')
+ON CONFLICT (counter_name) DO NOTHING;
+
+-- Per-election ballot counts: SUM(ballot_count) over at most 16 shards
+CREATE TABLE IF NOT EXISTS election_ballot_counts (
+    election_id UUID NOT NULL REFERENCES elections(election_id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    ballot_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (election_id, shard)
+);
+
+CREATE OR REPLACE FUNCTION bump_stats_counter(p_name TEXT, p_delta BIGINT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_delta <> 0 THEN
+        UPDATE stats_counters SET value = value + p_delta WHERE counter_name = p_name;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_election_counts()
+RETURNS TRIGGER AS $$
+DECLARE
+    d_total BIGINT := 0;
+    d_active BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT d_total + COUNT(*), d_active + COUNT(*) FILTER (WHERE status = 'ACTIVE')
+        INTO d_total, d_active FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT d_total - COUNT(*), d_active - COUNT(*) FILTER (WHERE status = 'ACTIVE')
+        INTO d_total, d_active FROM old_rows;
+    END IF;
+    PERFORM bump_stats_counter('elections_total', d_total);
+    PERFORM bump_stats_counter('elections_active', d_active);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_user_counts()
+RETURNS TRIGGER AS $$
+DECLARE
+    d_voters BIGINT := 0;
+    d_pending BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT d_voters + COUNT(*) FILTER (WHERE is_admin = false),
+               d_pending + COUNT(*) FILTER (WHERE kyc_status = 'PENDING')
+        INTO d_voters, d_pending FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT d_voters - COUNT(*) FILTER (WHERE is_admin = false),
+               d_pending - COUNT(*) FILTER (WHERE kyc_status = 'PENDING')
+        INTO d_voters, d_pending FROM old_rows;
+    END IF;
+    PERFORM bump_stats_counter('voters_total', d_voters);
+    PERFORM bump_stats_counter('kyc_pending', d_pending);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_ballot_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO election_ballot_counts (election_id, shard, ballot_count)
+        SELECT election_id, pg_backend_pid() % 16, COUNT(*) FROM new_rows GROUP BY election_id
+        ON CONFLICT (election_id, shard)
+        DO UPDATE SET ballot_count = election_ballot_counts.ballot_count + EXCLUDED.ballot_count;
+    ELSE
+        INSERT INTO election_ballot_counts (election_id, shard, ballot_count)
+        SELECT election_id, pg_backend_pid() % 16, -COUNT(*) FROM old_rows GROUP BY election_id
+        ON CONFLICT (election_id, shard)
+        DO UPDATE SET ballot_count = election_ballot_counts.ballot_count + EXCLUDED.ballot_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS elections_stats_insert ON elections;
+DROP TRIGGER IF EXISTS elections_stats_update ON elections;
+DROP TRIGGER IF EXISTS elections_stats_delete ON elections;
+CREATE TRIGGER elections_stats_insert AFTER INSERT ON elections
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_election_counts();
+CREATE TRIGGER elections_stats_update AFTER UPDATE ON elections
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_election_counts();
+CREATE TRIGGER elections_stats_delete AFTER DELETE ON elections
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_election_counts();
+
+DROP TRIGGER IF EXISTS users_stats_insert ON users;
+DROP TRIGGER IF EXISTS users_stats_update ON users;
+DROP TRIGGER IF EXISTS users_stats_delete ON users;
+CREATE TRIGGER users_stats_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_user_counts();
+CREATE TRIGGER users_stats_update AFTER UPDATE ON users
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_user_counts();
+CREATE TRIGGER users_stats_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_user_counts();
+
+DROP TRIGGER IF EXISTS ballots_stats_insert ON ballots;
+DROP TRIGGER IF EXISTS ballots_stats_delete ON ballots;
+CREATE TRIGGER ballots_stats_insert AFTER INSERT ON ballots
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_ballot_counts();
+CREATE TRIGGER ballots_stats_delete AFTER DELETE ON ballots
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_ballot_counts();
+
+-- Recompute every counter from the base tables (backfill / drift repair)
+CREATE OR REPLACE FUNCTION refresh_stats_counters()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE elections, users, ballots IN SHARE MODE;
+
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM elections) WHERE counter_name = 'elections_total';
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM elections WHERE status = 'ACTIVE') WHERE counter_name = 'elections_active';
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM users WHERE is_admin = false) WHERE counter_name = 'voters_total';
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM users WHERE kyc_status = 'PENDING') WHERE counter_name = 'kyc_pending';
+
+    DELETE FROM election_ballot_counts;
+    INSERT INTO election_ballot_counts (election_id, shard, ballot_count)
+    SELECT election_id, 0, COUNT(*) FROM ballots GROUP BY election_id;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_stats_counters();
+
+COMMIT;
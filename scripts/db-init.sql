@@ -48,16 +48,22 @@ CREATE TABLE users (
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_nic ON users(nic);
 CREATE INDEX idx_users_kyc_status ON users(kyc_status);
+CREATE INDEX idx_users_voters_created ON users(created_at, user_id) WHERE is_admin = false;
+CREATE INDEX idx_users_voters_kyc_created ON users(kyc_status, created_at, user_id) WHERE is_admin = false;
+CREATE INDEX idx_users_full_name_prefix ON users(lower(full_name) text_pattern_ops);
+CREATE INDEX idx_users_email_prefix ON users(lower(email) text_pattern_ops);
 
 -- User sessions
+-- Keyed for refresh by SHA-256 of the current refresh token (tokens themselves are not stored).
+-- expires_at: expiry of the latest access token; refresh_expires_at: when the session ends.
 CREATE TABLE sessions (
     session_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     user_id UUID NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
-    access_token TEXT NOT NULL,
-    refresh_token TEXT NOT NULL,
+    refresh_token_hash BYTEA NOT NULL,
     device_info JSONB,
     ip_address INET,
     expires_at TIMESTAMP NOT NULL,
+    refresh_expires_at TIMESTAMP NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     revoked_at TIMESTAMP,
     
@@ -65,8 +71,10 @@ CREATE TABLE sessions (
 );
 
 CREATE INDEX idx_sessions_user ON sessions(user_id);
-CREATE INDEX idx_sessions_access_token ON sessions(access_token);
-CREATE INDEX idx_sessions_expires_at ON sessions(expires_at);
+CREATE UNIQUE INDEX idx_sessions_refresh_token_hash ON sessions(refresh_token_hash);
+CREATE INDEX idx_sessions_refresh_expires_at ON sessions(refresh_expires_at);
+-- Revocation set load and sweeper: only revoked rows
+CREATE INDEX idx_sessions_revoked ON sessions(expires_at) WHERE revoked_at IS NOT NULL;
 
 -- =============================================
 -- ELECTIONS
@@ -106,6 +114,8 @@ CREATE TABLE elections (
 
 CREATE INDEX idx_elections_status ON elections(status);
 CREATE INDEX idx_elections_timing ON elections(start_time, end_time);
+CREATE INDEX idx_elections_created ON elections(created_at, election_id);
+CREATE INDEX idx_elections_title_prefix ON elections(lower(title) text_pattern_ops);
 
 -- Candidates
 CREATE TABLE candidates (
@@ -154,6 +164,59 @@ CREATE TABLE trustees (
 
 CREATE INDEX idx_trustees_election ON trustees(election_id);
 CREATE INDEX idx_trustees_user ON trustees(user_id);
+CREATE INDEX idx_trustees_election_created ON trustees(election_id, created_at, trustee_id);
+
+-- Partial decryptions uploaded in chunks (trustee CLI), merged into
+-- trustees.decryption_shares when the upload is completed
+CREATE TABLE decryption_share_chunks (
+    trustee_id UUID NOT NULL REFERENCES trustees(trustee_id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    shares JSONB NOT NULL, -- {ballot_id: partial_decryption}
+    share_count INTEGER NOT NULL,
+    digest VARCHAR(64) NOT NULL, -- SHA-256 of the canonical JSON of shares
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (trustee_id, chunk_index)
+);
+
+-- Distributed key generation (election-service /api/dkg, shared/dkg.py).
+-- One row per ceremony; restarting a failed ceremony replaces it.
+CREATE TABLE dkg_ceremonies (
+    election_id UUID PRIMARY KEY REFERENCES elections(election_id) ON DELETE CASCADE,
+    ceremony_id UUID NOT NULL DEFAULT uuid_generate_v4(),
+    threshold INTEGER NOT NULL,
+    total_trustees INTEGER NOT NULL,
+    round INTEGER NOT NULL DEFAULT 1, -- 1 commitments, 2 shares, 3 confirmations
+    status VARCHAR(20) NOT NULL DEFAULT 'RUNNING' CHECK (status IN ('RUNNING', 'COMPLETED', 'FAILED')),
+    failure_reason TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP
+);
+
+CREATE TABLE dkg_participants (
+    election_id UUID NOT NULL REFERENCES dkg_ceremonies(election_id) ON DELETE CASCADE,
+    trustee_index INTEGER NOT NULL, -- 1..n, the share's x coordinate
+    trustee_id UUID NOT NULL UNIQUE REFERENCES trustees(trustee_id) ON DELETE CASCADE,
+    transport_key BYTEA, -- X25519 key that shares for this trustee are encrypted to
+    commitments BYTEA, -- t compressed Ed25519 points (t * 32 bytes)
+    committed_at TIMESTAMP,
+    shares_dealt_at TIMESTAMP,
+    verification_key BYTEA, -- s_j * B
+    complaints INTEGER[], -- dealer indexes whose share failed verification
+    confirmed_at TIMESTAMP,
+
+    PRIMARY KEY (election_id, trustee_index)
+);
+
+-- Encrypted share from one dealer to one recipient (shared/ballot_format.py layout)
+CREATE TABLE dkg_shares (
+    election_id UUID NOT NULL REFERENCES dkg_ceremonies(election_id) ON DELETE CASCADE,
+    recipient_index INTEGER NOT NULL,
+    dealer_index INTEGER NOT NULL,
+    ciphertext BYTEA NOT NULL,
+
+    PRIMARY KEY (election_id, recipient_index, dealer_index)
+);
 
 -- =============================================
 -- VOTING CODES (Return Codes for Verification)
@@ -190,6 +253,7 @@ CREATE TABLE voting_codes (
 CREATE INDEX idx_voting_codes_user ON voting_codes(user_id);
 CREATE INDEX idx_voting_codes_election ON voting_codes(election_id);
 CREATE INDEX idx_voting_codes_main_code ON voting_codes(main_voting_code);
+CREATE INDEX idx_voting_codes_election_created ON voting_codes(election_id, created_at, code_id);
 
 -- =============================================
 -- ANONYMOUS TOKENS (Blind Signatures)
@@ -264,7 +328,7 @@ CREATE TABLE ballots (
     CONSTRAINT fk_token FOREIGN KEY (token_hash) REFERENCES anonymous_tokens(token_hash)
 );
 
-CREATE INDEX idx_ballots_election ON ballots(election_id);
+CREATE INDEX idx_ballots_election ON ballots(election_id, ballot_id);
 CREATE INDEX idx_ballots_hash ON ballots(ballot_hash);
 CREATE INDEX idx_ballots_token ON ballots(token_hash);
 CREATE INDEX idx_ballots_cast_time ON ballots(cast_at);
@@ -294,8 +358,9 @@ CREATE TABLE bulletin_board (
     -- Entry data (public information only)
     entry_data JSONB NOT NULL,
     
-    -- Digital signature
+    -- Digital signature: Ed25519 over the entry hash (shared/bulletin_chain.py)
     signature BYTEA NOT NULL,
+    signing_key_id VARCHAR(32), -- key in GET /api/bulletin/keys; NULL for unsigned entries from before signing
     
     -- Timestamp
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -305,6 +370,7 @@ CREATE TABLE bulletin_board (
 );
 
 CREATE INDEX idx_bulletin_election ON bulletin_board(election_id);
+CREATE INDEX idx_bulletin_election_sequence ON bulletin_board(election_id, sequence_number);
 CREATE INDEX idx_bulletin_type ON bulletin_board(entry_type);
 CREATE INDEX idx_bulletin_sequence ON bulletin_board(sequence_number);
 CREATE INDEX idx_bulletin_hash ON bulletin_board(entry_hash);
@@ -373,6 +439,54 @@ CREATE INDEX idx_audit_event_type ON audit_logs(event_type);
 CREATE INDEX idx_audit_created_at ON audit_logs(created_at);
 CREATE INDEX idx_audit_resource ON audit_logs(resource_type, resource_id);
 
+-- =============================================
+-- BULK KYC JOBS
+-- =============================================
+
+CREATE TABLE kyc_bulk_jobs (
+    job_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    target_status VARCHAR(20) NOT NULL CHECK (target_status IN ('PENDING', 'APPROVED', 'REJECTED')),
+    requested_by UUID REFERENCES users(user_id),
+    
+    -- Selection: explicit IDs and/or filters (kyc_status, created_after, created_before, name_prefix)
+    user_ids UUID[],
+    filters JSONB NOT NULL DEFAULT '{}',
+    
+    -- Progress (last_user_id is the resume point: users are processed in user_id order)
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')),
+    total BIGINT NOT NULL DEFAULT 0,
+    processed BIGINT NOT NULL DEFAULT 0,
+    updated BIGINT NOT NULL DEFAULT 0,
+    last_user_id UUID,
+    error TEXT,
+    
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- =============================================
+-- IDEMPOTENCY KEYS (replayed responses for retried POSTs)
+-- =============================================
+
+CREATE TABLE idempotency_keys (
+    scope VARCHAR(50) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash BYTEA NOT NULL,
+
+    -- NULL while the first attempt is still running
+    status_code INTEGER,
+    response JSONB,
+
+    locked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+
+    PRIMARY KEY (scope, idempotency_key)
+);
+
+CREATE INDEX idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+
 -- =============================================
 -- TRIGGERS FOR UPDATED_AT
 -- =============================================
@@ -391,6 +505,140 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_elections_updated_at BEFORE UPDATE ON elections
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- =============================================
+-- STATISTICS COUNTERS (trigger-maintained)
+-- =============================================
+
+-- Global counters (dashboard)
+CREATE TABLE stats_counters (
+    counter_name VARCHAR(64) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO stats_counters (counter_name) VALUES
+    ('elections_total'), ('elections_active'), ('voters_total'), ('kyc_pending');
+
+-- Per-election ballot counts: SUM(ballot_count) over at most 16 shards
+CREATE TABLE election_ballot_counts (
+    election_id UUID NOT NULL REFERENCES elections(election_id) ON DELETE CASCADE,
+    shard SMALLINT NOT NULL,
+    ballot_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (election_id, shard)
+);
+
+CREATE OR REPLACE FUNCTION bump_stats_counter(p_name TEXT, p_delta BIGINT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_delta <> 0 THEN
+        UPDATE stats_counters SET value = value + p_delta WHERE counter_name = p_name;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_election_counts()
+RETURNS TRIGGER AS $$
+DECLARE
+    d_total BIGINT := 0;
+    d_active BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT d_total + COUNT(*), d_active + COUNT(*) FILTER (WHERE status = 'ACTIVE')
+        INTO d_total, d_active FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT d_total - COUNT(*), d_active - COUNT(*) FILTER (WHERE status = 'ACTIVE')
+        INTO d_total, d_active FROM old_rows;
+    END IF;
+    PERFORM bump_stats_counter('elections_total', d_total);
+    PERFORM bump_stats_counter('elections_active', d_active);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_user_counts()
+RETURNS TRIGGER AS $$
+DECLARE
+    d_voters BIGINT := 0;
+    d_pending BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT d_voters + COUNT(*) FILTER (WHERE is_admin = false),
+               d_pending + COUNT(*) FILTER (WHERE kyc_status = 'PENDING')
+        INTO d_voters, d_pending FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT d_voters - COUNT(*) FILTER (WHERE is_admin = false),
+               d_pending - COUNT(*) FILTER (WHERE kyc_status = 'PENDING')
+        INTO d_voters, d_pending FROM old_rows;
+    END IF;
+    PERFORM bump_stats_counter('voters_total', d_voters);
+    PERFORM bump_stats_counter('kyc_pending', d_pending);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_ballot_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO election_ballot_counts (election_id, shard, ballot_count)
+        SELECT election_id, pg_backend_pid() % 16, COUNT(*) FROM new_rows GROUP BY election_id
+        ON CONFLICT (election_id, shard)
+        DO UPDATE SET ballot_count = election_ballot_counts.ballot_count + EXCLUDED.ballot_count;
+    ELSE
+        INSERT INTO election_ballot_counts (election_id, shard, ballot_count)
+        SELECT election_id, pg_backend_pid() % 16, -COUNT(*) FROM old_rows GROUP BY election_id
+        ON CONFLICT (election_id, shard)
+        DO UPDATE SET ballot_count = election_ballot_counts.ballot_count + EXCLUDED.ballot_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER elections_stats_insert AFTER INSERT ON elections
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_election_counts();
+CREATE TRIGGER elections_stats_update AFTER UPDATE ON elections
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_election_counts();
+CREATE TRIGGER elections_stats_delete AFTER DELETE ON elections
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_election_counts();
+
+CREATE TRIGGER users_stats_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_user_counts();
+CREATE TRIGGER users_stats_update AFTER UPDATE ON users
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_user_counts();
+CREATE TRIGGER users_stats_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_user_counts();
+
+CREATE TRIGGER ballots_stats_insert AFTER INSERT ON ballots
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_ballot_counts();
+CREATE TRIGGER ballots_stats_delete AFTER DELETE ON ballots
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION track_ballot_counts();
+
+-- Recompute every counter from the base tables (backfill / drift repair)
+CREATE OR REPLACE FUNCTION refresh_stats_counters()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE elections, users, ballots IN SHARE MODE;
+
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM elections) WHERE counter_name = 'elections_total';
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM elections WHERE status = 'ACTIVE') WHERE counter_name = 'elections_active';
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM users WHERE is_admin = false) WHERE counter_name = 'voters_total';
+    UPDATE stats_counters SET value = (SELECT COUNT(*) FROM users WHERE kyc_status = 'PENDING') WHERE counter_name = 'kyc_pending';
+
+    DELETE FROM election_ballot_counts;
+    INSERT INTO election_ballot_counts (election_id, shard, ballot_count)
+    SELECT election_id, 0, COUNT(*) FROM ballots GROUP BY election_id;
+END;
+$$ LANGUAGE plpgsql;
+
 -- =============================================
 -- SECURITY: ROW LEVEL SECURITY (Example)
 -- =============================================
@@ -0,0 +1,42 @@
+-- Migration: Binary ballot encoding
+-- Description: Rewrites ballots stored as JSON text of base64 fields
+--              ({"ciphertext": ..., "ephemeral_public_key": ..., "nonce": ..., "tag": ...})
+--              into the version 1 binary layout of shared/ballot_format.py:
+--              0x01 | ephemeral key (32) | nonce (12) | tag (16) | ciphertext.
+--              ballot_hash is left unchanged, so receipts and bulletin entries
+--              issued for these ballots stay valid. Rows whose fields do not
+--              have the expected sizes are left as JSON (the services read both).
+--              Runs in batches of 5000, committing after each, so it can be
+--              stopped and re-run while the services are up.
+-- Usage: psql -U postgres -d evoting_db -f scripts/migrate-ballots-binary.sql
+
+DO $$
+DECLARE
+    converted INTEGER;
+BEGIN
+    LOOP
+        WITH batch AS (
+            SELECT ballot_id, convert_from(encrypted_ballot, 'UTF8')::jsonb AS j
+            FROM ballots
+            WHERE get_byte(encrypted_ballot, 0) = 123  -- '{'
+              AND octet_length(decode(convert_from(encrypted_ballot, 'UTF8')::jsonb->>'ephemeral_public_key', 'base64')) = 32
+              AND octet_length(decode(convert_from(encrypted_ballot, 'UTF8')::jsonb->>'nonce', 'base64')) = 12
+              AND octet_length(decode(convert_from(encrypted_ballot, 'UTF8')::jsonb->>'tag', 'base64')) = 16
+            LIMIT 5000
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE ballots b
+        SET encrypted_ballot = '\x01'::bytea
+            || decode(batch.j->>'ephemeral_public_key', 'base64')
+            || decode(batch.j->>'nonce', 'base64')
+            || decode(batch.j->>'tag', 'base64')
+            || decode(batch.j->>'ciphertext', 'base64')
+        FROM batch
+        WHERE b.ballot_id = batch.ballot_id;
+
+        GET DIAGNOSTICS converted = ROW_COUNT;
+        RAISE NOTICE 'Converted % ballots', converted;
+        COMMIT;
+        EXIT WHEN converted < 5000;
+    END LOOP;
+END $$;
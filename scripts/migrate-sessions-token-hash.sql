@@ -0,0 +1,35 @@
+-- Migration: Key sessions by refresh token hash
+-- Description: Replaces the full JWT strings in sessions (access_token,
+--              refresh_token, and the long-text index on access_token) with
+--              a 32-byte SHA-256 digest of the refresh token, and adds the
+--              session end time used by the expiry sweeper.
+-- Usage: psql -U postgres -d evoting_db -f scripts/migrate-sessions-token-hash.sql
+
+BEGIN;
+
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS refresh_token_hash BYTEA;
+ALTER TABLE sessions ADD COLUMN IF NOT EXISTS refresh_expires_at TIMESTAMP;
+
+-- Same digest the auth service computes: SHA-256 of the token's UTF-8 bytes
+UPDATE sessions
+SET refresh_token_hash = sha256(convert_to(refresh_token, 'UTF8')),
+    -- The refresh token's own exp is not stored; assume it was (re)issued with the latest access token
+    refresh_expires_at = GREATEST(expires_at, created_at) + INTERVAL '7 days'
+WHERE refresh_token_hash IS NULL;
+
+ALTER TABLE sessions ALTER COLUMN refresh_token_hash SET NOT NULL;
+ALTER TABLE sessions ALTER COLUMN refresh_expires_at SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_sessions_access_token;
+DROP INDEX IF EXISTS idx_sessions_expires_at;
+ALTER TABLE sessions DROP COLUMN IF EXISTS access_token;
+ALTER TABLE sessions DROP COLUMN IF EXISTS refresh_token;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_refresh_token_hash ON sessions(refresh_token_hash);
+CREATE INDEX IF NOT EXISTS idx_sessions_refresh_expires_at ON sessions(refresh_expires_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_revoked ON sessions(expires_at) WHERE revoked_at IS NOT NULL;
+
+COMMIT;
+
+-- The dropped columns leave dead space behind; reclaim it once, off-peak:
+-- VACUUM FULL sessions;